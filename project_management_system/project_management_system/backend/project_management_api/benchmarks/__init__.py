@@ -0,0 +1,6 @@
+"""
+حزمة قياس أداء واجهة برمجة التطبيقات (API)
+
+التشغيل من مجلد project_management_api:
+    python -m benchmarks.run --help
+"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+مقارنة وضع Flask المتزامن بوضع ASGI: الاتصالات المتزامنة، الإنتاجية والكمون
+
+    python -m benchmarks.async_capacity --connections 32,256,1024 --threads 16
+
+يشغّل كل خادم في عملية منفصلة على نفس قاعدة البيانات:
+- sync: تطبيق Flask على werkzeug بمجمّع ثابت من --threads خيطاً (مثل gunicorn --threads)،
+  كل اتصال keep-alive يحجز خيطاً طوال عمره.
+- async: src.asgi على uvicorn (يتطلب uvicorn وaiosqlite).
+
+العميل حلقة asyncio تفتح N اتصالاً دائماً، كل منها يرسل طلبات متتالية لمدة --seconds:
+قائمة مهام مشروع، ومع نسبة --login-ratio تسجيل دخول (bcrypt).
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import BENCH_PASSWORD, build_app, close_app, percentile, seed_dataset
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _serve_sync(database_uri, port, threads):
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class _QuietHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class _PooledServer(BaseWSGIServer):
+        """عدد ثابت من خيوط العمال؛ الاتصالات الزائدة تنتظر في الطابور"""
+        request_queue_size = 4096
+        multithread = True  # werkzeug يغلق الاتصال بعد كل طلب بدونها
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    app = build_app(database_uri)
+    _PooledServer('127.0.0.1', port, app, handler=_QuietHandler).serve_forever()
+
+
+def _serve_async(database_uri, port):
+    import uvicorn
+
+    from src.aio.app import AsyncApp
+    from src.aio.routes import router
+
+    app = AsyncApp(build_app(database_uri), router)
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+
+def _wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'الخادم لم يبدأ على المنفذ {port}')
+
+
+async def _request(reader, writer, method, path, token=None, body=None):
+    lines = [f'{method} {path} HTTP/1.1', 'Host: 127.0.0.1']
+    payload = b''
+    if token:
+        lines.append(f'Authorization: Bearer {token}')
+    if body is not None:
+        payload = json.dumps(body).encode()
+        lines.append('Content-Type: application/json')
+    lines.append(f'Content-Length: {len(payload)}')
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length, keep_alive = 0, True
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        name = name.strip().lower()
+        if name == b'content-length':
+            length = int(value)
+        elif name == b'connection':
+            keep_alive = value.strip().lower() != b'close'
+    await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _connection(port, operations, deadline, samples, timeout, rng):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        label, method, path, token, body = operations(rng)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            status, keep_alive = await asyncio.wait_for(_request(reader, writer, method, path, token, body), timeout)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            status = 0
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+        samples.append((label, time.perf_counter() - started, status))
+    if writer is not None:
+        writer.close()
+
+
+async def _drive(port, operations, connections, seconds, timeout):
+    samples = []
+    deadline = time.monotonic() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _connection(port, operations, deadline, samples, timeout, random.Random(i))
+        for i in range(connections)
+    ))
+    return samples, time.perf_counter() - started
+
+
+def _report(mode, connections, samples, wall):
+    print(f'{mode:<6} {connections:>6} اتصال: {len(samples) / wall:>8.1f} طلب/ث، '
+          f'أخطاء/مهلة {sum(1 for s in samples if s[2] == 0 or s[2] >= 500):,}')
+    for label in sorted({s[0] for s in samples}):
+        values = sorted(s[1] * 1000 for s in samples if s[0] == label and 0 < s[2] < 500)
+        print(f'         {label:<6} {len(values):>7,} ناجح  p50={percentile(values, 50):>8.1f}ms '
+              f'p99={percentile(values, 99):>8.1f}ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='مقارنة سعة الاتصالات بين وضع Flask ووضع ASGI')
+    parser.add_argument('--connections', default='32,256,1024', help='مستويات الاتصالات المتزامنة')
+    parser.add_argument('--threads', type=int, default=16, help='خيوط خادم الوضع المتزامن')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--login-ratio', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=30, help='مهلة الطلب الواحد بالثواني')
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pm-async-') as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = build_app(database_uri)
+        dataset = seed_dataset(app, users=200, projects=50, tasks_per_project=40, notifications_per_user=10)
+        close_app(app)
+        usernames = [username for _, username in dataset.users]
+
+        def operations(rng):
+            if rng.random() < args.login_ratio:
+                return 'login', 'POST', '/api/auth/login', None, {
+                    'username': rng.choice(usernames), 'password': BENCH_PASSWORD,
+                }
+            project_id = rng.choice(dataset.projects)
+            token = dataset.tokens[dataset.owners[project_id]]
+            return 'tasks', 'GET', f'/api/projects/{project_id}/tasks', token, None
+
+        context = multiprocessing.get_context('spawn')
+        for mode in args.modes.split(','):
+            port = _free_port()
+            if mode == 'sync':
+                server = context.Process(target=_serve_sync, args=(database_uri, port, args.threads), daemon=True)
+            else:
+                server = context.Process(target=_serve_async, args=(database_uri, port), daemon=True)
+            server.start()
+            try:
+                _wait_ready(port)
+                for connections in (int(c) for c in args.connections.split(',')):
+                    samples, wall = asyncio.run(_drive(port, operations, connections, args.seconds, args.timeout))
+                    _report(mode, connections, samples, wall)
+            finally:
+                server.terminate()
+                server.join()
+
+
+if __name__ == '__main__':
+    main()
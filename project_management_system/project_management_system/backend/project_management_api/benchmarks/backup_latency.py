@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+قياس كمون الكتابة أثناء النسخ الاحتياطي لقاعدة بيانات كبيرة
+
+    python -m benchmarks.backup_latency --size-mb 4096
+
+يملأ قاعدة بيانات حتى الحجم المطلوب، ثم يشغّل عمال كتابة (تحديث مهمة والتزام
+لكل عملية) ويقيس p50/p99 للكمون مرتين: بدون نسخ احتياطي، وأثناء أخذ لقطة
+كاملة ثم لقطة تزايدية.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import update
+
+from benchmarks.harness import build_app, close_app, percentile, seed_dataset
+from src.backup import SnapshotStore
+from src.models.user import db
+from src.models.task import Task
+
+
+def _fill(app, dataset, path, size_mb, rng):
+    today = date.today()
+    now = datetime.utcnow()
+    user_ids = [u[0] for u in dataset.users]
+    filler = 'وصف ' * 400
+    task_ids = []
+    with app.app_context():
+        table = Task.__table__
+        while os.path.getsize(path) < size_mb * 1024 * 1024:
+            rows = []
+            for _ in range(20000):
+                start = today + timedelta(days=rng.randint(-300, 300))
+                task_id = str(uuid.uuid4())
+                rows.append({
+                    'id': task_id, 'project_id': rng.choice(dataset.projects), 'parent_task_id': None,
+                    'name': 'مهمة', 'description': filler, 'start_date': start,
+                    'end_date': start + timedelta(days=rng.randint(1, 30)),
+                    'assigned_to': rng.choice(user_ids), 'status': 'in_progress',
+                    'created_at': now, 'updated_at': now,
+                })
+                if rng.random() < 0.01:
+                    task_ids.append(task_id)
+            db.session.execute(table.insert(), rows)
+            db.session.commit()
+    return task_ids
+
+
+def _writer(app, task_ids, stop, samples, seed):
+    rng = random.Random(seed)
+    with app.app_context():
+        while not stop.is_set():
+            started = time.perf_counter()
+            db.session.execute(
+                update(Task).where(Task.id == rng.choice(task_ids))
+                .values(status=rng.choice(['in_progress', 'on_hold']), updated_at=datetime.utcnow())
+            )
+            db.session.commit()
+            samples.append((time.monotonic(), time.perf_counter() - started))
+
+
+def _snapshot(directory, path, incremental, pages, sleep):
+    # في عملية منفصلة كما يعمل أمر backup create من cron، فلا يتقاسم GIL مع العمال
+    return SnapshotStore(directory, 'bench').create(path, incremental=incremental, pages=pages, sleep=sleep)
+
+
+def _report(label, latencies):
+    values = sorted(v * 1000 for v in latencies)
+    print(f'{label}: {len(values):,} كتابة، p50={percentile(values, 50):.2f}ms '
+          f'p99={percentile(values, 99):.2f}ms max={values[-1] if values else 0:.2f}ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس كمون الكتابة أثناء النسخ الاحتياطي')
+    parser.add_argument('--size-mb', type=int, default=1024, help='حجم قاعدة البيانات')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10, help='مدة قياس خط الأساس')
+    parser.add_argument('--step-pages', type=int, default=256)
+    parser.add_argument('--step-sleep', type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory(prefix='pm-backup-') as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        app = build_app(f'sqlite:///{path}')
+        dataset = seed_dataset(app, users=100, projects=20, tasks_per_project=0, notifications_per_user=0)
+
+        started = time.perf_counter()
+        task_ids = _fill(app, dataset, path, args.size_mb, rng)
+        print(f'تعبئة {os.path.getsize(path) / 1024 / 1024:,.0f}MB: {time.perf_counter() - started:.1f}s')
+
+        stop = threading.Event()
+        samples = []
+        threads = [threading.Thread(target=_writer, args=(app, task_ids, stop, samples, i))
+                   for i in range(args.writers)]
+        for thread in threads:
+            thread.start()
+
+        baseline_start = time.monotonic()
+        time.sleep(args.seconds)
+        baseline_end = time.monotonic()
+
+        phases = []
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            for incremental in (False, True):
+                phase_start = time.monotonic()
+                manifest = executor.submit(_snapshot, os.path.join(tmp, 'backups'), path, incremental,
+                                           args.step_pages, args.step_sleep).result()
+                phases.append((manifest, phase_start, time.monotonic()))
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        close_app(app)
+
+        _report('بدون نسخ احتياطي', [s for t, s in samples if baseline_start <= t < baseline_end])
+        for manifest, phase_start, phase_end in phases:
+            seconds = phase_end - phase_start
+            print(f"لقطة {manifest['kind']}: {seconds:.1f}s، {manifest['changed_pages']:,} صفحة، "
+                  f"{manifest['bytes'] / 1024 / 1024:,.1f}MB مضغوطة")
+            _report('  الكتابة أثناءها', [s for t, s in samples if phase_start <= t < phase_end])
+
+
+if __name__ == '__main__':
+    main()
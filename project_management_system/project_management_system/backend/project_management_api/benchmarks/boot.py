@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+قياس زمن إقلاع العامل: كل تكرار يشغّل عملية Python جديدة (كما يفعل gunicorn عند
+إنشاء عامل) تستورد التطبيق وتنشئه وتخدم أول طلب.
+
+    python -m benchmarks.boot -n 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+from src.main import create_app
+app = create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "AUTO_MIGRATE": sys.argv[2] == "1"})
+created = time.perf_counter()
+app.test_client().get("/api/projects")
+first = time.perf_counter()
+print(json.dumps({
+    "create_app_ms": app.extensions["boot_time_ms"],
+    "import_and_create_ms": (created - started) * 1000,
+    "first_request_ms": (first - created) * 1000,
+}))
+'''
+
+
+def measure(database_uri, auto_migrate, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _CHILD, database_uri, '1' if auto_migrate else '0'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {}
+    for key in samples[0]:
+        values = sorted(s[key] for s in samples)
+        report[key] = {'p50': round(percentile(values, 50), 2), 'p95': round(percentile(values, 95), 2)}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس زمن إقلاع العامل')
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pm-boot-') as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'boot.db')}"
+        # تجهيز المخطط مرة واحدة كما يحدث عند النشر
+        from benchmarks.harness import build_app, close_app
+        close_app(build_app(database_uri))
+
+        for label, auto_migrate in (('fast path', False), ('AUTO_MIGRATE', True)):
+            report = measure(database_uri, auto_migrate, args.runs)
+            print(f'== {label} ({args.runs} runs) ==')
+            for key, stats in report.items():
+                print(f"  {key:<22} p50={stats['p50']:>8}ms  p95={stats['p95']:>8}ms")
+
+
+if __name__ == '__main__':
+    main()
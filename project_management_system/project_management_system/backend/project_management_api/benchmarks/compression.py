@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+قياس ضغط الاستجابات: البايتات الموفرة مقابل زمن المعالج لكل طلب على قائمة مهام كبيرة
+
+    python -m benchmarks.compression --tasks 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import build_app, close_app, percentile, seed_dataset
+from src.compression import available_encodings, compress_bytes
+
+
+def cpu_per_call(fn, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس ضغط استجابات JSON')
+    parser.add_argument('--tasks', type=int, default=5000, help='عدد مهام المشروع الكبير')
+    parser.add_argument('--repeat', type=int, default=20, help='عدد التكرارات لكل قياس')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pm-compress-') as tmp:
+        app = build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        dataset = seed_dataset(app, users=20, projects=1, tasks_per_project=10,
+                               large_project_tasks=args.tasks, notifications_per_user=0)
+        token = dataset.tokens[dataset.owners[dataset.large_project_id]]
+        path = f'/api/projects/{dataset.large_project_id}/tasks'
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        raw = client.get(path, headers=headers).get_data()
+        print(f'{path}\n  حجم JSON بدون ضغط: {len(raw):,} بايت ({args.tasks} مهمة)\n')
+
+        print(f"  {'encoding':<8} {'level':>5} {'bytes':>12} {'ratio':>7} {'saved':>12} {'cpu ms/req':>11}")
+        for encoding in available_encodings():
+            levels = {'gzip': (1, 6, 9), 'br': (1, 4, 8), 'zstd': (1, 3, 9)}[encoding]
+            for level in levels:
+                compressed = compress_bytes(raw, encoding, level)
+                cpu_ms = cpu_per_call(lambda: compress_bytes(raw, encoding, level), args.repeat)
+                print(f'  {encoding:<8} {level:>5} {len(compressed):>12,} {len(raw) / len(compressed):>6.1f}x '
+                      f'{len(raw) - len(compressed):>12,} {cpu_ms:>11.2f}')
+
+        # زمن الطلب الكامل عبر التطبيق (مع الإعدادات الحالية) مقارنة بدون ضغط
+        print()
+        for label, accept in [('identity', 'identity')] + [(e, e) for e in available_encodings()]:
+            latencies, size = [], 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(path, headers={**headers, 'Accept-Encoding': accept})
+                size = len(response.get_data())
+                latencies.append((time.perf_counter() - started) * 1000.0)
+            latencies.sort()
+            print(f'  طلب كامل {label:<8} bytes={size:>10,}  p50={percentile(latencies, 50):.1f}ms  '
+                  f'p95={percentile(latencies, 95):.1f}ms')
+        close_app(app)
+
+
+if __name__ == '__main__':
+    main()
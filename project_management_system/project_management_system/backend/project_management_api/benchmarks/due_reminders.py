@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+قياس مسح المواعيد النهائية على عدد كبير من المهام المفتوحة
+
+    python -m benchmarks.due_reminders --tasks 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import build_app, close_app, seed_dataset
+from src.models.user import db
+from src.models.task import Task
+from src.services.reminders import run_due_reminders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس مسح المواعيد النهائية')
+    parser.add_argument('--tasks', type=int, default=1000000, help='عدد المهام المفتوحة')
+    parser.add_argument('--window', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory(prefix='pm-due-') as tmp:
+        app = build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        dataset = seed_dataset(app, users=200, projects=10, tasks_per_project=0, notifications_per_user=0)
+        today = date.today()
+        now = datetime.utcnow()
+        user_ids = [u[0] for u in dataset.users]
+
+        with app.app_context():
+            started = time.perf_counter()
+            table = Task.__table__
+            chunk = 50000
+            for offset in range(0, args.tasks, chunk):
+                rows = []
+                for _ in range(min(chunk, args.tasks - offset)):
+                    start = today + timedelta(days=rng.randint(-30, 330))
+                    rows.append({
+                        'id': str(uuid.uuid4()), 'project_id': rng.choice(dataset.projects),
+                        'parent_task_id': None, 'name': 'مهمة', 'description': '',
+                        'start_date': start, 'end_date': start + timedelta(days=rng.randint(1, 30)),
+                        'assigned_to': rng.choice(user_ids), 'status': rng.choice(['not_started', 'in_progress']),
+                        'created_at': now, 'updated_at': now,
+                    })
+                db.session.execute(table.insert(), rows)
+                db.session.commit()
+            print(f'تعبئة {args.tasks:,} مهمة: {time.perf_counter() - started:.1f}s')
+
+            for label in ('المسح الأول', 'المسح الثاني (بعد إزالة التكرار)'):
+                started = time.perf_counter()
+                created = run_due_reminders(window_days=args.window)
+                print(f'{label}: {created:,} إشعار خلال {time.perf_counter() - started:.2f}s')
+        close_app(app)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""
+أدوات مشتركة لقياس الأداء: بناء التطبيق على قاعدة بيانات مؤقتة، تعبئة البيانات،
+تشغيل الحمل بالتوازي، حساب النسب المئوية للكمون ومقارنة النتائج بخط الأساس
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import bcrypt
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from src.models.user import User, db
+from src.models.project import Project, ProjectMember
+from src.models.task import Task, Dependency
+from src.models.notification import Notification
+
+BENCH_PASSWORD = 'bench-password'
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def build_app(database_uri, **overrides):
+    """بناء نسخة من التطبيق عبر create_app على قاعدة بيانات منفصلة وتطبيق الترحيلات عليها
+
+    تحديد المعدل معطل افتراضياً حتى يقيس السيناريو التطبيق نفسه؛ يمكن تفعيله عبر overrides.
+    """
+    from src.main import create_app
+    from src.migrations import upgrade
+
+    app = create_app({
+        'SECRET_KEY': 'bench-secret',
+        'JWT_SECRET_KEY': 'bench-jwt-secret',
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'RATELIMIT_ENABLED': False,
+        **overrides,
+    })
+    with app.app_context():
+        upgrade(db.engine)
+
+    return app
+
+
+def close_app(app):
+    """إيقاف خيوط التطبيق الخلفية وإغلاق اتصالاته قبل حذف قاعدة البيانات المؤقتة"""
+    from src.main import shutdown
+
+    shutdown(app)
+
+
+@dataclass
+class Dataset:
+    """معرفات البيانات التي تمت تعبئتها لاستخدامها في السيناريوهات"""
+    users: list = field(default_factory=list)          # [(id, username)]
+    tokens: dict = field(default_factory=dict)         # user_id -> token
+    projects: list = field(default_factory=list)       # [project_id]
+    tasks: dict = field(default_factory=dict)          # project_id -> [task_id]
+    owners: dict = field(default_factory=dict)         # project_id -> owner_id
+    large_project_id: str = None
+    notifications: dict = field(default_factory=dict)  # user_id -> [notification_id]
+
+
+def seed_dataset(app, users=50, projects=20, tasks_per_project=50, large_project_tasks=0,
+                 notifications_per_user=20, seed=42):
+    """تعبئة قاعدة البيانات بعمليات إدراج جماعية بدلاً من استدعاء الواجهة لكل سجل"""
+    rng = random.Random(seed)
+    dataset = Dataset()
+    # كلمة مرور واحدة مشفرة لجميع المستخدمين حتى لا تستغرق التعبئة وقتاً طويلاً
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    now = datetime.utcnow()
+    today = date.today()
+
+    with app.app_context():
+        user_rows = []
+        for i in range(users):
+            user_id = str(uuid.uuid4())
+            username = f'bench_user_{i}'
+            user_rows.append({
+                'id': user_id, 'username': username, 'email': f'{username}@bench.local',
+                'username_normalized': username, 'email_normalized': f'{username}@bench.local',
+                'password_hash': password_hash, 'created_at': now, 'updated_at': now,
+            })
+            dataset.users.append((user_id, username))
+        db.session.execute(insert(User), user_rows)
+
+        project_rows, member_rows, task_rows, dependency_rows = [], [], [], []
+        project_sizes = [tasks_per_project] * projects
+        if large_project_tasks:
+            project_sizes.append(large_project_tasks)
+
+        for index, size in enumerate(project_sizes):
+            project_id = str(uuid.uuid4())
+            owner_id = dataset.users[index % users][0]
+            project_rows.append({
+                'id': project_id, 'name': f'مشروع قياس {index}', 'description': 'بيانات قياس الأداء',
+                'start_date': today, 'end_date': today + timedelta(days=365), 'owner_id': owner_id,
+                'created_at': now, 'updated_at': now,
+            })
+            dataset.projects.append(project_id)
+            dataset.owners[project_id] = owner_id
+
+            member_ids = {u[0] for u in rng.sample(dataset.users, min(5, users))} - {owner_id}
+            for member_id in member_ids:
+                member_rows.append({'project_id': project_id, 'user_id': member_id,
+                                    'role': 'member', 'joined_at': now})
+
+            task_ids = []
+            for t in range(size):
+                task_id = str(uuid.uuid4())
+                start = today + timedelta(days=rng.randint(0, 300))
+                task_rows.append({
+                    'id': task_id, 'project_id': project_id,
+                    'parent_task_id': task_ids[rng.randrange(len(task_ids))] if task_ids and rng.random() < 0.3 else None,
+                    'name': f'مهمة {t}', 'description': 'وصف المهمة',
+                    'start_date': start, 'end_date': start + timedelta(days=rng.randint(1, 30)),
+                    'assigned_to': rng.choice(dataset.users)[0] if rng.random() < 0.8 else None,
+                    'status': rng.choice(['not_started', 'in_progress', 'completed', 'on_hold']),
+                    'created_at': now, 'updated_at': now,
+                })
+                if task_ids and rng.random() < 0.2:
+                    dependency_rows.append({
+                        'id': str(uuid.uuid4()), 'predecessor_task_id': task_ids[-1],
+                        'successor_task_id': task_id, 'type': 'finish_to_start',
+                    })
+                task_ids.append(task_id)
+            dataset.tasks[project_id] = task_ids
+
+        if large_project_tasks:
+            dataset.large_project_id = dataset.projects[-1]
+
+        db.session.execute(insert(Project), project_rows)
+        if member_rows:
+            db.session.execute(insert(ProjectMember), member_rows)
+        if task_rows:
+            db.session.execute(insert(Task), task_rows)
+        if dependency_rows:
+            db.session.execute(insert(Dependency), dependency_rows)
+
+        notification_rows = []
+        for user_id, _ in dataset.users:
+            ids = []
+            for n in range(notifications_per_user):
+                notification_id = str(uuid.uuid4())
+                ids.append(notification_id)
+                notification_rows.append({
+                    'id': notification_id, 'user_id': user_id, 'message': f'إشعار قياس {n}',
+                    'type': 'task_updated', 'is_read': False,
+                    'created_at': now - timedelta(minutes=n), 'related_entity_id': None,
+                })
+            dataset.notifications[user_id] = ids
+        if notification_rows:
+            db.session.execute(insert(Notification), notification_rows)
+
+        db.session.commit()
+
+        for user_id, _ in dataset.users:
+            dataset.tokens[user_id] = create_access_token(identity=user_id)
+
+    return dataset
+
+
+class TestClientDriver:
+    """تنفيذ الطلبات عبر عميل الاختبار الخاص بـ Flask (بدون شبكة)"""
+
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, json_body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, json=json_body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HttpDriver:
+    """تنفيذ الطلبات عبر خادم HTTP محلي حقيقي (werkzeug) في خيط منفصل"""
+
+    def __init__(self, app, host='127.0.0.1'):
+        import http.client
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class _QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self._http = http.client
+        self._server = make_server(host, 0, app, threaded=True, request_handler=_QuietHandler)
+        self._host, self._port = host, self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, json_body=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._http.HTTPConnection(self._host, self._port, timeout=60)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (self._http.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status
+
+    def close(self):
+        self._server.shutdown()
+
+
+def percentile(sorted_values, pct):
+    """حساب النسبة المئوية بطريقة أقرب رتبة على قائمة مرتبة"""
+    if not sorted_values:
+        return 0.0
+    # round() في بايثون يقرّب 95.5 إلى 96 و50.5 إلى 50، فالرتبة بـ ceil
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, wall_seconds):
+    """تلخيص العينات [(label, seconds, status)] إلى إنتاجية ونسب مئوية للكمون"""
+    def _stats(items):
+        latencies = sorted(s[1] * 1000.0 for s in items)
+        errors = sum(1 for s in items if s[2] >= 500 or s[2] == 0)
+        return {
+            'requests': len(items),
+            'errors': errors,
+            'rejected': sum(1 for s in items if s[2] == 429),
+            'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+    result = _stats(samples)
+    result['duration_s'] = round(wall_seconds, 3)
+    result['throughput_rps'] = round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0
+
+    endpoints = {}
+    for sample in samples:
+        endpoints.setdefault(sample[0], []).append(sample)
+    result['endpoints'] = {label: _stats(items) for label, items in sorted(endpoints.items())}
+    return result
+
+
+def run_load(driver, operations, total_requests, concurrency):
+    """تشغيل total_requests عملية بالتوازي؛ كل عملية تعيد (label, method, path, token, body)"""
+    samples = []
+    lock = threading.Lock()
+
+    def _worker(index):
+        label, method, path, token, body = operations(index)
+        started = time.perf_counter()
+        try:
+            status = driver.request(method, path, token=token, json_body=body)
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.append((label, elapsed, status))
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_worker, range(total_requests)))
+    wall = time.perf_counter() - wall_started
+
+    return summarize(samples, wall)
+
+
+def baseline_path(scenario, directory=None):
+    return os.path.join(directory or BASELINE_DIR, f'{scenario}.json')
+
+
+def save_baseline(scenario, result, directory=None):
+    """حفظ نتيجة السيناريو كخط أساس بصيغة JSON"""
+    path = baseline_path(scenario, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'scenario': scenario, 'recorded_at': datetime.utcnow().isoformat(),
+                   'result': result}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_baseline(scenario, directory=None):
+    path = baseline_path(scenario, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['result']
+
+
+def compare_to_baseline(result, baseline, threshold):
+    """إرجاع قائمة بالتراجعات التي تتجاوز العتبة النسبية (مثلاً 0.2 = 20%)"""
+    regressions = []
+    for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+        old, new = baseline.get(metric, 0.0), result.get(metric, 0.0)
+        if old > 0 and new > old * (1 + threshold):
+            regressions.append(f'{metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100:.1f}%)')
+
+    old, new = baseline.get('throughput_rps', 0.0), result.get('throughput_rps', 0.0)
+    if old > 0 and new < old * (1 - threshold):
+        regressions.append(f'throughput_rps: {old:.2f} -> {new:.2f} (-{(1 - new / old) * 100:.1f}%)')
+
+    if result.get('errors', 0) > baseline.get('errors', 0):
+        regressions.append(f"errors: {baseline.get('errors', 0)} -> {result['errors']}")
+
+    return regressions
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+قياس الاستيراد بالتدفق: يولّد ملف CSV كبيراً (بدون تحميله في الذاكرة) ثم يستورده
+
+    python -m benchmarks.import_tasks --rows 200000
+"""
+
+import argparse
+import csv
+import os
+import random
+import resource
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import build_app, close_app, seed_dataset
+from src.services.importer import import_tasks, open_stream
+
+
+def write_csv(path, rows, usernames, seed=1):
+    """خطة هرمية: كل 20 صفاً مهمة أم، وكل مهمة تعتمد على سابقتها بنسبة 50%"""
+    rng = random.Random(seed)
+    start = date.today()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'description', 'start_date', 'end_date', 'parent_id',
+                         'predecessors', 'assigned_to', 'status'])
+        for i in range(1, rows + 1):
+            task_start = start + timedelta(days=rng.randint(0, 700))
+            parent = '' if i % 20 == 1 else str(i - (i - 1) % 20)
+            predecessors = f'{i - 1}:{rng.choice(["FS", "SS", "FF"])}' if i > 1 and rng.random() < 0.5 else ''
+            writer.writerow([i, f'مهمة مستوردة {i}', '', task_start.isoformat(),
+                             (task_start + timedelta(days=rng.randint(1, 20))).isoformat(),
+                             parent, predecessors, rng.choice(usernames), 'not_started'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس استيراد المهام')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pm-import-') as tmp:
+        app = build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        dataset = seed_dataset(app, users=50, projects=1, tasks_per_project=0, notifications_per_user=0)
+        path = os.path.join(tmp, 'plan.csv')
+        write_csv(path, args.rows, [username for _, username in dataset.users])
+        print(f'الملف: {os.path.getsize(path) / 1e6:.1f}MB، {args.rows:,} صف')
+
+        def report(event):
+            if event['stage'] != 'parse' or event['done'] % 50000 == 0:
+                print(f"  {event['stage']}: {event['done']:,}")
+
+        with app.app_context(), open(path, 'rb') as binary:
+            summary = import_tasks(dataset.projects[0], open_stream(binary, 'csv'), 'csv',
+                                   batch_size=args.batch_size, progress=report)
+        close_app(app)
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"مهام: {summary['tasks']:,}  تبعيات: {summary['dependencies']:,}  "
+              f"تخطي: {summary['skipped']}  المدة: {summary['duration_s']}s  ذروة الذاكرة: {peak_mb:.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+مشغل قياس أداء الواجهة البرمجية
+
+أمثلة:
+    python -m benchmarks.run                          # جميع السيناريوهات ومقارنتها بخط الأساس
+    python -m benchmarks.run -s login_storm --http    # عبر خادم HTTP محلي حقيقي
+    python -m benchmarks.run --save-baseline          # تسجيل النتائج الحالية كخط أساس
+    python -m benchmarks.run --threshold 0.15         # اعتبار أي تراجع أكبر من 15% فشلاً
+    python -m benchmarks.run -s noisy_neighbour       # عميل مسيء مع تفعيل تحديد المعدل
+
+يعيد رمز خروج 1 عند اكتشاف تراجع عن خط الأساس.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import (
+    HttpDriver, TestClientDriver, build_app, close_app, compare_to_baseline, load_baseline,
+    run_load, save_baseline, seed_dataset,
+)
+from benchmarks.scenarios import SCENARIOS, build_operations
+
+
+def run_scenario(scenario, args):
+    with tempfile.TemporaryDirectory(prefix='pm-bench-') as tmp:
+        overrides = {'RATELIMIT_ENABLED': True} if args.ratelimit or scenario.ratelimit else {}
+        app = build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}", **overrides)
+        dataset = seed_dataset(app, **scenario.seed)
+        driver = HttpDriver(app) if args.http else TestClientDriver(app)
+        try:
+            operations = build_operations(scenario, dataset)
+            # تسخين قصير حتى لا تدخل تكلفة أول اتصال وأول استعلام في النتائج
+            run_load(driver, operations, min(20, scenario.requests), 1)
+            return run_load(driver, operations,
+                            args.requests or scenario.requests,
+                            args.concurrency or scenario.concurrency)
+        finally:
+            driver.close()
+            close_app(app)
+
+
+def print_result(name, result):
+    print(f"\n== {name} ==")
+    print(f"  الطلبات: {result['requests']}  الأخطاء: {result['errors']}  "
+          f"المدة: {result['duration_s']}s  الإنتاجية: {result['throughput_rps']} req/s")
+    print(f"  p50={result['p50_ms']}ms  p95={result['p95_ms']}ms  "
+          f"p99={result['p99_ms']}ms  max={result['max_ms']}ms")
+    for label, stats in result['endpoints'].items():
+        print(f"    {label:<34} n={stats['requests']:<6} p50={stats['p50_ms']:<9} "
+              f"p95={stats['p95_ms']:<9} p99={stats['p99_ms']:<9} err={stats['errors']} 429={stats['rejected']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس أداء واجهة إدارة المشاريع')
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='السيناريو المطلوب (يمكن تكراره). الافتراضي: الكل')
+    parser.add_argument('-n', '--requests', type=int, help='تجاوز عدد الطلبات لكل سيناريو')
+    parser.add_argument('-c', '--concurrency', type=int, help='تجاوز درجة التوازي')
+    parser.add_argument('--http', action='store_true', help='استخدام خادم HTTP محلي بدلاً من عميل الاختبار')
+    parser.add_argument('--ratelimit', action='store_true', help='تفعيل تحديد المعدل أثناء القياس')
+    parser.add_argument('--threshold', type=float, default=0.2, help='عتبة التراجع النسبية (افتراضي 0.2)')
+    parser.add_argument('--baseline-dir', help='مجلد ملفات خط الأساس')
+    parser.add_argument('--save-baseline', action='store_true', help='حفظ النتائج كخط أساس جديد')
+    parser.add_argument('--json', dest='json_out', help='كتابة جميع النتائج إلى ملف JSON')
+    args = parser.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    results, failed = {}, False
+
+    for name in names:
+        result = run_scenario(SCENARIOS[name], args)
+        results[name] = result
+        print_result(name, result)
+
+        if args.save_baseline:
+            print(f"  تم حفظ خط الأساس: {save_baseline(name, result, args.baseline_dir)}")
+            continue
+
+        baseline = load_baseline(name, args.baseline_dir)
+        if baseline is None:
+            print('  لا يوجد خط أساس لهذا السيناريو')
+            continue
+        regressions = compare_to_baseline(result, baseline, args.threshold)
+        if regressions:
+            failed = True
+            print('  تراجع في الأداء:')
+            for line in regressions:
+                print(f'    - {line}')
+        else:
+            print('  ضمن حدود خط الأساس')
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+سيناريوهات قياس الأداء
+
+كل سيناريو يحدد حجم البيانات المطلوبة وعدد الطلبات ودرجة التوازي، ودالة تبني
+العملية رقم i على شكل (label, method, path, token, body).
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from benchmarks.harness import BENCH_PASSWORD
+
+STATUSES = ['not_started', 'in_progress', 'completed', 'on_hold']
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    build: object
+    requests: int = 500
+    concurrency: int = 8
+    seed: dict = field(default_factory=dict)
+    ratelimit: bool = False
+
+
+def _owner_token(dataset, project_id):
+    return dataset.tokens[dataset.owners[project_id]]
+
+
+def login_storm(dataset, rng):
+    """عاصفة تسجيل دخول: عدد كبير من طلبات /auth/login المتزامنة (مقيدة بـ bcrypt)"""
+    def operation(index):
+        _, username = rng.choice(dataset.users)
+        password = BENCH_PASSWORD if rng.random() < 0.9 else 'wrong-password'
+        return ('POST /auth/login', 'POST', '/api/auth/login', None,
+                {'username': username, 'password': password})
+    return operation
+
+
+def large_project_listing(dataset, rng):
+    """قراءة متكررة لقائمة مهام مشروع كبير"""
+    project_id = dataset.large_project_id
+    token = _owner_token(dataset, project_id)
+
+    def operation(index):
+        return ('GET /projects/<id>/tasks', 'GET', f'/api/projects/{project_id}/tasks', token, None)
+    return operation
+
+
+def concurrent_task_updates(dataset, rng):
+    """تحديثات متزامنة على مجموعة صغيرة من المهام لإظهار التنافس على قفل الكتابة"""
+    project_id = dataset.projects[0]
+    token = _owner_token(dataset, project_id)
+    hot_tasks = dataset.tasks[project_id][:20]
+
+    def operation(index):
+        task_id = rng.choice(hot_tasks)
+        return ('PUT /tasks/<id>', 'PUT', f'/api/tasks/{task_id}', token,
+                {'status': rng.choice(STATUSES), 'description': f'تحديث {index}'})
+    return operation
+
+
+def mixed_workload(dataset, rng):
+    """مزيج من القراءة والكتابة على المشاريع والمهام والتبعيات والتعليقات والإشعارات"""
+    today = date.today()
+
+    def _pick_project():
+        project_id = rng.choice(dataset.projects)
+        return project_id, _owner_token(dataset, project_id)
+
+    def get_projects():
+        _, token = _pick_project()
+        return ('GET /projects', 'GET', '/api/projects', token, None)
+
+    def get_project():
+        project_id, token = _pick_project()
+        return ('GET /projects/<id>', 'GET', f'/api/projects/{project_id}', token, None)
+
+    def get_tasks():
+        project_id, token = _pick_project()
+        return ('GET /projects/<id>/tasks', 'GET', f'/api/projects/{project_id}/tasks', token, None)
+
+    def get_task():
+        project_id, token = _pick_project()
+        task_id = rng.choice(dataset.tasks[project_id])
+        return ('GET /tasks/<id>', 'GET', f'/api/tasks/{task_id}', token, None)
+
+    def create_task():
+        project_id, token = _pick_project()
+        start = today + timedelta(days=rng.randint(0, 200))
+        return ('POST /projects/<id>/tasks', 'POST', f'/api/projects/{project_id}/tasks', token, {
+            'name': 'مهمة جديدة', 'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=5)).isoformat(),
+        })
+
+    def update_task():
+        project_id, token = _pick_project()
+        task_id = rng.choice(dataset.tasks[project_id])
+        return ('PUT /tasks/<id>', 'PUT', f'/api/tasks/{task_id}', token, {'status': rng.choice(STATUSES)})
+
+    def add_dependency():
+        project_id, token = _pick_project()
+        predecessor, successor = rng.sample(dataset.tasks[project_id], 2)
+        return ('POST /tasks/<id>/dependencies', 'POST', f'/api/tasks/{successor}/dependencies', token,
+                {'predecessor_task_id': predecessor, 'type': 'finish_to_start'})
+
+    def get_comments():
+        project_id, token = _pick_project()
+        task_id = rng.choice(dataset.tasks[project_id])
+        return ('GET /tasks/<id>/comments', 'GET', f'/api/tasks/{task_id}/comments', token, None)
+
+    def add_comment():
+        project_id, token = _pick_project()
+        task_id = rng.choice(dataset.tasks[project_id])
+        return ('POST /tasks/<id>/comments', 'POST', f'/api/tasks/{task_id}/comments', token,
+                {'content': 'تعليق قياس'})
+
+    def get_notifications():
+        user_id, _ = rng.choice(dataset.users)
+        return ('GET /notifications', 'GET', '/api/notifications', dataset.tokens[user_id], None)
+
+    def read_notification():
+        user_id, _ = rng.choice(dataset.users)
+        notification_id = rng.choice(dataset.notifications[user_id])
+        return ('PUT /notifications/<id>/read', 'PUT', f'/api/notifications/{notification_id}/read',
+                dataset.tokens[user_id], None)
+
+    def auth_me():
+        user_id, _ = rng.choice(dataset.users)
+        return ('GET /auth/me', 'GET', '/api/auth/me', dataset.tokens[user_id], None)
+
+    # الأوزان تقريبية لنمط استخدام لوحة التحكم: القراءة أكثر بكثير من الكتابة
+    weighted = [
+        (get_projects, 10), (get_project, 10), (get_tasks, 20), (get_task, 10),
+        (get_comments, 10), (get_notifications, 10), (auth_me, 5),
+        (create_task, 6), (update_task, 8), (add_dependency, 3), (add_comment, 5), (read_notification, 3),
+    ]
+    choices = [fn for fn, weight in weighted for _ in range(weight)]
+
+    def operation(index):
+        return rng.choice(choices)()
+    return operation
+
+
+def noisy_neighbour(dataset, rng):
+    """عميل واحد يغرق قائمة المهام الثقيلة بينما يعمل بقية المستخدمين بشكل طبيعي
+
+    مع تفعيل تحديد المعدل يجب أن تُرفض طلبات العميل المسيء بـ 429 ويبقى
+    زمن استجابة الآخرين قريباً من الوضع الطبيعي.
+    """
+    project_id = dataset.large_project_id
+    noisy_token = _owner_token(dataset, project_id)
+    others = mixed_workload(dataset, rng)
+
+    def operation(index):
+        if rng.random() < 0.7:
+            return ('noisy GET /projects/<id>/tasks', 'GET', f'/api/projects/{project_id}/tasks', noisy_token, None)
+        label, method, path, token, body = others(index)
+        return (f'others {label}', method, path, token, body)
+    return operation
+
+
+SCENARIOS = {
+    'login_storm': Scenario(
+        name='login_storm', description='عاصفة تسجيل دخول متزامنة',
+        build=login_storm, requests=200, concurrency=16,
+        seed={'users': 100, 'projects': 2, 'tasks_per_project': 10, 'notifications_per_user': 0},
+    ),
+    'large_project_listing': Scenario(
+        name='large_project_listing', description='قائمة مهام مشروع كبير (5000 مهمة)',
+        build=large_project_listing, requests=100, concurrency=4,
+        seed={'users': 20, 'projects': 2, 'tasks_per_project': 10, 'large_project_tasks': 5000,
+              'notifications_per_user': 0},
+    ),
+    'concurrent_task_updates': Scenario(
+        name='concurrent_task_updates', description='تحديثات متزامنة لمجموعة مهام ساخنة',
+        build=concurrent_task_updates, requests=500, concurrency=16,
+        seed={'users': 20, 'projects': 2, 'tasks_per_project': 200, 'notifications_per_user': 0},
+    ),
+    'mixed': Scenario(
+        name='mixed', description='حمل مختلط قراءة/كتابة على جميع الموارد',
+        build=mixed_workload, requests=2000, concurrency=8,
+        seed={'users': 50, 'projects': 20, 'tasks_per_project': 100, 'notifications_per_user': 20},
+    ),
+    'noisy_neighbour': Scenario(
+        name='noisy_neighbour', description='عميل مسيء على قائمة مهام مشروع كبير مع تحديد المعدل',
+        build=noisy_neighbour, requests=1000, concurrency=16, ratelimit=True,
+        seed={'users': 50, 'projects': 20, 'tasks_per_project': 50, 'large_project_tasks': 2000,
+              'notifications_per_user': 10},
+    ),
+}
+
+
+def build_operations(scenario, dataset, seed=7):
+    return scenario.build(dataset, random.Random(seed))
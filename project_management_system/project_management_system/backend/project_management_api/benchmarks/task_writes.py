@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+قياس مسار الكتابة السريع لتعديل المهام وحذفها (src.services.task_writes)
+
+    python -m benchmarks.task_writes --writers 8 --seconds 10
+
+يشغّل عمال PUT /api/tasks/<id> ثم DELETE /api/tasks/<id> عبر عميل الاختبار على
+قاعدة SQLite (ملف) مرتين: TASK_FAST_WRITES مفعّل ومعطّل، ويقيس عدد الكتابات في
+الثانية وp50/p99 للكمون، ومدة الإمساك بقفل الكتابة: من أول عبارة كتابة في
+المعاملة حتى COMMIT أو ROLLBACK على الاتصال.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from benchmarks.harness import build_app, close_app, percentile, seed_dataset
+from src.models.user import db
+
+_WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class LockTimer:
+    """مدة الإمساك بقفل الكتابة لكل معاملة على محرك الكتابة"""
+
+    def __init__(self, engine):
+        self.samples = []
+        self._lock = threading.Lock()
+        event.listen(engine, 'before_cursor_execute', self._execute)
+        event.listen(engine, 'commit', self._finish)
+        event.listen(engine, 'rollback', self._finish)
+
+    def _execute(self, conn, cursor, statement, parameters, context, executemany):
+        # SQLite يأخذ القفل عند أول عبارة كتابة في المعاملة المؤجلة
+        if 'write_started' not in conn.info and statement.lstrip().upper().startswith(_WRITES):
+            conn.info['write_started'] = time.perf_counter()
+
+    def _finish(self, conn):
+        started = conn.info.pop('write_started', None)
+        if started is not None:
+            with self._lock:
+                self.samples.append(time.perf_counter() - started)
+
+    def reset(self):
+        with self._lock:
+            samples, self.samples = self.samples, []
+        return samples
+
+
+def _targets(dataset):
+    """(رمز مالك المشروع، معرف المهمة) لكل مهمة"""
+    return [(dataset.tokens[dataset.owners[project_id]], task_id)
+            for project_id in dataset.projects for task_id in dataset.tasks[project_id]]
+
+
+def _updater(app, targets, stop, samples, errors, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    while not stop.is_set():
+        token, task_id = rng.choice(targets)
+        started = time.perf_counter()
+        response = client.put(f'/api/tasks/{task_id}', headers={'Authorization': f'Bearer {token}'},
+                              json={'status': rng.choice(['in_progress', 'on_hold'])})
+        response.get_data()
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - started)
+        else:
+            errors.append(response.status_code)
+
+
+def _deleter(app, targets, stop, samples, errors):
+    client = app.test_client()
+    for token, task_id in targets:
+        if stop.is_set():
+            break
+        started = time.perf_counter()
+        response = client.delete(f'/api/tasks/{task_id}', headers={'Authorization': f'Bearer {token}'})
+        response.get_data()
+        if response.status_code in (200, 204):
+            samples.append(time.perf_counter() - started)
+        else:
+            errors.append(response.status_code)
+
+
+def _run(threads, seconds, stop):
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def _report(label, latencies, locks, errors, wall):
+    values = sorted(v * 1000 for v in latencies)
+    held = sorted(v * 1000 for v in locks)
+    print(f'  {label}: {len(values) / wall:,.0f} كتابة/ث، p50={percentile(values, 50):.2f}ms '
+          f'p99={percentile(values, 99):.2f}ms، قفل الكتابة p50={percentile(held, 50):.3f}ms '
+          f'p99={percentile(held, 99):.3f}ms، أخطاء={len(errors)}')
+
+
+def _measure(args, fast, tmp):
+    path = os.path.join(tmp, f"{'fast' if fast else 'orm'}.db")
+    app = build_app(f'sqlite:///{path}', TASK_FAST_WRITES=fast, READ_ROUTING_ENABLED=False,
+                    JOB_INLINE_WORKERS=0, RESPONSE_CACHE_ENABLED=False)
+    dataset = seed_dataset(app, users=args.users, projects=args.projects,
+                           tasks_per_project=args.tasks_per_project, notifications_per_user=0)
+    targets = _targets(dataset)
+    with app.app_context():
+        timer = LockTimer(db.engine)
+
+    print('مسار العبارة الواحدة' if fast else 'مسار ORM')
+
+    stop = threading.Event()
+    samples, errors = [], []
+    wall = _run([threading.Thread(target=_updater, args=(app, targets, stop, samples, errors, i))
+                 for i in range(args.writers)], args.seconds, stop)
+    _report('PUT', samples, timer.reset(), errors, wall)
+
+    # كل عامل يحذف مهامه الخاصة حتى لا يتنافس عاملان على المهمة نفسها
+    random.Random(1).shuffle(targets)
+    stop = threading.Event()
+    samples, errors = [], []
+    wall = _run([threading.Thread(target=_deleter, args=(app, targets[i::args.writers], stop, samples, errors))
+                 for i in range(args.writers)], args.seconds, stop)
+    _report('DELETE', samples, timer.reset(), errors, wall)
+    close_app(app)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس مسار الكتابة السريع للمهام')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10, help='مدة كل مرحلة')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--tasks-per-project', type=int, default=200)
+    parser.add_argument('--mode', choices=['both', 'fast', 'orm'], default='both')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pm-task-writes-') as tmp:
+        for fast in (True, False):
+            if args.mode == 'both' or args.mode == ('fast' if fast else 'orm'):
+                _measure(args, fast, tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+"""
+وضع تشغيل غير متزامن (ASGI) لنفس الواجهة البرمجية
+
+    uvicorn src.asgi:app --workers 4
+
+- مسارات المصادقة والمشاريع والمهام والإشعارات الأكثر استخداماً (src.aio.routes)
+  دوال async على حلقة الأحداث مع جلسة SQLAlchemy غير متزامنة لكل طلب
+  (aiosqlite)، فالطلب الذي ينتظر قفل SQLite أو عميلاً بطيئاً لا يحجز خيطاً.
+- bcrypt وغيره من العمل الحسابي يُنفّذ في مجمّع خيوط (ASYNC_CPU_WORKERS)؛
+  مكتبة bcrypt تحرر GIL أثناء التجزئة.
+- بقية المسارات، والحالات الخاصة التي يرفعها المسار بـ Delegate (مشروع
+  مؤرشف، propagate، ...)، تُمرَّر إلى تطبيق Flask نفسه في مجمّع خيوط منفصل
+  (ASYNC_WSGI_WORKERS)؛ الاستجابات المتدفقة منه تُرسل بعد اكتمالها.
+- الإعدادات ورموز JWT وتحديد المعدل مشتركة مع وضع Flask، فيمكن تشغيل الوضعين
+  معاً على قاعدة البيانات نفسها.
+- طلبات المؤسسات (src.tenancy) كلها عبر Flask؛ المسارات الأصلية للقاعدة الافتراضية.
+- يتطلب aiosqlite وخادم ASGI مثل uvicorn (اختياريان لوضع Flask، في
+  requirements-async.txt).
+"""
+
+import asyncio
+import io
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from urllib.parse import parse_qsl
+
+from flask_jwt_extended import create_access_token, decode_token
+from jwt import ExpiredSignatureError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.sqlite import listen_pragmas
+
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg', 'mysql': 'aiomysql'}
+
+
+class HTTPError(Exception):
+    """إنهاء الطلب باستجابة JSON ورمز حالة"""
+
+    def __init__(self, status, body, headers=()):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+        self.headers = list(headers)
+
+
+class Delegate(Exception):
+    """تمرير الطلب إلى تطبيق Flask (مسار أو حالة غير مدعومة أصلياً)"""
+
+
+class Router:
+
+    def __init__(self):
+        self.routes = []
+
+    def route(self, path, methods=('GET',), endpoint=None, auth=True):
+        """path بصيغة Flask (/projects/<project_id>)؛ endpoint اسم نقطة النهاية المقابلة في Flask"""
+        pattern = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', path) + '$')
+
+        def decorator(fn):
+            for method in methods:
+                self.routes.append((method, pattern, fn, endpoint, auth))
+            return fn
+        return decorator
+
+    def match(self, method, path):
+        for route_method, pattern, fn, endpoint, auth in self.routes:
+            if route_method == method:
+                matched = pattern.match(path)
+                if matched:
+                    return fn, endpoint, auth, matched.groupdict()
+        return None
+
+
+class Request:
+
+    def __init__(self, app, scope, body):
+        self.app = app
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.body = body
+        self.args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        self.headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope['headers']}
+        self.user_id = None
+        self.session = None
+
+    @cached_property
+    def json(self):
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, {'error': 'محتوى JSON غير صالح'})
+
+    @property
+    def remote_addr(self):
+        client = self.scope.get('client')
+        return client[0] if client else None
+
+
+def async_database_uri(uri):
+    """نفس قاعدة البيانات بمشغل غير متزامن (sqlite -> sqlite+aiosqlite)"""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'لا يوجد مشغل غير متزامن معروف لـ {backend}؛ استخدم ASYNC_DATABASE_URL')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope['headers']:
+        name = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        elif f'HTTP_{name}' in environ:
+            environ[f'HTTP_{name}'] += f',{value}'
+        else:
+            environ[f'HTTP_{name}'] = value
+    # الجسم مقروء بالكامل، فطوله معروف حتى لو أُرسل مجزأً
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ):
+    response = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers]
+        return chunks.append
+
+    result = wsgi_app(environ, start_response)
+    try:
+        for chunk in result:
+            chunks.append(chunk)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], b''.join(chunks)
+
+
+class AsyncApp:
+    """تطبيق ASGI حول تطبيق Flask: مسارات أصلية غير متزامنة، والبقية عبر WSGI"""
+
+    def __init__(self, flask_app, router):
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.router = router
+        self.limiter = flask_app.extensions.get('ratelimit')
+        self.read_routing = flask_app.extensions.get('read_routing')
+        self.activity_log = flask_app.extensions.get('activity')
+        self.tenancy = flask_app.extensions.get('tenancy')
+
+        url = make_url(config.get('ASYNC_DATABASE_URL') or async_database_uri(config['SQLALCHEMY_DATABASE_URI']))
+        sqlite = url.get_backend_name() == 'sqlite'
+        if sqlite and url.database in (None, '', ':memory:'):
+            # قاعدة في الذاكرة: اتصال واحد (StaticPool) ولا تُشارك مع Flask
+            self.engine = create_async_engine(url)
+        else:
+            self.engine = create_async_engine(url, pool_size=config['ASYNC_POOL_SIZE'], max_overflow=0)
+            if sqlite and config.get('SQLITE_PRAGMAS'):
+                listen_pragmas(self.engine.sync_engine, config['SQLITE_PRAGMAS'])
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+
+        self.cpu_executor = ThreadPoolExecutor(config['ASYNC_CPU_WORKERS'], thread_name_prefix='aio-cpu')
+        self.wsgi_executor = ThreadPoolExecutor(config['ASYNC_WSGI_WORKERS'], thread_name_prefix='aio-wsgi')
+
+    async def run_cpu(self, fn, *args):
+        """تنفيذ عمل حسابي (مثل bcrypt) خارج حلقة الأحداث"""
+        return await asyncio.get_running_loop().run_in_executor(self.cpu_executor, fn, *args)
+
+    def access_token(self, user_id):
+        with self.flask_app.app_context():
+            return create_access_token(identity=user_id)
+
+    def tenant_request(self, request):
+        """طلب لقاعدة مؤسسة: ترويسة X-Tenant أو مطالبة tenant في الرمز"""
+        if request.headers.get('x-tenant'):
+            return True
+        header = request.headers.get('authorization', '')
+        if not header.startswith('Bearer '):
+            return False
+        try:
+            with self.flask_app.app_context():
+                return bool(decode_token(header[len('Bearer '):]).get('tenant'))
+        except Exception:
+            return False
+
+    def identity(self, request):
+        """نفس تحقق jwt_required في Flask ونفس رسائل الخطأ"""
+        header = request.headers.get('authorization', '')
+        if not header.startswith('Bearer '):
+            raise HTTPError(401, {'msg': 'Missing Authorization Header'})
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(header[len('Bearer '):])
+        except ExpiredSignatureError:
+            raise HTTPError(401, {'msg': 'Token has expired'})
+        except Exception as e:
+            raise HTTPError(422, {'msg': str(e)})
+        if claims.get('type') != 'access':
+            raise HTTPError(422, {'msg': 'Only non-refresh tokens are allowed'})
+        return claims[self.flask_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = await _read_body(receive)
+        matched = self.router.match(scope['method'], scope['path'])
+        if matched is None:
+            await self._delegate(scope, body, send)
+            return
+
+        handler, endpoint, auth, params = matched
+        request = Request(self, scope, body)
+        # مع المؤسسات يمر التسجيل بـ Flask دائماً حيث يُتحقق من الدعوة (src.tenancy)
+        if self.tenancy is not None and (endpoint == 'auth.register' or self.tenant_request(request)):
+            await self._delegate(scope, body, send)
+            return
+        endpoint_class = None
+        headers = []
+        try:
+            if auth:
+                request.user_id = self.identity(request)
+            endpoint_class = self._admit(request, endpoint)
+            async with self.sessions() as session:
+                # سجل النشاط (src.services.activity) لا يرى طلب Flask هنا
+                session.sync_session.info.update(actor_id=request.user_id, activity_log=self.activity_log)
+                request.session = session
+                # (الجسم، الحالة) أو (الجسم، الحالة، ترويسات إضافية)
+                result, status, *extra = await handler(request, **params)
+                headers = list(extra[0]) if extra else []
+        except Delegate:
+            result = status = None
+        except HTTPError as e:
+            result, status, headers = e.body, e.status, e.headers
+        except Exception:
+            self.flask_app.logger.exception('%s %s', scope['method'], scope['path'])
+            result, status = {'error': 'حدث خطأ في الخادم'}, 500
+        finally:
+            if endpoint_class is not None:
+                self.limiter.release(endpoint_class)
+
+        if self.read_routing and status is not None and status < 400 and request.method != 'GET':
+            # قراءات Flask التالية لهذا المستخدم من الرئيسية (src.replicas)
+            self.read_routing.stick(request.user_id)
+
+        if status is None:
+            await self._delegate(scope, body, send)
+        else:
+            await self._send_json(send, request, result, status, headers)
+
+    def _admit(self, request, endpoint):
+        if self.limiter is None:
+            return None
+        endpoint_class = self.limiter.classify_endpoint(endpoint, request.method, request.path)
+        if endpoint_class is None:
+            return None
+        if endpoint_class != 'auth' and request.user_id:
+            key = f'{endpoint_class}:user:{request.user_id}'
+        else:
+            key = f'{endpoint_class}:ip:{request.remote_addr}'
+        allowed, retry_after = self.limiter.admit(endpoint_class, key)
+        if not allowed:
+            raise HTTPError(429, {'error': 'عدد الطلبات كبير جداً، يرجى المحاولة لاحقاً'},
+                            headers=[(b'retry-after', str(retry_after).encode())])
+        return endpoint_class
+
+    async def _send_json(self, send, request, result, status, headers=()):
+        headers = list(headers)
+        if status == 204:
+            body = b''
+        else:
+            # نفس ترميز jsonify في Flask
+            body = (self.flask_app.json.dumps(result) + '\n').encode('utf-8')
+            headers.append((b'content-type', b'application/json'))
+        headers.append((b'content-length', str(len(body)).encode()))
+        if 'origin' in request.headers:
+            headers.append((b'access-control-allow-origin', b'*'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _delegate(self, scope, body, send):
+        status, headers, content = await asyncio.get_running_loop().run_in_executor(
+            self.wsgi_executor, _call_wsgi, self.flask_app, _wsgi_environ(scope, body)
+        )
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.cpu_executor.shutdown(wait=False)
+                self.wsgi_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config=None):
+    """إنشاء تطبيق ASGI؛ config بنفس صيغة create_app"""
+    from src.main import create_app
+    from src.aio.routes import router
+
+    return AsyncApp(create_app(config), router)
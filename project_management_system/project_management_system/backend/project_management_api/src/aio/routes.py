@@ -0,0 +1,345 @@
+"""
+المسارات الأصلية لوضع ASGI
+
+نفس مسارات src.routes (المصادقة، المشاريع، المهام، الإشعارات) بجلسة غير متزامنة
+في request.session. التحقق من الأجسام والاستعلامات ورسائل الخطأ من
+src.services.payloads وsrc.services.task_writes، وهي نفسها التي تستدعيها مسارات
+Flask؛ هنا فقط تنفيذها بالجلسة غير المتزامنة. tests/test_asgi.py يقارن
+الاستجابتين لكل مسار.
+
+ما يبقى في Flask، فيُمرَّر إليه (لا مسار مطابق، أو برفع Delegate):
+- المشاريع والمهام والإشعارات غير الموجودة (404) والمشاريع المؤرشفة
+  (src.services.archive) وinclude_archived.
+- include= (src.services.task_includes)، وpropagate=true وIf-Match في تعديل المهمة.
+- طلبات المؤسسات والتسجيل معها (src.tenancy).
+وما يخص مسار Flask وحده: تخزين الاستجابات (src.response_cache) وضغطها
+(src.compression) ومسار TASK_FAST_WRITES؛ الاستجابات هنا تُحسب في كل طلب.
+"""
+
+from sqlalchemy import select
+
+from src.aio.app import Delegate, Router
+from src.models.user import User
+from src.models.project import Project
+from src.models.task import Task
+from src.models.notification import Notification
+from src.services.payloads import (
+    DATE_FORMAT_ERROR, PayloadError, apply_project_changes, check_assignee, check_parent, check_task_dates,
+    credentials, existing_user_query, mark_all_read_statement, new_project, new_task, notifications_query,
+    parent_project_query, project_access_query, registration, user_projects_query,
+)
+from src.services.task_writes import TaskWriteError, etag, task_changes
+
+router = Router()
+
+
+async def _has_project_access(session, project_id, user_id):
+    """التحقق من صلاحية المستخدم للوصول للمشروع"""
+    return await session.scalar(project_access_query(project_id, user_id))
+
+
+# المصادقة
+
+@router.route('/api/auth/register', methods=['POST'], endpoint='auth.register', auth=False)
+async def register(request):
+    session = request.session
+    try:
+        username, email, password = registration(request.json)
+
+        if await session.scalar(existing_user_query(username, email)):
+            return {'error': 'اسم المستخدم أو البريد الإلكتروني موجود بالفعل'}, 400
+
+        user = User(username=username, email=email)
+        # bcrypt خارج حلقة الأحداث
+        await request.app.run_cpu(user.set_password, password)
+
+        session.add(user)
+        await session.commit()
+
+        return {
+            'message': 'تم تسجيل المستخدم بنجاح',
+            'user': user.to_dict(),
+            'access_token': request.app.access_token(user.id),
+        }, 201
+
+    except PayloadError as e:
+        return {'error': str(e)}, e.status
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء التسجيل'}, 500
+
+
+@router.route('/api/auth/login', methods=['POST'], endpoint='auth.login', auth=False)
+async def login(request):
+    try:
+        username, password = credentials(request.json)
+
+        user = await request.session.scalar(select(User).where(User.username == username))
+
+        if not user or not await request.app.run_cpu(user.check_password, password):
+            return {'error': 'اسم المستخدم أو كلمة المرور غير صحيحة'}, 401
+
+        return {
+            'message': 'تم تسجيل الدخول بنجاح',
+            'user': user.to_dict(),
+            'access_token': request.app.access_token(user.id),
+        }, 200
+
+    except PayloadError as e:
+        return {'error': str(e)}, e.status
+    except Exception:
+        return {'error': 'حدث خطأ أثناء تسجيل الدخول'}, 500
+
+
+@router.route('/api/auth/me', endpoint='auth.get_current_user')
+async def get_current_user(request):
+    try:
+        user = await request.session.get(User, request.user_id)
+        if not user:
+            return {'error': 'المستخدم غير موجود'}, 404
+        return user.to_dict(), 200
+
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب بيانات المستخدم'}, 500
+
+
+# المشاريع
+
+@router.route('/api/projects', endpoint='project.get_projects')
+async def get_projects(request):
+    if request.args.get('include_archived', 'false').lower() == 'true':
+        raise Delegate()
+    try:
+        projects = await request.session.scalars(user_projects_query(request.user_id))
+        return [project.to_dict() for project in projects], 200
+
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب المشاريع'}, 500
+
+
+@router.route('/api/projects/<project_id>', endpoint='project.get_project')
+async def get_project(request, project_id):
+    try:
+        project = await request.session.get(Project, project_id)
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب المشروع'}, 500
+    if project is None:
+        # قد يكون مؤرشفاً
+        raise Delegate()
+
+    if not await _has_project_access(request.session, project_id, request.user_id):
+        return {'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}, 403
+    return project.to_dict(), 200
+
+
+@router.route('/api/projects', methods=['POST'], endpoint='project.create_project')
+async def create_project(request):
+    session = request.session
+    try:
+        project = Project(**new_project(request.json, request.user_id))
+        session.add(project)
+        await session.commit()
+
+        return project.to_dict(), 201
+
+    except PayloadError as e:
+        return {'error': str(e)}, e.status
+    except ValueError:
+        return {'error': DATE_FORMAT_ERROR}, 400
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء إنشاء المشروع'}, 500
+
+
+@router.route('/api/projects/<project_id>', methods=['PUT'], endpoint='project.update_project')
+async def update_project(request, project_id):
+    session = request.session
+    try:
+        project = await session.get(Project, project_id)
+        if project is None:
+            raise Delegate()
+
+        if project.owner_id != request.user_id:
+            return {'error': 'ليس لديك صلاحية لتعديل هذا المشروع'}, 403
+
+        apply_project_changes(project, request.json)
+
+        await session.commit()
+
+        return project.to_dict(), 200
+
+    except Delegate:
+        raise
+    except PayloadError as e:
+        await session.rollback()
+        return {'error': str(e)}, e.status
+    except ValueError:
+        await session.rollback()
+        return {'error': DATE_FORMAT_ERROR}, 400
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء تحديث المشروع'}, 500
+
+
+# المهام
+
+@router.route('/api/projects/<project_id>/tasks', endpoint='task.get_project_tasks')
+async def get_project_tasks(request, project_id):
+    if request.args.get('include'):
+        # المستند المركّب (src.services.task_includes) في مسار Flask
+        raise Delegate()
+    session = request.session
+    try:
+        if not await _has_project_access(session, project_id, request.user_id):
+            if await session.get(Project, project_id) is None:
+                raise Delegate()
+            return {'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}, 403
+
+        tasks = await session.scalars(select(Task).where(Task.project_id == project_id))
+        return [task.to_dict() for task in tasks], 200
+
+    except Delegate:
+        raise
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب المهام'}, 500
+
+
+@router.route('/api/tasks/<task_id>', endpoint='task.get_task')
+async def get_task(request, task_id):
+    if request.args.get('include'):
+        raise Delegate()
+    try:
+        task = await request.session.get(Task, task_id)
+        if task is None:
+            raise Delegate()
+
+        if not await _has_project_access(request.session, task.project_id, request.user_id):
+            return {'error': 'ليس لديك صلاحية للوصول لهذه المهمة'}, 403
+
+        return task.to_dict(), 200, [(b'etag', etag(task.version).encode())]
+
+    except Delegate:
+        raise
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب المهمة'}, 500
+
+
+@router.route('/api/projects/<project_id>/tasks', methods=['POST'], endpoint='task.create_task')
+async def create_task(request, project_id):
+    session = request.session
+    try:
+        if not await _has_project_access(session, project_id, request.user_id):
+            return {'error': 'ليس لديك صلاحية لإنشاء مهام في هذا المشروع'}, 403
+
+        fields = new_task(request.json, project_id)
+
+        if fields['parent_task_id']:
+            check_parent(await session.scalar(parent_project_query(fields['parent_task_id'])), project_id)
+
+        if fields['assigned_to']:
+            check_assignee(await session.get(User, fields['assigned_to']))
+
+        task = Task(**fields)
+        session.add(task)
+        await session.commit()
+
+        return task.to_dict(), 201
+
+    except PayloadError as e:
+        return {'error': str(e)}, e.status
+    except ValueError:
+        return {'error': DATE_FORMAT_ERROR}, 400
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء إنشاء المهمة'}, 500
+
+
+@router.route('/api/tasks/<task_id>', methods=['PUT'], endpoint='task.update_task')
+async def update_task(request, task_id):
+    data = request.json or {}
+    if request.args.get('propagate') == 'true' or data.get('propagate') is True or request.headers.get('if-match'):
+        # إعادة الجدولة حسب التبعيات وشرط If-Match يبقيان في مسار Flask
+        raise Delegate()
+
+    session = request.session
+    try:
+        task = await session.get(Task, task_id)
+        if task is None:
+            raise Delegate()
+
+        if not await _has_project_access(session, task.project_id, request.user_id):
+            return {'error': 'ليس لديك صلاحية لتعديل هذه المهمة'}, 403
+
+        # قواعد الحقول نفسها في مسار Flask (src.services.task_writes)
+        changes = task_changes(data)
+        if changes.get('assigned_to'):
+            check_assignee(await session.get(User, changes['assigned_to']))
+        for name, value in changes.items():
+            setattr(task, name, value)
+        check_task_dates(task)
+
+        await session.commit()
+
+        return task.to_dict(), 200, [(b'etag', etag(task.version).encode())]
+
+    except Delegate:
+        raise
+    except (TaskWriteError, PayloadError) as e:
+        await session.rollback()
+        return {'error': str(e)}, e.status
+    except ValueError:
+        return {'error': DATE_FORMAT_ERROR}, 400
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء تحديث المهمة'}, 500
+
+
+# الإشعارات
+
+@router.route('/api/notifications', endpoint='notification.get_notifications')
+async def get_notifications(request):
+    try:
+        notifications = await request.session.scalars(notifications_query(request.user_id))
+        return [notification.to_dict() for notification in notifications], 200
+
+    except Exception:
+        return {'error': 'حدث خطأ أثناء جلب الإشعارات'}, 500
+
+
+@router.route('/api/notifications/<notification_id>/read', methods=['PUT'],
+              endpoint='notification.mark_notification_read')
+async def mark_notification_read(request, notification_id):
+    session = request.session
+    try:
+        notification = await session.get(Notification, notification_id)
+        if notification is None:
+            raise Delegate()
+
+        if notification.user_id != request.user_id:
+            return {'error': 'ليس لديك صلاحية لتعديل هذا الإشعار'}, 403
+
+        notification.is_read = True
+        await session.commit()
+
+        return notification.to_dict(), 200
+
+    except Delegate:
+        raise
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء تحديث الإشعار'}, 500
+
+
+@router.route('/api/notifications/mark_all_read', methods=['PUT'],
+              endpoint='notification.mark_all_notifications_read')
+async def mark_all_notifications_read(request):
+    session = request.session
+    try:
+        await session.execute(mark_all_read_statement(request.user_id))
+        await session.commit()
+
+        return {'message': 'تم وضع علامة مقروءة على جميع الإشعارات'}, 200
+
+    except Exception:
+        await session.rollback()
+        return {'error': 'حدث خطأ أثناء تحديث الإشعارات'}, 500
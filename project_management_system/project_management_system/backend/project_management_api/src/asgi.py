@@ -0,0 +1,11 @@
+"""
+نقطة الدخول لخوادم ASGI (يتطلب aiosqlite):
+
+    pip install -r requirements-async.txt
+    flask --app src.main db upgrade     # مرة واحدة عند النشر
+    uvicorn src.asgi:app --workers 4
+"""
+
+from src.aio.app import create_asgi_app
+
+app = create_asgi_app()
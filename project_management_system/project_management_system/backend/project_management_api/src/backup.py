@@ -0,0 +1,425 @@
+"""
+نسخ احتياطي لقاعدة بيانات SQLite أثناء التشغيل واستعادتها
+
+- اللقطة تُؤخذ بواجهة النسخ الاحتياطي في SQLite (Connection.backup) على دفعات
+  من BACKUP_STEP_PAGES صفحة مع توقف BACKUP_STEP_SLEEP ثانية بين الدفعات، حتى
+  لا تنافس عمليات الكتابة على القرص.
+- في وضع WAL يُثبّت اتصال المصدر معاملة قراءة طوال النسخ: اللقطة متسقة عند
+  لحظة بدايتها، والكتابة مستمرة في ملف WAL دون انتظار ودون إعادة النسخ من
+  البداية. بدون WAL تكتفي الدفعات بحجز قفل القراءة لفترات قصيرة.
+- اللقطة الكاملة تُحفظ مضغوطة (zstd إن توفرت المكتبة وإلا gzip). اللقطة
+  التزايدية تحفظ الصفحات التي تغيرت منذ اللقطة السابقة فقط، بمقارنة بصمة كل
+  صفحة مع ملف البصمات (.pages) المحفوظ مع كل لقطة.
+- لكل لقطة بيان JSON (النوع، اللقطة الأم، عدد الصفحات، sha256 للملف الكامل).
+  الاستعادة تبني الملف من اللقطة الكاملة والتزايديات بعدها، ثم تتحقق من
+  sha256 ومن PRAGMA integrity_check قبل استبدال الملف الهدف.
+- الاحتفاظ: آخر BACKUP_RETAIN_FULL سلسلة (لقطة كاملة وتزايدياتها).
+
+- مع قواعد المؤسسات (src.tenancy) تأخذ backup create لقطة للقاعدة الافتراضية
+  ولكل مؤسسة نشطة في مخزن باسم tenant-<id>، ثابت إذا نُقل ملف المؤسسة.
+
+    flask --app src.main backup create [--incremental] [--tenant acme]
+    flask --app src.main backup list [--tenant acme]
+    flask --app src.main backup restore SNAPSHOT_ID --target PATH
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from src.sqlite import sqlite_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_SIZE = 8
+_CHUNK_SIZE = 1024 * 1024
+_PAGE_NUMBER = struct.Struct('>I')
+
+
+class BackupError(Exception):
+    """فشل إنشاء لقطة أو التحقق منها أو استعادتها"""
+
+
+def _open_compressed(path, mode, compression):
+    if compression == 'zstd':
+        if zstandard is None:
+            raise BackupError('مكتبة zstandard غير مثبتة')
+        context = zstandard.ZstdCompressor(level=3) if mode == 'wb' else zstandard.ZstdDecompressor()
+        raw = open(path, mode)
+        return context.stream_writer(raw) if mode == 'wb' else context.stream_reader(raw, closefd=True)
+    return gzip.open(path, mode, compresslevel=6)
+
+
+def _read_exact(stream, size):
+    """قراءة size بايت بالضبط (قارئ zstd قد يعيد أقل من المطلوب)"""
+    data = stream.read(size)
+    while data and len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _extension(compression):
+    return 'zst' if compression == 'zstd' else 'gz'
+
+
+def _read_pages(path, page_size):
+    with open(path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                return
+            yield page
+
+
+def _page_digest(page):
+    return hashlib.blake2b(page, digest_size=_DIGEST_SIZE).digest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def online_copy(source_path, target_path, pages=256, sleep=0.005, progress=None):
+    """نسخة متسقة من قاعدة بيانات تعمل، دون حجب الكتابة في وضع WAL"""
+    source = sqlite3.connect(source_path, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        target.execute('PRAGMA journal_mode = OFF')
+        target.execute('PRAGMA synchronous = OFF')
+        wal = source.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal'
+        if wal:
+            # معاملة القراءة تثبّت اللقطة؛ دفعات النسخ كلها تقرأ منها
+            source.execute('BEGIN')
+            source.execute('SELECT count(*) FROM sqlite_master').fetchone()
+
+        def _step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+            if sleep:
+                time.sleep(sleep)
+
+        source.backup(target, pages=pages, progress=_step)
+        if wal:
+            source.execute('COMMIT')
+    finally:
+        target.close()
+        source.close()
+
+
+class SnapshotStore:
+    """مجلد اللقطات: بيانات JSON وملفات البيانات والبصمات لكل لقطة"""
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def manifests(self):
+        """البيانات مرتبة من الأقدم إلى الأحدث"""
+        result = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.startswith(f'{self.name}-') and filename.endswith('.json'):
+                with open(self._path(filename)) as f:
+                    result.append(json.load(f))
+        return result
+
+    def manifest(self, snapshot_id):
+        path = self._path(f'{snapshot_id}.json')
+        if not os.path.exists(path):
+            raise BackupError(f'اللقطة غير موجودة: {snapshot_id}')
+        with open(path) as f:
+            return json.load(f)
+
+    def chain(self, snapshot_id):
+        """اللقطة الكاملة ثم التزايديات حتى snapshot_id"""
+        chain = [self.manifest(snapshot_id)]
+        while chain[0]['kind'] != 'full':
+            chain.insert(0, self.manifest(chain[0]['parent']))
+        return chain
+
+    def create(self, source_path, incremental=False, compression='zstd', pages=256, sleep=0.005,
+               max_chain=24, progress=None):
+        """أخذ لقطة جديدة؛ تزايدية إن طُلبت ووُجدت لقطة سابقة بنفس حجم الصفحة"""
+        if compression == 'zstd' and zstandard is None:
+            # zstandard اختيارية (requirements-extras.txt)
+            logger.warning('zstandard is not installed; writing %s as gzip', self.name)
+            compression = 'gzip'
+        snapshot_id = f"{self.name}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')}"
+        partial_path = self._path(f'{snapshot_id}.partial')
+        started = time.perf_counter()
+        try:
+            online_copy(source_path, partial_path, pages=pages, sleep=sleep, progress=progress)
+            copy = sqlite3.connect(partial_path)
+            page_size = copy.execute('PRAGMA page_size').fetchone()[0]
+            copy.close()
+
+            parent = None
+            if incremental:
+                previous = self.manifests()
+                if previous and previous[-1]['page_size'] == page_size:
+                    parent = previous[-1]
+                    if len(self.chain(parent['id'])) >= max_chain:
+                        # سلسلة طويلة تبطئ الاستعادة؛ نبدأ سلسلة جديدة
+                        parent = None
+
+            manifest = {
+                'id': snapshot_id,
+                'kind': 'incremental' if parent else 'full',
+                'parent': parent['id'] if parent else None,
+                'created_at': datetime.utcnow().isoformat(),
+                'source': os.path.abspath(source_path),
+                'page_size': page_size,
+                'compression': compression,
+                'sha256': _file_sha256(partial_path),
+            }
+            manifest.update(self._write_data(snapshot_id, partial_path, page_size, compression, parent))
+            manifest['seconds'] = round(time.perf_counter() - started, 3)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        with open(self._path(f'{snapshot_id}.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def _write_data(self, snapshot_id, copy_path, page_size, compression, parent):
+        data_file = f"{snapshot_id}.{'delta' if parent else 'db'}.{_extension(compression)}"
+        previous = None
+        if parent:
+            with open(self._path(parent['pages_file']), 'rb') as f:
+                previous = f.read()
+
+        page_count = 0
+        changed = 0
+        with open(self._path(f'{snapshot_id}.pages'), 'wb') as digests, \
+                _open_compressed(self._path(data_file), 'wb', compression) as out:
+            for page_number, page in enumerate(_read_pages(copy_path, page_size), start=1):
+                digest = _page_digest(page)
+                digests.write(digest)
+                page_count = page_number
+                if previous is None:
+                    out.write(page)
+                    continue
+                offset = (page_number - 1) * _DIGEST_SIZE
+                if previous[offset:offset + _DIGEST_SIZE] != digest:
+                    out.write(_PAGE_NUMBER.pack(page_number))
+                    out.write(page)
+                    changed += 1
+
+        return {
+            'file': data_file,
+            'pages_file': f'{snapshot_id}.pages',
+            'page_count': page_count,
+            'changed_pages': page_count if previous is None else changed,
+            'bytes': os.path.getsize(self._path(data_file)),
+        }
+
+    def build(self, snapshot_id, target_path):
+        """إعادة بناء ملف قاعدة البيانات من سلسلة اللقطات والتحقق منه"""
+        chain = self.chain(snapshot_id)
+        page_size = chain[-1]['page_size']
+        with open(target_path, 'wb') as out:
+            for manifest in chain:
+                with _open_compressed(self._path(manifest['file']), 'rb', manifest['compression']) as data:
+                    if manifest['kind'] == 'full':
+                        for chunk in iter(lambda: data.read(_CHUNK_SIZE), b''):
+                            out.write(chunk)
+                        continue
+                    while True:
+                        header = _read_exact(data, _PAGE_NUMBER.size)
+                        if not header:
+                            break
+                        page = _read_exact(data, page_size)
+                        if len(header) != _PAGE_NUMBER.size or len(page) != page_size:
+                            raise BackupError(f"ملف اللقطة {manifest['file']} مقطوع")
+                        (page_number,) = _PAGE_NUMBER.unpack(header)
+                        out.seek((page_number - 1) * page_size)
+                        out.write(page)
+                out.truncate(manifest['page_count'] * page_size)
+                out.seek(0, os.SEEK_END)
+        verify_file(target_path, chain[-1]['sha256'])
+        return chain[-1]
+
+    def prune(self, keep_full):
+        """حذف السلاسل الأقدم من آخر keep_full لقطة كاملة؛ يعيد معرفات المحذوفة"""
+        manifests = self.manifests()
+        full = [m['id'] for m in manifests if m['kind'] == 'full']
+        if len(full) <= keep_full:
+            return []
+        oldest_kept = full[-keep_full] if keep_full else None
+        removed = []
+        for manifest in manifests:
+            if oldest_kept is not None and manifest['id'] >= oldest_kept:
+                break
+            for filename in (manifest['file'], manifest['pages_file'], f"{manifest['id']}.json"):
+                path = self._path(filename)
+                if os.path.exists(path):
+                    os.remove(path)
+            removed.append(manifest['id'])
+        return removed
+
+
+def verify_file(path, sha256=None):
+    """التحقق من ملف مستعاد: sha256 (إن وُجد) وPRAGMA integrity_check"""
+    if sha256 and _file_sha256(path) != sha256:
+        raise BackupError('بصمة sha256 للملف المستعاد لا تطابق اللقطة')
+    connection = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in connection.execute('PRAGMA integrity_check')]
+    except sqlite3.DatabaseError as e:
+        # ترويسة تالفة: SQLite لا يفتح الملف أصلاً
+        result = [str(e)]
+    finally:
+        connection.close()
+    if result != ['ok']:
+        raise BackupError('فشل فحص السلامة: ' + '; '.join(result[:5]))
+
+
+def restore(store, snapshot_id, target_path):
+    """استعادة اللقطة إلى target_path بعد التحقق منها (يجب إيقاف العمال أولاً)"""
+    building_path = f'{target_path}.restoring'
+    try:
+        manifest = store.build(snapshot_id, building_path)
+    except Exception:
+        if os.path.exists(building_path):
+            os.remove(building_path)
+        raise
+    # ملف WAL قديم بجوار الهدف سيُطبّق على الملف المستعاد فيفسده
+    for suffix in ('-wal', '-shm', '-journal'):
+        if os.path.exists(target_path + suffix):
+            os.remove(target_path + suffix)
+    os.replace(building_path, target_path)
+    return manifest
+
+
+def _store(database=None, tenant_id=None):
+    from src.tenancy import TenantNotFound, tenant_database
+
+    if tenant_id is not None:
+        try:
+            source = tenant_database(tenant_id)
+        except TenantNotFound as e:
+            raise click.ClickException(str(e))
+        name = f'tenant-{tenant_id}'
+    else:
+        source = database or sqlite_path(current_app.config['SQLALCHEMY_DATABASE_URI'])
+        name = os.path.splitext(os.path.basename(source))[0] if source else None
+    if not source:
+        raise click.ClickException('النسخ الاحتياطي يتطلب قاعدة بيانات SQLite في ملف')
+    return source, SnapshotStore(current_app.config['BACKUP_DIR'], name)
+
+
+def _stores(database, tenant_id):
+    """المخازن التي تأخذ لها create لقطة: المحددة، أو الافتراضية وكل مؤسسة نشطة"""
+    from src.tenancy import active_databases
+
+    if database or tenant_id:
+        return [_store(database, tenant_id)]
+    return [_store(tenant_id=tenant) for tenant in active_databases()]
+
+
+backup_cli = AppGroup('backup', help='النسخ الاحتياطي والاستعادة')
+
+
+@backup_cli.command('create')
+@click.option('--incremental', is_flag=True, help='حفظ الصفحات المتغيرة منذ آخر لقطة فقط')
+@click.option('--database', default=None, help='ملف قاعدة بيانات آخر (مثل archive.db)')
+@click.option('--tenant', 'tenant_id', default=None, help='قاعدة هذه المؤسسة فقط')
+def create_command(incremental, database, tenant_id):
+    """أخذ لقطة أثناء التشغيل (مناسب للتشغيل الدوري من cron)"""
+    from src.locks import advisory_lock
+
+    config = current_app.config
+    for source, store in _stores(database, tenant_id):
+        # القفل في القاعدة الافتراضية لكل المخازن
+        with advisory_lock(f'backup:{store.name}', ttl=config['BACKUP_LOCK_TTL']) as acquired:
+            if not acquired:
+                click.echo(f'{store.name}: نسخ احتياطي آخر قيد التنفيذ')
+                continue
+            manifest = store.create(
+                source, incremental=incremental, compression=config['BACKUP_COMPRESSION'],
+                pages=config['BACKUP_STEP_PAGES'], sleep=config['BACKUP_STEP_SLEEP'],
+                max_chain=config['BACKUP_MAX_CHAIN'],
+            )
+            removed = store.prune(config['BACKUP_RETAIN_FULL'])
+
+        click.echo(
+            f"{store.name}: {manifest['id']} ({manifest['kind']}): "
+            f"{manifest['changed_pages']:,}/{manifest['page_count']:,} صفحة، "
+            f"{manifest['bytes'] / 1024 / 1024:.1f}MB خلال {manifest['seconds']:.2f}s"
+        )
+        if removed:
+            click.echo(f'حُذفت {len(removed)} لقطة قديمة')
+
+
+@backup_cli.command('list')
+@click.option('--database', default=None)
+@click.option('--tenant', 'tenant_id', default=None)
+def list_command(database, tenant_id):
+    """عرض اللقطات المحفوظة"""
+    _, store = _store(database, tenant_id)
+    for manifest in store.manifests():
+        click.echo(f"{manifest['id']}  {manifest['kind']:<11}  {manifest['bytes'] / 1024 / 1024:8.1f}MB  "
+                   f"{manifest['changed_pages']:,} صفحة")
+
+
+@backup_cli.command('verify')
+@click.argument('snapshot_id')
+@click.option('--database', default=None)
+@click.option('--tenant', 'tenant_id', default=None)
+def verify_command(snapshot_id, database, tenant_id):
+    """إعادة بناء اللقطة في ملف مؤقت والتحقق منها دون استعادتها"""
+    _, store = _store(database, tenant_id)
+    path = os.path.join(store.directory, f'{snapshot_id}.verify')
+    try:
+        store.build(snapshot_id, path)
+    except BackupError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    click.echo('اللقطة سليمة')
+
+
+@backup_cli.command('restore')
+@click.argument('snapshot_id')
+@click.option('--target', default=None, help='الملف الهدف (الافتراضي: قاعدة البيانات نفسها)')
+@click.option('--database', default=None)
+@click.option('--tenant', 'tenant_id', default=None)
+@click.option('--force', is_flag=True, help='استبدال ملف موجود')
+def restore_command(snapshot_id, target, database, tenant_id, force):
+    """استعادة لقطة بعد التحقق منها؛ أوقف العمال قبل الاستعادة فوق قاعدة البيانات الحية"""
+    source, store = _store(database, tenant_id)
+    target = target or source
+    if os.path.exists(target) and not force:
+        raise click.ClickException(f'{target} موجود؛ استخدم --force لاستبداله')
+    try:
+        manifest = restore(store, snapshot_id, target)
+    except BackupError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"تمت استعادة {manifest['id']} إلى {target}")
@@ -0,0 +1,406 @@
+"""
+ذاكرة مؤقتة مع إبطال بالوسوم (tags) ومخزن قابل للاستبدال
+
+كل قيمة تُخزّن مع مدة صلاحية ومجموعة وسوم مثل 'user:<id>' أو 'project:<id>'.
+لكل وسم رقم إصدار، والقيمة تحفظ إصدارات وسومها وقت حسابها؛ إبطال الوسم يزيد
+إصداره فتصبح كل القيم المرتبطة به قديمة دفعة واحدة. الإصدارات تُقرأ قبل الحساب
+(versions) فلا تُخزَّن قيمة حُسبت من بيانات أُبطلت أثناء حسابها.
+invalidate_on_commit يؤجل الإبطال إلى ما بعد التزام المعاملة.
+
+المخازن (CACHE_BACKEND):
+- sqlite (الافتراضي): ملف مشترك بين العمال (CACHE_SQLITE_PATH أو cache.db بجوار
+  القاعدة الرئيسية)، فالإبطال يصل إليهم جميعاً.
+- redis: خادم خارجي (CACHE_REDIS_URL، يتطلب حزمة redis).
+- memory: داخل العامل (LRU)، لعملية واحدة فقط: الإبطال لا يصل إلى العمال الآخرين
+  فيقرؤون قيماً قديمة حتى تنتهي صلاحيتها. يُستخدم دائماً لقاعدة بيانات في الذاكرة.
+أخطاء المخزن لا تُفشل الطلب: القراءة تُعامل كعدم وجود، وتُحصى في stats().
+"""
+
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _is_current(versions, current):
+    return all(current.get(tag, 0) == version for tag, version in versions.items())
+
+
+class MemoryBackend:
+    """داخل العامل؛ فهرس الوسوم يحرر القيم المُبطلة فوراً"""
+    name = 'memory'
+
+    def __init__(self, max_entries=10000):
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, versions = entry
+            if expires_at <= now or not _is_current(versions, self._versions):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def versions(self, tags):
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def set(self, key, value, ttl, versions):
+        with self._lock:
+            if not _is_current(versions, self._versions):
+                return
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, versions)
+            for tag in versions:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteBackend:
+    """ملف مشترك بين العمال؛ القيم المُبطلة تُستبدل أو تنتهي صلاحيتها وتُحذف دورياً"""
+    name = 'sqlite'
+
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._sets = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, tags TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_tag (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value, tags FROM cache_entry WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        versions = json.loads(row[1])
+        if versions and not _is_current(versions, self.versions(versions)):
+            return None
+        return pickle.loads(row[0])
+
+    def versions(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        current = dict(self._conn().execute(
+            f"SELECT tag, version FROM cache_tag WHERE tag IN ({', '.join('?' * len(tags))})", tags
+        ))
+        return {tag: current.get(tag, 0) for tag in tags}
+
+    def set(self, key, value, ttl, versions):
+        conn = self._conn()
+        now = time.time()
+        # BEGIN IMMEDIATE: التحقق من الإصدارات والكتابة ذريان مقابل invalidate من عامل آخر
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if versions and not _is_current(versions, self.versions(versions)):
+                conn.execute('ROLLBACK')
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entry (key, value, tags, expires_at) VALUES (?, ?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), json.dumps(versions), now + ttl),
+            )
+            self._sets += 1
+            if self._sets % self._PRUNE_EVERY == 0:
+                self._prune(conn, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _prune(self, conn, now):
+        conn.execute('DELETE FROM cache_entry WHERE expires_at <= ?', (now,))
+        excess = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_entry ORDER BY expires_at LIMIT ?)',
+                (excess,),
+            )
+
+    def invalidate(self, tags):
+        self._conn().executemany(
+            'INSERT INTO cache_tag (tag, version) VALUES (?, 1) '
+            'ON CONFLICT(tag) DO UPDATE SET version = version + 1',
+            [(tag,) for tag in tags],
+        )
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache_entry')
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM cache_entry WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+
+
+class RedisBackend:
+    """خادم خارجي مشترك؛ client أي عميل بواجهة redis-py"""
+    name = 'redis'
+
+    def __init__(self, url=None, client=None, prefix='pm:cache:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('CACHE_BACKEND=redis يتطلب حزمة redis (requirements-extras.txt)')
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(f'{self.prefix}e:{key}')
+        if raw is None:
+            return None
+        value, versions = pickle.loads(raw)
+        if versions and not _is_current(versions, self.versions(versions)):
+            return None
+        return value
+
+    def versions(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = self.client.mget([f'{self.prefix}t:{tag}' for tag in tags])
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    def set(self, key, value, ttl, versions):
+        # فحص الإصدارات قبل الكتابة؛ نافذة السباق المتبقية أقصر من زمن حساب القيمة
+        if versions and not _is_current(versions, self.versions(versions)):
+            return
+        self.client.set(f'{self.prefix}e:{key}', pickle.dumps((value, versions), pickle.HIGHEST_PROTOCOL),
+                        px=max(1, int(ttl * 1000)))
+
+    def invalidate(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}t:{tag}')
+        pipeline.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f'{self.prefix}e:*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=f'{self.prefix}e:*'))
+
+
+def cache_path(app):
+    """ملف مخزن sqlite: CACHE_SQLITE_PATH أو cache.db بجوار القاعدة الرئيسية؛ None لقاعدة في الذاكرة"""
+    from src.sqlite import sqlite_path
+
+    path = app.config.get('CACHE_SQLITE_PATH')
+    if path:
+        return path
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    main_path = sqlite_path(uri)
+    if main_path:
+        return os.path.join(os.path.dirname(main_path), 'cache.db')
+    if make_url(uri).get_backend_name() == 'sqlite':
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'cache.db')
+
+
+def make_backend(app):
+    name = app.config['CACHE_BACKEND']
+    max_entries = app.config['CACHE_MAX_ENTRIES']
+    if name == 'sqlite':
+        path = cache_path(app)
+        # قاعدة في الذاكرة تعني عملية واحدة
+        return SQLiteBackend(path, max_entries) if path else MemoryBackend(max_entries)
+    if name == 'memory':
+        if cache_path(app) and not app.testing:
+            logger.warning('CACHE_BACKEND=memory: invalidation does not reach other worker processes')
+        return MemoryBackend(max_entries)
+    if name == 'redis':
+        return RedisBackend(app.config['CACHE_REDIS_URL'])
+    raise ValueError(f'Unknown CACHE_BACKEND: {name}')
+
+
+class TaggedCache:
+    """واجهة الذاكرة المؤقتة: مفاتيح نصية أو tuple، وإحصاءات لكل مساحة أسماء داخل العامل"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self._stats = {}
+        self._invalidated = 0
+        self._lock = threading.Lock()
+
+    def configure(self, backend):
+        self.backend = backend
+        with self._lock:
+            self._stats.clear()
+            self._invalidated = 0
+
+    def get(self, key):
+        namespace, key = _split(key)
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            logger.exception('cache get failed: %s', key)
+            self._count(namespace, 'errors')
+            return None
+        self._count(namespace, 'misses' if value is None else 'hits')
+        return value
+
+    def versions(self, tags):
+        """إصدارات الوسوم الحالية؛ تُمرَّر إلى set بعد حساب القيمة"""
+        try:
+            return self.backend.versions(tags)
+        except Exception:
+            logger.exception('cache versions failed')
+            return None
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        namespace, key = _split(key)
+        try:
+            if versions is None:
+                versions = self.backend.versions(tags)
+            self.backend.set(key, value, ttl, versions)
+        except Exception:
+            logger.exception('cache set failed: %s', key)
+            self._count(namespace, 'errors')
+            return
+        self._count(namespace, 'sets')
+
+    def invalidate(self, *tags):
+        if not tags:
+            return
+        try:
+            self.backend.invalidate(tags)
+        except Exception:
+            logger.exception('cache invalidate failed: %s', tags)
+            self._count('invalidate', 'errors')
+            return
+        with self._lock:
+            self._invalidated += len(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
+
+    def stats(self):
+        with self._lock:
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+            invalidated = self._invalidated
+        for counts in namespaces.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else None
+        try:
+            entries = len(self.backend)
+        except Exception:
+            entries = None
+        return {
+            'backend': self.backend.name,
+            'pid': os.getpid(),
+            'entries': entries,
+            'invalidated_tags': invalidated,
+            'namespaces': namespaces,
+        }
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            counts = self._stats.get(namespace)
+            if counts is None:
+                counts = self._stats[namespace] = {'hits': 0, 'misses': 0, 'sets': 0, 'errors': 0}
+            counts[counter] += 1
+
+
+def _split(key):
+    """(مساحة الأسماء، المفتاح النصي): العنصر الأول من tuple أو ما قبل ':'"""
+    if isinstance(key, tuple):
+        return str(key[0]), '|'.join(map(str, key))
+    return key.split(':', 1)[0], key
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def project_tag(project_id):
+    return f'project:{project_id}'
+
+
+cache = TaggedCache()
+
+
+def init_cache(app):
+    """اختيار مخزن cache حسب CACHE_BACKEND"""
+    cache.configure(make_backend(app))
+
+
+def invalidate_on_commit(session, *tags):
+    """إبطال الوسوم بعد التزام معاملة الجلسة فقط (وتجاهلها إن تراجعت)"""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_invalidations(session, previous_transaction):
+    session.info.pop('cache_tags', None)
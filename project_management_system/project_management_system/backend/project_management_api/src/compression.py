@@ -0,0 +1,175 @@
+"""
+ضغط استجابات JSON حسب Accept-Encoding (zstd أو br أو gzip)
+
+- لا تُضغط الاستجابات الأصغر من COMPRESS_MIN_SIZE (تكلفة المعالج أكبر من التوفير).
+- مستوى الضغط قابل للضبط لكل خوارزمية، ويُخفّض تلقائياً للاستجابات الكبيرة
+  جداً (أكبر من COMPRESS_FAST_THRESHOLD) حتى يبقى زمن المعالج محدوداً.
+- الاستجابات المتدفقة تُضغط قطعة بقطعة بدون تحميلها كاملة في الذاكرة.
+- zstd وbr اختياريتان (مكتبتا zstandard وbrotli)؛ gzip متاح دائماً.
+"""
+
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def available_encodings():
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def _parse_accept_encoding(header):
+    accepted = {}
+    for part in header.lower().split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate(header, preference):
+    """اختيار أفضل ترميز يقبله العميل؛ عند تساوي q يُتبع ترتيب preference"""
+    if not header:
+        return None
+    accepted = _parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """واجهة موحدة لضغط دفعة واحدة أو ضغط متدفق"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self._obj.process(chunk)
+        return self._obj.compress(chunk)
+
+    def flush(self):
+        if self.encoding == 'br':
+            return self._obj.flush()
+        if self.encoding == 'gzip':
+            return self._obj.flush(zlib.Z_SYNC_FLUSH)
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_bytes(data, encoding, level):
+    compressor = _Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _stream(iterable, compressor):
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                data = compressor.compress(chunk)
+                # تفريغ بعد كل قطعة حتى يصل كل جزء للعميل فوراً (مهم للبث الطويل)
+                data += compressor.flush()
+                if data:
+                    yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+
+    def __init__(self, app):
+        self.enabled = app.config['COMPRESS_ENABLED']
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.mimetypes = set(app.config['COMPRESS_MIMETYPES'])
+        self.levels = app.config['COMPRESS_LEVELS']
+        self.fast_levels = app.config['COMPRESS_FAST_LEVELS']
+        self.fast_threshold = app.config['COMPRESS_FAST_THRESHOLD']
+        self.preference = [e for e in app.config['COMPRESS_ALGORITHMS'] if e in available_encodings()]
+
+    def level_for(self, encoding, size):
+        if size is not None and size >= self.fast_threshold:
+            return self.fast_levels[encoding]
+        return self.levels[encoding]
+
+    def after_request(self, response):
+        if not self.enabled or response.mimetype not in self.mimetypes:
+            return response
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')
+                or response.direct_passthrough):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''), self.preference)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            length = response.content_length
+            if length is not None and length < self.min_size:
+                return response
+            compressor = _Compressor(encoding, self.level_for(encoding, length))
+            response.response = _stream(response.response, compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(compress_bytes(data, encoding, self.level_for(encoding, len(data))))
+
+        response.headers['Content-Encoding'] = encoding
+        # المحتوى المضغوط يختلف بايتياً عن الأصل فيصبح الـ ETag ضعيفاً
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app):
+    compressor = ResponseCompressor(app)
+    app.extensions['compression'] = compressor
+    app.after_request(compressor.after_request)
+    return compressor
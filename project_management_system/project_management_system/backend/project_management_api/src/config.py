@@ -0,0 +1,194 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Config:
+    """الإعدادات الافتراضية (بيئة الإنتاج)"""
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string-change-this-in-production')
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        'DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # تُطبّق على كل اتصال بقاعدة بيانات SQLite (ملف)؛ WAL يسمح بالقراءة أثناء الكتابة
+    SQLITE_PRAGMAS = {'journal_mode': 'wal', 'synchronous': 'normal'}
+
+    # توجيه القراءة (src.replicas): طلبات GET تقرأ من نسخ DATABASE_READ_URLS (مفصولة بفواصل)،
+    # أو لـ SQLite من مجمّع اتصالات query_only على الملف نفسه؛ بعد كتابة المستخدم
+    # تُقرأ طلباته من القاعدة الرئيسية لمدة READ_STICKY_SECONDS
+    READ_ROUTING_ENABLED = os.environ.get('READ_ROUTING_ENABLED', 'true').lower() == 'true'
+    SQLALCHEMY_READ_URLS = [url for url in os.environ.get('DATABASE_READ_URLS', '').split(',') if url]
+    READ_POOL_SIZE = 10
+    READ_STICKY_SECONDS = 5
+
+    # تشغيل الترحيلات عند الإقلاع. في الإنتاج تُشغّل مرة واحدة أثناء النشر:
+    #   flask --app src.main db upgrade
+    AUTO_MIGRATE = False
+
+    # مخرجات: flask --app src.main assets build
+    STATIC_BUILD_FOLDER = os.environ.get('STATIC_BUILD_FOLDER', os.path.join(BASE_DIR, 'static_build'))
+    STATIC_MAX_AGE = 31536000
+
+    # ضغط استجابات JSON
+    COMPRESS_ENABLED = True
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_ALGORITHMS = ['zstd', 'br', 'gzip']
+    COMPRESS_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+    # مستويات أسرع للاستجابات الأكبر من COMPRESS_FAST_THRESHOLD بايت
+    COMPRESS_FAST_THRESHOLD = 1024 * 1024
+    COMPRESS_FAST_LEVELS = {'zstd': 1, 'br': 1, 'gzip': 1}
+
+    # تحديد معدل الطلبات: rate طلب/ثانية، burst سعة الدلو، concurrency لكل عامل
+    RATELIMIT_ENABLED = True
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND', 'memory')  # memory | sqlite
+    RATELIMIT_SQLITE_PATH = os.environ.get('RATELIMIT_SQLITE_PATH', os.path.join(BASE_DIR, 'database', 'ratelimit.db'))
+    RATELIMIT_CLASSES = {
+        'auth': {'rate': 0.2, 'burst': 10, 'concurrency': 4},
+        'heavy_read': {'rate': 2, 'burst': 20, 'concurrency': 8},
+        'write': {'rate': 5, 'burst': 50, 'concurrency': 16},
+    }
+    # ما لم يُذكر هنا: طلبات الكتابة على /api تتبع فئة write
+    RATELIMIT_ENDPOINTS = {
+        'auth.login': 'auth',
+        'auth.register': 'auth',
+        'task.get_project_tasks': 'heavy_read',
+        'task.get_project_timeline': 'heavy_read',
+        'workload.get_user_workload': 'heavy_read',
+        'workload.get_team_workload': 'heavy_read',
+    }
+
+    # تذكيرات task_due: النافذة بالأيام، والفاصل بالثواني للمسح الدوري داخل العمال
+    # (0 = معطل؛ يمكن بدلاً من ذلك تشغيل flask --app src.main reminders scan من cron)
+    DUE_REMINDER_WINDOW_DAYS = 3
+    DUE_REMINDER_BATCH_SIZE = 5000
+    DUE_REMINDER_INTERVAL = int(os.environ.get('DUE_REMINDER_INTERVAL', 0))
+    DUE_REMINDER_LOCK_TTL = 900
+
+    # الذاكرة المؤقتة (src.cache): sqlite ملف مشترك بين العمال (الافتراضي cache.db بجوار القاعدة
+    # الرئيسية)، redis خادم خارجي، memory داخل العامل فقط ولعملية واحدة، لأن إبطال الكتابة
+    # لا يصل إلى العمال الآخرين. قاعدة بيانات في الذاكرة تستخدم memory دائماً
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'sqlite')  # sqlite | redis | memory
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_MAX_ENTRIES = 10000
+
+    # استجابات get_project وget_project_tasks وget_task_comments المخزنة بوسم المشروع
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_TTL = 300
+
+    # معرفات المستخدمين المسموح لهم بمسارات /api/admin (مفصولة بفواصل)
+    ADMIN_USER_IDS = [user_id for user_id in os.environ.get('ADMIN_USER_IDS', '').split(',') if user_id]
+
+    # بحث المستخدمين (GET /users): الحد الافتراضي والأقصى للصفحة، وذاكرة البادئات المحلية
+    USER_SEARCH_LIMIT = 10
+    USER_SEARCH_MAX_LIMIT = 50
+    USER_SEARCH_CACHE_SIZE = 512
+    USER_SEARCH_CACHE_TTL = 30
+
+    # أقصى عدد أعضاء في طلب POST /projects/<id>/members/bulk
+    MEMBER_BULK_MAX = 1000
+
+    # سجل النشاط: كتابة المخزن المؤقت كل ACTIVITY_FLUSH_INTERVAL ثانية (0 = بعد كل التزام)
+    # أو عند بلوغ ACTIVITY_BATCH_SIZE، وتقليم الأحداث الأقدم من ACTIVITY_RETENTION_DAYS
+    # كل ACTIVITY_PRUNE_INTERVAL ثانية (0 = سطر الأوامر فقط)؛ عند فشل الكتابة تبقى الأحداث
+    # في المخزن حتى ACTIVITY_MAX_BUFFER ثم يُحذف الأقدم
+    ACTIVITY_ENABLED = True
+    ACTIVITY_FLUSH_INTERVAL = 2.0
+    ACTIVITY_BATCH_SIZE = 500
+    ACTIVITY_MAX_BUFFER = 50000
+    ACTIVITY_RETENTION_DAYS = 365
+    ACTIVITY_PRUNE_INTERVAL = 3600
+    ACTIVITY_FEED_LIMIT = 50
+    ACTIVITY_FEED_MAX_LIMIT = 200
+
+    # تعديل المهام وحذفها بعبارة UPDATE/DELETE شرطية واحدة (src.services.task_writes)؛
+    # False يعيد مسار ORM القديم للمقارنة
+    TASK_FAST_WRITES = True
+
+    # صندوق مهامي (GET /me/tasks): الحد الافتراضي والأقصى للصفحة
+    MY_TASKS_LIMIT = 50
+    MY_TASKS_MAX_LIMIT = 200
+
+    # طابور المهام الخلفية (src.jobs): مدة الإيجار وفاصل الاستطلاع بالثواني، والمحاولات
+    # مع تأخير أسّي، وخيوط داخل عامل الويب (اختيارية؛ الافتراضي flask jobs worker منفصلاً)
+    JOB_LEASE_SECONDS = 300
+    JOB_POLL_INTERVAL = 1.0
+    JOB_MAX_ATTEMPTS = 5
+    JOB_BACKOFF_BASE = 5
+    JOB_BACKOFF_MAX = 3600
+    JOB_RETENTION_DAYS = 7
+    JOB_INLINE_WORKERS = int(os.environ.get('JOB_INLINE_WORKERS', 0))
+    JOB_WORKER_THREADS = 4
+
+    # قاعدة بيانات لكل مؤسسة (src.tenancy): مجلد ملفات المؤسسات الجديدة، وأقصى عدد
+    # محركات مفتوحة (LRU) وإغلاق غير المستخدم منها بعد TENANT_IDLE_SECONDS، ومدة
+    # تخزين الدليل في العامل (وهي أيضاً مهلة النقل قبل النسخ)، وأقصى انتظار للمهام
+    # الجارية في المؤسسة قبل النسخ
+    TENANCY_ENABLED = os.environ.get('TENANCY_ENABLED', 'false').lower() == 'true'
+    TENANT_DATABASE_DIR = os.environ.get('TENANT_DATABASE_DIR', os.path.join(BASE_DIR, 'database', 'tenants'))
+    TENANT_ENGINE_CACHE_SIZE = 64
+    TENANT_IDLE_SECONDS = 600
+    TENANT_POOL_SIZE = 5
+    TENANT_DIRECTORY_TTL = 5
+    TENANT_MOVE_JOB_TIMEOUT = 600
+    # صلاحية دعوة التسجيل في مؤسسة (tenants invite) بالثواني
+    TENANT_INVITE_MAX_AGE = 7 * 24 * 3600
+
+    # محلل الأداء (/api/admin/profiler): فاصل العينات، ومدة التشغيل الافتراضية والقصوى
+    # بالثواني، وحدود عدد المكدسات المختلفة وعمق المكدس
+    PROFILER_INTERVAL_MS = 5
+    PROFILER_DURATION = 60
+    PROFILER_MAX_DURATION = 600
+    PROFILER_MAX_STACKS = 20000
+    PROFILER_MAX_DEPTH = 128
+
+    # حمل العمل: مدة صلاحية الذاكرة المؤقتة بالثواني وأقصى نطاق بالأيام
+    WORKLOAD_CACHE_TTL = 300
+    WORKLOAD_MAX_DAYS = 731
+
+    # الاستيراد: حجم الدفعة (صف لكل معاملة) وأقصى عدد أخطاء يُعاد في الملخص
+    IMPORT_BATCH_SIZE = 5000
+    IMPORT_MAX_ERRORS = 100
+
+    # ملف أرشيف المشاريع المكتملة (ATTACH)؛ الافتراضي archive.db بجوار القاعدة الرئيسية
+    # ويُعطّل تلقائياً لقاعدة بيانات في الذاكرة
+    ARCHIVE_DATABASE_PATH = os.environ.get('ARCHIVE_DATABASE_PATH')
+
+    # النسخ الاحتياطي: دفعات من BACKUP_STEP_PAGES صفحة مع توقف BACKUP_STEP_SLEEP ثانية بينها،
+    # والاحتفاظ بآخر BACKUP_RETAIN_FULL سلسلة (لقطة كاملة وتزايدياتها)
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', os.path.join(BASE_DIR, 'database', 'backups'))
+    BACKUP_COMPRESSION = 'zstd'  # zstd | gzip (gzip إذا لم تكن zstandard مثبتة)
+    BACKUP_STEP_PAGES = 256
+    BACKUP_STEP_SLEEP = 0.005
+    BACKUP_MAX_CHAIN = 24
+    BACKUP_RETAIN_FULL = 7
+    BACKUP_LOCK_TTL = 3600
+
+    # وضع ASGI (src.asgi): الافتراضي نفس DATABASE_URL بمشغل غير متزامن (aiosqlite)؛
+    # خيوط لـ bcrypt، وخيوط للمسارات الممررة إلى Flask
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASYNC_POOL_SIZE = 10
+    ASYNC_CPU_WORKERS = 4
+    ASYNC_WSGI_WORKERS = 8
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    AUTO_MIGRATE = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    AUTO_MIGRATE = True
+    RATELIMIT_ENABLED = False
+
+
+CONFIGS = {
+    'production': Config,
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+}
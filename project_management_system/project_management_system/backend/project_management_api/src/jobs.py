@@ -0,0 +1,382 @@
+"""
+طابور مهام خلفية دائم في جدول job بقاعدة التطبيق (بدون وسيط خارجي)
+
+- enqueue يضيف الصف في جلسة الطلب، فيُلتزم به مع بقية تغييراته أو لا يُلتزم
+  إطلاقاً، ويبقى بعد إعادة تشغيل العمليات.
+- الحجز عبارة واحدة UPDATE ... WHERE id = (SELECT ... LIMIT 1) RETURNING بالأولوية
+  ثم الموعد: SQLite ينفذها تحت قفل الكتابة فلا يحجز عاملان المهمة نفسها.
+  الحجز إيجار (lease) مدته JOB_LEASE_SECONDS يمدده نبض العامل؛ إن توقف العامل
+  فجأة تعود المهمة إلى الطابور بعد انتهاء الإيجار.
+- الفشل يعيد المهمة بتأخير أسّي (JOB_BACKOFF_BASE * 2^(n-1) حتى JOB_BACKOFF_MAX)
+  حتى max_attempts ثم failed مع آخر خطأ.
+- نجاح المهمة يُلتزم به في معاملة عملها نفسها، بشرط أن العامل ما زال يملك الإيجار.
+
+- مع قواعد المؤسسات (src.tenancy) لكل قاعدة طابورها: العامل يمر على القاعدة
+  الافتراضية ومؤسسات العامل النشطة بالتناوب، أو كل المؤسسات مع --all-tenants،
+  ويتجاوز المؤسسة أثناء نقلها.
+
+التشغيل: عمال مستقلون من سطر الأوامر، أو JOB_INLINE_WORKERS خيطاً داخل عامل
+الويب عند تفعيله صراحة (تبدأ مع أول طلب وتتوقف مع src.main.shutdown):
+
+    flask --app src.main jobs worker --threads 4 --processes 2 --all-tenants
+    flask --app src.main jobs status --tenant acme
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, func, select, text
+
+from src.models.job import Job
+from src.models.user import db
+from src.tenancy import TenantNotFound, bind_engine, use_tenant
+
+Handler = namedtuple('Handler', ['fn', 'max_attempts', 'priority'])
+
+JOBS = {}
+
+ALL_TENANTS = '*'
+
+_CLAIM = (
+    "UPDATE job SET status = 'running', locked_by = :worker, locked_until = :until, attempts = attempts + 1 "
+    "WHERE id = (SELECT id FROM job WHERE status = 'queued' AND run_at <= :now {names}"
+    "ORDER BY priority DESC, run_at LIMIT 1) "
+    "RETURNING id, name, payload, attempts, max_attempts, created_by"
+)
+_COMPLETE = text(
+    "UPDATE job SET status = 'succeeded', result = :result, locked_by = NULL, locked_until = NULL, "
+    "finished_at = :finished_at WHERE id = :id AND locked_by = :worker AND status = 'running'"
+)
+_RETRY = text(
+    "UPDATE job SET status = :status, run_at = :run_at, last_error = :error, locked_by = NULL, "
+    "locked_until = NULL, finished_at = :finished_at WHERE id = :id AND locked_by = :worker AND status = 'running'"
+)
+_HEARTBEAT = text(
+    "UPDATE job SET locked_until = :until WHERE locked_by = :worker AND status = 'running' AND id IN :ids"
+).bindparams(bindparam('ids', expanding=True))
+_REAP = text(
+    "UPDATE job SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+    "finished_at = CASE WHEN attempts >= max_attempts THEN :finished_at END, "
+    "last_error = 'انتهى إيجار العامل قبل إكمال المهمة', locked_by = NULL, locked_until = NULL "
+    "WHERE status = 'running' AND locked_until < :now"
+)
+_PRUNE = text("DELETE FROM job WHERE status IN ('succeeded', 'failed') AND finished_at < :cutoff")
+
+
+class JobError(Exception):
+    """فشل نهائي: لا تُعاد المحاولة"""
+
+
+def job(name, max_attempts=None, priority=0):
+    """تسجيل دالة مهمة تستقبل حقول payload كمعاملات مسماة"""
+    def decorator(fn):
+        JOBS[name] = Handler(fn, max_attempts, priority)
+        return fn
+    return decorator
+
+
+def enqueue(name, payload=None, priority=None, delay=0, key=None, created_by=None, max_attempts=None):
+    """إضافة مهمة في جلسة db الحالية (يلتزم بها المستدعي)؛ مع key تُعاد المهمة النشطة إن وُجدت"""
+    if name not in JOBS:
+        raise ValueError(f'مهمة غير معروفة: {name}')
+    handler = JOBS[name]
+    if key is not None:
+        active = db.session.scalar(select(Job).where(Job.key == key, Job.status.in_(('queued', 'running'))))
+        if active is not None:
+            return active
+
+    entry = Job(
+        name=name,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        priority=handler.priority if priority is None else priority,
+        key=key,
+        max_attempts=max_attempts or handler.max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_at=time.time() + delay,
+        created_by=created_by,
+    )
+    db.session.add(entry)
+    return entry
+
+
+def backoff(attempts, base, maximum):
+    # تذبذب عشوائي حتى لا تعود المهام الفاشلة معاً في اللحظة نفسها
+    return min(base * 2 ** (attempts - 1), maximum) * (0.5 + random.random() / 2)
+
+
+class Worker:
+    """خيوط تحجز المهام وتنفذها، وخيط نبض يمدد إيجار المهام الجارية"""
+
+    def __init__(self, app, threads=1, names=None, tenants=None):
+        config = app.config
+        self.app = app
+        self.threads = threads
+        self.names = list(names) if names else None
+        # None: القاعدة الافتراضية والمؤسسات النشطة في العامل؛ ALL_TENANTS؛ أو قائمة معرفات
+        self.tenants = tenants
+        self.lease = config['JOB_LEASE_SECONDS']
+        self.poll_interval = config['JOB_POLL_INTERVAL']
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._stop = threading.Event()
+        self._running = {}  # معرف الخيط -> (المؤسسة، معرف المهمة)
+        self._threads = []
+        self._next_maintenance = 0
+        self._turn = 0
+
+    def start(self):
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._loop, daemon=True, name=f'jobs-{i}')
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True, name='jobs-heartbeat')
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        return self
+
+    def stop(self, wait=True):
+        """إيقاف الحجز؛ المهام الجارية تكتمل قبل الخروج"""
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def shutdown(self, timeout=None):
+        """إيقاف العامل المضمّن في عامل الويب: لا يبدأ بعدها، وتكتمل المهام الجارية"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self._stop.set())
+        while not self._stop.wait(1):
+            pass
+        self.stop()
+
+    # --- الحجز والتنفيذ ---
+
+    def claim(self):
+        names = 'AND name IN :names ' if self.names else ''
+        statement = text(_CLAIM.format(names=names))
+        params = {'worker': self.worker_id, 'now': time.time(), 'until': time.time() + self.lease}
+        if self.names:
+            statement = statement.bindparams(bindparam('names', expanding=True))
+            params['names'] = self.names
+        with bind_engine().begin() as conn:
+            return conn.execute(statement, params).first()
+
+    def shards(self):
+        """المؤسسات التي يخدمها العامل (None للقاعدة الافتراضية)، بترتيب متناوب"""
+        router = self.app.extensions.get('tenancy')
+        if router is None:
+            return [None]
+        if self.tenants == ALL_TENANTS:
+            tenants = [None, *router.tenant_ids()]
+        elif self.tenants:
+            tenants = list(self.tenants)
+        else:
+            tenants = [None, *router.open_tenants()]
+        # بداية مختلفة في كل دورة حتى لا يستأثر طابور واحد بالعامل
+        self._turn += 1
+        start = self._turn % len(tenants)
+        return tenants[start:] + tenants[:start]
+
+    @contextmanager
+    def _tenant(self, tenant_id):
+        """use_tenant؛ يعيد False لمؤسسة حُذفت أو قيد النقل"""
+        if tenant_id is not None:
+            found = self.app.extensions['tenancy'].lookup(tenant_id)
+            if found is None or found[1] != 'active':
+                yield False
+                return
+        with use_tenant(tenant_id):
+            yield True
+
+    def run_once(self):
+        """حجز مهمة واحدة وتنفيذها؛ يعيد False إذا كانت كل الطوابير فارغة"""
+        with self.app.app_context():
+            for tenant_id in self.shards():
+                with self._tenant(tenant_id) as available:
+                    row = self.claim() if available else None
+                    if row is None:
+                        continue
+                    self._running[threading.get_ident()] = (tenant_id, row.id)
+                    try:
+                        self._execute(row)
+                    finally:
+                        self._running.pop(threading.get_ident(), None)
+                    return True
+            return False
+
+    def _execute(self, row):
+        config = self.app.config
+        # سجل النشاط: المهمة تُنسب لمن أنشأها
+        db.session.info['actor_id'] = row.created_by
+        try:
+            handler = JOBS.get(row.name)
+            if handler is None:
+                raise JobError(f'مهمة غير معروفة: {row.name}')
+            result = handler.fn(**json.loads(row.payload or '{}'))
+            completed = db.session.execute(_COMPLETE, {
+                'id': row.id, 'worker': self.worker_id, 'finished_at': datetime.utcnow(),
+                'result': json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+            }).rowcount
+            if completed:
+                db.session.commit()
+            else:
+                # انتهى الإيجار وحجزها عامل آخر: يُلغى عمل هذه المحاولة
+                db.session.rollback()
+                self.app.logger.warning('job %s lease lost, discarding result', row.id)
+        except Exception as e:
+            db.session.rollback()
+            final = isinstance(e, JobError) or row.attempts >= row.max_attempts
+            if not final:
+                self.app.logger.warning('job %s (%s) failed, retrying: %s', row.id, row.name, e)
+            else:
+                self.app.logger.error('job %s (%s) failed permanently: %s', row.id, row.name, e)
+            delay = 0 if final else backoff(row.attempts, config['JOB_BACKOFF_BASE'], config['JOB_BACKOFF_MAX'])
+            with bind_engine().begin() as conn:
+                conn.execute(_RETRY, {
+                    'id': row.id, 'worker': self.worker_id,
+                    'status': 'failed' if final else 'queued', 'run_at': time.time() + delay,
+                    'error': ''.join(traceback.format_exception_only(e)).strip()[:2000],
+                    'finished_at': datetime.utcnow() if final else None,
+                })
+        finally:
+            db.session.info.pop('actor_id', None)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+                self._maintenance()
+            except Exception:
+                self.app.logger.exception('job worker error')
+            self._stop.wait(self.poll_interval)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease / 3):
+            running = {}
+            for tenant_id, job_id in list(self._running.values()):
+                running.setdefault(tenant_id, []).append(job_id)
+            for tenant_id, ids in running.items():
+                try:
+                    with self.app.app_context(), use_tenant(tenant_id), bind_engine().begin() as conn:
+                        conn.execute(_HEARTBEAT, {'until': time.time() + self.lease, 'worker': self.worker_id,
+                                                  'ids': ids})
+                except Exception:
+                    self.app.logger.exception('job heartbeat failed')
+
+    def _maintenance(self):
+        """إعادة مهام العمال المتوقفين إلى الطابور وحذف المنتهية القديمة (كل دقيقة على الأكثر)"""
+        if time.monotonic() < self._next_maintenance:
+            return
+        self._next_maintenance = time.monotonic() + 60
+        with self.app.app_context():
+            for tenant_id in self.shards():
+                with self._tenant(tenant_id) as available:
+                    if not available:
+                        continue
+                    with bind_engine().begin() as conn:
+                        conn.execute(_REAP, {'now': time.time(), 'finished_at': datetime.utcnow()})
+                        conn.execute(_PRUNE, {
+                            'cutoff': datetime.utcnow() - timedelta(days=self.app.config['JOB_RETENTION_DAYS'])
+                        })
+
+
+def queue_stats():
+    rows = db.session.execute(select(Job.name, Job.status, func.count()).group_by(Job.name, Job.status)).all()
+    stats = {}
+    for name, status, count in rows:
+        stats.setdefault(name, {})[status] = count
+    return stats
+
+
+def init_jobs(app):
+    app.cli.add_command(jobs_cli)
+    threads = app.config['JOB_INLINE_WORKERS']
+    if not threads or app.config.get('TESTING'):
+        return None
+
+    # تبدأ مع أول طلب حتى لا تبدأ في عمليات سطر الأوامر (ومنها jobs worker نفسه)
+    worker = Worker(app, threads)
+    lock = threading.Lock()
+
+    def start_worker():
+        if worker._threads or worker._stop.is_set():
+            return
+        with lock:
+            if not worker._threads and not worker._stop.is_set():
+                worker.start()
+
+    app.before_request(start_worker)
+    app.extensions['jobs'] = worker
+    return worker
+
+
+def _process_main(threads, names, tenants):
+    from src.main import create_app
+    Worker(create_app(), threads, names, tenants).run_forever()
+
+
+jobs_cli = AppGroup('jobs', help='طابور المهام الخلفية')
+
+
+@jobs_cli.command('worker')
+@click.option('--threads', type=int, default=None, help='خيوط التنفيذ لكل عملية')
+@click.option('--processes', type=int, default=1, help='عدد العمليات (كل منها بخيوطه)')
+@click.option('--queue', 'names', multiple=True, help='تنفيذ هذه المهام فقط (يتكرر)')
+@click.option('--tenant', 'tenants', multiple=True, help='طوابير هذه المؤسسات فقط (يتكرر)')
+@click.option('--all-tenants', is_flag=True, help='القاعدة الافتراضية وكل المؤسسات في الدليل')
+def worker_command(threads, processes, names, tenants, all_tenants):
+    """تشغيل عمال الطابور حتى SIGTERM/SIGINT (تكتمل المهام الجارية أولاً)"""
+    threads = threads or current_app.config['JOB_WORKER_THREADS']
+    tenants = ALL_TENANTS if all_tenants else list(tenants) or None
+    if processes <= 1:
+        click.echo(f'عامل الطابور: {threads} خيط (pid {os.getpid()})')
+        Worker(current_app._get_current_object(), threads, names, tenants).run_forever()
+        return
+
+    context = multiprocessing.get_context('spawn')
+    children = [context.Process(target=_process_main, args=(threads, names, tenants), name=f'jobs-{i}')
+                for i in range(processes)]
+    for child in children:
+        child.start()
+    click.echo(f'عمال الطابور: {processes} عملية × {threads} خيط')
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+@jobs_cli.command('status')
+@click.option('--tenant', 'tenant_id', default=None, help='طابور هذه المؤسسة بدلاً من الافتراضي')
+def status_command(tenant_id):
+    """عدد المهام لكل اسم وحالة"""
+    try:
+        with use_tenant(tenant_id):
+            stats = queue_stats()
+    except TenantNotFound as e:
+        raise click.ClickException(str(e))
+    for name, counts in sorted(stats.items()):
+        click.echo(f"{name}: " + ', '.join(f'{status}={count}' for status, count in sorted(counts.items())))
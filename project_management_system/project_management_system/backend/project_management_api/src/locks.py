@@ -0,0 +1,52 @@
+"""
+أقفال استشارية بين العمال مخزنة في جدول advisory_lock
+
+SQLite لا يوفر pg_advisory_lock، لذلك القفل سطر له مالك ومدة صلاحية (lease):
+يُحجز بعملية upsert واحدة تنجح فقط إذا لم يكن القفل موجوداً أو انتهت صلاحيته،
+فإذا توقف العامل الحامل للقفل فجأة يتحرر القفل تلقائياً بعد ttl ثانية.
+"""
+
+import time
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from src.tenancy import bind_engine
+
+_ACQUIRE = text(
+    'INSERT INTO advisory_lock (name, owner, expires_at) VALUES (:name, :owner, :expires_at) '
+    'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+    'WHERE advisory_lock.expires_at < :now OR advisory_lock.owner = excluded.owner'
+)
+_RELEASE = text('DELETE FROM advisory_lock WHERE name = :name AND owner = :owner')
+
+
+def acquire(name, ttl, owner=None):
+    """محاولة حجز القفل؛ يعيد معرف المالك عند النجاح أو None"""
+    owner = owner or str(uuid.uuid4())
+    now = time.time()
+    with bind_engine().begin() as conn:
+        result = conn.execute(_ACQUIRE, {'name': name, 'owner': owner, 'expires_at': now + ttl, 'now': now})
+    return owner if result.rowcount == 1 else None
+
+
+def extend(name, owner, ttl):
+    """تمديد صلاحية قفل محجوز (للمهام الطويلة)"""
+    return acquire(name, ttl, owner=owner) is not None
+
+
+def release(name, owner):
+    with bind_engine().begin() as conn:
+        conn.execute(_RELEASE, {'name': name, 'owner': owner})
+
+
+@contextmanager
+def advisory_lock(name, ttl=900):
+    """with advisory_lock('name') as acquired: ... ؛ acquired يكون False إذا كان القفل محجوزاً"""
+    owner = acquire(name, ttl)
+    try:
+        yield owner is not None
+    finally:
+        if owner is not None:
+            release(name, owner)
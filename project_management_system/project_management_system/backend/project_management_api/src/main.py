@@ -3,62 +3,146 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from src.models.user import db
-from src.routes.user import user_bp
-from src.routes.auth import auth_bp
-from src.routes.project import project_bp
-from src.routes.task import task_bp
-from src.routes.notification import notification_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-app.config['JWT_SECRET_KEY'] = 'jwt-secret-string-change-this-in-production'
-
-# تمكين CORS للسماح بالطلبات من الواجهة الأمامية
-CORS(app)
-
-# تهيئة JWT
-jwt = JWTManager(app)
-
-# تسجيل المسارات
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(project_bp, url_prefix='/api')
-app.register_blueprint(task_bp, url_prefix='/api')
-app.register_blueprint(notification_bp, url_prefix='/api')
-
-# تهيئة قاعدة البيانات
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-with app.app_context():
-    # استيراد جميع النماذج لضمان إنشاء الجداول
-    from src.models.project import Project, ProjectMember
-    from src.models.task import Task, Comment, TaskAttachment, Dependency
-    from src.models.notification import Notification
-    
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+import time
+
+from flask import Flask
+
+
+def create_app(config=None):
+    """إنشاء تطبيق Flask
+
+    config يمكن أن يكون اسم بيئة ('production' أو 'development' أو 'testing')،
+    أو صنف إعدادات، أو قاموس قيم تُطبّق فوق الإعدادات الافتراضية.
+    الإقلاع لا يلمس قاعدة البيانات إلا إذا كان AUTO_MIGRATE مفعلاً.
+    """
+    started = time.perf_counter()
+
+    # الاستيرادات داخل المصنع حتى لا يكلّف استيراد الوحدة شيئاً
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from src.config import CONFIGS, Config
+    from src.migrations import db_cli
+    from src.backup import backup_cli
+    from src.services.importer import import_cli
+    from src.static_assets import init_static_assets
+    from src.compression import init_compression
+    from src.ratelimit import init_ratelimit
+    from src.profiler import init_profiler
+    from src.cache import init_cache
+    from src.services.reminders import init_reminders
+    from src.services.activity import init_activity
+    from src.jobs import init_jobs
+    from src.services.archive import init_archive
+    from src.sqlite import init_sqlite
+    from src.replicas import init_read_routing
+    from src.tenancy import init_tenancy
+    from src.models.user import db
+    from src.routes.user import user_bp
+    from src.routes.auth import auth_bp
+    from src.routes.project import project_bp
+    from src.routes.task import task_bp
+    from src.routes.notification import notification_bp
+    from src.routes.workload import workload_bp
+    from src.routes.admin import admin_bp
+    from src.routes.job import job_bp
+    import src.services.invalidation  # noqa: F401 (تسجيل مستمع إبطال الذاكرة المؤقتة)
+
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+
+    if config is None:
+        config = os.environ.get('APP_CONFIG', 'production')
+    if isinstance(config, str):
+        app.config.from_object(CONFIGS[config])
+    elif isinstance(config, dict):
+        app.config.from_object(Config)
+        app.config.update(config)
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+        app.config.from_object(config)
+
+    # تمكين CORS للسماح بالطلبات من الواجهة الأمامية
+    CORS(app)
+
+    # تهيئة JWT
+    JWTManager(app)
+
+    # مخزن الذاكرة المؤقتة (داخل العامل أو مشترك بين العمال)
+    init_cache(app)
+
+    # تحديد معدل الطلبات ورفض الحمل الزائد بـ 429
+    init_ratelimit(app)
+
+    # محلل الأداء بأخذ العينات (متوقف حتى يشغله مسؤول)
+    init_profiler(app)
+
+    # ضغط استجابات JSON حسب Accept-Encoding
+    init_compression(app)
+
+    # تسجيل المسارات
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(project_bp, url_prefix='/api')
+    app.register_blueprint(task_bp, url_prefix='/api')
+    app.register_blueprint(notification_bp, url_prefix='/api')
+    app.register_blueprint(workload_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(job_bp, url_prefix='/api')
+
+    # تهيئة قاعدة البيانات (بدون create_all؛ المخطط تديره الترحيلات)
+    db.init_app(app)
+    init_sqlite(app)
+    # طلبات القراءة على محركات القراءة والكتابة على الرئيسية
+    init_read_routing(app)
+    # قاعدة بيانات لكل مؤسسة حسب رمز JWT أو X-Tenant
+    init_tenancy(app)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(backup_cli)
+
+    if app.config.get('AUTO_MIGRATE'):
+        from src.migrations import upgrade
+        with app.app_context():
+            upgrade(db.engine)
+
+    # ربط قاعدة بيانات الأرشيف بكل اتصال (بعد ترحيلات الإقلاع لتُنسخ الجداول كاملة)
+    init_archive(app)
+
+    # تذكيرات المواعيد النهائية (سطر الأوامر والمسح الدوري الاختياري)
+    init_reminders(app)
+
+    # سجل نشاط المشاريع (كتابة الأحداث على دفعات من خيط خلفي)
+    init_activity(app)
+
+    # طابور المهام الخلفية (سطر الأوامر والعمال داخل عامل الويب)
+    init_jobs(app)
+
+    # الملفات الثابتة من بيان في الذاكرة (بدون stat لكل طلب)
+    init_static_assets(app)
+
+    boot_ms = (time.perf_counter() - started) * 1000
+    app.extensions['boot_time_ms'] = boot_ms
+    app.logger.info('create_app: %.1fms', boot_ms)
+
+    return app
+
+
+def shutdown(app, timeout=None):
+    """إيقاف خيوط التطبيق الخلفية (عمال الطابور المضمّنون، سجل النشاط) وإغلاق الاتصالات
+
+    لمن ينشئ تطبيقات ويتخلص منها في العملية نفسها (الاختبارات، benchmarks)؛
+    عامل الويب العادي لا يحتاجها.
+    """
+    from src.models.user import db
+
+    worker = app.extensions.get('jobs')
+    if worker is not None:
+        worker.shutdown(timeout)
+    log = app.extensions.get('activity')
+    if log is not None:
+        log.shutdown(timeout)
+    with app.app_context():
+        db.engine.dispose()
 
 
 if __name__ == '__main__':
+    app = create_app('development')
     app.run(host='0.0.0.0', port=5000, debug=True)
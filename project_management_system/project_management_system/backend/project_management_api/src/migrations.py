@@ -0,0 +1,333 @@
+"""
+ترحيلات مخطط قاعدة البيانات ذات الإصدارات
+
+كل ترحيل له رقم إصدار ثابت ويُسجّل في جدول schema_migrations بعد تطبيقه،
+فلا يُعاد تنفيذه ولا يحتاج الإقلاع إلى فحص المخطط. التشغيل مرة واحدة عند النشر:
+
+    flask --app src.main db upgrade
+    python -m src.migrations
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+
+Migration = namedtuple('Migration', ['version', 'name', 'apply'])
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """تسجيل دالة ترحيل تستقبل اتصال SQLAlchemy"""
+    def decorator(fn):
+        MIGRATIONS.append(Migration(version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return decorator
+
+
+_INITIAL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS user (
+        id VARCHAR(36) NOT NULL,
+        username VARCHAR(80) NOT NULL,
+        email VARCHAR(120) NOT NULL,
+        password_hash VARCHAR(128) NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (username),
+        UNIQUE (email)
+    )""",
+    """CREATE TABLE IF NOT EXISTS notification (
+        id VARCHAR(36) NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        message TEXT NOT NULL,
+        type VARCHAR(14) NOT NULL,
+        is_read BOOLEAN,
+        created_at DATETIME,
+        related_entity_id VARCHAR(36),
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS project (
+        id VARCHAR(36) NOT NULL,
+        name VARCHAR(200) NOT NULL,
+        description TEXT,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        owner_id VARCHAR(36) NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES user (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS project_member (
+        project_id VARCHAR(36) NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        role VARCHAR(6),
+        joined_at DATETIME,
+        PRIMARY KEY (project_id, user_id),
+        FOREIGN KEY(project_id) REFERENCES project (id),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS task (
+        id VARCHAR(36) NOT NULL,
+        project_id VARCHAR(36) NOT NULL,
+        parent_task_id VARCHAR(36),
+        name VARCHAR(200) NOT NULL,
+        description TEXT,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        assigned_to VARCHAR(36),
+        status VARCHAR(11),
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(project_id) REFERENCES project (id),
+        FOREIGN KEY(parent_task_id) REFERENCES task (id),
+        FOREIGN KEY(assigned_to) REFERENCES user (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS comment (
+        id VARCHAR(36) NOT NULL,
+        task_id VARCHAR(36) NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        content TEXT NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(task_id) REFERENCES task (id),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS dependency (
+        id VARCHAR(36) NOT NULL,
+        predecessor_task_id VARCHAR(36) NOT NULL,
+        successor_task_id VARCHAR(36) NOT NULL,
+        type VARCHAR(16),
+        PRIMARY KEY (id),
+        CONSTRAINT unique_dependency UNIQUE (predecessor_task_id, successor_task_id),
+        FOREIGN KEY(predecessor_task_id) REFERENCES task (id),
+        FOREIGN KEY(successor_task_id) REFERENCES task (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS task_attachment (
+        id VARCHAR(36) NOT NULL,
+        task_id VARCHAR(36) NOT NULL,
+        file_name VARCHAR(255) NOT NULL,
+        file_path VARCHAR(500) NOT NULL,
+        uploaded_by VARCHAR(36) NOT NULL,
+        uploaded_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(task_id) REFERENCES task (id),
+        FOREIGN KEY(uploaded_by) REFERENCES user (id)
+    )""",
+]
+
+
+@migration(1, 'initial_schema')
+def _initial_schema(conn):
+    # IF NOT EXISTS يجعل الترحيل آمناً على قواعد البيانات التي أنشأتها create_all سابقاً
+    for statement in _INITIAL_SCHEMA:
+        conn.exec_driver_sql(statement)
+
+
+@migration(2, 'due_date_indexes')
+def _due_date_indexes(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_task_end_date_status ON task (end_date, status)')
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_notification_related_type ON notification (related_entity_id, type)'
+    )
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS advisory_lock ('
+        'name VARCHAR(100) PRIMARY KEY, owner VARCHAR(36) NOT NULL, expires_at FLOAT NOT NULL)'
+    )
+
+
+@migration(3, 'workload_index')
+def _workload_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_task_assigned_start ON task (assigned_to, start_date)')
+
+
+@migration(4, 'timeline_index')
+def _timeline_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_task_project_dates ON task (project_id, start_date, end_date)')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_task_parent ON task (parent_task_id)')
+
+
+@migration(5, 'dependency_successor_index')
+def _dependency_successor_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_dependency_successor ON dependency (successor_task_id)')
+
+
+@migration(6, 'comment_task_index')
+def _comment_task_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_comment_task ON comment (task_id)')
+
+
+@migration(7, 'archived_project')
+def _archived_project(conn):
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS archived_project ('
+        'project_id VARCHAR(36) NOT NULL, name VARCHAR(200) NOT NULL, owner_id VARCHAR(36) NOT NULL, '
+        'archived_at DATETIME, PRIMARY KEY (project_id), FOREIGN KEY(owner_id) REFERENCES user (id))'
+    )
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_archived_project_owner ON archived_project (owner_id)')
+
+
+@migration(8, 'user_search_columns')
+def _user_search_columns(conn):
+    add_column(conn, 'user', 'username_normalized', 'VARCHAR(80)')
+    add_column(conn, 'user', 'email_normalized', 'VARCHAR(120)')
+    # التطبيع في بايثون لا بـ lower(): lower في SQLite لا يعالج إلا ASCII
+    from src.models.user import normalize
+    rows = conn.exec_driver_sql('SELECT id, username, email FROM "user"').all()
+    for user_id, username, email in rows:
+        conn.exec_driver_sql(
+            'UPDATE "user" SET username_normalized = ?, email_normalized = ? WHERE id = ?',
+            (normalize(username), normalize(email), user_id),
+        )
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_user_username_normalized ON "user" (username_normalized)')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_user_email_normalized ON "user" (email_normalized)')
+
+
+@migration(9, 'my_tasks_index')
+def _my_tasks_index(conn):
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_task_assigned_status_end ON task (assigned_to, status, end_date)'
+    )
+
+
+@migration(10, 'activity_event')
+def _activity_event(conn):
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS activity_event ('
+        'seq INTEGER NOT NULL, project_id VARCHAR(36) NOT NULL, entity_type VARCHAR(20) NOT NULL, '
+        'entity_id VARCHAR(80) NOT NULL, action VARCHAR(10) NOT NULL, actor_id VARCHAR(36), '
+        'changes TEXT, created_at DATETIME NOT NULL, PRIMARY KEY (seq))'
+    )
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_activity_project_seq ON activity_event (project_id, seq)')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_activity_created ON activity_event (created_at)')
+
+
+@migration(11, 'job_queue')
+def _job_queue(conn):
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS job ('
+        'id VARCHAR(36) NOT NULL, name VARCHAR(100) NOT NULL, payload TEXT, status VARCHAR(20) NOT NULL, '
+        'priority INTEGER NOT NULL, "key" VARCHAR(200), attempts INTEGER NOT NULL, max_attempts INTEGER NOT NULL, '
+        'run_at FLOAT NOT NULL, locked_by VARCHAR(100), locked_until FLOAT, last_error TEXT, result TEXT, '
+        'created_by VARCHAR(36), created_at DATETIME, finished_at DATETIME, '
+        'PRIMARY KEY (id), FOREIGN KEY(created_by) REFERENCES user (id))'
+    )
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_job_claim ON job (status, priority DESC, run_at)')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_job_key ON job ("key")')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_job_created_by ON job (created_by, created_at)')
+
+
+@migration(12, 'tenant_directory')
+def _tenant_directory(conn):
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS tenant ('
+        'id VARCHAR(64) NOT NULL, name VARCHAR(200) NOT NULL, shard VARCHAR(500) NOT NULL, '
+        'status VARCHAR(20) NOT NULL, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id))'
+    )
+
+
+@migration(13, 'task_version')
+def _task_version(conn):
+    add_column(conn, 'task', 'version', 'INTEGER NOT NULL DEFAULT 1')
+
+
+def _column_names(conn, table):
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+
+
+def add_column(conn, table, column, ddl):
+    """إضافة عمود إذا لم يكن موجوداً (SQLite لا يدعم ADD COLUMN IF NOT EXISTS)"""
+    if column not in _column_names(conn, table):
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at DATETIME NOT NULL)'
+        )
+
+
+def applied_versions(engine):
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.exec_driver_sql('SELECT version FROM schema_migrations')}
+
+
+def current_version(engine):
+    return max(applied_versions(engine), default=0)
+
+
+def upgrade(engine, target=None, log=None):
+    """تطبيق الترحيلات المعلقة بالترتيب وإرجاع قائمة الإصدارات المطبقة
+
+    يُدرج سطر الإصدار أولاً ليبدأ معاملة كتابة تحجز القفل، ثم يُنفّذ DDL داخل
+    نفس المعاملة. إذا شغّل عاملان الترحيل معاً ينتظر الثاني ثم يفشل إدراجه
+    بتعارض المفتاح فيتجاوز الإصدار الذي طبّقه الأول.
+    """
+    done = applied_versions(engine)
+    applied = []
+
+    for item in MIGRATIONS:
+        if item.version in done or (target is not None and item.version > target):
+            continue
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    'INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)',
+                    (item.version, item.name, datetime.utcnow()),
+                )
+                item.apply(conn)
+        except IntegrityError:
+            continue
+        applied.append(item.version)
+        if log:
+            log(f'{item.version:04d} {item.name} ({(time.perf_counter() - started) * 1000:.1f}ms)')
+
+    return applied
+
+
+db_cli = AppGroup('db', help='إدارة مخطط قاعدة البيانات')
+
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='التوقف عند هذا الإصدار')
+def upgrade_command(target):
+    """تطبيق الترحيلات المعلقة"""
+    from src.models.user import db
+
+    applied = upgrade(db.engine, target=target, log=click.echo)
+    click.echo(f'الإصدار الحالي: {current_version(db.engine)} (طُبّق {len(applied)} ترحيل)')
+
+
+@db_cli.command('current')
+def current_command():
+    """عرض إصدار المخطط الحالي والترحيلات المعلقة"""
+    from src.models.user import db
+
+    done = applied_versions(db.engine)
+    click.echo(f'الإصدار الحالي: {max(done, default=0)}')
+    for item in MIGRATIONS:
+        if item.version not in done:
+            click.echo(f'معلق: {item.version:04d} {item.name}')
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.main import create_app
+    from src.models.user import db
+
+    with create_app().app_context():
+        upgrade(db.engine, log=print)
@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from src.models.user import db
+
+class ActivityEvent(db.Model):
+    """سجل تغييرات المشروع (إضافة فقط)؛ seq تسلسل متزايد يُرتّب به السجل ويُرقّم"""
+    __tablename__ = 'activity_event'
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    project_id = db.Column(db.String(36), nullable=False)
+    entity_type = db.Column(db.String(20), nullable=False)  # task | dependency | comment | member | project
+    entity_id = db.Column(db.String(80), nullable=False)
+    action = db.Column(db.String(10), nullable=False)  # create | update | delete
+    actor_id = db.Column(db.String(36), nullable=True)
+    changes = db.Column(db.Text, nullable=True)  # JSON: {الحقل: [القديم، الجديد]} للتحديث
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # سجل المشروع: ترقيم keyset على seq داخل المشروع
+        db.Index('ix_activity_project_seq', 'project_id', 'seq'),
+        # التقليم بعمر السجل
+        db.Index('ix_activity_created', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'project_id': self.project_id,
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'action': self.action,
+            'actor_id': self.actor_id,
+            'changes': json.loads(self.changes) if self.changes else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+import uuid
+from src.models.user import db
+
+class Job(db.Model):
+    """مهمة خلفية في طابور src.jobs؛ run_at وlocked_until بثواني epoch"""
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=True)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued | running | succeeded | failed
+    priority = db.Column(db.Integer, nullable=False, default=0)  # الأعلى أولاً
+    key = db.Column(db.String(200), nullable=True)  # منع تكرار مهمة نشطة بالمفتاح نفسه
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.Float, nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.Float, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON
+    created_by = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # الحجز: أول مهمة جاهزة بالأولوية ثم الموعد من الفهرس مباشرة
+        db.Index('ix_job_claim', 'status', db.text('priority DESC'), 'run_at'),
+        db.Index('ix_job_key', 'key'),
+        db.Index('ix_job_created_by', 'created_by', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': json.loads(self.payload) if self.payload else None,
+            'status': self.status,
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': datetime.utcfromtimestamp(self.run_at).isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'result': json.loads(self.result) if self.result else None,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -12,6 +12,11 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     related_entity_id = db.Column(db.String(36), nullable=True)  # للربط مع المهمة أو المشروع أو التعليق
 
+    __table_args__ = (
+        # منع تكرار التذكيرات لنفس الكيان
+        db.Index('ix_notification_related_type', 'related_entity_id', 'type'),
+    )
+
     def __repr__(self):
         return f'<Notification {self.type} for user {self.user_id}>'
 
@@ -47,3 +47,21 @@ class ProjectMember(db.Model):
             'joined_at': self.joined_at.isoformat() if self.joined_at else None
         }
 
+
+class ArchivedProject(db.Model):
+    """سجل المشاريع المنقولة إلى قاعدة بيانات الأرشيف (يبقى في القاعدة الرئيسية)"""
+    __tablename__ = 'archived_project'
+    project_id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    owner_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_archived_project_owner', 'owner_id'),)
+
+    def to_dict(self):
+        return {
+            'project_id': self.project_id,
+            'name': self.name,
+            'owner_id': self.owner_id,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
@@ -15,6 +15,22 @@ class Task(db.Model):
     status = db.Column(db.Enum('not_started', 'in_progress', 'completed', 'on_hold', name='task_status'), default='not_started')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # يزيد مع كل تعديل؛ ETag للمهمة وشرط If-Match (src.services.task_writes)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __table_args__ = (
+        # فحص المواعيد النهائية: نطاق على end_date مع تصفية الحالة من الفهرس نفسه
+        db.Index('ix_task_end_date_status', 'end_date', 'status'),
+        # حمل العمل: مهام المستخدم المتقاطعة مع نطاق زمني
+        db.Index('ix_task_assigned_start', 'assigned_to', 'start_date'),
+        # صندوق مهامي: مهام المستخدم بحالة معينة مرتبة بتاريخ الانتهاء
+        db.Index('ix_task_assigned_status_end', 'assigned_to', 'status', 'end_date'),
+        # مخطط جانت: تقاطع المهام مع نافذة زمنية داخل المشروع
+        db.Index('ix_task_project_dates', 'project_id', 'start_date', 'end_date'),
+        db.Index('ix_task_parent', 'parent_task_id'),
+    )
+    # تحديثات ORM وحذفها مشروطة بالإصدار المقروء وتزيده
+    __mapper_args__ = {'version_id_col': version}
 
     # العلاقات
     subtasks = db.relationship('Task', backref=db.backref('parent_task', remote_side=[id]), lazy=True)
@@ -44,7 +60,8 @@ class Task(db.Model):
             'assigned_to': self.assigned_to,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version': self.version
         }
 
 class Comment(db.Model):
@@ -54,6 +71,8 @@ class Comment(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_comment_task', 'task_id'),)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -88,7 +107,11 @@ class Dependency(db.Model):
     successor_task_id = db.Column(db.String(36), db.ForeignKey('task.id'), nullable=False)
     type = db.Column(db.Enum('finish_to_start', 'start_to_start', 'finish_to_finish', 'start_to_finish', name='dependency_type'), default='finish_to_start')
 
-    __table_args__ = (db.UniqueConstraint('predecessor_task_id', 'successor_task_id', name='unique_dependency'),)
+    __table_args__ = (
+        db.UniqueConstraint('predecessor_task_id', 'successor_task_id', name='unique_dependency'),
+        # التبعيات الداخلة إلى مهمة (إعادة الجدولة)؛ الخارجة يغطيها القيد الفريد
+        db.Index('ix_dependency_successor', 'successor_task_id'),
+    )
 
     def to_dict(self):
         return {
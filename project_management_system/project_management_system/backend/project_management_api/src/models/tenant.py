@@ -0,0 +1,24 @@
+from datetime import datetime
+from src.models.user import db
+
+class Tenant(db.Model):
+    """مؤسسة لها قاعدة بيانات مستقلة (src.tenancy)؛ الدليل في القاعدة الافتراضية فقط"""
+    id = db.Column(db.String(64), primary_key=True)  # معرف قصير يظهر في رمز JWT وترويسة X-Tenant
+    name = db.Column(db.String(200), nullable=False)
+    shard = db.Column(db.String(500), nullable=False)  # مسار ملف SQLite أو رابط SQLAlchemy
+    status = db.Column(db.String(20), nullable=False, default='active')  # active | moving
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Tenant {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'shard': self.shard,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -1,18 +1,34 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 from datetime import datetime
 import uuid
 import bcrypt
 
-db = SQLAlchemy()
+from src.replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def normalize(value):
+    """الصيغة المخزنة في *_normalized وصيغة بادئة البحث"""
+    return value.strip().casefold() if value is not None else None
+
 
 class User(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+    # نسخ مطبّعة (casefold) للبحث بالبادئة عبر فهرس بدلاً من lower() على كل صف
+    username_normalized = db.Column(db.String(80))
+    email_normalized = db.Column(db.String(120))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_user_username_normalized', 'username_normalized'),
+        db.Index('ix_user_email_normalized', 'email_normalized'),
+    )
+
     # العلاقات
     owned_projects = db.relationship('Project', backref='owner', lazy=True)
     project_memberships = db.relationship('ProjectMember', backref='user', lazy=True)
@@ -24,6 +40,11 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+    @validates('username', 'email')
+    def _normalize(self, key, value):
+        setattr(self, f'{key}_normalized', normalize(value))
+        return value
+
     def set_password(self, password):
         """تشفير كلمة المرور وحفظها"""
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -0,0 +1,167 @@
+"""
+محلل أداء بأخذ العينات للعامل الحي (للمسؤولين عبر /api/admin/profiler)
+
+- خيط خلفي يقرأ sys._current_frames() كل PROFILER_INTERVAL_MS ويسجل مكدس
+  الخيوط التي تخدم طلبات مُعلَّمة فقط: كل طلبات العامل، أو نسبة rate من طلبات
+  نقطة نهاية واحدة (مثل task.get_project_tasks). جذر كل مكدس اسم نقطة النهاية.
+- المكدسات تُجمع بصيغة collapsed (إطار;إطار;... عدد) التي يقرؤها flamegraph.pl
+  وspeedscope، أو شجرة JSON لـ d3-flame-graph.
+- متوقف: فحص علم واحد في before_request. يعمل: عينة كل فاصل مهما كان عدد
+  الطلبات، وحدود لعمق المكدس وعدد المكدسات المختلفة ومدة التشغيل
+  (PROFILER_MAX_DURATION) فيتوقف تلقائياً.
+الحالة لكل عامل: التشغيل والإيقاف والتنزيل تخص العامل الذي خدم الطلب (pid).
+في وضع ASGI لا تُحلل إلا المسارات المفوضة إلى Flask.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request
+
+TRUNCATED = '[truncated]'
+
+
+def _short_path(filename):
+    """flask/app.py و src/routes/task.py بدلاً من المسار الكامل"""
+    index = filename.rfind('site-packages' + os.sep)
+    if index != -1:
+        return filename[index + len('site-packages' + os.sep):]
+    index = filename.rfind(os.sep + 'src' + os.sep)
+    if index != -1:
+        return filename[index + 1:]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+
+    def __init__(self, max_stacks, max_depth):
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.running = False
+        self.endpoint = None
+        self.rate = 1.0
+        self.interval = None
+        self.started_at = None
+        self.stopped_at = None
+        self.samples = 0
+        self.stacks = Counter()
+        self._threads = {}  # معرف الخيط -> نقطة النهاية
+        self._labels = {}   # code -> "دالة (ملف:سطر)"
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # --- التحكم ---
+
+    def start(self, interval, duration, endpoint=None, rate=1.0):
+        with self._lock:
+            if self.running:
+                raise ValueError('المحلل يعمل بالفعل في هذا العامل')
+            self.endpoint, self.rate, self.interval = endpoint, rate, interval
+            self.stacks = Counter()
+            self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self.running = True
+            self._thread = threading.Thread(target=self._run, args=(duration,), daemon=True, name='profiler')
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'running': self.running,
+            'endpoint': self.endpoint,
+            'rate': self.rate,
+            'interval_ms': self.interval * 1000 if self.interval else None,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'samples': self.samples,
+            'stacks': len(self.stacks),
+            'truncated': sum(count for stack, count in self.stacks.items() if stack[-1] == TRUNCATED),
+        }
+
+    # --- خطافات الطلب ---
+
+    def before_request(self):
+        if not self.running:
+            return
+        if self.endpoint is not None and (request.endpoint != self.endpoint or random.random() >= self.rate):
+            return
+        self._threads[threading.get_ident()] = request.endpoint or request.path
+
+    def teardown_request(self, exc=None):
+        if self._threads:
+            self._threads.pop(threading.get_ident(), None)
+
+    # --- أخذ العينات ---
+
+    def _run(self, duration):
+        deadline = time.monotonic() + duration
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+                if self._threads:
+                    self._sample()
+        finally:
+            self.running = False
+            self._threads.clear()
+            self.stopped_at = time.time()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+        return label
+
+    def _sample(self):
+        frames = sys._current_frames()
+        for ident, endpoint in list(self._threads.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack = (endpoint, *reversed(labels))
+            if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                stack = (endpoint, TRUNCATED)
+            self.stacks[stack] += 1
+            self.samples += 1
+
+    # --- المخرجات ---
+
+    def collapsed(self):
+        """سطر لكل مكدس: الإطارات من الجذر مفصولة بـ ; ثم عدد العينات"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def tree(self):
+        """شجرة {name, value, children} لـ d3-flame-graph"""
+        root = {'name': 'root', 'value': 0, 'children': {}}
+        for stack, count in self.stacks.items():
+            root['value'] += count
+            node = root
+            for label in stack:
+                node = node['children'].setdefault(label, {'name': label, 'value': 0, 'children': {}})
+                node['value'] += count
+
+        def finish(node):
+            return {**node, 'children': [finish(child) for child in node['children'].values()]}
+        return finish(root)
+
+
+def init_profiler(app):
+    profiler = SamplingProfiler(app.config['PROFILER_MAX_STACKS'], app.config['PROFILER_MAX_DEPTH'])
+    app.extensions['profiler'] = profiler
+    app.before_request(profiler.before_request)
+    app.teardown_request(profiler.teardown_request)
+    return profiler
@@ -0,0 +1,210 @@
+"""
+تحديد معدل الطلبات (token bucket) والتحكم في القبول لكل فئة من نقاط النهاية
+
+- كل فئة (auth، heavy_read، write) لها معدل تعبئة (rate طلب/ثانية) وسعة (burst)
+  وحد أقصى للطلبات المتزامنة داخل العامل الواحد (concurrency).
+- المفتاح هو هوية JWT إن وجدت وإلا عنوان IP؛ فئة auth تستخدم IP دائماً.
+- عند تجاوز الحد يُرفض الطلب فوراً بـ 429 وRetry-After بدلاً من أن ينتظر
+  في طابور العامل، فيبقى زمن الاستجابة محدوداً لبقية المستخدمين.
+- المخزن قابل للاستبدال: memory داخل العامل، أو sqlite ملف مشترك بين العمال.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+_WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class MemoryBackend:
+    """مخزن داخل العامل؛ الحدود تُطبق لكل عامل على حدة
+
+    الدلاء بترتيب آخر استخدام (LRU): فوق max_keys يُحذف الأقدم من المقدمة بتكلفة
+    ثابتة لكل طلب. الأقدم استخداماً هو الأرجح امتلاءً، والدلو الممتلئ يكافئ دلواً
+    غير موجود.
+    """
+
+    def __init__(self, max_keys=100000):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def take(self, key, rate, burst, cost=1.0):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            allowed, tokens = _refill_and_take(tokens, updated_at, now, rate, burst, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, _retry_after(tokens, rate, cost)
+
+
+class SQLiteBackend:
+    """مخزن مشترك بين العمال في ملف SQLite (بديل محلي لمخزن خارجي مثل Redis)"""
+
+    _PRUNE_EVERY = 10000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst, cost=1.0):
+        conn = self._conn()
+        now = time.time()
+        # BEGIN IMMEDIATE يحجز قفل الكتابة فتكون القراءة والتحديث ذريين بين العمليات
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            allowed, tokens = _refill_and_take(tokens, updated_at, now, rate, burst, cost)
+            conn.execute(
+                'INSERT INTO rate_bucket (key, tokens, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self._PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM rate_bucket WHERE updated_at < ?', (now - 3600,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, _retry_after(tokens, rate, cost)
+
+
+def _refill_and_take(tokens, updated_at, now, rate, burst, cost):
+    tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= cost:
+        return True, tokens - cost
+    return False, tokens
+
+
+def _retry_after(tokens, rate, cost):
+    if tokens >= cost or not rate:
+        return 0
+    return max(1, math.ceil((cost - tokens) / rate))
+
+
+def make_backend(app):
+    name = app.config['RATELIMIT_BACKEND']
+    if name == 'sqlite':
+        return SQLiteBackend(app.config['RATELIMIT_SQLITE_PATH'])
+    if name == 'memory':
+        return MemoryBackend()
+    raise ValueError(f'Unknown RATELIMIT_BACKEND: {name}')
+
+
+class RateLimiter:
+
+    def __init__(self, app):
+        self.classes = app.config['RATELIMIT_CLASSES']
+        self.endpoints = app.config['RATELIMIT_ENDPOINTS']
+        self.backend = make_backend(app)
+        self._in_flight = {name: 0 for name in self.classes}
+        self._lock = threading.Lock()
+
+    def classify(self):
+        return self.classify_endpoint(request.endpoint, request.method, request.path)
+
+    def classify_endpoint(self, endpoint, method, path):
+        if method == 'OPTIONS' or not endpoint:
+            return None
+        endpoint_class = self.endpoints.get(endpoint)
+        if endpoint_class is None and method in _WRITE_METHODS and path.startswith('/api/'):
+            endpoint_class = 'write'
+        return endpoint_class if endpoint_class in self.classes else None
+
+    def _key(self, endpoint_class):
+        if endpoint_class != 'auth':
+            try:
+                verify_jwt_in_request(optional=True)
+                identity = get_jwt_identity()
+                if identity:
+                    return f'{endpoint_class}:user:{identity}'
+            except Exception:
+                pass
+        return f'{endpoint_class}:ip:{request.remote_addr}'
+
+    def admit(self, endpoint_class, key):
+        """حجز مقعد تزامن ثم أخذ رمز من الدلو؛ يعيد (مقبول، ثواني Retry-After)
+
+        المقعد أولاً: الطلب المرفوض لامتلاء الفئة لا يستهلك رمزاً من دلو المستخدم.
+        """
+        limits = self.classes[endpoint_class]
+
+        # التحكم في القبول: رفض فوري بدلاً من الانتظار خلف طلبات بطيئة من نفس الفئة
+        max_concurrency = limits.get('concurrency')
+        if max_concurrency:
+            with self._lock:
+                if self._in_flight[endpoint_class] >= max_concurrency:
+                    return False, 1
+                self._in_flight[endpoint_class] += 1
+
+        try:
+            allowed, retry_after = self.backend.take(key, limits['rate'], limits['burst'])
+        except BaseException:
+            self.release(endpoint_class)
+            raise
+        if not allowed:
+            self.release(endpoint_class)
+            return False, retry_after
+        return True, 0
+
+    def release(self, endpoint_class):
+        if self.classes[endpoint_class].get('concurrency'):
+            with self._lock:
+                self._in_flight[endpoint_class] -= 1
+
+    def before_request(self):
+        endpoint_class = self.classify()
+        if endpoint_class is None:
+            return None
+
+        allowed, retry_after = self.admit(endpoint_class, self._key(endpoint_class))
+        if not allowed:
+            return _too_many(retry_after)
+        g.ratelimit_class = endpoint_class
+        return None
+
+    def teardown_request(self, exc=None):
+        endpoint_class = g.pop('ratelimit_class', None)
+        if endpoint_class is not None:
+            self.release(endpoint_class)
+
+
+def _too_many(retry_after):
+    response = jsonify({'error': 'عدد الطلبات كبير جداً، يرجى المحاولة لاحقاً'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def init_ratelimit(app):
+    if not app.config['RATELIMIT_ENABLED']:
+        return None
+    limiter = RateLimiter(app)
+    app.extensions['ratelimit'] = limiter
+    app.before_request(limiter.before_request)
+    app.teardown_request(limiter.teardown_request)
+    return limiter
@@ -0,0 +1,143 @@
+"""
+توجيه القراءة والكتابة بين القاعدة الرئيسية ومحركات القراءة
+
+- طلبات GET/HEAD تعمل بجلسة للقراءة: استعلامات SELECT تُنفّذ على محرك قراءة،
+  إما نسخ القراءة في SQLALCHEMY_READ_URLS (مثل PostgreSQL)، أو لـ SQLite ملف
+  مجمّع اتصالات منفصل على الملف نفسه بـ query_only، ومع WAL لا ينتظر الكاتب
+  ولا يحجبه.
+- أي كتابة في الجلسة (flush، INSERT/UPDATE/DELETE، FOR UPDATE) تذهب إلى
+  الرئيسية، وتبقى بقية الجلسة عليها فترى ما كتبته.
+- الالتصاق: بعد كتابة ناجحة للمستخدم تُقرأ طلباته من الرئيسية لمدة
+  READ_STICKY_SECONDS حتى لا يرى بيانات نسخة متأخرة. يُخزّن في src.cache، فنسخ
+  القراءة تتطلب مخزناً مشتركاً بين العمال (sqlite أو redis) لأن طلب المستخدم
+  التالي قد يصل إلى عامل آخر.
+- READ_ROUTING_ENABLED = False يعيد كل الاستعلامات إلى المحرك الرئيسي.
+- طلبات المؤسسات (src.tenancy) كلها على محرك قاعدة المؤسسة.
+"""
+
+import random
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+from src.cache import cache
+from src.tenancy import tenant_engine
+
+_READ_METHODS = ('GET', 'HEAD')
+_WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RoutingSession(Session):
+    """جلسة db: توجه SELECT إلى محرك قراءة عندما تكون info['read_only'] مفعلة"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        tenant = tenant_engine()
+        if tenant is not None and bind is None:
+            # قاعدة المؤسسة (src.tenancy) للقراءة والكتابة
+            return tenant
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not self.info.get('read_only'):
+            return engine
+
+        if self._flushing or not _is_read(clause):
+            # من هنا فصاعداً على الرئيسية
+            self.info['read_only'] = False
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+            return engine
+
+        router = current_app.extensions.get('read_routing')
+        if router is None or engine is not router.primary:
+            return engine
+        return router.reader()
+
+
+def _is_read(clause):
+    return (clause is not None and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None)
+
+
+def _identity():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+class ReadRouter:
+
+    def __init__(self, db, primary, readers, sticky_seconds):
+        self.db = db
+        self.primary = primary
+        self.readers = readers
+        self.sticky_seconds = sticky_seconds
+
+    def reader(self):
+        return self.readers[0] if len(self.readers) == 1 else random.choice(self.readers)
+
+    def is_sticky(self, user_id):
+        return bool(user_id) and cache.get(f'read_sticky:{user_id}') is not None
+
+    def stick(self, user_id):
+        """قراءات المستخدم التالية من الرئيسية لمدة READ_STICKY_SECONDS"""
+        if user_id and self.sticky_seconds:
+            cache.set(f'read_sticky:{user_id}', True, self.sticky_seconds)
+
+    def before_request(self):
+        if request.method in _READ_METHODS and not self.is_sticky(_identity()):
+            self.db.session.info['read_only'] = True
+
+    def after_request(self, response):
+        if response.status_code < 400 and (
+            request.method in _WRITE_METHODS or self.db.session.info.get('wrote')
+        ):
+            self.stick(_identity())
+        return response
+
+
+def make_read_engines(app):
+    """محركات القراءة: SQLALCHEMY_READ_URLS، أو مجمّع query_only على ملف SQLite نفسه"""
+    # src.models.user يستورد هذه الوحدة، وsrc.sqlite يستورد db منها
+    from src.sqlite import listen_pragmas, sqlite_path
+
+    config = app.config
+    options = {'pool_size': config['READ_POOL_SIZE'], **(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})}
+
+    urls = config.get('SQLALCHEMY_READ_URLS')
+    if urls:
+        if cache.backend.name == 'memory':
+            raise RuntimeError('نسخ القراءة (DATABASE_READ_URLS) تتطلب CACHE_BACKEND مشتركاً بين العمال: sqlite أو redis')
+        return [create_engine(url, pool_pre_ping=True, **options) for url in urls]
+
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if sqlite_path(uri) is None:
+        return []
+    engine = create_engine(uri, **options)
+    listen_pragmas(engine, {**(config.get('SQLITE_PRAGMAS') or {}), 'query_only': 'ON'})
+    return [engine]
+
+
+def read_engines(app):
+    router = app.extensions.get('read_routing')
+    return router.readers if router else []
+
+
+def init_read_routing(app):
+    if not app.config.get('READ_ROUTING_ENABLED'):
+        return None
+    readers = make_read_engines(app)
+    if not readers:
+        return None
+
+    from src.models.user import db
+
+    with app.app_context():
+        primary = db.engine
+    router = ReadRouter(db, primary, readers, app.config['READ_STICKY_SECONDS'])
+    app.extensions['read_routing'] = router
+    app.before_request(router.before_request)
+    app.after_request(router.after_request)
+    return router
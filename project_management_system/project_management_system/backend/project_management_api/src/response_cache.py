@@ -0,0 +1,58 @@
+"""
+تخزين استجابات GET المشتركة بين أعضاء المشروع في src.cache
+
+المفتاح: نقطة النهاية ومعاملات المسار والاستعلام ونطاق الصلاحية؛ القيمة جسم
+الاستجابة ونوعها، بوسوم المشروع (project:<id>) التي تُبطلها مسارات الكتابة
+(src.services.invalidation). دالة scope تتحقق من الصلاحية في كل طلب، حتى عند
+وجود القيمة، وتعيد (النطاق، الوسوم) أو None فيُنفّذ المسار نفسه ويعيد خطأه.
+"""
+
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+from src.cache import cache
+from src.tenancy import current_tenant
+
+
+def cached_response(scope):
+    """مزخرف لمسارات GET بعد jwt_required؛ scope(user_id, **view_args) -> (نطاق، وسوم) أو None"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            if not current_app.config.get('RESPONSE_CACHE_ENABLED'):
+                return view(**view_args)
+
+            try:
+                scoped = scope(get_jwt_identity(), **view_args)
+            except Exception:
+                scoped = None
+            if scoped is None:
+                return view(**view_args)
+            auth_scope, tags = scoped
+
+            # مساحة الأسماء في الإحصاءات: response.<endpoint>
+            key = ':'.join((
+                f'response.{request.endpoint}',
+                '&'.join(f'{name}={value}' for name, value in sorted(view_args.items())),
+                urlencode(sorted(request.args.items(multi=True))), auth_scope, current_tenant() or '',
+            ))
+            entry = cache.get(key)
+            if entry is not None:
+                body, status, mimetype = entry
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            # الإصدارات قبل القراءة: كتابة تلتزم أثناء الحساب تمنع تخزين النتيجة
+            versions = cache.versions(tags)
+            response = current_app.make_response(view(**view_args))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, (response.get_data(), response.status_code, response.mimetype),
+                          current_app.config['RESPONSE_CACHE_TTL'], tags=tags, versions=versions)
+                response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
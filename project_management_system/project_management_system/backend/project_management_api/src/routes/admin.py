@@ -0,0 +1,101 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.cache import cache
+from src.jobs import queue_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/cache', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    try:
+        if not _is_admin(get_jwt_identity()):
+            return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+        
+        # إحصاءات العامل الذي خدم الطلب (pid)، وعدد القيم في المخزن نفسه
+        return jsonify(cache.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب إحصاءات الذاكرة المؤقتة'}), 500
+
+@admin_bp.route('/admin/jobs', methods=['GET'])
+@jwt_required()
+def get_job_stats():
+    """عدد مهام الطابور لكل اسم وحالة"""
+    try:
+        if not _is_admin(get_jwt_identity()):
+            return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+        return jsonify(queue_stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب إحصاءات الطابور'}), 500
+
+@admin_bp.route('/admin/profiler', methods=['GET'])
+@jwt_required()
+def get_profiler_status():
+    if not _is_admin(get_jwt_identity()):
+        return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+    return jsonify(current_app.extensions['profiler'].status()), 200
+
+@admin_bp.route('/admin/profiler/start', methods=['POST'])
+@jwt_required()
+def start_profiler():
+    """{"interval_ms": 5, "duration": 60, "endpoint": "task.get_project_tasks", "rate": 10}"""
+    try:
+        if not _is_admin(get_jwt_identity()):
+            return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+        
+        config = current_app.config
+        data = request.get_json(silent=True) or {}
+        try:
+            interval_ms = float(data.get('interval_ms', config['PROFILER_INTERVAL_MS']))
+            duration = float(data.get('duration', config['PROFILER_DURATION']))
+            rate = float(data.get('rate', 100))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'قيم interval_ms وduration وrate يجب أن تكون أرقاماً'}), 400
+        
+        endpoint = data.get('endpoint')
+        if endpoint is not None and endpoint not in current_app.view_functions:
+            return jsonify({'error': 'نقطة النهاية غير موجودة'}), 400
+        if interval_ms < 1 or not 0 < duration <= config['PROFILER_MAX_DURATION'] or not 0 < rate <= 100:
+            return jsonify({'error': f"interval_ms من 1، وduration حتى {config['PROFILER_MAX_DURATION']} ثانية، وrate من 0 إلى 100"}), 400
+        
+        profiler = current_app.extensions['profiler']
+        profiler.start(interval_ms / 1000, duration, endpoint, rate / 100)
+        return jsonify(profiler.status()), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء تشغيل المحلل'}), 500
+
+@admin_bp.route('/admin/profiler/stop', methods=['POST'])
+@jwt_required()
+def stop_profiler():
+    if not _is_admin(get_jwt_identity()):
+        return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+    profiler = current_app.extensions['profiler']
+    profiler.stop()
+    return jsonify(profiler.status()), 200
+
+@admin_bp.route('/admin/profiler/stacks', methods=['GET'])
+@jwt_required()
+def download_profiler_stacks():
+    """?format=collapsed (flamegraph.pl وspeedscope) أو json (d3-flame-graph)"""
+    if not _is_admin(get_jwt_identity()):
+        return jsonify({'error': 'هذه العملية متاحة للمسؤولين فقط'}), 403
+    
+    profiler = current_app.extensions['profiler']
+    output = request.args.get('format', 'collapsed')
+    if output == 'json':
+        return jsonify(profiler.tree()), 200
+    if output != 'collapsed':
+        return jsonify({'error': 'الصيغة يجب أن تكون collapsed أو json'}), 400
+    
+    response = current_app.response_class(profiler.collapsed(), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename=profile-{profiler.status()["pid"]}.collapsed'
+    return response
+
+def _is_admin(user_id):
+    """المسؤولون هم المعرفات المذكورة في ADMIN_USER_IDS"""
+    return user_id in current_app.config['ADMIN_USER_IDS']
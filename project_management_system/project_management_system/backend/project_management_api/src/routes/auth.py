@@ -1,35 +1,30 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from src.models.user import User, db
+from src.services.payloads import PayloadError, credentials, existing_user_query, registration
+from src.tenancy import tenant_claims
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/auth/register', methods=['POST'])
 def register():
     try:
-        data = request.json
-        
-        # التحقق من وجود البيانات المطلوبة
-        if not data or not data.get('username') or not data.get('email') or not data.get('password'):
-            return jsonify({'error': 'اسم المستخدم والبريد الإلكتروني وكلمة المرور مطلوبة'}), 400
+        # التحقق من وجود البيانات المطلوبة (src.services.payloads، مشترك مع src.aio.routes)
+        username, email, password = registration(request.json)
         
         # التحقق من عدم وجود مستخدم بنفس اسم المستخدم أو البريد الإلكتروني
-        existing_user = User.query.filter(
-            (User.username == data['username']) | (User.email == data['email'])
-        ).first()
-        
-        if existing_user:
+        if db.session.scalar(existing_user_query(username, email)):
             return jsonify({'error': 'اسم المستخدم أو البريد الإلكتروني موجود بالفعل'}), 400
         
         # إنشاء مستخدم جديد
-        user = User(username=data['username'], email=data['email'])
-        user.set_password(data['password'])
+        user = User(username=username, email=email)
+        user.set_password(password)
         
         db.session.add(user)
         db.session.commit()
         
         # إنشاء رمز الوصول
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=tenant_claims())
         
         return jsonify({
             'message': 'تم تسجيل المستخدم بنجاح',
@@ -37,6 +32,8 @@ def register():
             'access_token': access_token
         }), 201
         
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء التسجيل'}), 500
@@ -44,19 +41,16 @@ def register():
 @auth_bp.route('/auth/login', methods=['POST'])
 def login():
     try:
-        data = request.json
-        
-        if not data or not data.get('username') or not data.get('password'):
-            return jsonify({'error': 'اسم المستخدم وكلمة المرور مطلوبان'}), 400
+        username, password = credentials(request.json)
         
         # البحث عن المستخدم
-        user = User.query.filter_by(username=data['username']).first()
+        user = User.query.filter_by(username=username).first()
         
-        if not user or not user.check_password(data['password']):
+        if not user or not user.check_password(password):
             return jsonify({'error': 'اسم المستخدم أو كلمة المرور غير صحيحة'}), 401
         
         # إنشاء رمز الوصول
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=tenant_claims())
         
         return jsonify({
             'message': 'تم تسجيل الدخول بنجاح',
@@ -64,6 +58,8 @@ def login():
             'access_token': access_token
         }), 200
         
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         return jsonify({'error': 'حدث خطأ أثناء تسجيل الدخول'}), 500
 
@@ -0,0 +1,46 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.job import Job
+from src.models.user import db
+
+job_bp = Blueprint('job', __name__)
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+@job_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+def get_jobs():
+    """مهام المستخدم الحالي من الأحدث: ?status=&limit="""
+    try:
+        current_user_id = get_jwt_identity()
+        status = request.args.get('status')
+        if status and status not in JOB_STATUSES:
+            return jsonify({'error': f"الحالة يجب أن تكون إحدى: {', '.join(JOB_STATUSES)}"}), 400
+        try:
+            limit = min(int(request.args.get('limit', 50)), 200)
+        except ValueError:
+            return jsonify({'error': 'قيمة limit غير صحيحة'}), 400
+        
+        query = Job.query.filter_by(created_by=current_user_id)
+        if status:
+            query = query.filter_by(status=status)
+        jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+        return jsonify([job.to_dict() for job in jobs]), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب المهام الخلفية'}), 500
+
+@job_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    try:
+        current_user_id = get_jwt_identity()
+        job = db.session.get(Job, job_id)
+        # مهام المستخدمين الآخرين للمسؤولين فقط
+        if not job or (job.created_by != current_user_id
+                       and current_user_id not in current_app.config['ADMIN_USER_IDS']):
+            return jsonify({'error': 'المهمة الخلفية غير موجودة'}), 404
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب المهمة الخلفية'}), 500
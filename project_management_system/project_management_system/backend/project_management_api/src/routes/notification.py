@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.notification import Notification
+from src.services.payloads import mark_all_read_statement, notifications_query
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -12,9 +13,7 @@ def get_notifications():
         current_user_id = get_jwt_identity()
         
         # جلب الإشعارات مرتبة حسب التاريخ (الأحدث أولاً)
-        notifications = Notification.query.filter_by(user_id=current_user_id).order_by(
-            Notification.created_at.desc()
-        ).all()
+        notifications = db.session.scalars(notifications_query(current_user_id))
         
         return jsonify([notification.to_dict() for notification in notifications]), 200
         
@@ -26,7 +25,9 @@ def get_notifications():
 def mark_notification_read(notification_id):
     try:
         current_user_id = get_jwt_identity()
-        notification = Notification.query.get_or_404(notification_id)
+        notification = Notification.query.get(notification_id)
+        if not notification:
+            return jsonify({'error': 'الإشعار غير موجود'}), 404
         
         # التحقق من أن الإشعار يخص المستخدم الحالي
         if notification.user_id != current_user_id:
@@ -48,9 +49,7 @@ def mark_all_notifications_read():
         current_user_id = get_jwt_identity()
         
         # تحديث جميع الإشعارات غير المقروءة للمستخدم
-        Notification.query.filter_by(
-            user_id=current_user_id, is_read=False
-        ).update({'is_read': True})
+        db.session.execute(mark_all_read_statement(current_user_id))
         
         db.session.commit()
         
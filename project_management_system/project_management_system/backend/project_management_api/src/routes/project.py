@@ -1,11 +1,39 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, db
 from src.models.project import Project, ProjectMember
+from src.services.archive import (
+    ArchiveError, archive_project as archive_project_service, archived_projects_for, get_archived,
+    has_archived_access, unarchive_project as unarchive_project_service,
+)
+from src.services.activity import activity_feed
+from src.services.cloning import clone_project as clone_project_service
+from src.services.deletion import schedule_project_deletion
+from src.services.membership import add_members
+from src.services.payloads import (
+    DATE_FORMAT_ERROR, PayloadError, apply_project_changes, new_project, project_access_query, user_projects_query,
+)
+from src.cache import project_tag
+from src.response_cache import cached_response
 
 project_bp = Blueprint('project', __name__)
 
+# حالات add_members التي ترفض إضافة عضو واحد: (الرسالة، رمز الحالة)
+_MEMBER_ERRORS = {
+    'not_found': ('المستخدم غير موجود', 404),
+    'already_member': ('المستخدم عضو في المشروع بالفعل', 400),
+    'owner': ('المستخدم مالك المشروع', 400),
+    'invalid_role': ('الدور غير صحيح', 400),
+}
+
+def _project_scope(user_id, project_id):
+    """نطاق الاستجابة المخزنة: كل من يصل إلى المشروع (نشطاً أو مؤرشفاً) يرى الاستجابة نفسها"""
+    if _has_project_access(project_id, user_id) or has_archived_access(project_id, user_id):
+        return 'member', [project_tag(project_id)]
+    return None
+
 @project_bp.route('/projects', methods=['GET'])
 @jwt_required()
 def get_projects():
@@ -13,25 +41,32 @@ def get_projects():
         current_user_id = get_jwt_identity()
         
         # جلب المشاريع التي يملكها المستخدم أو عضو فيها
-        owned_projects = Project.query.filter_by(owner_id=current_user_id).all()
-        member_projects = db.session.query(Project).join(ProjectMember).filter(
-            ProjectMember.user_id == current_user_id
-        ).all()
-        
-        # دمج المشاريع وإزالة التكرار
-        all_projects = list(set(owned_projects + member_projects))
+        result = [project.to_dict() for project in db.session.scalars(user_projects_query(current_user_id))]
+
+        # المشاريع المؤرشفة عند الطلب فقط
+        if request.args.get('include_archived', 'false').lower() == 'true':
+            result += [{**project.to_dict(), 'archived': True} for project in archived_projects_for(current_user_id)]
         
-        return jsonify([project.to_dict() for project in all_projects]), 200
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': 'حدث خطأ أثناء جلب المشاريع'}), 500
 
 @project_bp.route('/projects/<project_id>', methods=['GET'])
 @jwt_required()
+@cached_response(_project_scope)
 def get_project(project_id):
     try:
         current_user_id = get_jwt_identity()
-        project = Project.query.get_or_404(project_id)
+        project = Project.query.get(project_id)
+        if project is None:
+            # المشاريع المؤرشفة تُقرأ من قاعدة بيانات الأرشيف
+            project = get_archived(Project, project_id)
+            if project is None:
+                return jsonify({'error': 'المشروع غير موجود'}), 404
+            if not has_archived_access(project_id, current_user_id):
+                return jsonify({'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}), 403
+            return jsonify({**project.to_dict(), 'archived': True}), 200
         
         # التحقق من صلاحية الوصول
         if not _has_project_access(project_id, current_user_id):
@@ -47,33 +82,17 @@ def get_project(project_id):
 def create_project():
     try:
         current_user_id = get_jwt_identity()
-        data = request.json
-        
-        if not data or not data.get('name') or not data.get('start_date') or not data.get('end_date'):
-            return jsonify({'error': 'اسم المشروع وتاريخ البداية والنهاية مطلوبة'}), 400
-        
-        # تحويل التواريخ
-        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        
-        if start_date >= end_date:
-            return jsonify({'error': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
-        
-        project = Project(
-            name=data['name'],
-            description=data.get('description', ''),
-            start_date=start_date,
-            end_date=end_date,
-            owner_id=current_user_id
-        )
+        project = Project(**new_project(request.json, current_user_id))
         
         db.session.add(project)
         db.session.commit()
         
         return jsonify(project.to_dict()), 201
         
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), e.status
     except ValueError:
-        return jsonify({'error': 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'}), 400
+        return jsonify({'error': DATE_FORMAT_ERROR}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء إنشاء المشروع'}), 500
@@ -83,33 +102,26 @@ def create_project():
 def update_project(project_id):
     try:
         current_user_id = get_jwt_identity()
-        project = Project.query.get_or_404(project_id)
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({'error': 'المشروع غير موجود'}), 404
         
         # التحقق من أن المستخدم هو مالك المشروع
         if project.owner_id != current_user_id:
             return jsonify({'error': 'ليس لديك صلاحية لتعديل هذا المشروع'}), 403
         
-        data = request.json
-        
-        if data.get('name'):
-            project.name = data['name']
-        if data.get('description') is not None:
-            project.description = data['description']
-        if data.get('start_date'):
-            project.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        if data.get('end_date'):
-            project.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        
-        # التحقق من صحة التواريخ
-        if project.start_date >= project.end_date:
-            return jsonify({'error': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
+        apply_project_changes(project, request.json)
         
         db.session.commit()
         
         return jsonify(project.to_dict()), 200
         
+    except PayloadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
     except ValueError:
-        return jsonify({'error': 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'}), 400
+        db.session.rollback()
+        return jsonify({'error': DATE_FORMAT_ERROR}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء تحديث المشروع'}), 500
@@ -119,28 +131,144 @@ def update_project(project_id):
 def delete_project(project_id):
     try:
         current_user_id = get_jwt_identity()
-        project = Project.query.get_or_404(project_id)
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({'error': 'المشروع غير موجود'}), 404
         
         # التحقق من أن المستخدم هو مالك المشروع
         if project.owner_id != current_user_id:
             return jsonify({'error': 'ليس لديك صلاحية لحذف هذا المشروع'}), 403
         
-        db.session.delete(project)
+        # الحذف في الخلفية (src.services.deletion)؛ حالة المهمة من /api/jobs/<id>
+        job = schedule_project_deletion(project, current_user_id)
         db.session.commit()
         
-        return '', 204
+        response = jsonify({'message': 'تمت جدولة حذف المشروع', 'job': job.to_dict()})
+        response.headers['Location'] = f'/api/jobs/{job.id}'
+        return response, 202
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء حذف المشروع'}), 500
 
-@project_bp.route('/projects/<project_id>/members', methods=['POST'])
+@project_bp.route('/projects/<project_id>/clone', methods=['POST'])
+@jwt_required()
+def clone_project(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+        project = Project.query.get_or_404(project_id)
+
+        # التحقق من صلاحية الوصول للمشروع المصدر
+        if not _has_project_access(project_id, current_user_id):
+            return jsonify({'error': 'ليس لديك صلاحية لنسخ هذا المشروع'}), 403
+
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'جسم الطلب يجب أن يكون كائن JSON'}), 400
+
+        # الإزاحة إما بعدد الأيام أو بتاريخ بداية جديد للمشروع
+        if data.get('start_date'):
+            if not isinstance(data['start_date'], str):
+                raise ValueError('start_date')
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            offset_days = (start_date - project.start_date).days
+        else:
+            offset_days = data.get('offset_days') or 0
+            # bool صنف فرعي من int في Python
+            if not isinstance(offset_days, int) or isinstance(offset_days, bool):
+                raise ValueError('offset_days')
+
+        flags = {'include_assignees': True, 'include_comments': False, 'include_members': False,
+                 'reset_status': True}
+        for flag, default in flags.items():
+            flags[flag] = data.get(flag, default)
+            if not isinstance(flags[flag], bool):
+                return jsonify({'error': f'{flag} يجب أن يكون true أو false'}), 400
+        name = data.get('name')
+        if name is not None and not isinstance(name, str):
+            return jsonify({'error': 'name يجب أن يكون نصاً'}), 400
+
+        clone, counts = clone_project_service(
+            project,
+            owner_id=current_user_id,
+            name=name,
+            offset_days=offset_days,
+            **flags,
+        )
+        db.session.commit()
+
+        return jsonify({**clone.to_dict(), 'copied': counts}), 201
+
+    except (ValueError, OverflowError):
+        db.session.rollback()
+        return jsonify({'error': 'تنسيق التاريخ أو offset_days غير صحيح'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'حدث خطأ أثناء نسخ المشروع'}), 500
+
+@project_bp.route('/projects/<project_id>/archive', methods=['POST'])
 @jwt_required()
-def add_project_member():
+def archive_project(project_id):
     try:
         current_user_id = get_jwt_identity()
-        project_id = request.view_args['project_id']
         project = Project.query.get_or_404(project_id)
+
+        # التحقق من أن المستخدم هو مالك المشروع
+        if project.owner_id != current_user_id:
+            return jsonify({'error': 'ليس لديك صلاحية لأرشفة هذا المشروع'}), 403
+
+        data = request.get_json(silent=True) or {}
+        force = data.get('force', False) or request.args.get('force', 'false').lower() == 'true'
+
+        counts = archive_project_service(project, force=force)
+        db.session.commit()
+
+        return jsonify({'project_id': project_id, 'archived': True, 'moved': counts}), 200
+
+    except ArchiveError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'حدث خطأ أثناء أرشفة المشروع'}), 500
+
+@project_bp.route('/projects/<project_id>/unarchive', methods=['POST'])
+@jwt_required()
+def unarchive_project(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+        project = get_archived(Project, project_id)
+        if project is None:
+            return jsonify({'error': 'المشروع غير موجود في الأرشيف'}), 404
+
+        # التحقق من أن المستخدم هو مالك المشروع
+        if project.owner_id != current_user_id:
+            return jsonify({'error': 'ليس لديك صلاحية لإلغاء أرشفة هذا المشروع'}), 403
+
+        db.session.expunge(project)
+        counts = unarchive_project_service(project_id)
+        db.session.commit()
+
+        project = Project.query.get(project_id)
+        return jsonify({**project.to_dict(), 'moved': counts}), 200
+
+    except ArchiveError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'حدث خطأ أثناء إلغاء أرشفة المشروع'}), 500
+
+@project_bp.route('/projects/<project_id>/members', methods=['POST'])
+@jwt_required()
+def add_project_member(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({'error': 'المشروع غير موجود'}), 404
         
         # التحقق من أن المستخدم هو مالك المشروع
         if project.owner_id != current_user_id:
@@ -150,33 +278,57 @@ def add_project_member():
         if not data or not data.get('user_id'):
             return jsonify({'error': 'معرف المستخدم مطلوب'}), 400
         
-        # التحقق من وجود المستخدم
-        user = User.query.get(data['user_id'])
-        if not user:
-            return jsonify({'error': 'المستخدم غير موجود'}), 404
+        result, = add_members(project, [{'user_id': data['user_id'], 'role': data.get('role', 'member')}])
+        if result['status'] in _MEMBER_ERRORS:
+            message, code = _MEMBER_ERRORS[result['status']]
+            return jsonify({'error': message}), code
         
-        # التحقق من عدم وجود العضوية مسبقاً
-        existing_member = ProjectMember.query.filter_by(
-            project_id=project_id, user_id=data['user_id']
-        ).first()
+        db.session.commit()
         
-        if existing_member:
-            return jsonify({'error': 'المستخدم عضو في المشروع بالفعل'}), 400
+        member = ProjectMember.query.filter_by(project_id=project_id, user_id=data['user_id']).first()
+        return jsonify(member.to_dict()), 201
         
-        member = ProjectMember(
-            project_id=project_id,
-            user_id=data['user_id'],
-            role=data.get('role', 'member')
-        )
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'حدث خطأ أثناء إضافة العضو'}), 500
+
+@project_bp.route('/projects/<project_id>/members/bulk', methods=['POST'])
+@jwt_required()
+def add_project_members_bulk(project_id):
+    """إضافة عدة أعضاء في طلب واحد: {"members": [{"user_id": "...", "role": "member"}]}"""
+    try:
+        current_user_id = get_jwt_identity()
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({'error': 'المشروع غير موجود'}), 404
+        
+        if project.owner_id != current_user_id:
+            return jsonify({'error': 'ليس لديك صلاحية لإضافة أعضاء لهذا المشروع'}), 403
+        
+        data = request.json
+        members = data.get('members') if isinstance(data, dict) else None
+        if not isinstance(members, list) or not members or not all(isinstance(m, dict) for m in members):
+            return jsonify({'error': 'قائمة الأعضاء مطلوبة'}), 400
+        
+        max_members = current_app.config['MEMBER_BULK_MAX']
+        if len(members) > max_members:
+            return jsonify({'error': f'الحد الأقصى {max_members} عضو في الطلب الواحد'}), 400
         
-        db.session.add(member)
+        results = add_members(project, members)
         db.session.commit()
         
-        return jsonify(member.to_dict()), 201
+        return jsonify({
+            'added': sum(1 for result in results if result['status'] == 'added'),
+            'results': results,
+        }), 200
         
+    except IntegrityError:
+        # إضافة متزامنة لنفس العضو بين القراءة والإدراج
+        db.session.rollback()
+        return jsonify({'error': 'تم تعديل أعضاء المشروع أثناء الطلب، حاول مرة أخرى'}), 409
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'حدث خطأ أثناء إضافة العضو'}), 500
+        return jsonify({'error': 'حدث خطأ أثناء إضافة الأعضاء'}), 500
 
 @project_bp.route('/projects/<project_id>/members/<user_id>', methods=['DELETE'])
 @jwt_required()
@@ -205,20 +357,29 @@ def remove_project_member(project_id, user_id):
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء إزالة العضو'}), 500
 
+@project_bp.route('/projects/<project_id>/activity', methods=['GET'])
+@jwt_required()
+def get_project_activity(project_id):
+    """سجل نشاط المشروع من الأحدث: ?limit=&cursor=<seq>"""
+    try:
+        current_user_id = get_jwt_identity()
+        if not (_has_project_access(project_id, current_user_id) or has_archived_access(project_id, current_user_id)):
+            return jsonify({'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}), 403
+        
+        try:
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+            cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError:
+            return jsonify({'error': 'قيمة limit أو cursor غير صحيحة'}), 400
+        
+        return jsonify(activity_feed(project_id, limit, cursor)), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب سجل النشاط'}), 500
+
 def _has_project_access(project_id, user_id):
-    """التحقق من صلاحية المستخدم للوصول للمشروع"""
-    project = Project.query.get(project_id)
-    if not project:
-        return False
-    
-    # إذا كان المستخدم مالك المشروع
-    if project.owner_id == user_id:
-        return True
-    
-    # إذا كان المستخدم عضو في المشروع
-    member = ProjectMember.query.filter_by(
-        project_id=project_id, user_id=user_id
-    ).first()
-    
-    return member is not None
+    """التحقق من صلاحية المستخدم للوصول للمشروع (مالكاً أو عضواً)"""
+    return db.session.scalar(project_access_query(project_id, user_id))
 
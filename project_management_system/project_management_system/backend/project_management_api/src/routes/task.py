@@ -1,44 +1,146 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime
 from src.models.user import User, db
 from src.models.project import Project
 from src.models.task import Task, Comment, Dependency
+from src.services.archive import archived_options, get_archived, has_archived_access
+from src.services.importer import ImportFormatError, PARSERS, detect_format, iter_import, open_stream
+from src.services.inbox import assigned_tasks, parse_statuses
+from src.services.payloads import (
+    DATE_FORMAT_ERROR, PayloadError, check_assignee, check_parent, new_task, parent_project_query,
+    project_access_query,
+)
+from src.services.scheduling import DependencyCycleError, propagate_schedule
+from src.services.task_includes import compound_document, load_tasks, parse_includes
+from src.services import task_writes
+from src.services.task_writes import TaskWriteError, etag, parse_if_match, task_changes
+from src.services.timeline import ZOOM_LEVELS, project_timeline
+from src.cache import project_tag
+from src.response_cache import cached_response
 
 task_bp = Blueprint('task', __name__)
 
+# نطاق الاستجابات المخزنة: كل من يصل إلى المشروع يرى الاستجابة نفسها
+
+def _project_scope(user_id, project_id):
+    if _has_project_access(project_id, user_id, include_archived=True):
+        return 'member', [project_tag(project_id)]
+    return None
+
+def _task_scope(user_id, task_id):
+    task = Task.query.get(task_id) or get_archived(Task, task_id)
+    if task is not None and _has_project_access(task.project_id, user_id, include_archived=True):
+        return 'member', [project_tag(task.project_id)]
+    return None
+
 @task_bp.route('/projects/<project_id>/tasks', methods=['GET'])
 @jwt_required()
+@cached_response(_project_scope)
 def get_project_tasks(project_id):
     try:
         current_user_id = get_jwt_identity()
         
         # التحقق من صلاحية الوصول للمشروع
-        if not _has_project_access(project_id, current_user_id):
+        if not _has_project_access(project_id, current_user_id, include_archived=True):
             return jsonify({'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}), 403
         
-        tasks = Task.query.filter_by(project_id=project_id).all()
+        # include=: مستند مركّب بعدد ثابت من الاستعلامات
+        includes = parse_includes(request.args.get('include'))
+        if includes:
+            tasks = load_tasks([Task.project_id == project_id], includes, archived_options(project_id))
+            return jsonify(compound_document(tasks, includes)), 200
+        
+        tasks = Task.query.filter_by(project_id=project_id).execution_options(**archived_options(project_id)).all()
         return jsonify([task.to_dict() for task in tasks]), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'حدث خطأ أثناء جلب المهام'}), 500
 
+@task_bp.route('/projects/<project_id>/timeline', methods=['GET'])
+@jwt_required()
+def get_project_timeline(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+
+        # التحقق من صلاحية الوصول للمشروع
+        if not _has_project_access(project_id, current_user_id, include_archived=True):
+            return jsonify({'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}), 403
+
+        if not request.args.get('from') or not request.args.get('to'):
+            return jsonify({'error': 'تاريخ البداية والنهاية للنافذة (from وto) مطلوبان'}), 400
+
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+        if end < start:
+            return jsonify({'error': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
+
+        zoom = request.args.get('zoom', 'week')
+        if zoom not in ZOOM_LEVELS:
+            return jsonify({'error': 'zoom يجب أن يكون day أو week أو month أو quarter'}), 400
+
+        return jsonify(project_timeline(project_id, start, end, zoom, archived_options(project_id))), 200
+
+    except ValueError:
+        return jsonify({'error': 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب المخطط الزمني'}), 500
+
 @task_bp.route('/tasks/<task_id>', methods=['GET'])
 @jwt_required()
 def get_task(task_id):
     try:
         current_user_id = get_jwt_identity()
-        task = Task.query.get_or_404(task_id)
+        # المهمة في القاعدة الرئيسية أو في الأرشيف إن كان مشروعها مؤرشفاً
+        task = Task.query.get(task_id) or get_archived(Task, task_id)
+        if task is None:
+            return jsonify({'error': 'المهمة غير موجودة'}), 404
         
         # التحقق من صلاحية الوصول للمشروع
-        if not _has_project_access(task.project_id, current_user_id):
+        if not _has_project_access(task.project_id, current_user_id, include_archived=True):
             return jsonify({'error': 'ليس لديك صلاحية للوصول لهذه المهمة'}), 403
         
-        return jsonify(task.to_dict()), 200
+        includes = parse_includes(request.args.get('include'))
+        if includes:
+            tasks = load_tasks([Task.id == task_id], includes, archived_options(task.project_id))
+            return jsonify(compound_document(tasks, includes, single=True)), 200
+        
+        response = jsonify(task.to_dict())
+        response.headers['ETag'] = etag(task.version)
+        return response, 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'حدث خطأ أثناء جلب المهمة'}), 500
 
+@task_bp.route('/me/tasks', methods=['GET'])
+@jwt_required()
+def get_my_tasks():
+    """المهام المسندة للمستخدم الحالي في كل مشاريعه، مرتبة بتاريخ الانتهاء"""
+    try:
+        current_user_id = get_jwt_identity()
+        try:
+            due_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            due_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            return jsonify({'error': 'تنسيق التاريخ أو limit غير صحيح'}), 400
+
+        return jsonify(assigned_tasks(
+            current_user_id, parse_statuses(request.args.get('status')),
+            due_from, due_to, limit, request.args.get('cursor'),
+        )), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء جلب المهام'}), 500
+
 @task_bp.route('/projects/<project_id>/tasks', methods=['POST'])
 @jwt_required()
 def create_task(project_id):
@@ -49,94 +151,135 @@ def create_task(project_id):
         if not _has_project_access(project_id, current_user_id):
             return jsonify({'error': 'ليس لديك صلاحية لإنشاء مهام في هذا المشروع'}), 403
         
-        data = request.json
-        
-        if not data or not data.get('name') or not data.get('start_date') or not data.get('end_date'):
-            return jsonify({'error': 'اسم المهمة وتاريخ البداية والنهاية مطلوبة'}), 400
-        
-        # تحويل التواريخ
-        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        
-        if start_date >= end_date:
-            return jsonify({'error': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
+        fields = new_task(request.json, project_id)
         
         # التحقق من المهمة الأم إذا كانت موجودة
-        parent_task_id = data.get('parent_task_id')
-        if parent_task_id:
-            parent_task = Task.query.get(parent_task_id)
-            if not parent_task or parent_task.project_id != project_id:
-                return jsonify({'error': 'المهمة الأم غير صحيحة'}), 400
+        if fields['parent_task_id']:
+            check_parent(db.session.scalar(parent_project_query(fields['parent_task_id'])), project_id)
         
         # التحقق من المستخدم المُسند إليه
-        assigned_to = data.get('assigned_to')
-        if assigned_to:
-            assignee = User.query.get(assigned_to)
-            if not assignee:
-                return jsonify({'error': 'المستخدم المُسند إليه غير موجود'}), 400
-        
-        task = Task(
-            project_id=project_id,
-            parent_task_id=parent_task_id,
-            name=data['name'],
-            description=data.get('description', ''),
-            start_date=start_date,
-            end_date=end_date,
-            assigned_to=assigned_to,
-            status=data.get('status', 'not_started')
-        )
+        if fields['assigned_to']:
+            check_assignee(User.query.get(fields['assigned_to']))
+        
+        task = Task(**fields)
         
         db.session.add(task)
         db.session.commit()
         
         return jsonify(task.to_dict()), 201
         
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), e.status
     except ValueError:
-        return jsonify({'error': 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'}), 400
+        return jsonify({'error': DATE_FORMAT_ERROR}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء إنشاء المهمة'}), 500
 
+@task_bp.route('/projects/<project_id>/import', methods=['POST'])
+@jwt_required()
+def import_project_tasks(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+        
+        # التحقق من صلاحية الوصول للمشروع
+        if not _has_project_access(project_id, current_user_id):
+            return jsonify({'error': 'ليس لديك صلاحية لاستيراد مهام في هذا المشروع'}), 403
+        
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({'error': 'ملف الاستيراد مطلوب (file)'}), 400
+        
+        file_format = request.args.get('format') or detect_format(upload.filename)
+        if file_format not in PARSERS:
+            return jsonify({'error': 'التنسيق يجب أن يكون csv أو msproject'}), 400
+        
+        events = iter_import(project_id, open_stream(upload.stream, file_format), file_format,
+                             current_app.config['IMPORT_BATCH_SIZE'], current_app.config['IMPORT_MAX_ERRORS'],
+                             current_user_id)
+        
+        # progress=true: سطر JSON لكل دفعة (NDJSON) ثم الملخص
+        if request.args.get('progress') == 'true':
+            return Response(stream_with_context(_ndjson(events)), mimetype='application/x-ndjson')
+        
+        summary = next(event for event in events if event['stage'] == 'done')
+        summary.pop('stage')
+        return jsonify(summary), 201
+        
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء استيراد المهام'}), 500
+
+def _ndjson(events):
+    try:
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+    except ImportFormatError as e:
+        yield json.dumps({'stage': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+    except Exception:
+        yield json.dumps({'stage': 'error', 'error': 'حدث خطأ أثناء استيراد المهام'}, ensure_ascii=False) + '\n'
+
 @task_bp.route('/tasks/<task_id>', methods=['PUT'])
 @jwt_required()
 def update_task(task_id):
     try:
         current_user_id = get_jwt_identity()
+        data = request.json
+        # If-Match: "<version>" يرفض الكتابة إذا عُدّلت المهمة بعد قراءتها
+        expected_version = parse_if_match(request.headers.get('If-Match'))
+        
+        # propagate=true: إزاحة المهام اللاحقة في نفس المعاملة
+        propagate = request.args.get('propagate') == 'true' or data.get('propagate') is True
+        
+        if current_app.config.get('TASK_FAST_WRITES') and not propagate:
+            # عبارة UPDATE شرطية واحدة (src.services.task_writes)
+            task = task_writes.update_task(task_id, current_user_id, task_changes(data), expected_version)
+            response = jsonify(task)
+            response.headers['ETag'] = etag(task['version'])
+            return response, 200
+        
         task = Task.query.get_or_404(task_id)
         
         # التحقق من صلاحية الوصول للمشروع
         if not _has_project_access(task.project_id, current_user_id):
             return jsonify({'error': 'ليس لديك صلاحية لتعديل هذه المهمة'}), 403
         
-        data = request.json
+        if expected_version is not None and task.version != expected_version:
+            return jsonify({'error': 'عُدّلت المهمة بعد قراءتها؛ أعد تحميلها ثم حاول مرة أخرى'}), 412
         
-        if data.get('name'):
-            task.name = data['name']
-        if data.get('description') is not None:
-            task.description = data['description']
-        if data.get('start_date'):
-            task.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        if data.get('end_date'):
-            task.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        if data.get('status'):
-            task.status = data['status']
-        if 'assigned_to' in data:
-            if data['assigned_to']:
-                assignee = User.query.get(data['assigned_to'])
-                if not assignee:
-                    return jsonify({'error': 'المستخدم المُسند إليه غير موجود'}), 400
-            task.assigned_to = data['assigned_to']
+        changes = task_changes(data)
+        if changes.get('assigned_to') and not User.query.get(changes['assigned_to']):
+            return jsonify({'error': 'المستخدم المُسند إليه غير موجود'}), 400
+        for name, value in changes.items():
+            setattr(task, name, value)
         
         # التحقق من صحة التواريخ
         if task.start_date >= task.end_date:
             return jsonify({'error': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
         
+        rescheduled = propagate_schedule(task.id) if propagate else None
+        
         db.session.commit()
         
-        return jsonify(task.to_dict()), 200
+        if propagate:
+            response = jsonify({'task': task.to_dict(), 'rescheduled': rescheduled})
+        else:
+            response = jsonify(task.to_dict())
+        response.headers['ETag'] = etag(task.version)
+        return response, 200
         
+    except TaskWriteError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
     except ValueError:
         return jsonify({'error': 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'}), 400
+    except DependencyCycleError:
+        db.session.rollback()
+        return jsonify({'error': 'التبعيات تشكل حلقة ولا يمكن إعادة الجدولة'}), 409
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'عُدّلت المهمة من طلب آخر أثناء التحديث؛ حاول مرة أخرى'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء تحديث المهمة'}), 500
@@ -146,17 +289,33 @@ def update_task(task_id):
 def delete_task(task_id):
     try:
         current_user_id = get_jwt_identity()
+        expected_version = parse_if_match(request.headers.get('If-Match'))
+        
+        if current_app.config.get('TASK_FAST_WRITES'):
+            # عبارة DELETE شرطية واحدة للمهمة ثم ما يتبعها (src.services.task_writes)
+            task_writes.delete_task(task_id, current_user_id, expected_version)
+            return '', 204
+        
         task = Task.query.get_or_404(task_id)
         
         # التحقق من صلاحية الوصول للمشروع
         if not _has_project_access(task.project_id, current_user_id):
             return jsonify({'error': 'ليس لديك صلاحية لحذف هذه المهمة'}), 403
         
+        if expected_version is not None and task.version != expected_version:
+            return jsonify({'error': 'عُدّلت المهمة بعد قراءتها؛ أعد تحميلها ثم حاول مرة أخرى'}), 412
+        
         db.session.delete(task)
         db.session.commit()
         
         return '', 204
         
+    except TaskWriteError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'عُدّلت المهمة من طلب آخر أثناء الحذف؛ حاول مرة أخرى'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء حذف المهمة'}), 500
@@ -231,16 +390,22 @@ def delete_dependency(dependency_id):
 
 @task_bp.route('/tasks/<task_id>/comments', methods=['GET'])
 @jwt_required()
+@cached_response(_task_scope)
 def get_task_comments(task_id):
     try:
         current_user_id = get_jwt_identity()
-        task = Task.query.get_or_404(task_id)
+        # المهمة في القاعدة الرئيسية أو في الأرشيف إن كان مشروعها مؤرشفاً
+        task = Task.query.get(task_id) or get_archived(Task, task_id)
+        if task is None:
+            return jsonify({'error': 'المهمة غير موجودة'}), 404
         
         # التحقق من صلاحية الوصول للمشروع
-        if not _has_project_access(task.project_id, current_user_id):
+        if not _has_project_access(task.project_id, current_user_id, include_archived=True):
             return jsonify({'error': 'ليس لديك صلاحية للوصول لتعليقات هذه المهمة'}), 403
         
-        comments = Comment.query.filter_by(task_id=task_id).order_by(Comment.created_at.desc()).all()
+        comments = Comment.query.filter_by(task_id=task_id).execution_options(
+            **archived_options(task.project_id)
+        ).order_by(Comment.created_at.desc()).all()
         return jsonify([comment.to_dict() for comment in comments]), 200
         
     except Exception as e:
@@ -296,22 +461,13 @@ def delete_comment(comment_id):
         db.session.rollback()
         return jsonify({'error': 'حدث خطأ أثناء حذف التعليق'}), 500
 
-def _has_project_access(project_id, user_id):
-    """التحقق من صلاحية المستخدم للوصول للمشروع"""
-    from src.models.project import ProjectMember
-    
-    project = Project.query.get(project_id)
-    if not project:
-        return False
-    
-    # إذا كان المستخدم مالك المشروع
-    if project.owner_id == user_id:
+def _has_project_access(project_id, user_id, include_archived=False):
+    """التحقق من صلاحية المستخدم للوصول للمشروع
+
+    المشاريع المؤرشفة للقراءة فقط، فلا تُقبل إلا مع include_archived.
+    """
+    # المالك أو الأعضاء (src.services.payloads، الاستعلام نفسه في src.aio.routes)
+    if db.session.scalar(project_access_query(project_id, user_id)):
         return True
-    
-    # إذا كان المستخدم عضو في المشروع
-    member = ProjectMember.query.filter_by(
-        project_id=project_id, user_id=user_id
-    ).first()
-    
-    return member is not None
+    return include_archived and Project.query.get(project_id) is None and has_archived_access(project_id, user_id)
 
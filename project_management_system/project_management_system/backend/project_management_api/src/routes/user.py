@@ -1,12 +1,29 @@
 from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
+from src.services.user_search import can_view_user, search_users
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
+@jwt_required()
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """البحث في المستخدمين المشاركين للمستخدم الحالي: ?q=بادئة&limit=&cursor="""
+    try:
+        current_user_id = get_jwt_identity()
+        try:
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            return jsonify({'error': 'قيمة limit غير صحيحة'}), 400
+
+        return jsonify(search_users(
+            current_user_id, request.args.get('q', ''), limit, request.args.get('cursor')
+        ))
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء البحث عن المستخدمين'}), 500
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -17,23 +34,37 @@ def create_user():
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
-@user_bp.route('/users/<int:user_id>', methods=['GET'])
+# معرفات المستخدمين UUID نصية، فلا يُستخدم <int:user_id>
+@user_bp.route('/users/<user_id>', methods=['GET'])
+@jwt_required()
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
+    user = db.session.get(User, user_id)
+    if not user or not can_view_user(get_jwt_identity(), user_id):
+        return jsonify({'error': 'المستخدم غير موجود'}), 404
     return jsonify(user.to_dict())
 
-@user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@user_bp.route('/users/<user_id>', methods=['PUT'])
+@jwt_required()
 def update_user(user_id):
-    user = User.query.get_or_404(user_id)
+    if user_id != get_jwt_identity():
+        return jsonify({'error': 'ليس لديك صلاحية لتعديل هذا المستخدم'}), 403
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'المستخدم غير موجود'}), 404
     data = request.json
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
     return jsonify(user.to_dict())
 
-@user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@user_bp.route('/users/<user_id>', methods=['DELETE'])
+@jwt_required()
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
+    if user_id != get_jwt_identity():
+        return jsonify({'error': 'ليس لديك صلاحية لحذف هذا المستخدم'}), 403
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'المستخدم غير موجود'}), 404
     db.session.delete(user)
     db.session.commit()
     return '', 204
@@ -0,0 +1,86 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import date, datetime, timedelta
+from sqlalchemy import exists, or_, select
+from sqlalchemy.orm import aliased
+from src.models.user import User, db
+from src.models.project import Project, ProjectMember
+from src.routes.project import _has_project_access
+from src.services.workload import GRANULARITIES, team_workload, user_workload
+
+workload_bp = Blueprint('workload', __name__)
+
+@workload_bp.route('/users/<user_id>/workload', methods=['GET'])
+@jwt_required()
+def get_user_workload(user_id):
+    try:
+        current_user_id = get_jwt_identity()
+
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'المستخدم غير موجود'}), 404
+
+        # يرى المستخدم حمل عمله أو حمل من يشاركه مشروعاً واحداً على الأقل
+        if user_id != current_user_id and not _shares_project(user_id, current_user_id):
+            return jsonify({'error': 'ليس لديك صلاحية لعرض حمل عمل هذا المستخدم'}), 403
+
+        params, error = _parse_range()
+        if error:
+            return jsonify({'error': error}), 400
+
+        return jsonify(user_workload(user_id, *params)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء حساب حمل العمل'}), 500
+
+@workload_bp.route('/projects/<project_id>/workload', methods=['GET'])
+@jwt_required()
+def get_team_workload(project_id):
+    try:
+        current_user_id = get_jwt_identity()
+        project = Project.query.get_or_404(project_id)
+
+        # التحقق من صلاحية الوصول للمشروع
+        if not _has_project_access(project_id, current_user_id):
+            return jsonify({'error': 'ليس لديك صلاحية للوصول لهذا المشروع'}), 403
+
+        params, error = _parse_range()
+        if error:
+            return jsonify({'error': error}), 400
+
+        return jsonify(team_workload(project, *params)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'حدث خطأ أثناء حساب حمل عمل الفريق'}), 500
+
+def _parse_range():
+    """قراءة from وto وgranularity من الاستعلام؛ الافتراضي 30 يوماً من اليوم"""
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else date.today()
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else start + timedelta(days=29)
+    except ValueError:
+        return None, 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return None, 'granularity يجب أن تكون day أو week'
+    if end < start:
+        return None, 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'
+    if (end - start).days >= current_app.config['WORKLOAD_MAX_DAYS']:
+        return None, f"النطاق لا يمكن أن يتجاوز {current_app.config['WORKLOAD_MAX_DAYS']} يوماً"
+
+    return (start, end, granularity), None
+
+def _belongs_to(project_member, user_id):
+    """شرط مرتبط بصف Project الخارجي: المستخدم مالكه أو عضو فيه"""
+    return or_(Project.owner_id == user_id, exists().where(
+        project_member.project_id == Project.id, project_member.user_id == user_id,
+    ))
+
+def _shares_project(user_id, other_user_id):
+    """هل يشترك المستخدمان في مشروع واحد على الأقل (مالكاً أو عضواً)
+
+    استعلام EXISTS واحد يتوقف عند أول مشروع مشترك، بدلاً من جلب مشاريع كل منهما.
+    """
+    return db.session.scalar(select(exists().where(
+        _belongs_to(ProjectMember, user_id), _belongs_to(aliased(ProjectMember), other_user_id),
+    )))
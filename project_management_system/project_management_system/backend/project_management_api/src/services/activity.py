@@ -0,0 +1,377 @@
+"""
+سجل نشاط المشاريع: من غيّر ماذا ومتى
+
+- after_flush يحوّل تغييرات المهام والتبعيات والتعليقات والأعضاء والمشاريع إلى
+  أحداث مضغوطة: للتحديث الحقول المتغيرة فقط {الحقل: [القديم، الجديد]}، وللإنشاء
+  والحذف الحقول الأساسية.
+- الأحداث تُنقل بعد الالتزام فقط إلى مخزن مؤقت في العامل، ويكتبها خيط خلفي
+  بإدراج جماعي كل ACTIVITY_FLUSH_INTERVAL ثانية أو عند بلوغ ACTIVITY_BATCH_SIZE،
+  بدلاً من كتابة إضافية في معاملة كل طلب. توقف العامل فجأة يفقد أحداث آخر
+  دفعة لم تُكتب بعد.
+- السجل GET /projects/<id>/activity من الأحدث، بترقيم keyset على
+  (project_id, seq).
+- التقليم: حذف الأحداث الأقدم من ACTIVITY_RETENTION_DAYS على دفعات، دورياً
+  من الخيط الخلفي تحت قفل استشاري أو من سطر الأوامر:
+
+    flask --app src.main activity prune --days 180
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_request_context
+from flask.cli import AppGroup
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.locks import advisory_lock
+from src.models.activity import ActivityEvent
+from src.models.project import Project, ProjectMember
+from src.models.task import Comment, Dependency, Task
+from src.models.user import db
+from src.tenancy import bind_engine, tenant_engine, use_tenant
+
+logger = logging.getLogger(__name__)
+
+PRUNE_LOCK_NAME = 'activity_prune'
+
+# الحقول المسجلة عند الإنشاء والحذف لكل نوع
+_SUMMARY_FIELDS = {
+    Task: ('name', 'status', 'assigned_to', 'start_date', 'end_date', 'parent_task_id'),
+    Project: ('name', 'start_date', 'end_date'),
+    Dependency: ('predecessor_task_id', 'successor_task_id', 'type'),
+    Comment: ('task_id', 'user_id'),
+    ProjectMember: ('user_id', 'role'),
+}
+_ENTITY_TYPES = {Task: 'task', Project: 'project', Dependency: 'dependency',
+                 Comment: 'comment', ProjectMember: 'member'}
+_IGNORED_FIELDS = {'created_at', 'updated_at', 'version'}
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _actor(session):
+    actor = session.info.get('actor_id')
+    if actor is None and has_request_context():
+        try:
+            actor = get_jwt_identity()
+        except Exception:
+            actor = None
+    return actor
+
+
+def _diff(obj):
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in _IGNORED_FIELDS:
+            continue
+        history = state.attrs[attr.key].history
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                changes[attr.key] = [_value(old), _value(new)]
+    return changes
+
+
+def _summary(obj, model=None):
+    return {name: _value(getattr(obj, name)) for name in _SUMMARY_FIELDS[model or type(obj)]
+            if getattr(obj, name) is not None}
+
+
+def record_activity(session, project_id, entity_type, entity_id, action, changes=None):
+    """إضافة حدث يُكتب بعد التزام الجلسة؛ للتغييرات الجماعية التي لا تمر بوحدة العمل"""
+    pending = session.info.setdefault('activity', {})
+    key = (entity_type, entity_id)
+    previous = pending.get(key)
+    # عدة flush في المعاملة نفسها (autoflush) تُدمج في حدث واحد للكيان
+    if previous is not None and action == 'update' and previous['action'] in ('create', 'update'):
+        for name, (old, new) in changes.items():
+            if previous['action'] == 'create':
+                previous['changes'][name] = new
+            else:
+                previous['changes'][name] = [previous['changes'].get(name, [old])[0], new]
+        return
+    if previous is not None:
+        # حذف بعد إنشاء أو تحديث: يُسجل الحدثان بترتيبهما
+        key = (entity_type, entity_id, len(pending))
+    pending[key] = {
+        'project_id': project_id,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'action': action,
+        'actor_id': _actor(session),
+        'changes': dict(changes or {}),
+        'created_at': datetime.utcnow(),
+    }
+
+
+def _entity_id(model, row):
+    return row.user_id if model is ProjectMember else row.id
+
+
+def record_created(session, project_id, model, row):
+    """حدث إنشاء من صف أعاده INSERT ... RETURNING (دون وحدة العمل)"""
+    record_activity(session, project_id, _ENTITY_TYPES[model], _entity_id(model, row), 'create', _summary(row, model))
+
+
+def record_deleted(session, project_id, model, row):
+    """حدث حذف من صف أعادته DELETE ... RETURNING (دون وحدة العمل)"""
+    record_activity(session, project_id, _ENTITY_TYPES[model], _entity_id(model, row), 'delete', _summary(row, model))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_activity(session, flush_context):
+    pending = []
+    for action, objects in (('create', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            if type(obj) not in _ENTITY_TYPES:
+                continue
+            if action == 'update':
+                changes = _diff(obj)
+                if not changes:
+                    continue
+            else:
+                changes = _summary(obj)
+            pending.append((obj, action, changes))
+    if not pending:
+        return
+
+    # التبعيات والتعليقات: مشروعها من مهمتها باستعلام واحد
+    task_ids = {obj.predecessor_task_id if isinstance(obj, Dependency) else obj.task_id
+                for obj, _, _ in pending if isinstance(obj, (Dependency, Comment))}
+    task_projects = dict(session.execute(
+        select(Task.id, Task.project_id).where(Task.id.in_(task_ids))
+    ).all()) if task_ids else {}
+    # مهام حُذفت في هذه الدفعة نفسها لم تعد في الجدول
+    task_projects.update({obj.id: obj.project_id for obj, _, _ in pending if isinstance(obj, Task)})
+
+    for obj, action, changes in pending:
+        if isinstance(obj, Project):
+            project_id, entity_id = obj.id, obj.id
+        elif isinstance(obj, ProjectMember):
+            project_id, entity_id = obj.project_id, obj.user_id
+        elif isinstance(obj, Task):
+            project_id, entity_id = obj.project_id, obj.id
+        else:
+            task_id = obj.predecessor_task_id if isinstance(obj, Dependency) else obj.task_id
+            project_id, entity_id = task_projects.get(task_id), obj.id
+        if project_id:
+            record_activity(session, project_id, _ENTITY_TYPES[type(obj)], entity_id, action, changes)
+
+
+@event.listens_for(Session, 'after_commit')
+def _buffer_activity(session):
+    pending = session.info.pop('activity', None)
+    if not pending:
+        return
+    rows = [{**row, 'changes': json.dumps(row['changes'], ensure_ascii=False) if row['changes'] else None}
+            for row in pending.values()]
+    log = session.info.get('activity_log')
+    if log is None:
+        try:
+            log = current_app.extensions.get('activity')
+        except RuntimeError:
+            log = None
+    if log is not None:
+        log.append(rows, tenant_engine())
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_activity(session, previous_transaction):
+    session.info.pop('activity', None)
+
+
+class ActivityLog:
+    """مخزن مؤقت للأحداث في العامل يُكتب على دفعات إلى activity_event
+
+    كل حدث يُكتب في قاعدة المؤسسة التي التزمت به (src.tenancy) أو في engine.
+    فشل الكتابة يُبقي الأحداث في المخزن لمحاولة لاحقة، وفوق max_buffer حدث
+    يُحذف الأقدم حتى لا ينمو المخزن بلا حد إذا استمر الفشل.
+    """
+
+    def __init__(self, engine, batch_size, flush_interval, max_buffer=50000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def append(self, rows, engine=None):
+        overflow = len(self._buffer) + len(rows) - self.max_buffer
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning('activity buffer full: dropping %d oldest events', overflow)
+        self._buffer.extend((engine, row) for row in rows)
+        if not self.flush_interval:
+            # يُستدعى من after_commit: التعديل نفسه التُزم به، فلا يُفشل فشل السجل الطلب
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('activity log flush failed; %d events kept for retry', len(self._buffer))
+        elif len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self):
+        """كتابة كل الأحداث المخزنة؛ يعيد عددها"""
+        written = 0
+        # قفل واحد حتى لا تكتب خيوط متعددة الدفعة نفسها بترتيب مختلف
+        with self._lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                targets = {}
+                for engine, row in batch:
+                    targets.setdefault(engine or self.engine, []).append(row)
+                try:
+                    for engine, rows in targets.items():
+                        with engine.begin() as conn:
+                            conn.execute(ActivityEvent.__table__.insert(), rows)
+                        written += len(rows)
+                        # لا تُعاد الدفعة المكتوبة إذا فشلت قاعدة أخرى
+                        batch = [entry for entry in batch if (entry[0] or self.engine) is not engine]
+                except Exception:
+                    # إعادة الدفعة لمقدمة المخزن لمحاولة لاحقة
+                    self._buffer.extendleft(reversed(batch))
+                    raise
+        return written
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def start(self, app):
+        """خيط الكتابة الدورية، وكتابة ما تبقى عند خروج العملية"""
+        self._thread = threading.Thread(target=self.run, args=(app,), daemon=True, name='activity-log')
+        self._thread.start()
+        atexit.register(self.shutdown)
+        return self
+
+    def shutdown(self, timeout=None):
+        """إيقاف خيط الكتابة وكتابة ما تبقى في المخزن؛ آمن للاستدعاء أكثر من مرة"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            atexit.unregister(self.shutdown)
+        self.flush()
+
+    def run(self, app):
+        prune_interval = app.config['ACTIVITY_PRUNE_INTERVAL']
+        next_prune = time.monotonic() + prune_interval
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            if self._stop.is_set():
+                break
+            self._wake.clear()
+            try:
+                self.flush()
+                if prune_interval and time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + prune_interval
+                    with app.app_context():
+                        # القاعدة الافتراضية وقواعد المؤسسات المفتوحة في هذا العامل
+                        router = app.extensions.get('tenancy')
+                        for tenant_id in [None, *(router.open_tenants() if router else ())]:
+                            with use_tenant(tenant_id):
+                                run_prune()
+            except Exception:
+                app.logger.exception('activity log flush failed')
+
+
+def activity_feed(project_id, limit=None, cursor=None):
+    """{'events': [...] من الأحدث، 'next_cursor': seq أو None}"""
+    config = current_app.config
+    limit = config['ACTIVITY_FEED_LIMIT'] if limit is None else limit
+    if not 1 <= limit <= config['ACTIVITY_FEED_MAX_LIMIT']:
+        raise ValueError(f"limit يجب أن يكون بين 1 و {config['ACTIVITY_FEED_MAX_LIMIT']}")
+
+    # أحداث هذا العامل التي لم تُكتب بعد (يرى المستخدم تغييره فوراً)
+    log = current_app.extensions.get('activity')
+    if log is not None and len(log):
+        log.flush()
+
+    stmt = select(ActivityEvent).where(ActivityEvent.project_id == project_id)
+    if cursor is not None:
+        stmt = stmt.where(ActivityEvent.seq < cursor)
+    events = db.session.scalars(stmt.order_by(ActivityEvent.seq.desc()).limit(limit + 1)).all()
+    return {
+        'events': [event.to_dict() for event in events[:limit]],
+        'next_cursor': events[limit - 1].seq if len(events) > limit else None,
+    }
+
+
+def prune_activity(days, batch_size=5000):
+    """حذف الأحداث الأقدم من days يوماً على دفعات؛ يعيد عدد المحذوف"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    table = ActivityEvent.__table__
+    deleted = 0
+    while True:
+        # دفعات قصيرة حتى لا يُحجز قفل الكتابة طويلاً
+        with bind_engine().begin() as conn:
+            result = conn.execute(table.delete().where(table.c.seq.in_(
+                select(table.c.seq).where(table.c.created_at < cutoff).limit(batch_size).scalar_subquery()
+            )))
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def run_prune(days=None):
+    """التقليم تحت القفل الاستشاري؛ يعيد None إذا كان عامل آخر ينفذه"""
+    days = current_app.config['ACTIVITY_RETENTION_DAYS'] if days is None else days
+    if not days:
+        return 0
+    with advisory_lock(PRUNE_LOCK_NAME) as acquired:
+        if not acquired:
+            return None
+        return prune_activity(days)
+
+
+def init_activity(app):
+    app.cli.add_command(activity_cli)
+    if not app.config.get('ACTIVITY_ENABLED'):
+        return None
+
+    with app.app_context():
+        engine = db.engine
+    # الاختبارات تكتب مباشرة بعد الالتزام (دون خيط خلفي)
+    interval = 0 if app.config.get('TESTING') else app.config['ACTIVITY_FLUSH_INTERVAL']
+    log = ActivityLog(engine, app.config['ACTIVITY_BATCH_SIZE'], interval, app.config['ACTIVITY_MAX_BUFFER'])
+    app.extensions['activity'] = log
+    if interval:
+        log.start(app)
+    return log
+
+
+activity_cli = AppGroup('activity', help='سجل نشاط المشاريع')
+
+
+@activity_cli.command('prune')
+@click.option('--days', type=int, default=None, help='الاحتفاظ بأحداث آخر عدد من الأيام')
+@click.option('--tenant', 'tenant_id', default=None, help='قاعدة هذه المؤسسة بدلاً من الافتراضية')
+def prune_command(days, tenant_id):
+    """حذف الأحداث القديمة (مناسب للتشغيل من cron)"""
+    started = time.perf_counter()
+    try:
+        with use_tenant(tenant_id):
+            deleted = run_prune(days)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if deleted is None:
+        click.echo('التقليم قيد التنفيذ في عامل آخر')
+        return
+    click.echo(f'تم حذف {deleted} حدث خلال {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,276 @@
+"""
+أرشفة المشاريع المكتملة في ملف SQLite منفصل مربوط بـ ATTACH
+
+- كل اتصال يربط ملف الأرشيف باسم المخطط archive، وجداوله نسخة من جداول
+  القاعدة الرئيسية (src.sqlite.mirror_tables).
+- الأرشفة تنقل صفوف المشروع (المشروع، الأعضاء، المهام، التبعيات، التعليقات،
+  بيانات المرفقات، الإشعارات) بعبارة INSERT ... SELECT لكل جدول ثم DELETE
+  لكل جدول، وتسجل المشروع في archived_project بالقاعدة الرئيسية.
+  إلغاء الأرشفة هو النقل العكسي.
+- القراءة شفافة: الاستعلام نفسه يُنفّذ على الأرشيف بخيار
+  schema_translate_map (ARCHIVE_OPTIONS) عندما يكون المشروع مؤرشفاً.
+فالقاعدة الرئيسية وفهارسها لا تحمل إلا المشاريع النشطة؛ الصفحات المحررة
+تُعاد إلى الاستخدام، و--vacuum في سطر الأوامر يقلّص الملف نفسه.
+"""
+
+import os
+import sqlite3
+import time
+from functools import partial
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, exists, select, text
+
+from src.cache import invalidate_on_commit, project_tag, user_tag
+from src.models.user import db
+from src.models.project import ArchivedProject, Project, ProjectMember
+from src.models.task import Task
+from src.replicas import read_engines
+from src.sqlite import attach, mirror_tables, sqlite_path, table_columns
+from src.tenancy import current_tenant
+
+ARCHIVE_SCHEMA = 'archive'
+ARCHIVE_OPTIONS = {'schema_translate_map': {None: ARCHIVE_SCHEMA}}
+
+# ترتيب الإدراج (الآباء أولاً)؛ الحذف بالترتيب العكسي
+ARCHIVE_TABLES = ('project', 'project_member', 'task', 'dependency', 'comment', 'task_attachment', 'notification')
+
+_PROJECT_TASKS = 'SELECT id FROM {schema}.task WHERE project_id = :project_id'
+_PROJECT_COMMENTS = f'SELECT id FROM {{schema}}.comment WHERE task_id IN ({_PROJECT_TASKS})'
+_FILTERS = {
+    'project': 'id = :project_id',
+    'project_member': 'project_id = :project_id',
+    'task': 'project_id = :project_id',
+    'dependency': f'successor_task_id IN ({_PROJECT_TASKS}) OR predecessor_task_id IN ({_PROJECT_TASKS})',
+    'comment': f'task_id IN ({_PROJECT_TASKS})',
+    'task_attachment': f'task_id IN ({_PROJECT_TASKS})',
+    # الإشعارات المرتبطة بالمشروع أو بإحدى مهامه أو تعليقاته
+    'notification': (
+        f'related_entity_id = :project_id OR related_entity_id IN ({_PROJECT_TASKS}) '
+        f'OR related_entity_id IN ({_PROJECT_COMMENTS})'
+    ),
+}
+
+
+class ArchiveError(Exception):
+    """لا يمكن أرشفة المشروع أو إلغاء أرشفته في حالته الحالية"""
+
+
+def archive_path(app):
+    """مسار ملف الأرشيف: ARCHIVE_DATABASE_PATH أو archive.db بجوار القاعدة الرئيسية"""
+    path = app.config.get('ARCHIVE_DATABASE_PATH')
+    if path is None:
+        main_path = sqlite_path(app.config['SQLALCHEMY_DATABASE_URI'])
+        if main_path:
+            path = os.path.join(os.path.dirname(main_path), 'archive.db')
+    return path or None
+
+
+def _on_connect(dbapi_connection, connection_record, path):
+    attach(dbapi_connection, path, ARCHIVE_SCHEMA)
+    try:
+        mirror_tables(dbapi_connection, ARCHIVE_SCHEMA, ARCHIVE_TABLES)
+    except sqlite3.OperationalError:
+        # اتصال آخر يُنشئ الجداول نفسها الآن؛ النقل يعيد المزامنة قبل أن يبدأ
+        pass
+
+
+def _on_read_connect(dbapi_connection, connection_record, path):
+    attach(dbapi_connection, path, ARCHIVE_SCHEMA)
+
+
+def init_archive(app):
+    """ربط ملف الأرشيف بكل اتصال جديد وتسجيل أوامر archive"""
+    app.cli.add_command(archive_cli)
+    path = archive_path(app)
+    app.config['ARCHIVE_DATABASE_PATH'] = path
+    if not path:
+        return
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'connect', partial(_on_connect, path=path))
+    # الاتصالات المفتوحة قبل التسجيل (ترحيلات الإقلاع) لا تحمل الأرشيف
+    engine.dispose()
+    # محركات القراءة للقراءة فقط: ربط بدون نسخ الجداول
+    for reader in read_engines(app):
+        event.listen(reader, 'connect', partial(_on_read_connect, path=path))
+
+
+def archive_enabled():
+    # ملف الأرشيف مرتبط بالقاعدة الافتراضية فقط
+    return bool(current_app.config.get('ARCHIVE_DATABASE_PATH')) and current_tenant() is None
+
+
+def is_archived(project_id):
+    return archive_enabled() and db.session.get(ArchivedProject, project_id) is not None
+
+
+def archived_options(project_id):
+    """خيارات التنفيذ لقراءة بيانات المشروع من موضعها الحالي"""
+    return ARCHIVE_OPTIONS if is_archived(project_id) else {}
+
+
+def get_archived(model, entity_id):
+    """جلب كيان من الأرشيف بمعرفه (بعد عدم وجوده في القاعدة الرئيسية)"""
+    if not archive_enabled() or not db.session.scalar(select(exists().select_from(ArchivedProject))):
+        return None
+    return db.session.execute(
+        select(model).where(model.__mapper__.primary_key[0] == entity_id).execution_options(**ARCHIVE_OPTIONS)
+    ).scalar_one_or_none()
+
+
+def has_archived_access(project_id, user_id):
+    """صلاحية القراءة لمشروع مؤرشف: مالكه أو أحد أعضائه وقت الأرشفة"""
+    if not archive_enabled():
+        return False
+    entry = db.session.get(ArchivedProject, project_id)
+    if entry is None:
+        return False
+    if entry.owner_id == user_id:
+        return True
+    return db.session.execute(
+        select(exists().where(ProjectMember.project_id == project_id, ProjectMember.user_id == user_id))
+        .execution_options(**ARCHIVE_OPTIONS)
+    ).scalar()
+
+
+def archived_projects_for(user_id):
+    """المشاريع المؤرشفة التي يملكها المستخدم أو كان عضواً فيها"""
+    if not archive_enabled():
+        return []
+    # السجل في القاعدة الرئيسية، والمشاريع نفسها في الأرشيف
+    owned = list(db.session.scalars(select(ArchivedProject.project_id).where(ArchivedProject.owner_id == user_id)))
+    member = select(ProjectMember.project_id).where(ProjectMember.user_id == user_id)
+    return list(db.session.scalars(
+        select(Project).where(Project.id.in_(owned) | Project.id.in_(member)).execution_options(**ARCHIVE_OPTIONS)
+    ))
+
+
+def _copy(connection, project_id, source, target):
+    dbapi_connection = connection.connection.dbapi_connection
+    # جداول الأرشيف قد تكون أُنشئت قبل آخر ترحيل على هذا الاتصال
+    mirror_tables(dbapi_connection, ARCHIVE_SCHEMA, ARCHIVE_TABLES)
+
+    counts = {}
+    for table in ARCHIVE_TABLES:
+        columns = ', '.join(f'"{name}"' for name in table_columns(dbapi_connection, source, table))
+        condition = _FILTERS[table].format(schema=source)
+        # OR REPLACE: إعادة النقل بعد انقطاع بين المرحلتين لا تتعارض مع نسخة سابقة
+        counts[table] = connection.execute(text(
+            f'INSERT OR REPLACE INTO {target}."{table}" ({columns}) '
+            f'SELECT {columns} FROM {source}."{table}" WHERE {condition}'
+        ), {'project_id': project_id}).rowcount
+    return counts
+
+
+def _delete(connection, project_id, source):
+    for table in reversed(ARCHIVE_TABLES):
+        condition = _FILTERS[table].format(schema=source)
+        connection.execute(text(f'DELETE FROM {source}."{table}" WHERE {condition}'), {'project_id': project_id})
+
+
+def delete_project_rows(project_id):
+    """حذف المشروع وكل صفوفه من القاعدة الرئيسية بعبارة DELETE لكل جدول (بدون التزام)
+
+    يعيد وسوم الذاكرة المؤقتة للإبطال، وتُحسب قبل حذف المهام.
+    """
+    tags = _cache_tags(project_id, 'main')
+    _delete(db.session.connection(), project_id, 'main')
+    return tags
+
+
+def _move(project_id, source, target):
+    """النسخ ثم الحذف في معاملتين
+
+    في وضع WAL لا تكون المعاملة ذرية عبر ملفين مربوطين، لذلك يُلتزم بالنسخ
+    أولاً: الانقطاع بين المرحلتين يترك نسخة زائدة في الهدف فقط، والمصدر
+    وسجل archived_project يبقيان صحيحين وتعيد المحاولة التالية النقل.
+    """
+    counts = _copy(db.session.connection(), project_id, source, target)
+    db.session.commit()
+    _delete(db.session.connection(), project_id, source)
+    return counts
+
+
+def _cache_tags(project_id, schema):
+    assignees = db.session.execute(
+        text(f'SELECT DISTINCT assigned_to FROM {schema}.task WHERE project_id = :project_id AND assigned_to IS NOT NULL'),
+        {'project_id': project_id},
+    ).scalars()
+    return [project_tag(project_id), *(user_tag(user_id) for user_id in assignees)]
+
+
+def archive_project(project, force=False):
+    """نقل المشروع وكل صفوفه إلى الأرشيف؛ يعيد عدد الصفوف المنقولة لكل جدول
+
+    تلتزم الدالة بمرحلة النسخ؛ الحذف وتسجيل الأرشفة يلتزم بهما المستدعي
+    بـ db.session.commit().
+    """
+    if not archive_enabled():
+        raise ArchiveError('الأرشفة غير مفعلة')
+    open_tasks = db.session.scalar(
+        select(exists().where(Task.project_id == project.id, Task.status != 'completed'))
+    )
+    if open_tasks and not force:
+        raise ArchiveError('لا يمكن أرشفة مشروع يحتوي مهاماً غير مكتملة')
+
+    project_id, name, owner_id = project.id, project.name, project.owner_id
+    db.session.flush()
+    tags = _cache_tags(project_id, 'main')
+    db.session.expunge(project)
+    counts = _move(project_id, 'main', ARCHIVE_SCHEMA)
+    # الإبطال مع التزام الحذف، لا مع التزام النسخ
+    invalidate_on_commit(db.session, *tags)
+    db.session.add(ArchivedProject(project_id=project_id, name=name, owner_id=owner_id))
+    return counts
+
+
+def unarchive_project(project_id):
+    """إعادة المشروع من الأرشيف إلى القاعدة الرئيسية؛ يعيد عدد الصفوف المنقولة"""
+    entry = db.session.get(ArchivedProject, project_id) if archive_enabled() else None
+    if entry is None:
+        raise ArchiveError('المشروع غير مؤرشف')
+
+    counts = _move(project_id, ARCHIVE_SCHEMA, 'main')
+    invalidate_on_commit(db.session, *_cache_tags(project_id, 'main'))
+    db.session.execute(delete(ArchivedProject).where(ArchivedProject.project_id == project_id))
+    return counts
+
+
+archive_cli = AppGroup('archive', help='أرشفة المشاريع المكتملة')
+
+
+@archive_cli.command('projects')
+@click.option('--completed-before', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help='أرشفة المشاريع المنتهية قبل هذا التاريخ وكل مهامها مكتملة')
+@click.option('--vacuum', is_flag=True, help='تقليص ملف القاعدة الرئيسية بعد النقل')
+def archive_projects_command(completed_before, vacuum):
+    """أرشفة المشاريع المكتملة (مناسب للتشغيل الدوري من cron)"""
+    if not archive_enabled():
+        raise click.ClickException('الأرشفة غير مفعلة (ARCHIVE_DATABASE_PATH)')
+
+    started = time.perf_counter()
+    candidates = list(db.session.scalars(
+        select(Project.id).where(
+            Project.end_date < completed_before.date(),
+            ~exists().where(Task.project_id == Project.id, Task.status != 'completed'),
+        )
+    ))
+    archived = 0
+    for project_id in candidates:
+        # معاملة لكل مشروع حتى لا تطول أقفال الكتابة
+        try:
+            archive_project(db.session.get(Project, project_id))
+            db.session.commit()
+            archived += 1
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'تعذرت أرشفة المشروع {project_id}: {e}', err=True)
+    click.echo(f'تمت أرشفة {archived} مشروع خلال {time.perf_counter() - started:.2f}s')
+
+    if vacuum and archived:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('VACUUM main')
+        click.echo('تم تقليص القاعدة الرئيسية')
@@ -0,0 +1,129 @@
+"""
+نسخ مشروع (أو قالب) بعبارات INSERT ... SELECT جماعية في معاملة واحدة
+
+1. تُولَّد معرفات جديدة لكل مهمة وتبعية وتعليق وتُدرج في جدول مؤقت
+   clone_map(old_id, new_id) بإدراج جماعي واحد.
+2. تُنسخ المهام بعبارة واحدة: المعرف والمهمة الأم يُعاد تعيينهما بالربط مع
+   clone_map، والتواريخ تُزاح بعدد الأيام المطلوب داخل قاعدة البيانات.
+3. التبعيات ثم التعليقات (اختيارياً) بنفس الطريقة.
+فعدد العبارات ثابت مهما كان حجم المشروع، بدلاً من طلب HTTP لكل مهمة.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, DateTime, column, func, insert, literal, null, select, table
+
+from src.cache import invalidate_on_commit, user_tag
+from src.models.user import db
+from src.models.project import Project, ProjectMember
+from src.models.task import Task, Comment, Dependency
+from src.services.activity import record_created
+
+_CREATE_MAP = (
+    'CREATE TEMP TABLE IF NOT EXISTS clone_map ('
+    'old_id VARCHAR(36) PRIMARY KEY, new_id VARCHAR(36) NOT NULL)'
+)
+
+clone_map = table('clone_map', column('old_id'), column('new_id'))
+
+
+def _shift(column, offset_days):
+    if not offset_days:
+        return column
+    return func.date(column, f'{offset_days:+d} days', type_=Date)
+
+
+def clone_project(source, owner_id, name=None, offset_days=0, include_assignees=True,
+                  include_comments=False, include_members=False, reset_status=True):
+    """نسخ المشروع source إلى مشروع جديد يملكه owner_id؛ يعيد (المشروع، الإحصاءات)
+
+    لا تلتزم الدالة بالمعاملة؛ المستدعي يستدعي db.session.commit().
+    """
+    project = Project(
+        name=name or f'{source.name} (نسخة)',
+        description=source.description,
+        start_date=source.start_date + timedelta(days=offset_days),
+        end_date=source.end_date + timedelta(days=offset_days),
+        owner_id=owner_id,
+    )
+    db.session.add(project)
+    db.session.flush()
+
+    connection = db.session.connection()
+    connection.exec_driver_sql(_CREATE_MAP)
+    connection.exec_driver_sql('DELETE FROM clone_map')
+
+    task_ids = select(Task.id).where(Task.project_id == source.id)
+    old_ids = list(db.session.scalars(task_ids))
+    old_ids += db.session.scalars(select(Dependency.id).where(Dependency.successor_task_id.in_(task_ids)))
+    if include_comments:
+        old_ids += db.session.scalars(select(Comment.id).where(Comment.task_id.in_(task_ids)))
+    if old_ids:
+        connection.execute(insert(clone_map), [{'old_id': old_id, 'new_id': str(uuid.uuid4())} for old_id in old_ids])
+
+    now = datetime.utcnow()
+    task_map, parent_map = clone_map.alias('task_map'), clone_map.alias('parent_map')
+    tasks = connection.execute(insert(Task.__table__).from_select(
+        ['id', 'project_id', 'parent_task_id', 'name', 'description', 'start_date', 'end_date',
+         'assigned_to', 'status', 'created_at', 'updated_at'],
+        select(
+            task_map.c.new_id, literal(project.id), parent_map.c.new_id, Task.name, Task.description,
+            _shift(Task.start_date, offset_days), _shift(Task.end_date, offset_days),
+            Task.assigned_to if include_assignees else null(),
+            literal('not_started') if reset_status else Task.status,
+            literal(now, DateTime), literal(now, DateTime),
+        )
+        .join(task_map, task_map.c.old_id == Task.id)
+        .outerjoin(parent_map, parent_map.c.old_id == Task.parent_task_id)
+        .where(Task.project_id == source.id)
+    ).returning(*Task.__table__.c)).all()
+
+    dependency_map, predecessor_map, successor_map = (
+        clone_map.alias('dependency_map'), clone_map.alias('predecessor_map'), clone_map.alias('successor_map')
+    )
+    dependencies = connection.execute(insert(Dependency.__table__).from_select(
+        ['id', 'predecessor_task_id', 'successor_task_id', 'type'],
+        select(dependency_map.c.new_id, predecessor_map.c.new_id, successor_map.c.new_id, Dependency.type)
+        .join(dependency_map, dependency_map.c.old_id == Dependency.id)
+        .join(predecessor_map, predecessor_map.c.old_id == Dependency.predecessor_task_id)
+        .join(successor_map, successor_map.c.old_id == Dependency.successor_task_id)
+    ).returning(*Dependency.__table__.c)).all()
+
+    comments = []
+    if include_comments:
+        comment_map, comment_task_map = clone_map.alias('comment_map'), clone_map.alias('comment_task_map')
+        comments = connection.execute(insert(Comment.__table__).from_select(
+            ['id', 'task_id', 'user_id', 'content', 'created_at'],
+            select(comment_map.c.new_id, comment_task_map.c.new_id, Comment.user_id, Comment.content,
+                   Comment.created_at)
+            .join(comment_map, comment_map.c.old_id == Comment.id)
+            .join(comment_task_map, comment_task_map.c.old_id == Comment.task_id)
+        ).returning(*Comment.__table__.c)).all()
+
+    members = []
+    if include_members:
+        members = connection.execute(insert(ProjectMember.__table__).from_select(
+            ['project_id', 'user_id', 'role', 'joined_at'],
+            select(literal(project.id), ProjectMember.user_id, ProjectMember.role, literal(now, DateTime))
+            .where(ProjectMember.project_id == source.id, ProjectMember.user_id != owner_id)
+        ).returning(*ProjectMember.__table__.c)).all()
+        # مالك المصدر يصبح عضواً في النسخة إن لم يكن هو من نسخها (حدثه من after_flush)
+        if source.owner_id != owner_id:
+            db.session.add(ProjectMember(project_id=project.id, user_id=source.owner_id, role='admin'))
+
+    connection.exec_driver_sql('DELETE FROM clone_map')
+
+    if include_assignees:
+        assignees = db.session.scalars(
+            select(Task.assigned_to).where(Task.project_id == source.id, Task.assigned_to.isnot(None)).distinct()
+        )
+        invalidate_on_commit(db.session, *(user_tag(user_id) for user_id in assignees))
+
+    # الإدراج الجماعي لا يمر بوحدة العمل فلا يلتقطه after_flush
+    for model, rows in ((Task, tasks), (Dependency, dependencies), (Comment, comments), (ProjectMember, members)):
+        for row in rows:
+            record_created(db.session, project.id, model, row)
+
+    return project, {'tasks': len(tasks), 'dependencies': len(dependencies), 'comments': len(comments),
+                     'members': len(members) + int(include_members and source.owner_id != owner_id)}
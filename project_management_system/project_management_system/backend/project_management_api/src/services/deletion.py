@@ -0,0 +1,33 @@
+"""
+حذف المشاريع في الخلفية عبر طابور المهام (src.jobs)
+
+DELETE /projects/<id> يضيف مهمة delete_project ويعيد 202 فوراً بدلاً من
+تحميل كل مهام المشروع وتعليقاته وتبعياته في الطلب وحذفها صفاً صفاً. المهمة
+تحذف بعبارة DELETE واحدة لكل جدول في معاملة واحدة (src.services.archive)،
+ولا تضر إعادة تنفيذها بعد انقطاع.
+"""
+
+from src.cache import invalidate_on_commit
+from src.jobs import enqueue, job
+from src.models.project import Project
+from src.models.user import db
+from src.services.activity import record_activity
+from src.services.archive import delete_project_rows
+
+
+def schedule_project_deletion(project, user_id):
+    """مهمة الحذف (أو المهمة النشطة نفسها لطلب مكرر)؛ يلتزم بها المستدعي"""
+    return enqueue('delete_project', {'project_id': project.id}, key=f'delete_project:{project.id}',
+                   created_by=user_id)
+
+
+@job('delete_project', priority=10)
+def delete_project(project_id):
+    project = db.session.get(Project, project_id)
+    if project is None:
+        return {'deleted': False}
+    name = project.name
+    db.session.expunge(project)
+    invalidate_on_commit(db.session, *delete_project_rows(project_id))
+    record_activity(db.session, project_id, 'project', project_id, 'delete', {'name': name})
+    return {'deleted': True}
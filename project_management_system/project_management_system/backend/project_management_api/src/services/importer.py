@@ -0,0 +1,398 @@
+"""
+استيراد المهام بالتدفق من CSV أو MS Project XML
+
+الذاكرة ثابتة مهما كان حجم الملف:
+- القراءة سطراً بسطر (csv) أو عنصراً بعنصر (iterparse مع clear)، ولا يُحتفظ
+  إلا بدفعة واحدة في الذاكرة.
+- مراجع المهمة الأم والتبعيات والموارد تُحل داخل قاعدة البيانات عبر جداول
+  مرحلية مؤقتة (import_task وimport_dependency ...) وليس بقاموس في الذاكرة،
+  فلا يهم ترتيب ظهورها في الملف.
+
+المراحل: parse (تحقق دفعة بدفعة وإدراج في الجداول المرحلية) ثم tasks ثم
+dependencies بعبارات INSERT ... SELECT على نطاقات seq، وكل دفعة معاملة مستقلة
+قصيرة يتبعها حدث تقدم {'stage', 'done', 'total'}.
+
+أعمدة CSV (الصف الأول عناوين): id, name, description, start_date, end_date,
+parent_id, predecessors, assigned_to, status
+- predecessors: معرفات مفصولة بـ ';' مع نوع اختياري: '12' أو '12:SS'
+- assigned_to: اسم المستخدم أو بريده الإلكتروني
+"""
+
+import csv
+import io
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from src.cache import cache, project_tag, user_tag
+from src.models.user import db
+from src.tenancy import bind_engine
+
+TASK_STATUSES = ('not_started', 'in_progress', 'completed', 'on_hold')
+DEPENDENCY_TYPES = {
+    'FS': 'finish_to_start', 'SS': 'start_to_start', 'FF': 'finish_to_finish', 'SF': 'start_to_finish',
+}
+# أنواع PredecessorLink في MS Project
+MSP_DEPENDENCY_TYPES = {'0': 'finish_to_finish', '1': 'finish_to_start', '2': 'start_to_finish', '3': 'start_to_start'}
+
+_STAGING = [
+    'CREATE TEMP TABLE IF NOT EXISTS import_task ('
+    'seq INTEGER PRIMARY KEY, ext_id TEXT NOT NULL UNIQUE, new_id TEXT NOT NULL, parent_ext TEXT, '
+    'name TEXT NOT NULL, description TEXT, start_date TEXT NOT NULL, end_date TEXT NOT NULL, '
+    'assignee TEXT, status TEXT NOT NULL)',
+    'CREATE TEMP TABLE IF NOT EXISTS import_dependency ('
+    'seq INTEGER PRIMARY KEY, new_id TEXT NOT NULL, pred_ext TEXT NOT NULL, succ_ext TEXT NOT NULL, type TEXT NOT NULL)',
+    'CREATE TEMP TABLE IF NOT EXISTS import_resource (uid TEXT PRIMARY KEY, name TEXT)',
+    'CREATE TEMP TABLE IF NOT EXISTS import_assignment (task_uid TEXT NOT NULL, resource_uid TEXT NOT NULL)',
+]
+IMPORT_CACHE_KB = 64 * 1024
+_STAGING_TABLES = ('import_task', 'import_dependency', 'import_resource', 'import_assignment')
+
+_INSERT_STAGED_TASK = (
+    'INSERT OR IGNORE INTO import_task '
+    '(ext_id, new_id, parent_ext, name, description, start_date, end_date, assignee, status) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+_INSERT_STAGED_DEPENDENCY = 'INSERT INTO import_dependency (new_id, pred_ext, succ_ext, type) VALUES (?, ?, ?, ?)'
+
+# مهام MS Project بلا مستخدم مباشر: أول مورد مسند إليها
+_RESOLVE_ASSIGNMENTS = (
+    'UPDATE import_task SET assignee = ('
+    'SELECT r.name FROM import_assignment a JOIN import_resource r ON r.uid = a.resource_uid '
+    'WHERE a.task_uid = import_task.ext_id LIMIT 1'
+    ') WHERE assignee IS NULL'
+)
+
+_INSERT_TASKS = (
+    'INSERT INTO task (id, project_id, parent_task_id, name, description, start_date, end_date, '
+    'assigned_to, status, created_at, updated_at) '
+    'SELECT s.new_id, ?, p.new_id, s.name, s.description, s.start_date, s.end_date, '
+    'COALESCE(by_name.id, by_email.id), s.status, ?, ? '
+    'FROM import_task s '
+    'LEFT JOIN import_task p ON p.ext_id = s.parent_ext '
+    'LEFT JOIN user by_name ON by_name.username = s.assignee '
+    'LEFT JOIN user by_email ON by_email.email = s.assignee '
+    'WHERE s.seq BETWEEN ? AND ?'
+)
+
+_INSERT_DEPENDENCIES = (
+    'INSERT OR IGNORE INTO dependency (id, predecessor_task_id, successor_task_id, type) '
+    'SELECT d.new_id, p.new_id, s.new_id, d.type FROM import_dependency d '
+    'JOIN import_task p ON p.ext_id = d.pred_ext '
+    'JOIN import_task s ON s.ext_id = d.succ_ext '
+    'WHERE d.seq BETWEEN ? AND ? AND p.ext_id != s.ext_id'
+)
+
+# أحداث سجل النشاط للصفوف المُدرجة في الدفعة نفسها (الإدراج الجماعي لا يمر بوحدة العمل)؛
+# json_patch على كائن فارغ يحذف الحقول الفارغة كما يفعل _summary في src.services.activity
+_INSERT_TASK_ACTIVITY = (
+    'INSERT INTO activity_event (project_id, entity_type, entity_id, action, actor_id, changes, created_at) '
+    "SELECT t.project_id, 'task', t.id, 'create', ?, json_patch('{}', json_object("
+    "'name', t.name, 'status', t.status, 'assigned_to', t.assigned_to, 'start_date', t.start_date, "
+    "'end_date', t.end_date, 'parent_task_id', t.parent_task_id)), ? "
+    'FROM import_task s JOIN task t ON t.id = s.new_id '
+    'WHERE s.seq BETWEEN ? AND ? ORDER BY s.seq'
+)
+
+_INSERT_DEPENDENCY_ACTIVITY = (
+    'INSERT INTO activity_event (project_id, entity_type, entity_id, action, actor_id, changes, created_at) '
+    "SELECT ?, 'dependency', x.id, 'create', ?, json_object("
+    "'predecessor_task_id', x.predecessor_task_id, 'successor_task_id', x.successor_task_id, 'type', x.type), ? "
+    'FROM import_dependency d JOIN dependency x ON x.id = d.new_id '
+    'WHERE d.seq BETWEEN ? AND ? ORDER BY d.seq'
+)
+
+
+class ImportFormatError(ValueError):
+    """الملف ليس بالتنسيق المتوقع"""
+
+
+def _parse_date(value):
+    return date.fromisoformat(value.strip()[:10])
+
+
+def _task_record(ext_id, name, description, start, end, parent_ext, assignee, status):
+    """التحقق من صف واحد؛ يعيد صف الجدول المرحلي أو يرفع ValueError برسالة عربية"""
+    name = (name or '').strip()
+    if not name:
+        raise ValueError('اسم المهمة مطلوب')
+    if not start or not end:
+        raise ValueError('تاريخ البداية والنهاية مطلوبان')
+    try:
+        start_date, end_date = _parse_date(start), _parse_date(end)
+    except ValueError:
+        raise ValueError('تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD')
+    if end_date < start_date:
+        raise ValueError('تاريخ النهاية يجب أن يكون بعد تاريخ البداية')
+    if end_date == start_date:
+        # المعالم (milestones) ومهام اليوم الواحد: النظام يشترط أن تكون النهاية بعد البداية
+        end_date = start_date + timedelta(days=1)
+    status = (status or '').strip() or 'not_started'
+    if status not in TASK_STATUSES:
+        raise ValueError(f'حالة غير معروفة: {status}')
+    return (ext_id, str(uuid.uuid4()), parent_ext or None, name[:200], description or '',
+            start_date.isoformat(), end_date.isoformat(), (assignee or '').strip() or None, status)
+
+
+def parse_csv(stream):
+    """توليد سجلات ('task', ...) و('dependency', ...) من ملف CSV نصي"""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or 'name' not in reader.fieldnames:
+        raise ImportFormatError('ملف CSV يجب أن يحتوي صف عناوين فيه العمود name')
+
+    for line, row in enumerate(reader, start=2):
+        ext_id = (row.get('id') or '').strip() or f'line:{line}'
+        try:
+            record = _task_record(ext_id, row.get('name'), row.get('description'), row.get('start_date'),
+                                  row.get('end_date'), (row.get('parent_id') or '').strip(),
+                                  row.get('assigned_to'), row.get('status'))
+        except ValueError as e:
+            yield 'error', (f'سطر {line}', str(e))
+            continue
+        yield 'task', record
+
+        for item in filter(None, (part.strip() for part in (row.get('predecessors') or '').split(';'))):
+            predecessor, _, code = item.partition(':')
+            dependency_type = DEPENDENCY_TYPES.get(code.strip().upper() or 'FS')
+            if dependency_type is None:
+                yield 'error', (f'سطر {line}', f'نوع تبعية غير معروف: {code}')
+                continue
+            yield 'dependency', (str(uuid.uuid4()), predecessor.strip(), ext_id, dependency_type)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _text(element, name):
+    for child in element:
+        if _local(child.tag) == name:
+            return (child.text or '').strip()
+    return ''
+
+
+def parse_msproject(stream):
+    """توليد السجلات من MS Project XML بـ iterparse؛ كل عنصر يُحذف بعد معالجته"""
+    outline = []
+    container = None
+    try:
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            tag = _local(element.tag)
+            if event == 'start':
+                if tag in ('Tasks', 'Resources', 'Assignments'):
+                    container = element
+                continue
+
+            if tag == 'Task':
+                uid = _text(element, 'UID')
+                level = int(_text(element, 'OutlineLevel') or 1)
+                if level == 0 or not uid:
+                    # المهمة 0 ملخص المشروع نفسه
+                    container.clear()
+                    continue
+                del outline[level - 1:]
+                parent_ext = outline[-1] if outline else None
+                outline.append(uid)
+
+                percent = int(_text(element, 'PercentComplete') or 0)
+                status = 'completed' if percent >= 100 else 'in_progress' if percent > 0 else 'not_started'
+                try:
+                    yield 'task', _task_record(uid, _text(element, 'Name'), _text(element, 'Notes'),
+                                               _text(element, 'Start'), _text(element, 'Finish'),
+                                               parent_ext, None, status)
+                except ValueError as e:
+                    yield 'error', (f'UID {uid}', str(e))
+
+                for link in element:
+                    if _local(link.tag) != 'PredecessorLink':
+                        continue
+                    dependency_type = MSP_DEPENDENCY_TYPES.get(_text(link, 'Type') or '1', 'finish_to_start')
+                    yield 'dependency', (str(uuid.uuid4()), _text(link, 'PredecessorUID'), uid, dependency_type)
+                container.clear()
+
+            elif tag == 'Resource':
+                uid = _text(element, 'UID')
+                if uid and uid != '0':
+                    yield 'resource', (uid, _text(element, 'Name') or None)
+                container.clear()
+
+            elif tag == 'Assignment':
+                task_uid, resource_uid = _text(element, 'TaskUID'), _text(element, 'ResourceUID')
+                if task_uid and resource_uid and resource_uid != '-65535':
+                    yield 'assignment', (task_uid, resource_uid)
+                container.clear()
+    except ET.ParseError as e:
+        raise ImportFormatError(f'ملف XML غير صالح: {e}')
+
+
+PARSERS = {'csv': parse_csv, 'msproject': parse_msproject}
+
+
+def detect_format(filename):
+    return 'msproject' if (filename or '').lower().endswith('.xml') else 'csv'
+
+
+def open_stream(binary, file_format):
+    """csv يحتاج تدفقاً نصياً؛ iterparse يقرأ البايتات مباشرة"""
+    if file_format == 'csv':
+        return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    return binary
+
+
+def _count(conn, table):
+    return conn.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+
+
+def iter_import(project_id, stream, file_format, batch_size=5000, max_errors=100, actor_id=None):
+    """تنفيذ الاستيراد مع توليد حدث تقدم بعد كل دفعة؛ آخر حدث stage='done' ومعه الملخص"""
+    activity = current_app.config.get('ACTIVITY_ENABLED')
+    started = time.perf_counter()
+    summary = {'tasks': 0, 'dependencies': 0, 'skipped': 0, 'errors': []}
+    batches = {'task': [], 'dependency': [], 'resource': [], 'assignment': []}
+    parsed = 0
+
+    # اتصال مخصص حتى تبقى الجداول المؤقتة متاحة عبر كل المعاملات
+    with bind_engine().connect() as conn:
+        # ذاكرة صفحات أكبر لهذا الاتصال فقط: الإدراج في فهارس المعرفات العشوائية
+        # يلمس صفحات متفرقة، ومع الذاكرة الافتراضية (2MB) يصبح كل إدراج قراءة من القرص
+        cache_size = conn.exec_driver_sql('PRAGMA cache_size').scalar()
+        conn.exec_driver_sql(f'PRAGMA cache_size = -{IMPORT_CACHE_KB}')
+        for statement in _STAGING:
+            conn.exec_driver_sql(statement)
+        for table in _STAGING_TABLES:
+            conn.exec_driver_sql(f'DELETE FROM {table}')
+        conn.commit()
+
+        def flush():
+            if batches['task']:
+                staged = conn.exec_driver_sql(_INSERT_STAGED_TASK, batches['task']).rowcount
+                for _ in range(len(batches['task']) - staged):
+                    _error(summary, max_errors, 'ملف', 'معرف مهمة مكرر')
+            if batches['dependency']:
+                conn.exec_driver_sql(_INSERT_STAGED_DEPENDENCY, batches['dependency'])
+            if batches['resource']:
+                conn.exec_driver_sql('INSERT OR REPLACE INTO import_resource (uid, name) VALUES (?, ?)',
+                                     batches['resource'])
+            if batches['assignment']:
+                conn.exec_driver_sql('INSERT INTO import_assignment (task_uid, resource_uid) VALUES (?, ?)',
+                                     batches['assignment'])
+            conn.commit()
+            for items in batches.values():
+                items.clear()
+
+        try:
+            for kind, record in PARSERS[file_format](stream):
+                if kind == 'error':
+                    _error(summary, max_errors, *record)
+                    continue
+                batches[kind].append(record)
+                if kind == 'task':
+                    parsed += 1
+                    if len(batches['task']) >= batch_size:
+                        flush()
+                        yield _progress('parse', parsed)
+            flush()
+            yield _progress('parse', parsed)
+
+            conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS temp.ix_import_assignment ON import_assignment (task_uid)')
+            conn.exec_driver_sql(_RESOLVE_ASSIGNMENTS)
+            conn.commit()
+
+            now = datetime.utcnow()
+            total = conn.exec_driver_sql('SELECT MAX(seq) FROM import_task').scalar() or 0
+            for low in range(1, total + 1, batch_size):
+                summary['tasks'] += conn.exec_driver_sql(
+                    _INSERT_TASKS, (project_id, now, now, low, low + batch_size - 1)
+                ).rowcount
+                if activity:
+                    conn.exec_driver_sql(_INSERT_TASK_ACTIVITY, (actor_id, now, low, low + batch_size - 1))
+                conn.commit()
+                yield _progress('tasks', summary['tasks'], total)
+
+            total = conn.exec_driver_sql('SELECT MAX(seq) FROM import_dependency').scalar() or 0
+            staged_dependencies = _count(conn, 'import_dependency')
+            for low in range(1, total + 1, batch_size):
+                summary['dependencies'] += conn.exec_driver_sql(
+                    _INSERT_DEPENDENCIES, (low, low + batch_size - 1)
+                ).rowcount
+                if activity:
+                    conn.exec_driver_sql(_INSERT_DEPENDENCY_ACTIVITY,
+                                         (project_id, actor_id, now, low, low + batch_size - 1))
+                conn.commit()
+                yield _progress('dependencies', summary['dependencies'], staged_dependencies)
+
+            unresolved = staged_dependencies - summary['dependencies']
+            if unresolved:
+                _error(summary, max_errors, 'ملف', f'{unresolved} تبعية تشير إلى مهام غير موجودة أو مكررة', unresolved)
+
+            assignees = [row[0] for row in conn.exec_driver_sql(
+                'SELECT id FROM user WHERE username IN (SELECT assignee FROM import_task) '
+                'OR email IN (SELECT assignee FROM import_task)'
+            )]
+        finally:
+            conn.rollback()
+            for table in _STAGING_TABLES:
+                conn.exec_driver_sql(f'DELETE FROM {table}')
+            conn.commit()
+            conn.exec_driver_sql(f'PRAGMA cache_size = {cache_size}')
+
+    cache.invalidate(project_tag(project_id), *(user_tag(user_id) for user_id in assignees))
+
+    summary['duration_s'] = round(time.perf_counter() - started, 2)
+    yield {'stage': 'done', **summary}
+
+
+def import_tasks(project_id, stream, file_format, batch_size=5000, max_errors=100, progress=None, actor_id=None):
+    """استيراد المهام إلى project_id؛ يعيد ملخصاً بالأعداد والأخطاء والمدة"""
+    for event in iter_import(project_id, stream, file_format, batch_size, max_errors, actor_id):
+        if event['stage'] == 'done':
+            event.pop('stage')
+            return event
+        if progress:
+            progress(event)
+
+
+def _progress(stage, done, total=None):
+    return {'stage': stage, 'done': done, 'total': total}
+
+
+def _error(summary, max_errors, where, message, count=1):
+    summary['skipped'] += count
+    if len(summary['errors']) < max_errors:
+        summary['errors'].append({'where': where, 'error': message})
+
+
+import_cli = AppGroup('import', help='استيراد المهام من ملفات خارجية')
+
+
+@import_cli.command('tasks')
+@click.argument('project_id')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(sorted(PARSERS)), default=None,
+              help='الافتراضي حسب امتداد الملف')
+@click.option('--batch-size', type=int, default=None)
+def import_tasks_command(project_id, path, file_format, batch_size):
+    """استيراد ملف CSV أو MS Project XML إلى مشروع موجود"""
+    from src.models.project import Project
+
+    if db.session.get(Project, project_id) is None:
+        raise click.ClickException('المشروع غير موجود')
+    file_format = file_format or detect_format(path)
+
+    def report(event):
+        total = f"/{event['total']}" if event['total'] else ''
+        click.echo(f"  {event['stage']}: {event['done']}{total}")
+
+    with open(path, 'rb') as binary:
+        summary = import_tasks(project_id, open_stream(binary, file_format), file_format,
+                               batch_size or current_app.config['IMPORT_BATCH_SIZE'],
+                               current_app.config['IMPORT_MAX_ERRORS'], progress=report)
+    for error in summary['errors']:
+        click.echo(f"  {error['where']}: {error['error']}")
+    click.echo(f"تم استيراد {summary['tasks']} مهمة و{summary['dependencies']} تبعية "
+               f"(تم تخطي {summary['skipped']}) خلال {summary['duration_s']}s")
@@ -0,0 +1,79 @@
+"""
+صندوق "مهامي" عبر كل المشاريع
+
+    GET /me/tasks?status=in_progress,on_hold&from=2024-01-01&to=2024-01-31&limit=50&cursor=...
+
+استعلام واحد على فهرس task(assigned_to, status, end_date) مع ربط المشروع
+لاسمه وللتحقق من أن المستخدم ما زال مالكاً أو عضواً فيه، بدلاً من جلب كل
+مشروع ثم كل مهامه وتصفيتها في الواجهة. الترتيب بتاريخ الانتهاء والترقيم
+بالمؤشر على (end_date, id) فلا تتأثر الصفحات التالية بعمق الترقيم.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import exists, or_, select, tuple_
+
+from src.models.project import Project, ProjectMember
+from src.models.task import Task
+from src.models.user import db
+
+# الافتراضي: المهام المفتوحة فقط
+OPEN_STATUSES = ('not_started', 'in_progress', 'on_hold')
+STATUSES = (*OPEN_STATUSES, 'completed')
+
+
+def parse_statuses(value):
+    if not value:
+        return OPEN_STATUSES
+    statuses = tuple(dict.fromkeys(status.strip() for status in value.split(',') if status.strip()))
+    unknown = set(statuses) - set(STATUSES)
+    if unknown:
+        raise ValueError(f"قيمة status غير صحيحة: {', '.join(sorted(unknown))}. القيم المسموحة: {', '.join(STATUSES)}")
+    return statuses
+
+
+def encode_cursor(task):
+    return f'{task.end_date.isoformat()}_{task.id}'
+
+
+def decode_cursor(cursor):
+    try:
+        end_date, task_id = cursor.split('_', 1)
+        return datetime.strptime(end_date, '%Y-%m-%d').date(), task_id
+    except ValueError:
+        raise ValueError('قيمة cursor غير صحيحة')
+
+
+def assigned_tasks(user_id, statuses=OPEN_STATUSES, due_from=None, due_to=None, limit=None, cursor=None):
+    """{'tasks': [مهمة مع project_name], 'next_cursor': مؤشر أو None}"""
+    config = current_app.config
+    limit = config['MY_TASKS_LIMIT'] if limit is None else limit
+    if not 1 <= limit <= config['MY_TASKS_MAX_LIMIT']:
+        raise ValueError(f"limit يجب أن يكون بين 1 و {config['MY_TASKS_MAX_LIMIT']}")
+
+    stmt = (
+        select(Task, Project.name)
+        .join(Project, Project.id == Task.project_id)
+        .where(
+            Task.assigned_to == user_id,
+            Task.status.in_(statuses),
+            or_(Project.owner_id == user_id, exists().where(
+                ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id
+            )),
+        )
+    )
+    if due_from:
+        stmt = stmt.where(Task.end_date >= due_from)
+    if due_to:
+        stmt = stmt.where(Task.end_date <= due_to)
+    if cursor:
+        stmt = stmt.where(tuple_(Task.end_date, Task.id) > decode_cursor(cursor))
+
+    # صف إضافي لمعرفة وجود صفحة تالية
+    rows = db.session.execute(stmt.order_by(Task.end_date, Task.id).limit(limit + 1)).all()
+    tasks = [{**task.to_dict(), 'project_name': project_name} for task, project_name in rows[:limit]]
+    return {
+        'tasks': tasks,
+        'next_cursor': encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None,
+    }
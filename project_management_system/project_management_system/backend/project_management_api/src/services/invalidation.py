@@ -0,0 +1,54 @@
+"""
+وسوم إبطال الذاكرة المؤقتة من تغييرات النماذج
+
+after_flush يرى التغييرات وسجلها قبل تصفيرها، والإبطال الفعلي بعد الالتزام فقط
+(invalidate_on_commit) حتى لا تُبطل القيم لمعاملة تراجعت:
+- project:<id> لأي تغيير في المشروع أو أعضائه أو مهامه أو تبعياتها أو تعليقاتها
+  أو مرفقاتها (استجابات المشروع المخزنة وحمل عمل الفريق).
+- user:<id> للمسند إليه الحالي والسابق عند تغيّر الإسناد أو التواريخ أو الحالة
+  (حمل العمل).
+التحديثات الجماعية التي لا تمر بوحدة العمل تستدعي invalidate_on_commit بنفسها.
+"""
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.cache import invalidate_on_commit, project_tag, user_tag
+from src.models.project import Project, ProjectMember
+from src.models.task import Comment, Dependency, Task, TaskAttachment
+
+TRACKED_TASK_FIELDS = ('assigned_to', 'start_date', 'end_date', 'status')
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_invalidations(session, flush_context):
+    tags = set()
+    task_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Task):
+            tags.add(project_tag(obj.project_id))
+            state = inspect(obj)
+            if obj in session.dirty and not any(
+                state.attrs[name].history.has_changes() for name in TRACKED_TASK_FIELDS
+            ):
+                continue
+            for user_id in (obj.assigned_to, *state.attrs.assigned_to.history.deleted):
+                if user_id:
+                    tags.add(user_tag(user_id))
+        elif isinstance(obj, (Comment, TaskAttachment)):
+            task_ids.add(obj.task_id)
+        elif isinstance(obj, Dependency):
+            task_ids.update((obj.predecessor_task_id, obj.successor_task_id))
+        elif isinstance(obj, ProjectMember):
+            tags.add(project_tag(obj.project_id))
+        elif isinstance(obj, Project):
+            tags.add(project_tag(obj.id))
+
+    # مهام حُذفت في هذه الدفعة نفسها تضيف وسم مشروعها من الفرع الأول
+    task_ids.discard(None)
+    if task_ids:
+        tags.update(project_tag(project_id) for project_id in session.scalars(
+            select(Task.project_id).where(Task.id.in_(task_ids)).distinct()
+        ))
+    if tags:
+        invalidate_on_commit(session, *tags)
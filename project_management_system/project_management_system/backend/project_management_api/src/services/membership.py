@@ -0,0 +1,111 @@
+"""
+إضافة أعضاء المشروع بالجملة مع إشعارات project_invite
+
+    POST /projects/<id>/members/bulk  {"members": [{"user_id": "...", "role": "member"}, ...]}
+
+- المستخدمون والعضويات الحالية يُجلبون باستعلام IN واحد لكل منهما، والأعضاء
+  الحاليون يُستبعدون بفرق المجموعات بدلاً من استعلام لكل مستخدم.
+- العضويات تُدرج بعبارة إدراج جماعي واحدة، وإشعارات project_invite بعبارة ثانية
+  في المعاملة نفسها: تُلتزم مع العضويات أو تُلغى معها، بلا عامل مهام.
+- النتيجة لكل مستخدم بترتيب الطلب: added، أو سبب التخطي.
+الإدراج الجماعي لا يمر بوحدة العمل، فيُبطل وسم المشروع وذاكرة بحث المستخدمين
+ويُسجل النشاط صراحة بعد الالتزام.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.cache import invalidate_on_commit, project_tag
+from src.jobs import job
+from src.models.notification import Notification
+from src.models.project import Project, ProjectMember
+from src.models.user import User, db
+from src.services.activity import record_activity
+from src.services.user_search import directory_changed_on_commit
+
+ROLES = ('admin', 'member')
+
+# حالات النتيجة لكل مستخدم
+ADDED = 'added'
+ALREADY_MEMBER = 'already_member'
+NOT_FOUND = 'not_found'
+OWNER = 'owner'
+INVALID_ROLE = 'invalid_role'
+DUPLICATE = 'duplicate'
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def add_members(project, invites):
+    """invites: [{'user_id', 'role'}]؛ يعيد [{'user_id', 'role', 'status'}] دون التزام"""
+    user_ids = {invite.get('user_id') for invite in invites if invite.get('user_id')}
+    # دفعات حتى لا تتجاوز معاملات IN حد قاعدة البيانات
+    existing_users, existing_members = set(), set()
+    for chunk in _chunks(user_ids):
+        existing_users.update(db.session.scalars(select(User.id).where(User.id.in_(chunk))))
+        existing_members.update(db.session.scalars(select(ProjectMember.user_id).where(
+            ProjectMember.project_id == project.id, ProjectMember.user_id.in_(chunk)
+        )))
+    addable = existing_users - existing_members - {project.owner_id}
+
+    results, seen, member_rows = [], set(), []
+    for invite in invites:
+        user_id, role = invite.get('user_id'), invite.get('role') or 'member'
+        if role not in ROLES:
+            status = INVALID_ROLE
+        elif user_id in seen:
+            status = DUPLICATE
+        elif user_id not in existing_users:
+            status = NOT_FOUND
+        elif user_id == project.owner_id:
+            status = OWNER
+        elif user_id not in addable:
+            status = ALREADY_MEMBER
+        else:
+            status = ADDED
+            seen.add(user_id)
+            member_rows.append({'project_id': project.id, 'user_id': user_id, 'role': role})
+        results.append({'user_id': user_id, 'role': role, 'status': status})
+
+    if member_rows:
+        now = datetime.utcnow()
+        db.session.execute(ProjectMember.__table__.insert(), [
+            {**row, 'joined_at': now} for row in member_rows
+        ])
+        _insert_invites(project, [row['user_id'] for row in member_rows], now)
+        for row in member_rows:
+            record_activity(db.session, project.id, 'member', row['user_id'], 'create',
+                            {'user_id': row['user_id'], 'role': row['role']})
+        invalidate_on_commit(db.session, project_tag(project.id))
+        directory_changed_on_commit(db.session)
+
+    return results
+
+
+def _insert_invites(project, user_ids, now):
+    """إشعارات project_invite للأعضاء المضافين بإدراج جماعي واحد"""
+    db.session.execute(Notification.__table__.insert(), [{
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'message': f'تمت إضافتك إلى مشروع "{project.name}"',
+        'type': 'project_invite',
+        'is_read': False,
+        'created_at': now,
+        'related_entity_id': project.id,
+    } for user_id in user_ids])
+
+
+@job('project_invites')
+def send_project_invites(project_id, user_ids):
+    """مهام project_invites التي جُدولت قبل الإدراج في معاملة الإضافة"""
+    project = db.session.get(Project, project_id)
+    if project is None:
+        return {'sent': 0}
+    _insert_invites(project, user_ids, datetime.utcnow())
+    return {'sent': len(user_ids)}
@@ -0,0 +1,145 @@
+"""
+قواعد الطلبات المشتركة بين مسارات Flask (src.routes) ومسارات ASGI الأصلية (src.aio.routes)
+
+- التحقق من الأجسام: كل دالة تعيد الحقول الجاهزة أو ترفع PayloadError برسالة
+  ورمز حالة، وValueError لتاريخ بتنسيق غير صحيح (رسالته الموحدة في المسارات).
+- الاستعلامات: عبارات select/update تنفذها كل جهة بجلستها، متزامنة في Flask
+  وغير متزامنة في ASGI، فلا يختلف منطق الصلاحيات أو الفرز بين الوضعين.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import exists, or_, select, update
+
+from src.models.notification import Notification
+from src.models.project import Project, ProjectMember
+from src.models.task import Task
+from src.models.user import User
+
+DATE_FORMAT_ERROR = 'تنسيق التاريخ غير صحيح. استخدم YYYY-MM-DD'
+DATE_ORDER_ERROR = 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'
+
+
+class PayloadError(Exception):
+    """رفض جسم الطلب برمز حالة HTTP"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _check_dates(start_date, end_date):
+    if start_date >= end_date:
+        raise PayloadError(DATE_ORDER_ERROR)
+
+
+# المصادقة
+
+def registration(data):
+    """(username, email, password) من جسم التسجيل"""
+    if not data or not data.get('username') or not data.get('email') or not data.get('password'):
+        raise PayloadError('اسم المستخدم والبريد الإلكتروني وكلمة المرور مطلوبة')
+    return data['username'], data['email'], data['password']
+
+
+def credentials(data):
+    """(username, password) من جسم تسجيل الدخول"""
+    if not data or not data.get('username') or not data.get('password'):
+        raise PayloadError('اسم المستخدم وكلمة المرور مطلوبان')
+    return data['username'], data['password']
+
+
+def existing_user_query(username, email):
+    return select(User.id).where((User.username == username) | (User.email == email)).limit(1)
+
+
+# المشاريع
+
+def project_access_query(project_id, user_id):
+    """select يعيد True إذا كان المستخدم مالك المشروع أو عضواً فيه (False لمشروع غير موجود)"""
+    return select(exists().where(
+        Project.id == project_id,
+        or_(Project.owner_id == user_id,
+            exists().where(ProjectMember.project_id == project_id, ProjectMember.user_id == user_id)),
+    ))
+
+
+def user_projects_query(user_id):
+    member_ids = select(ProjectMember.project_id).where(ProjectMember.user_id == user_id)
+    return select(Project).where((Project.owner_id == user_id) | Project.id.in_(member_ids))
+
+
+def new_project(data, owner_id):
+    """معاملات Project(...) من جسم POST /projects"""
+    if not data or not data.get('name') or not data.get('start_date') or not data.get('end_date'):
+        raise PayloadError('اسم المشروع وتاريخ البداية والنهاية مطلوبة')
+    start_date, end_date = parse_date(data['start_date']), parse_date(data['end_date'])
+    _check_dates(start_date, end_date)
+    return {'name': data['name'], 'description': data.get('description', ''),
+            'start_date': start_date, 'end_date': end_date, 'owner_id': owner_id}
+
+
+def apply_project_changes(project, data):
+    """تطبيق جسم PUT /projects/<id> على المشروع"""
+    data = data or {}
+    if data.get('name'):
+        project.name = data['name']
+    if data.get('description') is not None:
+        project.description = data['description']
+    if data.get('start_date'):
+        project.start_date = parse_date(data['start_date'])
+    if data.get('end_date'):
+        project.end_date = parse_date(data['end_date'])
+    _check_dates(project.start_date, project.end_date)
+
+
+# المهام
+
+def new_task(data, project_id):
+    """معاملات Task(...) من جسم POST /projects/<id>/tasks
+
+    وجود المهمة الأم والمستخدم المسند إليه يتحقق منهما المستدعي بجلسته
+    (parent_project_query وUser)، ثم check_parent.
+    """
+    if not data or not data.get('name') or not data.get('start_date') or not data.get('end_date'):
+        raise PayloadError('اسم المهمة وتاريخ البداية والنهاية مطلوبة')
+    start_date, end_date = parse_date(data['start_date']), parse_date(data['end_date'])
+    _check_dates(start_date, end_date)
+    return {'project_id': project_id, 'parent_task_id': data.get('parent_task_id'), 'name': data['name'],
+            'description': data.get('description', ''), 'start_date': start_date, 'end_date': end_date,
+            'assigned_to': data.get('assigned_to'), 'status': data.get('status', 'not_started')}
+
+
+def parent_project_query(parent_task_id):
+    return select(Task.project_id).where(Task.id == parent_task_id)
+
+
+def check_parent(parent_project_id, project_id):
+    if parent_project_id != project_id:
+        raise PayloadError('المهمة الأم غير صحيحة')
+
+
+def check_assignee(assignee):
+    if assignee is None:
+        raise PayloadError('المستخدم المُسند إليه غير موجود')
+
+
+def check_task_dates(task):
+    _check_dates(task.start_date, task.end_date)
+
+
+# الإشعارات
+
+def notifications_query(user_id):
+    return (select(Notification).where(Notification.user_id == user_id)
+            .order_by(Notification.created_at.desc()))
+
+
+def mark_all_read_statement(user_id):
+    return (update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+            .values(is_read=True))
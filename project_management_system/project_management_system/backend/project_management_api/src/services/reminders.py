@@ -0,0 +1,163 @@
+"""
+توليد إشعارات task_due للمهام التي تدخل نافذة التذكير
+
+- يمسح نطاق end_date فقط عبر الفهرس ix_task_end_date_status بدلاً من كل المهام.
+- يستبعد المهام التي أُرسل لها تذكير مسبقاً لنفس المستخدم (related_entity_id).
+- يعالج المهام على دفعات بترقيم keyset على (end_date, id)، وكل دفعة إدراج
+  جماعي واحد في معاملة قصيرة حتى لا يُحجز قفل الكتابة طويلاً.
+- يعمل تحت قفل استشاري فلا ينفذه إلا عامل واحد حتى لو جُدول في كل العمال.
+- المسح الدوري وسطر الأوامر يمران على القاعدة الافتراضية وكل مؤسسة نشطة
+  (src.tenancy)، ولكل قاعدة قفلها.
+"""
+
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, exists, select, tuple_
+
+from src.locks import advisory_lock
+from src.tenancy import TenantNotFound, active_databases, use_tenant
+from src.models.user import db
+from src.models.task import Task
+from src.models.notification import Notification
+
+LOCK_NAME = 'due_date_reminders'
+OPEN_STATUSES = ('not_started', 'in_progress', 'on_hold')
+
+
+def _message(name, end_date, today):
+    days = (end_date - today).days
+    if days <= 0:
+        return f'مهمة "{name}" تنتهي اليوم'
+    if days == 1:
+        return f'مهمة "{name}" ستنتهي غداً'
+    return f'مهمة "{name}" ستنتهي خلال {days} أيام'
+
+
+def scan_due_tasks(window_days, batch_size=5000, today=None):
+    """إنشاء إشعارات task_due؛ يعيد عدد الإشعارات المنشأة"""
+    today = today or date.today()
+    window_end = today + timedelta(days=window_days)
+    notification_table = Notification.__table__
+
+    already_sent = exists().where(and_(
+        Notification.related_entity_id == Task.id,
+        Notification.type == 'task_due',
+        Notification.user_id == Task.assigned_to,
+    ))
+    base = (
+        select(Task.id, Task.name, Task.end_date, Task.assigned_to)
+        .where(
+            Task.end_date >= today,
+            Task.end_date <= window_end,
+            Task.status.in_(OPEN_STATUSES),
+            Task.assigned_to.isnot(None),
+            ~already_sent,
+        )
+        .order_by(Task.end_date, Task.id)
+        .limit(batch_size)
+    )
+
+    created, last_key = 0, None
+    while True:
+        query = base if last_key is None else base.where(tuple_(Task.end_date, Task.id) > last_key)
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        now = datetime.utcnow()
+        db.session.execute(notification_table.insert(), [{
+            'id': str(uuid.uuid4()),
+            'user_id': row.assigned_to,
+            'message': _message(row.name, row.end_date, today),
+            'type': 'task_due',
+            'is_read': False,
+            'created_at': now,
+            'related_entity_id': row.id,
+        } for row in rows])
+        db.session.commit()
+
+        created += len(rows)
+        last_key = (rows[-1].end_date, rows[-1].id)
+        if len(rows) < batch_size:
+            break
+
+    return created
+
+
+def run_due_reminders(window_days=None, batch_size=None):
+    """تشغيل المسح تحت القفل الاستشاري؛ يعيد None إذا كان عامل آخر ينفذه"""
+    config = current_app.config
+    window_days = config['DUE_REMINDER_WINDOW_DAYS'] if window_days is None else window_days
+    batch_size = batch_size or config['DUE_REMINDER_BATCH_SIZE']
+    with advisory_lock(LOCK_NAME, ttl=config['DUE_REMINDER_LOCK_TTL']) as acquired:
+        if not acquired:
+            return None
+        return scan_due_tasks(window_days, batch_size)
+
+
+def run_all_due_reminders(window_days=None, batch_size=None, tenants=None):
+    """المسح في كل قاعدة؛ يعيد {المؤسسة (None للافتراضية): العدد أو None إن كانت مقفلة}
+
+    فشل قاعدة يُسجل ولا يوقف البقية.
+    """
+    results = {}
+    for tenant_id in active_databases() if tenants is None else tenants:
+        try:
+            with use_tenant(tenant_id):
+                results[tenant_id] = run_due_reminders(window_days, batch_size)
+        except TenantNotFound:
+            raise
+        except Exception:
+            current_app.logger.exception('due reminders failed for tenant %s', tenant_id)
+    return results
+
+
+def _scheduler_loop(app, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                for tenant_id, created in run_all_due_reminders().items():
+                    if created:
+                        app.logger.info('due reminders (%s): %d notifications', tenant_id or 'default', created)
+        except Exception:
+            app.logger.exception('due reminders failed')
+
+
+def init_reminders(app):
+    """تشغيل المسح الدوري داخل العامل إذا كان DUE_REMINDER_INTERVAL أكبر من صفر"""
+    app.cli.add_command(reminders_cli)
+    interval = app.config['DUE_REMINDER_INTERVAL']
+    if interval and not app.config.get('TESTING'):
+        thread = threading.Thread(target=_scheduler_loop, args=(app, interval), daemon=True,
+                                  name='due-reminders')
+        thread.start()
+
+
+reminders_cli = AppGroup('reminders', help='تذكيرات المواعيد النهائية')
+
+
+@reminders_cli.command('scan')
+@click.option('--window', type=int, default=None, help='نافذة التذكير بالأيام')
+@click.option('--batch-size', type=int, default=None)
+@click.option('--tenant', 'tenant_id', default=None, help='قاعدة هذه المؤسسة فقط (الافتراضي كل القواعد)')
+def scan_command(window, batch_size, tenant_id):
+    """إنشاء إشعارات task_due (مناسب للتشغيل من cron)"""
+    started = time.perf_counter()
+    try:
+        results = run_all_due_reminders(window, batch_size, None if tenant_id is None else [tenant_id])
+    except TenantNotFound as e:
+        raise click.ClickException(str(e))
+    for database, created in results.items():
+        label = database or 'default'
+        if created is None:
+            click.echo(f'{label}: المسح قيد التنفيذ في عامل آخر')
+        else:
+            click.echo(f'{label}: تم إنشاء {created} إشعار')
+    click.echo(f'المدة {time.perf_counter() - started:.2f}s')
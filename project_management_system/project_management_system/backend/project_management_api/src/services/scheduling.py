@@ -0,0 +1,146 @@
+"""
+إعادة الجدولة التلقائية حسب التبعيات
+
+عند تغيير تواريخ مهمة تُزاح المهام اللاحقة لها (مباشرة أو عبر سلسلة) بأقل
+إزاحة تحقق قيود التبعية، مع الحفاظ على مدة كل مهمة:
+
+    finish_to_start   بداية اللاحقة >= نهاية السابقة
+    start_to_start    بداية اللاحقة >= بداية السابقة
+    finish_to_finish  نهاية اللاحقة >= نهاية السابقة
+    start_to_finish   نهاية اللاحقة >= بداية السابقة
+
+المهام القابلة للوصول تُجلب باستعلام WITH RECURSIVE واحد، وتُعالج بترتيب
+طوبولوجي (Kahn) في الذاكرة، ثم تُكتب الإزاحات بعبارة UPDATE واحدة (CASE id WHEN ...
+لكل _UPDATE_CHUNK مهمة) داخل معاملة تعديل المهمة نفسها. التكلفة O(مهام + تبعيات)
+للسلاسل الطويلة.
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, String, case, literal, select, update
+from sqlalchemy.orm import aliased
+
+from src.cache import invalidate_on_commit, project_tag, user_tag
+from src.models.user import db
+from src.models.task import Task, Dependency
+from src.services.activity import record_activity
+
+# مهام كل عبارة UPDATE: ثلاثة معاملات لكل مهمة تبقى دون حد المعاملات في SQLite
+_UPDATE_CHUNK = 500
+
+
+class DependencyCycleError(Exception):
+    """التبعيات تشكل حلقة فلا يوجد ترتيب طوبولوجي"""
+
+
+def _required_shift(dependency_type, start, end, predecessor_start, predecessor_end):
+    if dependency_type == 'start_to_start':
+        return (predecessor_start - start).days
+    if dependency_type == 'finish_to_finish':
+        return (predecessor_end - end).days
+    if dependency_type == 'start_to_finish':
+        return (predecessor_start - end).days
+    return (predecessor_end - start).days
+
+
+def propagate_schedule(task_id):
+    """إزاحة المهام اللاحقة للمهمة task_id؛ يعيد قائمة المهام التي تغيرت تواريخها
+
+    يجب استدعاؤها بعد تعديل المهمة داخل الجلسة وقبل الالتزام.
+    """
+    db.session.flush()
+
+    reachable = select(literal(task_id, String).label('id')).cte('reachable', recursive=True)
+    reachable = reachable.union(
+        select(Dependency.successor_task_id).where(Dependency.predecessor_task_id == reachable.c.id)
+    )
+
+    nodes = {
+        row.id: [row.start_date, row.end_date, row.assigned_to, row.project_id]
+        for row in db.session.execute(
+            select(Task.id, Task.start_date, Task.end_date, Task.assigned_to, Task.project_id)
+            .where(Task.id.in_(select(reachable.c.id)))
+        )
+    }
+    if len(nodes) <= 1:
+        return []
+
+    # كل التبعيات الداخلة إلى المهام القابلة للوصول، مع تواريخ السابقة الحالية
+    predecessor = aliased(Task)
+    incoming = {}
+    successors = {}
+    in_degree = dict.fromkeys(nodes, 0)
+    for row in db.session.execute(
+        select(Dependency.predecessor_task_id, Dependency.successor_task_id, Dependency.type,
+               predecessor.start_date, predecessor.end_date)
+        .join(predecessor, predecessor.id == Dependency.predecessor_task_id)
+        .where(Dependency.successor_task_id.in_(select(reachable.c.id)))
+    ):
+        incoming.setdefault(row.successor_task_id, []).append(
+            (row.predecessor_task_id, row.type, row.start_date, row.end_date)
+        )
+        if row.predecessor_task_id in nodes:
+            successors.setdefault(row.predecessor_task_id, []).append(row.successor_task_id)
+            in_degree[row.successor_task_id] += 1
+
+    queue = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+    if task_id not in queue:
+        raise DependencyCycleError(task_id)
+
+    shifted = {}
+    processed = 0
+    while queue:
+        node_id = queue.popleft()
+        processed += 1
+        if node_id != task_id:
+            start, end = nodes[node_id][:2]
+            shift = 0
+            for predecessor_id, dependency_type, predecessor_start, predecessor_end in incoming.get(node_id, ()):
+                if predecessor_id in nodes:
+                    predecessor_start, predecessor_end = nodes[predecessor_id][:2]
+                shift = max(shift, _required_shift(dependency_type, start, end, predecessor_start, predecessor_end))
+            if shift > 0:
+                nodes[node_id][0] = start + timedelta(days=shift)
+                nodes[node_id][1] = end + timedelta(days=shift)
+                shifted[node_id] = shift
+        for successor_id in successors.get(node_id, ()):
+            in_degree[successor_id] -= 1
+            if in_degree[successor_id] == 0:
+                queue.append(successor_id)
+
+    if processed < len(nodes):
+        raise DependencyCycleError(task_id)
+    if not shifted:
+        return []
+
+    now = datetime.utcnow()
+    table = Task.__table__
+    # عبارة Core واحدة: الإصدار يزيد في العبارة نفسها (تحديث ORM بالمفتاح يتطلب الإصدار المقروء).
+    # UPDATE ... FROM (VALUES ...) لا يسمي أعمدة الجدول المشتق في SQLite، فالقيم تُختار بـ CASE
+    node_ids = list(shifted)
+    for offset in range(0, len(node_ids), _UPDATE_CHUNK):
+        chunk = node_ids[offset:offset + _UPDATE_CHUNK]
+        db.session.execute(
+            update(table).where(table.c.id.in_(chunk)).values(
+                start_date=case({node_id: literal(nodes[node_id][0], Date) for node_id in chunk}, value=table.c.id),
+                end_date=case({node_id: literal(nodes[node_id][1], Date) for node_id in chunk}, value=table.c.id),
+                updated_at=now, version=table.c.version + 1,
+            )
+        )
+    invalidate_on_commit(db.session, *{user_tag(nodes[node_id][2]) for node_id in shifted if nodes[node_id][2]},
+                         *{project_tag(nodes[node_id][3]) for node_id in shifted})
+    # التحديث الجماعي لا يمر بوحدة العمل فلا يلتقطه after_flush
+    for node_id, shift in shifted.items():
+        start, end, _, project_id = nodes[node_id]
+        record_activity(db.session, project_id, 'task', node_id, 'update', {
+            'start_date': [(start - timedelta(days=shift)).isoformat(), start.isoformat()],
+            'end_date': [(end - timedelta(days=shift)).isoformat(), end.isoformat()],
+        })
+
+    return [{
+        'id': node_id,
+        'start_date': nodes[node_id][0].isoformat(),
+        'end_date': nodes[node_id][1].isoformat(),
+        'shift_days': shift,
+    } for node_id, shift in shifted.items()]
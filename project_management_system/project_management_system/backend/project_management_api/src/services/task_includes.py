@@ -0,0 +1,88 @@
+"""
+توسيع المهام بـ include= في مستند مركّب واحد
+
+    GET /tasks/<id>?include=comments,attachments,dependencies,subtasks,users
+    GET /projects/<id>/tasks?include=comments,users
+
+العلاقات تُحمّل بـ selectinload: استعلام واحد لكل علاقة لكل القائمة (IN على
+معرفات المهام) بدلاً من استعلام لكل مهمة، فعدد الاستعلامات ثابت مهما كان
+طول القائمة. المستخدمون (المسند إليهم، كتّاب التعليقات، رافعو المرفقات)
+يُجمعون في استعلام واحد ويُعادون مرة واحدة في included.users.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from src.models.user import User, db
+from src.models.task import Task
+
+INCLUDES = ('comments', 'attachments', 'dependencies', 'subtasks', 'users')
+
+_LOADERS = {
+    'comments': (Task.comments,),
+    'attachments': (Task.attachments,),
+    'dependencies': (Task.predecessor_dependencies, Task.successor_dependencies),
+    'subtasks': (Task.subtasks,),
+}
+
+
+def parse_includes(value):
+    """قيمة include= إلى مجموعة؛ ValueError لقيمة غير معروفة"""
+    includes = {name.strip() for name in (value or '').split(',') if name.strip()}
+    unknown = includes - set(INCLUDES)
+    if unknown:
+        raise ValueError(f"قيمة include غير صحيحة: {', '.join(sorted(unknown))}. القيم المسموحة: {', '.join(INCLUDES)}")
+    return includes
+
+
+def load_tasks(criteria, includes, options=None, order_by=()):
+    """جلب المهام مع العلاقات المطلوبة؛ options خيارات التنفيذ (الأرشيف)"""
+    stmt = select(Task).where(*criteria).order_by(*order_by).options(
+        *(selectinload(attribute) for name in includes for attribute in _LOADERS.get(name, ()))
+    )
+    # populate_existing: المهمة قد تكون في الجلسة بعلاقات غير محملة (فحص الصلاحية)
+    return db.session.scalars(stmt.execution_options(populate_existing=True, **(options or {}))).all()
+
+
+def task_document(task, includes):
+    result = task.to_dict()
+    if 'comments' in includes:
+        result['comments'] = [comment.to_dict() for comment in sorted(
+            task.comments, key=lambda comment: comment.created_at, reverse=True
+        )]
+    if 'attachments' in includes:
+        result['attachments'] = [attachment.to_dict() for attachment in task.attachments]
+    if 'dependencies' in includes:
+        result['dependencies'] = {
+            'predecessors': [dependency.to_dict() for dependency in task.predecessor_dependencies],
+            'successors': [dependency.to_dict() for dependency in task.successor_dependencies],
+        }
+    if 'subtasks' in includes:
+        result['subtasks'] = [subtask.to_dict() for subtask in task.subtasks]
+    return result
+
+
+def compound_document(tasks, includes, single=False):
+    """{'data': مهمة أو قائمة مهام، 'included': {'users': [...]}}"""
+    data = [task_document(task, includes) for task in tasks]
+    document = {'data': data[0] if single else data, 'included': {}}
+    if 'users' in includes:
+        document['included']['users'] = _users(tasks, includes)
+    return document
+
+
+def _users(tasks, includes):
+    user_ids = set()
+    for task in tasks:
+        user_ids.add(task.assigned_to)
+        if 'comments' in includes:
+            user_ids.update(comment.user_id for comment in task.comments)
+        if 'attachments' in includes:
+            user_ids.update(attachment.uploaded_by for attachment in task.attachments)
+        if 'subtasks' in includes:
+            user_ids.update(subtask.assigned_to for subtask in task.subtasks)
+    user_ids.discard(None)
+    if not user_ids:
+        return []
+    users = db.session.scalars(select(User).where(User.id.in_(user_ids)).order_by(User.username))
+    return [user.to_dict() for user in users]
@@ -0,0 +1,213 @@
+"""
+مسار كتابة سريع لتعديل المهام وحذفها (PUT وDELETE /tasks/<id>)
+
+داخل معاملة الكتابة عبارة شرطية واحدة بدلاً من get_or_404 واستعلامي الصلاحية
+والمسند إليه ثم flush:
+
+    UPDATE task SET ..., version = version + 1
+    WHERE id = :id AND version = :version
+      AND project_id IN (مشاريع المستخدم مالكاً أو عضواً)
+      AND EXISTS (المستخدم المسند إليه)
+    RETURNING *
+
+- الوجود والصلاحية والإصدار شروط في العبارة نفسها، وRETURNING ينتج الاستجابة.
+- التزامن المتفائل: If-Match: "<version>" (قيمة ETag في الاستجابات) يرفض الكتابة
+  بـ 412 إذا عدّل طلب آخر المهمة بعد قراءتها. بدونه يعاد التنفيذ تلقائياً.
+- التعديل يقرأ لقطة الصف قبل المعاملة (بلا قفل كتابة في SQLite) لسجل النشاط
+  ووسوم الإبطال والتحقق من التواريخ؛ شرط الإصدار يضمن أنها الحالة عند الكتابة.
+- الحذف لا يحتاج لقطة: DELETE ... RETURNING يعيد الصف المحذوف، ثم تُحذف
+  تعليقاته ومرفقاته وتبعياته وتُفصل مهامه الفرعية في المعاملة نفسها.
+- عند عدم تطابق أي صف يحدد استعلام تشخيص الخطأ (404/403/412/400)، في مسار
+  الخطأ فقط.
+
+propagate=true يبقى على مسار ORM. TASK_FAST_WRITES = False يعيد المسار القديم
+للمقارنة:
+
+    python -m benchmarks.task_writes --writers 8
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, exists, select, union, update
+
+from src.cache import invalidate_on_commit, project_tag, user_tag
+from src.models.project import Project, ProjectMember
+from src.models.task import Comment, Dependency, Task, TaskAttachment
+from src.models.user import User, db
+from src.services.activity import record_activity, record_deleted
+from src.services.inbox import STATUSES
+from src.services.invalidation import TRACKED_TASK_FIELDS
+
+# محاولات التعديل بدون If-Match عند تغيّر المهمة بين اللقطة والكتابة
+MAX_RETRIES = 3
+
+
+class TaskWriteError(Exception):
+    """رفض الكتابة برمز حالة HTTP"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_if_match(value):
+    """الإصدار من ترويسة If-Match ("3" أو W/"3")؛ None بدونها أو مع *"""
+    if not value or value.strip() == '*':
+        return None
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise TaskWriteError('قيمة If-Match غير صحيحة', 400)
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def task_changes(data):
+    """الحقول المطلوب تغييرها من جسم PUT بقواعد المسار القديم؛ ValueError لتاريخ غير صحيح"""
+    values = {}
+    if data.get('name'):
+        values['name'] = data['name']
+    if data.get('description') is not None:
+        values['description'] = data['description']
+    if data.get('start_date'):
+        values['start_date'] = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+    if data.get('end_date'):
+        values['end_date'] = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+    if data.get('status'):
+        if data['status'] not in STATUSES:
+            raise TaskWriteError(f"قيمة status غير صحيحة. القيم المسموحة: {', '.join(STATUSES)}", 400)
+        values['status'] = data['status']
+    if 'assigned_to' in data:
+        values['assigned_to'] = data['assigned_to'] or None
+    return values
+
+
+def _accessible_projects(user_id):
+    return union(
+        select(Project.id).where(Project.owner_id == user_id),
+        select(ProjectMember.project_id).where(ProjectMember.user_id == user_id),
+    )
+
+
+def _diagnose(task_id, user_id, forbidden, assigned_to=None):
+    """سبب عدم تطابق العبارة الشرطية؛ None إذا كان الإصدار وحده قد تغيّر"""
+    project_id = db.session.scalar(select(Task.project_id).where(Task.id == task_id))
+    if project_id is None:
+        return TaskWriteError('المهمة غير موجودة', 404)
+    if db.session.scalar(select(Project.id).where(
+        Project.id == project_id, Project.id.in_(_accessible_projects(user_id))
+    )) is None:
+        return TaskWriteError(forbidden, 403)
+    if assigned_to and db.session.get(User, assigned_to) is None:
+        return TaskWriteError('المستخدم المُسند إليه غير موجود', 400)
+    return None
+
+
+def _stale():
+    return TaskWriteError('عُدّلت المهمة بعد قراءتها؛ أعد تحميلها ثم حاول مرة أخرى', 412)
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def update_task(task_id, user_id, values, expected_version=None):
+    """تعديل المهمة بعبارة شرطية واحدة؛ يعيد قاموس المهمة أو يرفع TaskWriteError"""
+    forbidden = 'ليس لديك صلاحية لتعديل هذه المهمة'
+    table = Task.__table__
+    for _ in range(MAX_RETRIES):
+        before = db.session.execute(select(table).where(table.c.id == task_id)).first()
+        if before is None:
+            raise TaskWriteError('المهمة غير موجودة', 404)
+        if expected_version is not None and before.version != expected_version:
+            raise _diagnose(task_id, user_id, forbidden) or _stale()
+        start_date = values.get('start_date', before.start_date)
+        end_date = values.get('end_date', before.end_date)
+        if start_date >= end_date:
+            raise (_diagnose(task_id, user_id, forbidden)
+                   or TaskWriteError('تاريخ النهاية يجب أن يكون بعد تاريخ البداية', 400))
+        if all(before._mapping[name] == value for name, value in values.items()):
+            # لا تغيير: لا كتابة ولا إصدار جديد، فتبقى ETag لدى العملاء صالحة
+            error = _diagnose(task_id, user_id, forbidden, values.get('assigned_to'))
+            if error is not None:
+                raise error
+            db.session.rollback()
+            return Task(**before._mapping).to_dict()
+
+        stmt = (
+            update(table)
+            .where(
+                table.c.id == task_id,
+                table.c.version == before.version,
+                table.c.project_id.in_(_accessible_projects(user_id)),
+            )
+            .values(**values, updated_at=datetime.utcnow(), version=table.c.version + 1)
+            .returning(*table.c)
+        )
+        if values.get('assigned_to'):
+            stmt = stmt.where(exists().where(User.id == values['assigned_to']))
+        row = db.session.execute(stmt).first()
+        if row is not None:
+            break
+        db.session.rollback()
+        error = _diagnose(task_id, user_id, forbidden, values.get('assigned_to'))
+        if error is not None:
+            raise error
+        if expected_version is not None:
+            raise _stale()
+    else:
+        raise TaskWriteError('المهمة تُعدّل باستمرار من طلبات أخرى؛ حاول مرة أخرى', 409)
+
+    # ما كان يسجله after_flush لتعديل ORM
+    changes = {name: [_value(before._mapping[name]), _value(row._mapping[name])]
+               for name in values if before._mapping[name] != row._mapping[name]}
+    tags = {project_tag(row.project_id)}
+    if changes:
+        record_activity(db.session, row.project_id, 'task', task_id, 'update', changes)
+        if any(name in changes for name in TRACKED_TASK_FIELDS):
+            tags.update(user_tag(assignee) for assignee in (before.assigned_to, row.assigned_to) if assignee)
+    invalidate_on_commit(db.session, *tags)
+    db.session.commit()
+    return Task(**row._mapping).to_dict()
+
+
+def delete_task(task_id, user_id, expected_version=None):
+    """حذف المهمة وما يتبعها بعبارة شرطية واحدة للمهمة؛ يرفع TaskWriteError"""
+    table = Task.__table__
+    stmt = delete(table).where(table.c.id == task_id, table.c.project_id.in_(_accessible_projects(user_id)))
+    if expected_version is not None:
+        stmt = stmt.where(table.c.version == expected_version)
+    row = db.session.execute(stmt.returning(*table.c)).first()
+    if row is None:
+        db.session.rollback()
+        raise _diagnose(task_id, user_id, 'ليس لديك صلاحية لحذف هذه المهمة') or _stale()
+
+    session = db.session
+    project_id = row.project_id
+    record_deleted(session, project_id, Task, row)
+    for comment in session.execute(
+        delete(Comment).where(Comment.task_id == task_id).returning(Comment.id, Comment.task_id, Comment.user_id)
+    ):
+        record_deleted(session, project_id, Comment, comment)
+    session.execute(delete(TaskAttachment).where(TaskAttachment.task_id == task_id))
+    # التبعيات لا معنى لها بدون أحد طرفيها
+    for dependency in session.execute(
+        delete(Dependency)
+        .where((Dependency.predecessor_task_id == task_id) | (Dependency.successor_task_id == task_id))
+        .returning(Dependency.id, Dependency.predecessor_task_id, Dependency.successor_task_id, Dependency.type)
+    ):
+        record_deleted(session, project_id, Dependency, dependency)
+    for subtask_id, in session.execute(
+        update(table).where(table.c.parent_task_id == task_id)
+        .values(parent_task_id=None, updated_at=datetime.utcnow(), version=table.c.version + 1)
+        .returning(table.c.id)
+    ):
+        record_activity(session, project_id, 'task', subtask_id, 'update', {'parent_task_id': [task_id, None]})
+
+    invalidate_on_commit(session, project_tag(project_id), *((user_tag(row.assigned_to),) if row.assigned_to else ()))
+    session.commit()
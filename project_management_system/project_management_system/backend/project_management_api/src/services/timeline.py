@@ -0,0 +1,174 @@
+"""
+مخطط جانت لنافذة زمنية: المهام المتقاطعة مع [from, to] فقط وتبعياتها
+
+- التقاطع start_date <= to AND end_date >= from يُنفّذ بالفهرس
+  (project_id, start_date, end_date) فيُقرأ end_date من الفهرس دون الرجوع للجدول.
+- مستويا day وweek يعيدان كل مهمة ظاهرة.
+- مستويا month وquarter يعيدان شريطاً مجمّعاً لكل مهمة جذر (بلا أم) مع كل
+  أحفادها الظاهرين، والمهام المستقلة (بلا أم ولا أبناء) تُجمع في شريط واحد لكل
+  شهر أو ربع حسب تاريخ بدايتها. التجميع بـ GROUP BY في قاعدة البيانات، مع
+  الأسهم بين الأشرطة. تسمية الفترة بـ strftime الخاصة بـ SQLite
+  (src.sqlite.date_period).
+فحجم الاستجابة يتبع النافذة المعروضة لا حجم المشروع.
+"""
+
+from sqlalchemy import and_, case, exists, func, literal, select
+from sqlalchemy.orm import aliased
+
+from src.models.user import db
+from src.models.task import Task, Dependency
+from src.sqlite import date_period
+
+ZOOM_LEVELS = ('day', 'week', 'month', 'quarter')
+AGGREGATED_ZOOM_LEVELS = ('month', 'quarter')
+PERIOD_PREFIX = 'period:'
+
+
+def _overlaps(task, project_id, start, end):
+    return and_(task.project_id == project_id, task.start_date <= end, task.end_date >= start)
+
+
+def _task_bars(project_id, start, end, options):
+    rows = db.session.execute(
+        select(Task.id, Task.parent_task_id, Task.name, Task.start_date, Task.end_date,
+               Task.status, Task.assigned_to)
+        .where(_overlaps(Task, project_id, start, end))
+        .order_by(Task.start_date, Task.id),
+        execution_options=options,
+    )
+    tasks = [{
+        'id': row.id,
+        'parent_task_id': row.parent_task_id,
+        'name': row.name,
+        'start_date': row.start_date.isoformat(),
+        'end_date': row.end_date.isoformat(),
+        'status': row.status,
+        'assigned_to': row.assigned_to,
+    } for row in rows]
+
+    predecessor, successor = aliased(Task), aliased(Task)
+    edges = db.session.execute(
+        select(Dependency.id, predecessor.id, successor.id, Dependency.type)
+        .join(predecessor, predecessor.id == Dependency.predecessor_task_id)
+        .join(successor, successor.id == Dependency.successor_task_id)
+        .where(_overlaps(predecessor, project_id, start, end), _overlaps(successor, project_id, start, end)),
+        execution_options=options,
+    )
+    dependencies = [{
+        'id': dependency_id,
+        'predecessor_task_id': predecessor_id,
+        'successor_task_id': successor_id,
+        'type': dependency_type,
+    } for dependency_id, predecessor_id, successor_id, dependency_type in edges]
+    return tasks, dependencies
+
+
+def _groups(project_id, start, end, zoom):
+    """(task_id, group_id) لكل مهمة ظاهرة
+
+    الشريط هو الجد الأعلى للمهمة (الصعود من المهام الظاهرة فقط بـ WITH RECURSIVE)،
+    فكل مهمة في شريط واحد مهما كان عمق الشجرة، أو المهمة نفسها إن كانت أمّاً بلا
+    أم، أو فترة البداية للمهام المستقلة.
+    """
+    ancestors = (
+        select(Task.id.label('task_id'), Task.id.label('ancestor_id'), Task.parent_task_id.label('parent_id'))
+        .where(_overlaps(Task, project_id, start, end))
+        .cte('ancestors', recursive=True)
+    )
+    parent = aliased(Task)
+    # UNION لا UNION ALL: يتوقف الصعود حتى لو وُجدت حلقة في parent_task_id
+    ancestors = ancestors.union(
+        select(ancestors.c.task_id, parent.id, parent.parent_task_id)
+        .join(parent, parent.id == ancestors.c.parent_id)
+    )
+
+    task, child = aliased(Task), aliased(Task)
+    has_children = exists().where(child.parent_task_id == task.id)
+    group = case(
+        (ancestors.c.ancestor_id != ancestors.c.task_id, ancestors.c.ancestor_id),
+        (has_children, task.id),
+        else_=literal(PERIOD_PREFIX) + date_period(task.start_date, zoom),
+    )
+    return (
+        select(ancestors.c.task_id, group.label('group_id'))
+        .join(task, task.id == ancestors.c.task_id)
+        .where(ancestors.c.parent_id.is_(None))
+        .cte('groups')
+    )
+
+
+def _aggregated_bars(project_id, start, end, zoom, options):
+    groups = _groups(project_id, start, end, zoom)
+    grouped = (
+        select(
+            groups.c.group_id,
+            func.min(Task.start_date).label('start_date'),
+            func.max(Task.end_date).label('end_date'),
+            func.count().label('task_count'),
+            func.sum(case((Task.status == 'completed', 1), else_=0)).label('completed'),
+        )
+        .join(groups, groups.c.task_id == Task.id)
+        .group_by(groups.c.group_id)
+        .subquery()
+    )
+    group_task = aliased(Task)
+    rows = db.session.execute(
+        select(grouped, group_task.name, group_task.status)
+        .outerjoin(group_task, group_task.id == grouped.c.group_id)
+        .order_by(grouped.c.start_date, grouped.c.group_id),
+        execution_options=options,
+    )
+    tasks = []
+    for row in rows:
+        is_period = row.group_id.startswith(PERIOD_PREFIX)
+        tasks.append({
+            'id': row.group_id,
+            'name': f'مهام مستقلة ({row.group_id[len(PERIOD_PREFIX):]})' if is_period else row.name,
+            'start_date': row.start_date.isoformat(),
+            'end_date': row.end_date.isoformat(),
+            'status': None if is_period else row.status,
+            'task_count': row.task_count,
+            'progress': round(row.completed / row.task_count, 2),
+            'aggregated': True,
+        })
+
+    # المجموعات تضم المهام الظاهرة فقط، فالربط بها يكفي لطرفي السهم
+    predecessor, successor = groups.alias('predecessor_group'), groups.alias('successor_group')
+    edges = db.session.execute(
+        select(predecessor.c.group_id, successor.c.group_id, Dependency.type)
+        .join(predecessor, predecessor.c.task_id == Dependency.predecessor_task_id)
+        .join(successor, successor.c.task_id == Dependency.successor_task_id)
+        .distinct(),
+        execution_options=options,
+    )
+    seen = set()
+    dependencies = []
+    for predecessor_id, successor_id, dependency_type in edges:
+        # الأسهم داخل المجموعة نفسها لا تظهر على مستوى الشريط المجمّع،
+        # ويكفي سهم واحد بين كل مجموعتين
+        if predecessor_id == successor_id or (predecessor_id, successor_id) in seen:
+            continue
+        seen.add((predecessor_id, successor_id))
+        dependencies.append({
+            'predecessor_task_id': predecessor_id,
+            'successor_task_id': successor_id,
+            'type': dependency_type,
+        })
+    return tasks, dependencies
+
+
+def project_timeline(project_id, start, end, zoom='week', options=None):
+    """options: خيارات تنفيذ الاستعلامات (مثل قراءة مشروع مؤرشف)"""
+    options = options or {}
+    if zoom in AGGREGATED_ZOOM_LEVELS:
+        tasks, dependencies = _aggregated_bars(project_id, start, end, zoom, options)
+    else:
+        tasks, dependencies = _task_bars(project_id, start, end, options)
+    return {
+        'project_id': project_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'zoom': zoom,
+        'tasks': tasks,
+        'dependencies': dependencies,
+    }
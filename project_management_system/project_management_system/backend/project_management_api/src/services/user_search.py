@@ -0,0 +1,141 @@
+"""
+بحث دليل المستخدمين لاختيار المسند إليه (الإكمال التلقائي)
+
+    GET /users?q=ah&limit=10&cursor=<id>
+
+- مطابقة بادئة غير حساسة لحالة الأحرف على username_normalized وemail_normalized:
+  نطاق [prefix, prefix+1) على عمود مفهرس بدلاً من lower(username) LIKE 'ah%'
+  الذي يفحص كل الجدول.
+- النطاق: المستخدم نفسه ومن يشاركونه مشروعاً (مالكاً أو عضواً).
+- ترقيم بالمؤشر على (username_normalized, id): cursor معرف آخر مستخدم في الصفحة.
+- ذاكرة محلية صغيرة (LRU مع مدة صلاحية) للبادئات المتكررة أثناء الكتابة، تُفرغ
+  بعد التزام أي تغيير في المستخدمين أو العضويات في هذه العملية.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import and_, event, or_, select, tuple_, union
+from sqlalchemy.orm import Session
+
+from src.models.project import Project, ProjectMember
+from src.models.user import User, db, normalize
+
+
+class PrefixCache:
+    """LRU محدود الحجم بمدة صلاحية لكل قيمة"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, max_entries):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+prefix_cache = PrefixCache()
+
+
+def _prefix_range(column, prefix):
+    # أصغر سلسلة أكبر من كل سلاسل البادئة: زيادة آخر حرف
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+def _visible_user_ids(user_id):
+    projects = union(
+        select(Project.id).where(Project.owner_id == user_id),
+        select(ProjectMember.project_id).where(ProjectMember.user_id == user_id),
+    ).subquery()
+    return union(
+        select(Project.owner_id).where(Project.id.in_(select(projects.c[0]))),
+        select(ProjectMember.user_id).where(ProjectMember.project_id.in_(select(projects.c[0]))),
+    )
+
+
+def search_users(user_id, query='', limit=None, cursor=None):
+    """{'users': [...], 'next_cursor': معرف أو None}؛ ValueError لمؤشر أو حد غير صحيح"""
+    config = current_app.config
+    limit = config['USER_SEARCH_LIMIT'] if limit is None else limit
+    if not 1 <= limit <= config['USER_SEARCH_MAX_LIMIT']:
+        raise ValueError(f"limit يجب أن يكون بين 1 و {config['USER_SEARCH_MAX_LIMIT']}")
+    prefix = normalize(query or '')
+
+    key = (user_id, prefix, limit, cursor)
+    result = prefix_cache.get(key)
+    if result is not None:
+        return result
+
+    stmt = select(User).where(or_(User.id == user_id, User.id.in_(_visible_user_ids(user_id))))
+    if prefix:
+        stmt = stmt.where(or_(
+            _prefix_range(User.username_normalized, prefix),
+            _prefix_range(User.email_normalized, prefix),
+        ))
+    if cursor:
+        after = db.session.get(User, cursor)
+        if after is None:
+            raise ValueError('قيمة cursor غير صحيحة')
+        stmt = stmt.where(tuple_(User.username_normalized, User.id) > (after.username_normalized, after.id))
+
+    # صف إضافي لمعرفة وجود صفحة تالية
+    users = db.session.scalars(stmt.order_by(User.username_normalized, User.id).limit(limit + 1)).all()
+    result = {
+        'users': [user.to_dict() for user in users[:limit]],
+        'next_cursor': users[limit - 1].id if len(users) > limit else None,
+    }
+    prefix_cache.set(key, result, config['USER_SEARCH_CACHE_TTL'], config['USER_SEARCH_CACHE_SIZE'])
+    return result
+
+
+def can_view_user(user_id, other_id):
+    """المستخدم نفسه أو من يشاركه مشروعاً"""
+    if user_id == other_id:
+        return True
+    visible = _visible_user_ids(user_id).subquery()
+    return db.session.scalar(select(visible.c[0]).where(visible.c[0] == other_id).limit(1)) is not None
+
+
+def directory_changed_on_commit(session):
+    """تفريغ ذاكرة البادئات بعد الالتزام؛ للإدراجات الجماعية التي لا تمر بوحدة العمل"""
+    session.info['user_directory_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_directory_changes(session, flush_context):
+    if any(isinstance(obj, (User, Project, ProjectMember))
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        directory_changed_on_commit(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _clear_prefix_cache(session):
+    if session.info.pop('user_directory_changed', False):
+        prefix_cache.clear()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_directory_changes(session, previous_transaction):
+    session.info.pop('user_directory_changed', None)
@@ -0,0 +1,151 @@
+"""
+حمل العمل عبر المشاريع: عدد المهام المتزامنة لكل مستخدم يوماً بيوم أو أسبوعاً بأسبوع
+
+الحساب بالفرز والمسح (sort-and-sweep): كل مهمة تتحول إلى حدثين (+1 عند البداية،
+-1 بعد النهاية)، وبعد فرز الأحداث نمر عليها مرة واحدة لنحصل على مقاطع ثابتة
+العدد، ثم تُجمع المقاطع في فترات اليوم أو الأسبوع. التكلفة O(n log n) في عدد
+المهام بدلاً من O(n × أيام).
+
+المهام تُجلب بفهرس (assigned_to, start_date)، والنتائج تُخزّن مؤقتاً بوسم
+المستخدم وتُبطَل تلقائياً عند حفظ أي تغيير في الإسناد أو التواريخ أو الحالة.
+"""
+
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from src.cache import cache, project_tag, user_tag
+from src.models.user import User, db
+from src.models.project import ProjectMember
+from src.models.task import Task
+
+ONE_DAY = timedelta(days=1)
+GRANULARITIES = ('day', 'week')
+
+
+def sweep(intervals, start, end):
+    """تحويل فترات [بداية، نهاية] شاملة إلى مقاطع (من، إلى، العدد) تغطي [start, end]"""
+    events = []
+    for task_start, task_end in intervals:
+        task_start, task_end = max(task_start, start), min(task_end, end)
+        if task_start <= task_end:
+            events.append((task_start, 1))
+            events.append((task_end + ONE_DAY, -1))
+    events.sort()
+
+    segments, current, cursor, i = [], 0, start, 0
+    while i < len(events):
+        day = events[i][0]
+        if day > cursor:
+            segments.append((cursor, day - ONE_DAY, current))
+            cursor = day
+        while i < len(events) and events[i][0] == day:
+            current += events[i][1]
+            i += 1
+    if cursor <= end:
+        segments.append((cursor, end, current))
+    return segments
+
+
+def _bucket_ranges(start, end, granularity):
+    cursor = start
+    while cursor <= end:
+        if granularity == 'week':
+            # الأسابيع تبدأ يوم الاثنين؛ الأسبوع الأول والأخير يُقصّان على النطاق
+            bucket_end = min(cursor + timedelta(days=6 - cursor.weekday()), end)
+        else:
+            bucket_end = cursor
+        yield cursor, bucket_end
+        cursor = bucket_end + ONE_DAY
+
+
+def bucketize(segments, start, end, granularity):
+    """تجميع المقاطع في فترات: أقصى تزامن (peak) ومتوسطه (average) لكل فترة"""
+    buckets = [[bucket_start, bucket_end, 0, 0] for bucket_start, bucket_end in _bucket_ranges(start, end, granularity)]
+    j = 0
+    for segment_start, segment_end, count in segments:
+        while segment_start <= segment_end:
+            bucket = buckets[j]
+            if segment_start > bucket[1]:
+                j += 1
+                continue
+            upto = min(segment_end, bucket[1])
+            bucket[2] = max(bucket[2], count)
+            bucket[3] += count * ((upto - segment_start).days + 1)
+            segment_start = upto + ONE_DAY
+
+    return [{
+        'start': bucket_start.isoformat(),
+        'end': bucket_end.isoformat(),
+        'peak': peak,
+        'average': round(task_days / ((bucket_end - bucket_start).days + 1), 2),
+    } for bucket_start, bucket_end, peak, task_days in buckets]
+
+
+def _intervals_by_user(user_ids, start, end):
+    """المهام غير المكتملة المتقاطعة مع النطاق لكل مستخدم (تستخدم ix_task_assigned_start)"""
+    rows = db.session.execute(
+        select(Task.assigned_to, Task.start_date, Task.end_date).where(
+            Task.assigned_to.in_(user_ids),
+            Task.start_date <= end,
+            Task.end_date >= start,
+            Task.status != 'completed',
+        )
+    )
+    intervals = {user_id: [] for user_id in user_ids}
+    for assigned_to, task_start, task_end in rows:
+        intervals[assigned_to].append((task_start, task_end))
+    return intervals
+
+
+def _summary(intervals, start, end, granularity):
+    return {
+        'tasks': len(intervals),
+        'buckets': bucketize(sweep(intervals, start, end), start, end, granularity),
+    }
+
+
+def user_workload(user_id, start, end, granularity='day'):
+    key = ('workload', user_id, start, end, granularity)
+    result = cache.get(key)
+    if result is None:
+        intervals = _intervals_by_user([user_id], start, end)[user_id]
+        result = {
+            'user_id': user_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'granularity': granularity,
+            **_summary(intervals, start, end, granularity),
+        }
+        cache.set(key, result, current_app.config['WORKLOAD_CACHE_TTL'], tags=[user_tag(user_id)])
+    return result
+
+
+def team_workload(project, start, end, granularity='day'):
+    """حمل عمل مالك المشروع وأعضائه عبر كل مشاريعهم، مع مجموع الفريق"""
+    key = ('team_workload', project.id, start, end, granularity)
+    result = cache.get(key)
+    if result is None:
+        member_ids = db.session.scalars(
+            select(ProjectMember.user_id).where(ProjectMember.project_id == project.id)
+        ).all()
+        user_ids = list(dict.fromkeys([project.owner_id, *member_ids]))
+        usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all())
+        intervals = _intervals_by_user(user_ids, start, end)
+
+        result = {
+            'project_id': project.id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'granularity': granularity,
+            'members': [{
+                'user_id': user_id,
+                'username': usernames.get(user_id),
+                **_summary(intervals[user_id], start, end, granularity),
+            } for user_id in user_ids],
+            'team': _summary([item for items in intervals.values() for item in items], start, end, granularity),
+        }
+        tags = [project_tag(project.id), *(user_tag(user_id) for user_id in user_ids)]
+        cache.set(key, result, current_app.config['WORKLOAD_CACHE_TTL'], tags=tags)
+    return result
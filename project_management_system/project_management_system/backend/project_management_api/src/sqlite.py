@@ -0,0 +1,108 @@
+"""
+أدوات اتصالات SQLite
+
+- init_sqlite: تطبيق SQLITE_PRAGMAS على كل اتصال جديد (وضع WAL افتراضياً
+  حتى لا تحجب القراءات الطويلة، كالنسخ الاحتياطي، عمليات الكتابة).
+- sqlite_path: مسار ملف قاعدة البيانات من رابط SQLAlchemy (None للذاكرة أو غير SQLite).
+- attach: ربط ملف آخر بالاتصال (ATTACH DATABASE) تحت اسم مخطط.
+- mirror_tables: إنشاء نسخة من جداول main وفهارسها في المخطط المرتبط، وإكمال
+  الأعمدة التي أضافتها الترحيلات لاحقاً حتى يبقى INSERT ... SELECT بين
+  المخططين صالحاً.
+- date_period: تسمية الشهر أو الربع لعمود تاريخ بـ strftime الخاصة بـ SQLite
+  (يستخدمها تجميع مخطط جانت؛ قاعدة أخرى تحتاج to_char أو ما يقابلها هنا).
+"""
+
+import re
+import sqlite3
+from functools import partial
+
+from sqlalchemy import Integer, String, cast, event, func
+from sqlalchemy.engine import make_url
+
+from src.models.user import db
+
+_CREATE_TABLE = re.compile(r'^CREATE TABLE\s+("?\w+"?)', re.IGNORECASE)
+_CREATE_INDEX = re.compile(r'^CREATE (UNIQUE )?INDEX\s+("?\w+"?)', re.IGNORECASE)
+
+
+def _apply_pragmas(dbapi_connection, connection_record, pragmas):
+    # عبر cursor حتى يعمل مع محول aiosqlite أيضاً
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def listen_pragmas(engine, pragmas):
+    event.listen(engine, 'connect', partial(_apply_pragmas, pragmas=pragmas))
+
+
+def init_sqlite(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas or sqlite_path(app.config['SQLALCHEMY_DATABASE_URI']) is None:
+        return
+    with app.app_context():
+        listen_pragmas(db.engine, pragmas)
+
+
+def sqlite_path(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+
+def date_period(column, period):
+    """'2026-01' للشهر أو '2026-Q1' للربع"""
+    if period == 'quarter':
+        quarter = (cast(func.strftime('%m', column), Integer) + 2) // 3
+        return func.strftime('%Y', column, type_=String) + '-Q' + cast(quarter, String)
+    return func.strftime('%Y-%m', column, type_=String)
+
+
+def attach(dbapi_connection, path, schema):
+    attached = {row[1] for row in dbapi_connection.execute('PRAGMA database_list')}
+    if schema not in attached:
+        dbapi_connection.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+
+
+def table_columns(dbapi_connection, schema, table):
+    return [row[1] for row in dbapi_connection.execute(f'PRAGMA {schema}.table_info("{table}")')]
+
+
+def mirror_tables(dbapi_connection, schema, tables):
+    for table in tables:
+        row = dbapi_connection.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if row is None:
+            # الجدول غير موجود بعد (قبل تطبيق الترحيلات)
+            continue
+
+        # IF NOT EXISTS وتجاهل العمود المكرر: عدة اتصالات قد تُفتح في الوقت نفسه
+        existing = set(table_columns(dbapi_connection, schema, table))
+        if not existing:
+            dbapi_connection.execute(_CREATE_TABLE.sub(rf'CREATE TABLE IF NOT EXISTS {schema}.\1', row[0], count=1))
+        else:
+            for _, name, column_type, _, default, _ in dbapi_connection.execute(f'PRAGMA main.table_info("{table}")'):
+                if name not in existing:
+                    suffix = f' DEFAULT {default}' if default is not None else ''
+                    try:
+                        dbapi_connection.execute(
+                            f'ALTER TABLE {schema}."{table}" ADD COLUMN "{name}" {column_type}{suffix}'
+                        )
+                    except sqlite3.OperationalError as e:
+                        if 'duplicate column' not in str(e):
+                            raise
+
+        indexes = {row[0] for row in dbapi_connection.execute(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,)
+        )}
+        for name, index_sql in dbapi_connection.execute(
+            "SELECT name, sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        ).fetchall():
+            if name not in indexes:
+                dbapi_connection.execute(_CREATE_INDEX.sub(rf'CREATE \1INDEX IF NOT EXISTS {schema}.\2', index_sql, count=1))
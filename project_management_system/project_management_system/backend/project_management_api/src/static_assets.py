@@ -0,0 +1,351 @@
+"""
+تقديم الملفات الثابتة من بيان (manifest) محمّل في الذاكرة
+
+- البناء (مرة واحدة عند النشر): flask --app src.main assets build
+  ينسخ ملفات static/ إلى STATIC_BUILD_FOLDER بأسماء تحمل بصمة المحتوى
+  (app.3f2a9c1b.js)، ويكتب نسخاً مضغوطة مسبقاً ‎.gz و‎.br (إذا توفرت مكتبة brotli)
+  وملف manifest.json، ويعيد كتابة المراجع داخل ملفات HTML/CSS/JS إلى الأسماء الجديدة.
+  المراجع المطلقة (/js/app.js) من جذر static/ والنسبية (./util.js و../img/a.png)
+  من مجلد الملف الذي يحويها. الملف يُبنى بعد كل ملف نصي يشير إليه، فبصمته تُحسب
+  من محتواه بعد إعادة الكتابة وتتغير مع بصمات ما يعتمد عليه؛ ملفات الحلقة (a.js
+  يستورد b.js ويستورده) وindex.html تبقى بأسمائها المنطقية (no-cache) وتُكتب أخيراً.
+- التشغيل: يُقرأ البيان مرة واحدة، فلا يوجد أي stat على نظام الملفات لكل طلب.
+  الأسماء ذات البصمة تُرسل مع Cache-Control: immutable، والأسماء المنطقية
+  (مثل index.html) مع no-cache وETag، وIf-None-Match يعيد 304.
+- بدون بناء (بيئة التطوير): يُبنى البيان في الذاكرة عند أول طلب مع ضغط gzip فقط.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import threading
+
+import click
+from flask import Response, current_app, request
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # اختياري: بدونه تُبنى نسخ gzip فقط
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'index.html'
+
+_COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/xml',
+    'application/manifest+json', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon',
+)
+_REWRITE_EXTENSIONS = ('.html', '.css', '.js')
+# مسار بين علامتي تنصيص أو داخل url(...) ينتهي بالإغلاق أو ?query أو #hash
+_REFERENCE = re.compile(r'(?P<prefix>["\'(])(?P<path>[^"\'()\s?#]+)(?=["\')?#])')
+# تفضيل br ثم gzip عند تساوي q
+_ENCODING_PREFERENCE = ('br', 'gzip')
+_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def _content_type(name):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def _is_compressible(content_type):
+    return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+def _compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def _fingerprinted(name, digest):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{digest[:12]}{ext}'
+
+
+def _walk(folder):
+    for root, _, files in os.walk(folder):
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            yield os.path.relpath(path, folder).replace(os.sep, '/'), path
+
+
+def _resolve(name, reference):
+    """المرجع داخل الملف name إلى اسم في static/: المطلق من الجذر والنسبي من مجلد الملف"""
+    if reference.startswith('/'):
+        return posixpath.normpath(reference.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(name), reference))
+
+
+def _references(name, data, names):
+    """الملفات الموجودة في names التي يشير إليها محتوى name"""
+    found = {_resolve(name, m['path']) for m in _REFERENCE.finditer(data.decode('utf-8'))}
+    return (found & names) - {name}
+
+
+def _rewrite_references(data, name, renames):
+    """استبدال المراجع إلى ملفات أُعيدت تسميتها مع الحفاظ على شكل المرجع (مطلق أو نسبي)"""
+    if not renames:
+        return data
+
+    def replace(m):
+        target = renames.get(_resolve(name, m['path']))
+        if target is None:
+            return m[0]
+        # البصمة تغير آخر جزء من المسار فقط
+        head, slash, _ = m['path'].rpartition('/')
+        return m['prefix'] + head + slash + target.rpartition('/')[2]
+
+    return _REFERENCE.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+
+def _build_order(sources):
+    """(ترتيب البناء، الملفات التي تبقى بلا بصمة)
+
+    الملفات غير النصية أولاً، ثم كل ملف نصي بعد الملفات النصية التي يشير إليها.
+    عند حلقة يُثبّت اسم أول ملف متبقٍ فيها ويُبنى مع index.html في النهاية: اسمه لا
+    يعتمد على محتواه، فتُكتب مراجعه بعد أن تُعرف أسماء كل الملفات الأخرى.
+    """
+    text = {name for name in sources if name.endswith(_REWRITE_EXTENSIONS)}
+    pinned = {INDEX_NAME} & text
+    depends = {}
+    for name in text - pinned:
+        with open(sources[name], 'rb') as f:
+            depends[name] = _references(name, f.read(), text) - pinned
+
+    ordered = sorted(set(sources) - text)
+    while depends:
+        ready = sorted(name for name, names in depends.items() if not names)
+        if not ready:
+            ready = [min(depends)]
+            pinned.add(ready[0])
+        for name in ready:
+            del depends[name]
+        for names in depends.values():
+            names.difference_update(ready)
+        ordered.extend(name for name in ready if name not in pinned)
+    return ordered + sorted(pinned), pinned
+
+
+def build_assets(source_folder, build_folder, encodings=None):
+    """بناء مجلد الإخراج والبيان؛ يعيد قاموس البيان"""
+    if encodings is None:
+        encodings = ['gzip'] + (['br'] if brotli is not None else [])
+
+    if os.path.isdir(build_folder):
+        shutil.rmtree(build_folder)
+    os.makedirs(build_folder)
+
+    sources = dict(_walk(source_folder))
+    # محتوى الملف النصي (وبالتالي بصمته) يعتمد على أسماء ما يشير إليه
+    ordered, pinned = _build_order(sources)
+    renames, assets = {}, {}
+
+    for name in ordered:
+        with open(sources[name], 'rb') as f:
+            data = f.read()
+        if name.endswith(_REWRITE_EXTENSIONS):
+            data = _rewrite_references(data, name, renames)
+
+        digest = hashlib.sha256(data).hexdigest()
+        # صفحة التطبيق يجب أن تبقى على عنوان ثابت فلا تأخذ بصمة، وكذلك ملفات الحلقات
+        file_name = name if name in pinned else _fingerprinted(name, digest)
+        if file_name != name:
+            renames[name] = file_name
+
+        target = os.path.join(build_folder, file_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        content_type = _content_type(name)
+        variants = {}
+        if _is_compressible(content_type):
+            for encoding in encodings:
+                compressed = _compress(data, encoding)
+                if len(compressed) < len(data) * 0.9:
+                    variant_name = file_name + _EXTENSIONS[encoding]
+                    with open(os.path.join(build_folder, variant_name), 'wb') as f:
+                        f.write(compressed)
+                    variants[encoding] = variant_name
+
+        assets[name] = {
+            'file': file_name, 'hash': digest[:32], 'content_type': content_type,
+            'size': len(data), 'encodings': variants,
+        }
+
+    manifest = {'version': 1, 'assets': assets}
+    with open(os.path.join(build_folder, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class _Asset:
+    __slots__ = ('etag', 'content_type', 'bodies')
+
+    def __init__(self, etag, content_type, bodies):
+        self.etag = etag
+        self.content_type = content_type
+        self.bodies = bodies  # encoding ('identity'/'gzip'/'br') -> bytes
+
+
+class StaticAssets:
+    """البيان في الذاكرة: المسار المطلوب -> (الملف، هل هو ثابت بالبصمة)"""
+
+    def __init__(self, static_folder, build_folder, max_age=31536000):
+        self.static_folder = static_folder
+        self.build_folder = build_folder
+        self.max_age = max_age
+        self._routes = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        manifest_path = os.path.join(self.build_folder, MANIFEST_NAME)
+        routes = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            for name, entry in manifest['assets'].items():
+                asset = self._read_built(entry)
+                routes[name] = (asset, False)
+                if entry['file'] != name:
+                    routes[entry['file']] = (asset, True)
+        elif self.static_folder and os.path.isdir(self.static_folder):
+            for name, path in _walk(self.static_folder):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                content_type = _content_type(name)
+                bodies = {'identity': data}
+                if _is_compressible(content_type):
+                    compressed = gzip.compress(data, compresslevel=6, mtime=0)
+                    if len(compressed) < len(data) * 0.9:
+                        bodies['gzip'] = compressed
+                routes[name] = (_Asset(hashlib.sha256(data).hexdigest()[:32], content_type, bodies), False)
+        return routes
+
+    def _read_built(self, entry):
+        bodies = {}
+        for encoding, file_name in [('identity', entry['file'])] + list(entry['encodings'].items()):
+            with open(os.path.join(self.build_folder, file_name), 'rb') as f:
+                bodies[encoding] = f.read()
+        return _Asset(entry['hash'], entry['content_type'], bodies)
+
+    @property
+    def routes(self):
+        if self._routes is None:
+            with self._lock:
+                if self._routes is None:
+                    self._routes = self._load()
+        return self._routes
+
+    def lookup(self, path):
+        return self.routes.get(path)
+
+    def respond(self, path):
+        found = self.lookup(path or INDEX_NAME)
+        if found is None:
+            # لا نعيد صفحة التطبيق لمسارات API أو لملفات مفقودة (تُطلب بامتداد)
+            last_segment = path.rsplit('/', 1)[-1]
+            if path.startswith('api/') or '.' in last_segment:
+                return Response('Not Found', status=404, mimetype='text/plain')
+            found = self.lookup(INDEX_NAME)
+            if found is None:
+                return Response('index.html not found', status=404, mimetype='text/plain')
+
+        asset, immutable = found
+        encoding = _negotiate(request.headers.get('Accept-Encoding', ''), asset.bodies)
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': f'public, max-age={self.max_age}, immutable' if immutable else 'no-cache',
+        }
+        if len(asset.bodies) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if _etag_matches(request.headers.get('If-None-Match'), asset.etag):
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(asset.bodies[encoding], content_type=asset.content_type, headers=headers)
+
+
+def _negotiate(accept_encoding, bodies):
+    if len(bodies) == 1 or not accept_encoding:
+        return 'identity'
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip()] = q
+    best, best_q = 'identity', 0.0
+    for encoding in _ENCODING_PREFERENCE:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if encoding in bodies and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _etag_matches(if_none_match, etag):
+    """مقارنة ضعيفة: أي نسخة مضغوطة من نفس المحتوى تعتبر مطابقة"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == etag or candidate.startswith(etag + '-'):
+            return True
+    return False
+
+
+def init_static_assets(app):
+    """تسجيل مسار تقديم الملفات الثابتة وواجهة سطر الأوامر"""
+    assets = StaticAssets(
+        app.static_folder,
+        app.config['STATIC_BUILD_FOLDER'],
+        max_age=app.config['STATIC_MAX_AGE'],
+    )
+    app.extensions['static_assets'] = assets
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        return assets.respond(path)
+
+    app.cli.add_command(assets_cli)
+    return assets
+
+
+assets_cli = AppGroup('assets', help='بناء الملفات الثابتة')
+
+
+@assets_cli.command('build')
+def build_command():
+    """بصمة المحتوى وضغط مسبق لملفات static/ وكتابة البيان"""
+    source = current_app.static_folder
+    target = current_app.config['STATIC_BUILD_FOLDER']
+    manifest = build_assets(source, target)
+    total = sum(a['size'] for a in manifest['assets'].values())
+    click.echo(f"تم بناء {len(manifest['assets'])} ملف ({total} بايت) في {target}")
+    for name, entry in sorted(manifest['assets'].items()):
+        variants = ', '.join(entry['encodings']) or '-'
+        click.echo(f"  {name} -> {entry['file']} [{variants}]")
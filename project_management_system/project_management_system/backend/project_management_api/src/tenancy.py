@@ -0,0 +1,517 @@
+"""
+قاعدة بيانات مستقلة لكل مؤسسة (tenant)
+
+- الدليل: جدول tenant في القاعدة الافتراضية (SQLALCHEMY_DATABASE_URI) يربط معرف
+  المؤسسة بملف SQLite خاص بها (أو رابط SQLAlchemy) وحالتها.
+- الطلب: المؤسسة من مطالبة tenant في رمز JWT (تضيفها /auth/login و/auth/register)،
+  أو من ترويسة X-Tenant لتسجيل الدخول فقط. التسجيل في مؤسسة يتطلب دعوة موقعة
+  لبريد بعينه (tenants invite) في حقل invite؛ بدونها ترفض /auth/register ترويسة
+  X-Tenant بـ 403، فلا يستطيع أي عميل أن ينشئ لنفسه حساباً داخل مؤسسة. جلسة db وكل ما يستخدم
+  bind_engine() يعملان على قاعدة المؤسسة حتى نهاية الطلب، فلكل مؤسسة قفل كتابة
+  مستقل ولا يحجب حمل مؤسسة كبيرة البقية. الطلب بدون مؤسسة على القاعدة الافتراضية
+  كما كان.
+- المحركات: ذاكرة LRU لمحركات المؤسسات النشطة في العامل (TENANT_ENGINE_CACHE_SIZE)
+  بمجمّع اتصالات لكل منها، ويُغلق المحرك غير المستخدم منذ TENANT_IDLE_SECONDS.
+  أول فتح لقاعدة في العامل يطبق ترحيلاتها المعلقة.
+- النقل دون إيقاف: الحالة moving ترفض الكتابة بـ 503 وتوقف عمال الطابور عن
+  المؤسسة، ثم انتظار المهام الجارية، ثم نسخة متسقة (src.backup.online_copy)
+  والتحقق منها، ثم تبديل الملف في الدليل وإعادة التحقق قبل العودة إلى active.
+  القراءة مستمرة طوال النقل.
+
+    flask --app src.main tenants create acme --name "Acme"
+    flask --app src.main tenants list
+    flask --app src.main tenants move acme --to /mnt/fast/acme.db
+
+النسخ الاحتياطي (backup create) وتذكيرات المواعيد تمر على القاعدة الافتراضية وكل
+المؤسسات؛ الأرشيف للقاعدة الافتراضية فقط (معطل لطلبات المؤسسات).
+
+    flask --app src.main tenants invite acme --email bob@acme.io
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import click
+from flask import current_app, g, jsonify, request
+from flask.cli import AppGroup
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import create_engine, select
+
+
+class TenantNotFound(LookupError):
+    """معرف مؤسسة غير موجود في الدليل"""
+
+
+class TenantForbidden(PermissionError):
+    """طلب مؤسسة غير مسموح (تسجيل بدون دعوة صالحة)"""
+
+
+TenantBinding = namedtuple('TenantBinding', ['id', 'shard', 'status', 'engine'])
+
+_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# المؤسسة المرتبطة بالطلب أو بمهمة الطابور الحالية
+_current = ContextVar('tenant', default=None)
+
+
+def current_tenant():
+    binding = _current.get()
+    return binding.id if binding else None
+
+
+def tenant_engine():
+    binding = _current.get()
+    return binding.engine if binding else None
+
+
+def bind_engine():
+    """محرك المؤسسة الحالية أو المحرك الافتراضي؛ بديل db.engine للاتصالات المباشرة"""
+    from src.models.user import db
+
+    return tenant_engine() or db.engine
+
+
+def tenant_claims():
+    """مطالبات رمز JWT الإضافية للمؤسسة الحالية"""
+    tenant_id = current_tenant()
+    return {'tenant': tenant_id} if tenant_id else {}
+
+
+@contextmanager
+def use_tenant(tenant_id):
+    """تشغيل الكتلة على قاعدة المؤسسة؛ None للقاعدة الافتراضية"""
+    if tenant_id is None:
+        yield None
+        return
+    router = current_app.extensions.get('tenancy')
+    binding = router.bind(tenant_id) if router else None
+    if binding is None:
+        raise TenantNotFound(f'المؤسسة غير موجودة: {tenant_id}')
+    token = _current.set(binding)
+    try:
+        yield binding
+    finally:
+        _current.reset(token)
+
+
+def active_databases():
+    """None للقاعدة الافتراضية ثم كل مؤسسة نشطة (للمهام الدورية وسطر الأوامر)"""
+    router = current_app.extensions.get('tenancy')
+    if router is None:
+        return [None]
+    return [None, *(tenant_id for tenant_id in router.tenant_ids()
+                    if (router.lookup(tenant_id) or (None, None))[1] == 'active')]
+
+
+def tenant_database(tenant_id):
+    """مسار ملف SQLite للمؤسسة (None إن لم يكن ملفاً)"""
+    from src.sqlite import sqlite_path
+
+    router = current_app.extensions.get('tenancy')
+    found = router.lookup(tenant_id) if router else None
+    if found is None:
+        raise TenantNotFound(f'المؤسسة غير موجودة: {tenant_id}')
+    return sqlite_path(shard_url(found[0]))
+
+
+def shard_url(shard):
+    return shard if '://' in shard else f'sqlite:///{shard}'
+
+
+def _invites():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='tenant-invite')
+
+
+def _email(value):
+    return value.strip().lower() if isinstance(value, str) else None
+
+
+def create_invite(tenant_id, email):
+    """دعوة موقعة للتسجيل في المؤسسة بالبريد email، صالحة TENANT_INVITE_MAX_AGE ثانية"""
+    return _invites().dumps({'tenant': tenant_id, 'email': _email(email)})
+
+
+def _invited_tenant():
+    """مؤسسة دعوة /auth/register، أو None للتسجيل في القاعدة الافتراضية"""
+    data = request.get_json(silent=True)
+    invite = data.get('invite') if isinstance(data, dict) else None
+    if not invite:
+        if request.headers.get('X-Tenant'):
+            raise TenantForbidden('التسجيل في مؤسسة يتطلب دعوة')
+        return None
+    try:
+        claims = _invites().loads(invite, max_age=current_app.config['TENANT_INVITE_MAX_AGE'])
+    except (BadSignature, TypeError):
+        raise TenantForbidden('الدعوة غير صالحة أو منتهية')
+    if claims['email'] != _email(data.get('email')):
+        raise TenantForbidden('الدعوة لبريد إلكتروني آخر')
+    return claims['tenant']
+
+
+def _requested_tenant():
+    try:
+        if verify_jwt_in_request(optional=True) is not None:
+            # رمز صالح: مؤسسته فقط، فلا تنقل الترويسة المستخدم إلى مؤسسة أخرى
+            return get_jwt().get('tenant')
+    except Exception:
+        pass
+    if request.endpoint == 'auth.register':
+        return _invited_tenant()
+    # بدون رمز: الترويسة تختار مؤسسة تسجيل الدخول فقط
+    if request.endpoint == 'auth.login':
+        return request.headers.get('X-Tenant')
+    return None
+
+
+class TenantRouter:
+    """دليل المؤسسات المخزن مؤقتاً ومحركاتها المفتوحة (LRU)"""
+
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.cache_size = config['TENANT_ENGINE_CACHE_SIZE']
+        self.idle_seconds = config['TENANT_IDLE_SECONDS']
+        self.directory_ttl = config['TENANT_DIRECTORY_TTL']
+        self.engine_options = {'pool_size': config['TENANT_POOL_SIZE'],
+                               **(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})}
+        self._directory = {}  # المعرف -> (انتهاء الصلاحية، الملف، الحالة) أو (انتهاء، None، None)
+        self._engines = OrderedDict()  # المعرف -> [الملف، المحرك، آخر استخدام]
+        self._tenant_ids = (0, [])
+        self._lock = threading.Lock()
+
+    # --- الدليل ---
+
+    def lookup(self, tenant_id):
+        """(الملف، الحالة) من الدليل أو None لمؤسسة غير موجودة"""
+        entry = self._directory.get(tenant_id)
+        if entry is None or entry[0] < time.monotonic():
+            from src.models.tenant import Tenant
+            from src.models.user import db
+
+            # الدليل في القاعدة الافتراضية دائماً، خارج جلسة الطلب
+            with db.engine.connect() as conn:
+                row = conn.execute(select(Tenant.shard, Tenant.status).where(Tenant.id == tenant_id)).first()
+            entry = (time.monotonic() + self.directory_ttl, *(row or (None, None)))
+            self._directory[tenant_id] = entry
+        return None if entry[1] is None else entry[1:]
+
+    def tenant_ids(self):
+        """كل المؤسسات في الدليل (مخزنة TENANT_DIRECTORY_TTL ثانية)"""
+        expires_at, ids = self._tenant_ids
+        if expires_at < time.monotonic():
+            from src.models.tenant import Tenant
+            from src.models.user import db
+
+            with db.engine.connect() as conn:
+                ids = list(conn.scalars(select(Tenant.id).order_by(Tenant.id)))
+            self._tenant_ids = (time.monotonic() + self.directory_ttl, ids)
+        return ids
+
+    def forget(self, tenant_id):
+        """إسقاط الدليل والمحرك المخزنين (بعد نقل المؤسسة)"""
+        self._directory.pop(tenant_id, None)
+        with self._lock:
+            entry = self._engines.pop(tenant_id, None)
+        if entry is not None:
+            entry[1].dispose()
+
+    # --- المحركات ---
+
+    def _open(self, shard):
+        from src.migrations import upgrade
+        from src.sqlite import listen_pragmas, sqlite_path
+
+        url = shard_url(shard)
+        path = sqlite_path(url)
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        engine = create_engine(url, **self.engine_options)
+        if path is not None and self.app.config.get('SQLITE_PRAGMAS'):
+            listen_pragmas(engine, self.app.config['SQLITE_PRAGMAS'])
+        upgrade(engine)
+        return engine
+
+    def engine(self, tenant_id, shard):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._engines.get(tenant_id)
+            if entry is not None and entry[0] == shard:
+                self._engines.move_to_end(tenant_id)
+                entry[2] = now
+                return entry[1]
+
+        engine = self._open(shard)
+        closed = []
+        with self._lock:
+            entry = self._engines.get(tenant_id)
+            if entry is not None and entry[0] == shard:
+                # فتحه خيط آخر في الأثناء
+                closed.append(engine)
+                engine = entry[1]
+            else:
+                if entry is not None:
+                    closed.append(entry[1])
+                self._engines[tenant_id] = [shard, engine, now]
+            self._engines.move_to_end(tenant_id)
+            closed.extend(self._evict(now))
+        # الاتصالات المستعارة حالياً من محرك مُغلق تُغلق عند إعادتها
+        for old in closed:
+            old.dispose()
+        return engine
+
+    def _evict(self, now):
+        evicted = []
+        while len(self._engines) > self.cache_size:
+            evicted.append(self._engines.popitem(last=False)[1][1])
+        # الأقدم استخداماً أولاً: التوقف عند أول محرك ما زال نشطاً
+        while self._engines:
+            tenant_id, (shard, engine, last_used) = next(iter(self._engines.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            del self._engines[tenant_id]
+            evicted.append(engine)
+        return evicted
+
+    def open_tenants(self):
+        """المؤسسات التي لها محرك مفتوح في هذا العامل"""
+        with self._lock:
+            return list(self._engines)
+
+    def bind(self, tenant_id):
+        found = self.lookup(tenant_id)
+        if found is None:
+            return None
+        shard, status = found
+        return TenantBinding(tenant_id, shard, status, self.engine(tenant_id, shard))
+
+    # --- خطافات الطلب ---
+
+    def before_request(self):
+        try:
+            tenant_id = _requested_tenant()
+        except TenantForbidden as e:
+            return jsonify({'error': str(e)}), 403
+        if not tenant_id:
+            return None
+        binding = self.bind(tenant_id)
+        if binding is None:
+            return jsonify({'error': 'المؤسسة غير موجودة'}), 404
+        if binding.status == 'moving' and request.method not in _READ_METHODS:
+            response = jsonify({'error': 'بيانات المؤسسة قيد النقل، أعد المحاولة بعد قليل'})
+            response.headers['Retry-After'] = str(self.directory_ttl)
+            return response, 503
+        g.tenant_token = _current.set(binding)
+        return None
+
+    def teardown_request(self, exc=None):
+        token = g.pop('tenant_token', None)
+        if token is not None:
+            _current.reset(token)
+
+
+# --- الإدارة ---
+
+def create_tenant(tenant_id, name, shard=None):
+    from src.models.tenant import Tenant
+    from src.models.user import db
+
+    if db.session.get(Tenant, tenant_id) is not None:
+        raise ValueError(f'المؤسسة موجودة بالفعل: {tenant_id}')
+    shard = shard or os.path.join(current_app.config['TENANT_DATABASE_DIR'], f'{tenant_id}.db')
+    # إنشاء الملف وترحيله قبل إضافته للدليل
+    current_app.extensions['tenancy']._open(shard).dispose()
+    tenant = Tenant(id=tenant_id, name=name, shard=shard)
+    db.session.add(tenant)
+    db.session.commit()
+    return tenant
+
+
+def _table_counts(path):
+    import sqlite3
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        check = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        if check != 'ok':
+            raise ValueError(f'فشل فحص سلامة {path}: {check}')
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        conn.close()
+
+
+def _wait_for_jobs(path, timeout, poll=0.5):
+    """انتظار مهام الطابور التي حجزها عامل قبل الحالة moving وما زال إيجارها حياً"""
+    import sqlite3
+
+    deadline = time.monotonic() + timeout
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        while True:
+            running = conn.execute(
+                "SELECT COUNT(*) FROM job WHERE status = 'running' AND locked_until > ?", (time.time(),)
+            ).fetchone()[0]
+            if not running:
+                return
+            if time.monotonic() >= deadline:
+                raise ValueError(f'{running} مهمة جارية في المؤسسة لم تنته خلال {timeout} ثانية')
+            time.sleep(poll)
+    finally:
+        conn.close()
+
+
+def move_tenant(tenant_id, target, progress=None):
+    """نقل قاعدة المؤسسة إلى ملف آخر؛ الكتابة مرفوضة (503) أثناء النسخ فقط
+
+    الحالة moving تمنع الطلبات الجديدة وحجز مهام جديدة، لكن مهمة حُجزت قبلها تظل
+    تكتب في الملف القديم، فيُنتظر انتهاء المهام الجارية قبل النسخ. بعد تبديل الملف
+    في الدليل (والحالة ما زالت moving) يُعاد التحقق: أي التزام في الملف القديم بعد
+    بدء النسخ (PRAGMA data_version على اتصال مفتوح قبله، ويشمل UPDATE الذي لا يغير
+    عدد الصفوف) أو اختلاف في العدد يلغي النقل ويعيد المؤسسة إلى ملفها القديم.
+    """
+    import sqlite3
+
+    from src.backup import online_copy
+    from src.models.tenant import Tenant
+    from src.models.user import db
+    from src.sqlite import sqlite_path
+
+    config = current_app.config
+    tenant = db.session.get(Tenant, tenant_id)
+    if tenant is None:
+        raise ValueError(f'المؤسسة غير موجودة: {tenant_id}')
+    if tenant.status != 'active':
+        raise ValueError(f'المؤسسة في الحالة {tenant.status}')
+    source = sqlite_path(shard_url(tenant.shard))
+    target = os.path.abspath(target)
+    if source is None or sqlite_path(shard_url(target)) is None:
+        raise ValueError('النقل يدعم ملفات SQLite فقط')
+    if os.path.exists(target):
+        raise ValueError(f'الملف موجود بالفعل: {target}')
+
+    router = current_app.extensions['tenancy']
+    shard = tenant.shard
+    tenant.status = 'moving'
+    db.session.commit()
+    try:
+        # كل العمال يرون الحالة الجديدة بعد انتهاء صلاحية الدليل المخزن لديهم،
+        # ثم مهلة دفعة سجل النشاط حتى تُكتب أحداثها في الملف القديم
+        time.sleep(config['TENANT_DIRECTORY_TTL'] + config['ACTIVITY_FLUSH_INTERVAL'])
+        _wait_for_jobs(source, config['TENANT_MOVE_JOB_TIMEOUT'])
+
+        watch = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+        try:
+            version = watch.execute('PRAGMA data_version').fetchone()[0]
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            online_copy(source, target, pages=config['BACKUP_STEP_PAGES'], sleep=config['BACKUP_STEP_SLEEP'],
+                        progress=progress)
+            expected, copied = _table_counts(source), _table_counts(target)
+            if expected != copied:
+                raise ValueError('عدد الصفوف في النسخة لا يطابق الأصل')
+
+            tenant.shard = target
+            db.session.commit()
+            router.forget(tenant_id)
+            if (watch.execute('PRAGMA data_version').fetchone()[0] != version
+                    or _table_counts(source) != _table_counts(target)):
+                raise ValueError('تغيّر الملف الأصلي أثناء النقل')
+        finally:
+            watch.close()
+
+        tenant.status = 'active'
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        tenant.shard = shard
+        tenant.status = 'active'
+        db.session.commit()
+        router.forget(tenant_id)
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+    router.forget(tenant_id)
+    return source
+
+
+def init_tenancy(app):
+    app.cli.add_command(tenants_cli)
+    if not app.config.get('TENANCY_ENABLED'):
+        return None
+    router = TenantRouter(app)
+    app.extensions['tenancy'] = router
+    app.before_request(router.before_request)
+    app.teardown_request(router.teardown_request)
+    return router
+
+
+tenants_cli = AppGroup('tenants', help='قواعد بيانات المؤسسات')
+
+
+@tenants_cli.command('create')
+@click.argument('tenant_id')
+@click.option('--name', default=None, help='اسم المؤسسة (الافتراضي معرفها)')
+@click.option('--shard', default=None, help='مسار ملف SQLite (الافتراضي TENANT_DATABASE_DIR/<id>.db)')
+def create_command(tenant_id, name, shard):
+    """إنشاء مؤسسة وقاعدة بياناتها"""
+    if 'tenancy' not in current_app.extensions:
+        raise click.ClickException('TENANCY_ENABLED غير مفعّل')
+    try:
+        tenant = create_tenant(tenant_id, name or tenant_id, shard)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'تم إنشاء المؤسسة {tenant.id}: {tenant.shard}')
+
+
+@tenants_cli.command('invite')
+@click.argument('tenant_id')
+@click.option('--email', required=True, help='بريد المستخدم المدعو')
+def invite_command(tenant_id, email):
+    """طباعة دعوة للتسجيل في المؤسسة (حقل invite في /auth/register)"""
+    if 'tenancy' not in current_app.extensions:
+        raise click.ClickException('TENANCY_ENABLED غير مفعّل')
+    if current_app.extensions['tenancy'].lookup(tenant_id) is None:
+        raise click.ClickException(f'المؤسسة غير موجودة: {tenant_id}')
+    click.echo(create_invite(tenant_id, email))
+
+
+@tenants_cli.command('list')
+def list_command():
+    """عرض المؤسسات وملفاتها"""
+    from src.models.tenant import Tenant
+    from src.models.user import db
+
+    for tenant in db.session.scalars(select(Tenant).order_by(Tenant.id)):
+        click.echo(f'{tenant.id}\t{tenant.status}\t{tenant.shard}')
+
+
+@tenants_cli.command('move')
+@click.argument('tenant_id')
+@click.option('--to', 'target', required=True, help='مسار ملف SQLite الجديد')
+@click.option('--remove-source', is_flag=True, help='حذف الملف القديم بعد النقل')
+def move_command(tenant_id, target, remove_source):
+    """نقل قاعدة المؤسسة إلى ملف آخر دون إيقاف القراءة"""
+    if 'tenancy' not in current_app.extensions:
+        raise click.ClickException('TENANCY_ENABLED غير مفعّل')
+    started = time.perf_counter()
+
+    def progress(done, total):
+        click.echo(f'\r{done}/{total} صفحة', nl=False)
+
+    try:
+        source = move_tenant(tenant_id, target, progress=progress)
+    except (ValueError, OSError) as e:
+        raise click.ClickException(str(e))
+    click.echo(f'\nتم نقل {tenant_id} إلى {os.path.abspath(target)} خلال {time.perf_counter() - started:.2f}s')
+    if remove_source:
+        # العمال الآخرون قد يحملون المحرك القديم حتى انتهاء صلاحية دليلهم
+        time.sleep(current_app.config['TENANT_DIRECTORY_TTL'])
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(source + suffix):
+                os.remove(source + suffix)
@@ -0,0 +1,10 @@
+"""
+نقطة الدخول لخوادم WSGI:
+
+    flask --app src.main db upgrade     # مرة واحدة عند النشر
+    gunicorn -w 4 src.wsgi:app
+"""
+
+from src.main import create_app
+
+app = create_app()
@@ -0,0 +1,130 @@
+"""
+إعداد اختبارات الواجهة الخلفية
+
+التشغيل من مجلد project_management_api:
+    python -m pytest -q tests
+"""
+
+import fnmatch
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import MemoryBackend, RedisBackend, SQLiteBackend, TaggedCache, cache
+
+
+class FakeRedis:
+    """عميل بالجزء الذي يستخدمه RedisBackend من واجهة redis-py، في الذاكرة"""
+
+    def __init__(self):
+        self._data = {}
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, px=None):
+        self._data[key] = (value, time.monotonic() + px / 1000 if px else None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self._data[key] = (str(value).encode(), None)
+        return value
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def scan_iter(self, match='*'):
+        return [key for key in list(self._data) if fnmatch.fnmatch(key, match) and self._live(key)]
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def incr(self, key):
+        self._calls.append(key)
+
+    def execute(self):
+        return [self._client.incr(key) for key in self._calls]
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    """كل مخزن بالاختبارات نفسها؛ redis عبر عميل مزيف إن لم يُحدد CACHE_TEST_REDIS_URL"""
+    if request.param == 'memory':
+        yield MemoryBackend(max_entries=100)
+    elif request.param == 'sqlite':
+        yield SQLiteBackend(str(tmp_path / 'cache.db'), max_entries=100)
+    elif os.environ.get('CACHE_TEST_REDIS_URL'):
+        backend = RedisBackend(os.environ['CACHE_TEST_REDIS_URL'], prefix=f'pm:test:{time.time_ns()}:')
+        yield backend
+        backend.clear()
+    else:
+        yield RedisBackend(client=FakeRedis())
+
+
+@pytest.fixture
+def tagged(backend):
+    """الكائن العام cache بالمخزن المختبر (مستمعو الالتزام يستخدمونه)، ثم استعادة مخزنه"""
+    previous = cache.backend
+    cache.configure(backend)
+    yield cache
+    cache.configure(previous)
+
+
+@pytest.fixture
+def fresh_cache(backend):
+    return TaggedCache(backend)
+
+
+@pytest.fixture
+def app(request, tmp_path):
+    """تطبيق على ملف SQLite مؤقت بعد تطبيق الترحيلات؛ إعدادات إضافية عبر parametrize(indirect=True)"""
+    from src.main import create_app, shutdown
+    from src.migrations import upgrade
+    from src.models.user import db
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'RATELIMIT_ENABLED': False,
+        **getattr(request, 'param', {}),
+    })
+    with app.app_context():
+        upgrade(db.engine)
+    yield app
+    shutdown(app)
+
+
+def register(client, username):
+    """تسجيل مستخدم وإعادة (المعرف، ترويسات المصادقة)"""
+    body = client.post('/api/auth/register', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'password',
+    }).get_json()
+    return body['user']['id'], {'Authorization': f"Bearer {body['access_token']}"}
+
+
+def create_project(client, headers, **fields):
+    response = client.post('/api/projects', headers=headers, json={
+        'name': 'P', 'start_date': '2026-01-01', 'end_date': '2026-12-31', **fields,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
@@ -0,0 +1,134 @@
+"""سجل النشاط للتغييرات الجماعية التي لا تمر بوحدة العمل (src.services.activity)"""
+
+import io
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.models.activity import ActivityEvent
+from src.models.user import db
+from src.services.activity import ActivityLog
+from tests.conftest import create_project, register
+
+
+def _task(client, headers, project_id, name, start, end):
+    response = client.post(f'/api/projects/{project_id}/tasks', headers=headers,
+                           json={'name': name, 'start_date': start, 'end_date': end})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def _events(client, headers, project_id):
+    response = client.get(f'/api/projects/{project_id}/activity?limit=200', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['events']
+
+
+def test_propagate_records_shifted_successors(app):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    first = _task(client, headers, project_id, 'T1', '2026-01-01', '2026-01-05')
+    second = _task(client, headers, project_id, 'T2', '2026-01-06', '2026-01-08')
+    client.post(f'/api/tasks/{second}/dependencies', headers=headers, json={'predecessor_task_id': first})
+
+    response = client.put(f'/api/tasks/{first}?propagate=true', headers=headers, json={'end_date': '2026-01-11'})
+    assert response.status_code == 200, response.get_json()
+
+    updates = {event['entity_id']: event for event in _events(client, headers, project_id)
+               if event['entity_type'] == 'task' and event['action'] == 'update'}
+    assert updates[first]['changes'] == {'end_date': ['2026-01-05', '2026-01-11']}
+    # finish_to_start: اللاحقة تبدأ يوم انتهاء السابقة
+    assert updates[second]['changes'] == {'start_date': ['2026-01-06', '2026-01-11'],
+                                          'end_date': ['2026-01-08', '2026-01-13']}
+    assert updates[second]['actor_id'] is not None
+
+
+def test_clone_records_created_rows(app):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    first = _task(client, headers, project_id, 'T1', '2026-01-01', '2026-01-05')
+    second = _task(client, headers, project_id, 'T2', '2026-01-06', '2026-01-08')
+    client.post(f'/api/tasks/{second}/dependencies', headers=headers, json={'predecessor_task_id': first})
+
+    response = client.post(f'/api/projects/{project_id}/clone', headers=headers, json={'offset_days': 7})
+    assert response.status_code == 201, response.get_json()
+    clone_id = response.get_json()['id']
+
+    events = _events(client, headers, clone_id)
+    created = sorted(event['entity_type'] for event in events if event['action'] == 'create')
+    assert created == ['dependency', 'project', 'task', 'task']
+    tasks = {event['changes']['name']: event['changes'] for event in events if event['entity_type'] == 'task'}
+    assert tasks['T1']['start_date'] == '2026-01-08'
+
+
+def test_import_records_created_rows(app):
+    client = app.test_client()
+    user_id, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    csv = 'id,name,start_date,end_date,predecessors\n1,T1,2026-01-01,2026-01-05,\n2,T2,2026-01-06,2026-01-08,1\n'
+
+    response = client.post(f'/api/projects/{project_id}/import', headers=headers, content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(csv.encode()), 'tasks.csv')})
+    assert response.status_code == 201, response.get_json()
+
+    events = [event for event in _events(client, headers, project_id) if event['action'] == 'create']
+    tasks = {event['changes']['name']: event for event in events if event['entity_type'] == 'task'}
+    assert set(tasks) == {'T1', 'T2'}
+    assert tasks['T1']['changes'] == {'name': 'T1', 'status': 'not_started',
+                                      'start_date': '2026-01-01', 'end_date': '2026-01-05'}
+    assert tasks['T1']['actor_id'] == user_id
+    dependencies = [event for event in events if event['entity_type'] == 'dependency']
+    assert len(dependencies) == 1
+    assert dependencies[0]['changes']['predecessor_task_id'] == tasks['T1']['entity_id']
+
+
+@pytest.mark.parametrize('app', [{'ACTIVITY_FLUSH_INTERVAL': 60}], indirect=True)
+def test_shutdown_stops_flush_thread(app):
+    from src.main import shutdown
+
+    log = app.extensions['activity']
+    assert any(thread.name == 'activity-log' for thread in threading.enumerate())
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    create_project(client, headers)
+    assert len(log)
+
+    shutdown(app)
+    assert len(log) == 0
+    assert not any(thread.name == 'activity-log' for thread in threading.enumerate())
+    with app.app_context():
+        assert db.session.query(ActivityEvent).count() > 0
+
+
+@pytest.mark.parametrize('app', [{'ACTIVITY_FLUSH_INTERVAL': 0}], indirect=True)
+def test_failed_sync_flush_keeps_events(app, tmp_path):
+    """فشل كتابة السجل بعد الالتزام لا يُفشل الطلب، والأحداث تُكتب مع الالتزام التالي"""
+    log = app.extensions['activity']
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    engine = log.engine
+    log.engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'activity.db'}")
+    try:
+        project_id = create_project(client, headers)
+        assert len(log) > 0
+    finally:
+        log.engine.dispose()
+        log.engine = engine
+
+    _task(client, headers, project_id, 'T', '2026-01-01', '2026-01-02')
+    assert len(log) == 0
+    assert {event['entity_type'] for event in _events(client, headers, project_id)} >= {'project', 'task'}
+
+
+def test_buffer_is_bounded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'activity.db'}")
+    log = ActivityLog(engine, batch_size=10, flush_interval=0, max_buffer=3)
+    for i in range(5):
+        log.append([{'seq': i}])
+    assert len(log) == 3
+    assert log.dropped == 2
+    assert [row['seq'] for _, row in log._buffer] == [2, 3, 4]
+    engine.dispose()
@@ -0,0 +1,137 @@
+"""أرشفة المشاريع في ملف SQLite مربوط (src.services.archive)"""
+
+import sqlite3
+
+import pytest
+
+from src.services import archive
+from src.tenancy import create_invite, create_tenant
+from tests.conftest import create_project, register
+
+
+def _count(path, table, **where):
+    condition = ' AND '.join(f'{name} = ?' for name in where) or '1'
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f'SELECT count(*) FROM "{table}" WHERE {condition}', tuple(where.values())).fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def project(app, tmp_path):
+    client = app.test_client()
+    _, owner = register(client, 'owner')
+    member_id, member = register(client, 'member')
+    _, stranger = register(client, 'stranger')
+    project_id = create_project(client, owner)
+    client.post(f'/api/projects/{project_id}/members', headers=owner, json={'user_id': member_id})
+    tasks = [client.post(f'/api/projects/{project_id}/tasks', headers=owner, json={
+        'name': name, 'start_date': '2026-01-01', 'end_date': '2026-01-05', 'status': 'completed',
+    }).get_json()['id'] for name in ('T1', 'T2')]
+    client.post(f'/api/tasks/{tasks[1]}/dependencies', headers=owner, json={'predecessor_task_id': tasks[0]})
+    client.post(f'/api/tasks/{tasks[0]}/comments', headers=owner, json={'content': 'c'})
+    paths = {'main': str(tmp_path / 'app.db'), 'archive': str(tmp_path / 'archive.db')}
+    return client, {'owner': owner, 'member': member, 'stranger': stranger}, project_id, tasks, paths
+
+
+def test_archive_round_trip(project):
+    client, users, project_id, tasks, paths = project
+    owner = users['owner']
+
+    response = client.post(f'/api/projects/{project_id}/archive', headers=owner)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['moved'] == {
+        'project': 1, 'project_member': 1, 'task': 2, 'dependency': 1, 'comment': 1,
+        'task_attachment': 0, 'notification': 1,
+    }
+    assert _count(paths['main'], 'task', project_id=project_id) == 0
+    assert _count(paths['main'], 'project', id=project_id) == 0
+    assert _count(paths['archive'], 'task', project_id=project_id) == 2
+
+    response = client.post(f'/api/projects/{project_id}/unarchive', headers=owner)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['moved']['task'] == 2
+    assert _count(paths['main'], 'task', project_id=project_id) == 2
+    assert _count(paths['main'], 'comment') == 1
+    assert _count(paths['archive'], 'task', project_id=project_id) == 0
+    assert _count(paths['main'], 'archived_project') == 0
+    assert client.get(f'/api/projects/{project_id}', headers=owner).get_json().get('archived') is None
+
+
+def test_archived_reads(project):
+    client, users, project_id, tasks, _ = project
+    client.post(f'/api/projects/{project_id}/archive', headers=users['owner'])
+
+    # المالك والعضو وقت الأرشفة يقرآن من الأرشيف؛ غيرهما لا
+    for name in ('owner', 'member'):
+        response = client.get(f'/api/projects/{project_id}', headers=users[name])
+        assert response.status_code == 200 and response.get_json()['archived'] is True
+        response = client.get(f'/api/projects/{project_id}/tasks', headers=users[name])
+        assert sorted(task['id'] for task in response.get_json()) == sorted(tasks)
+        response = client.get(f'/api/tasks/{tasks[0]}', headers=users[name])
+        assert response.status_code == 200 and response.get_json()['name'] == 'T1'
+    assert client.get(f'/api/projects/{project_id}', headers=users['stranger']).status_code == 403
+    assert client.get(f'/api/projects/{project_id}/tasks', headers=users['stranger']).status_code == 403
+
+    listed = client.get('/api/projects', headers=users['member']).get_json()
+    assert project_id not in [item['id'] for item in listed]
+    listed = client.get('/api/projects?include_archived=true', headers=users['member']).get_json()
+    assert [item.get('archived') for item in listed if item['id'] == project_id] == [True]
+
+
+def test_open_tasks_need_force(project):
+    client, users, project_id, _, paths = project
+    client.post(f'/api/projects/{project_id}/tasks', headers=users['owner'], json={
+        'name': 'open', 'start_date': '2026-01-01', 'end_date': '2026-01-05',
+    })
+    assert client.post(f'/api/projects/{project_id}/archive', headers=users['member']).status_code == 403
+    assert client.post(f'/api/projects/{project_id}/archive', headers=users['owner']).status_code == 409
+    response = client.post(f'/api/projects/{project_id}/archive?force=true', headers=users['owner'])
+    assert response.status_code == 200
+    assert response.get_json()['moved']['task'] == 3
+
+
+def test_interrupted_move_is_retried(project, monkeypatch):
+    client, users, project_id, _, paths = project
+    delete = archive._delete
+
+    def interrupted(connection, project_id, source):
+        raise RuntimeError('انقطاع بين النسخ والحذف')
+
+    monkeypatch.setattr(archive, '_delete', interrupted)
+    assert client.post(f'/api/projects/{project_id}/archive', headers=users['owner']).status_code == 500
+
+    # النسخ التُزم وحده: المصدر كامل والمشروع غير مسجل مؤرشفاً
+    assert _count(paths['main'], 'task', project_id=project_id) == 2
+    assert _count(paths['archive'], 'task', project_id=project_id) == 2
+    assert _count(paths['main'], 'archived_project') == 0
+    assert client.get(f'/api/projects/{project_id}', headers=users['owner']).get_json().get('archived') is None
+
+    monkeypatch.setattr(archive, '_delete', delete)
+    response = client.post(f'/api/projects/{project_id}/archive', headers=users['owner'])
+    assert response.status_code == 200, response.get_json()
+    assert _count(paths['main'], 'task', project_id=project_id) == 0
+    # INSERT OR REPLACE: لا نسخ مكررة في الأرشيف
+    assert _count(paths['archive'], 'task', project_id=project_id) == 2
+    assert _count(paths['archive'], 'comment') == 1
+
+
+@pytest.mark.parametrize('app', [{'TENANCY_ENABLED': True, 'TENANT_DIRECTORY_TTL': 0}], indirect=True)
+def test_disabled_for_tenants(app, tmp_path):
+    app.config['TENANT_DATABASE_DIR'] = str(tmp_path / 'shards')
+    with app.app_context():
+        create_tenant('acme', 'Acme')
+        invite = create_invite('acme', 'a@example.com')
+    client = app.test_client()
+    token = client.post('/api/auth/register', json={
+        'username': 'a', 'email': 'a@example.com', 'password': 'password', 'invite': invite,
+    }).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    project_id = create_project(client, headers)
+
+    response = client.post(f'/api/projects/{project_id}/archive?force=true', headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'الأرشفة غير مفعلة'
+    # ملف الأرشيف مربوط بالقاعدة الافتراضية فقط؛ المشروع باقٍ في قاعدة المؤسسة
+    assert client.get(f'/api/projects/{project_id}', headers=headers).status_code == 200
@@ -0,0 +1,162 @@
+"""وضع ASGI (src.aio): المسارات الأصلية تعيد ما يعيده مسار Flask نفسه"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from src.aio.app import AsyncApp
+from src.aio.routes import router
+from tests.conftest import create_project, register
+
+
+async def _call(asgi, method, path, headers, body):
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'client': ('127.0.0.1', 1),
+        'server': ('test', 80),
+        'headers': [(b'content-type', b'application/json'),
+                    *((name.lower().encode(), value.encode()) for name, value in headers.items())],
+    }
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode()}]
+    response = {}
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode().lower(): value.decode() for name, value in message['headers']}
+        else:
+            response['body'] = json.loads(message['body'])
+
+    await asgi(scope, receive, send)
+    await asgi.engine.dispose()
+    return response['status'], response['body'], response['headers']
+
+
+# حقول تختلف بين استدعاءين متتاليين للطلب نفسه
+_VOLATILE = {'id', 'created_at', 'updated_at', 'joined_at', 'access_token', 'version'}
+
+
+def _normalize(body):
+    if isinstance(body, list):
+        return [_normalize(item) for item in body]
+    if isinstance(body, dict):
+        return {key: _normalize(value) for key, value in body.items() if key not in _VOLATILE}
+    return body
+
+
+@pytest.mark.parametrize('body, status', [
+    ({'status': 'done'}, 400),
+    ({'start_date': 'x'}, 400),
+    ({'status': 'completed'}, 200),
+])
+def test_update_task_matches_flask(app, body, status):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    task_id = client.post(f'/api/projects/{project_id}/tasks', headers=headers, json={
+        'name': 'T', 'start_date': '2026-01-01', 'end_date': '2026-01-05',
+    }).get_json()['id']
+
+    asgi_status, asgi_body, _ = asyncio.run(_call(AsyncApp(app, router), 'PUT', f'/api/tasks/{task_id}', headers, body))
+    flask_response = client.put(f'/api/tasks/{task_id}', headers=headers, json=body)
+
+    assert asgi_status == flask_response.status_code == status
+    if status != 200:
+        assert asgi_body == flask_response.get_json()
+
+
+def test_native_routes_match_flask(app):
+    """كل مسار أصلي: الرمز والجسم (بلا المعرفات والأوقات) وETag كما في Flask"""
+    from src.models.notification import Notification
+    from src.models.user import db
+
+    client = app.test_client()
+    owner_id, owner = register(client, 'a')
+    _, outsider = register(client, 'b')
+    project_id = create_project(client, owner)
+    task_id = client.post(f'/api/projects/{project_id}/tasks', headers=owner, json={
+        'name': 'T', 'start_date': '2026-01-01', 'end_date': '2026-01-05',
+    }).get_json()['id']
+    with app.app_context():
+        notification = Notification(user_id=owner_id, message='m', type='task_due')
+        db.session.add(notification)
+        db.session.commit()
+        notification_id = notification.id
+
+    task = {'name': 'N', 'start_date': '2026-01-01', 'end_date': '2026-01-03'}
+    cases = [
+        ('POST', '/api/auth/register', None, {}, 400),
+        ('POST', '/api/auth/register', None, {'username': 'a', 'email': 'x@example.com', 'password': 'p'}, 400),
+        ('POST', '/api/auth/login', None, {'username': 'a'}, 400),
+        ('POST', '/api/auth/login', None, {'username': 'a', 'password': 'wrong'}, 401),
+        ('POST', '/api/auth/login', None, {'username': 'a', 'password': 'password'}, 200),
+        ('GET', '/api/auth/me', owner, None, 200),
+        ('GET', '/api/auth/me', {}, None, 401),
+        ('GET', '/api/projects', owner, None, 200),
+        ('GET', f'/api/projects/{project_id}', owner, None, 200),
+        ('GET', f'/api/projects/{project_id}', outsider, None, 403),
+        ('POST', '/api/projects', owner, {'name': 'P'}, 400),
+        ('POST', '/api/projects', owner, {'name': 'P', 'start_date': '1/1/2026', 'end_date': '2026-02-01'}, 400),
+        ('POST', '/api/projects', owner, {'name': 'P', 'start_date': '2026-02-01', 'end_date': '2026-01-01'}, 400),
+        ('POST', '/api/projects', owner, {'name': 'P', 'start_date': '2026-01-01', 'end_date': '2026-02-01'}, 201),
+        ('PUT', f'/api/projects/{project_id}', outsider, {'name': 'X'}, 403),
+        ('PUT', f'/api/projects/{project_id}', owner, {'end_date': '2025-01-01'}, 400),
+        ('PUT', f'/api/projects/{project_id}', owner, {'end_date': 'x'}, 400),
+        ('PUT', f'/api/projects/{project_id}', owner, {'name': 'P2', 'description': 'd'}, 200),
+        ('GET', f'/api/projects/{project_id}/tasks', owner, None, 200),
+        ('GET', f'/api/projects/{project_id}/tasks', outsider, None, 403),
+        ('GET', f'/api/tasks/{task_id}', owner, None, 200),
+        ('GET', f'/api/tasks/{task_id}', outsider, None, 403),
+        ('POST', f'/api/projects/{project_id}/tasks', outsider, task, 403),
+        ('POST', f'/api/projects/{project_id}/tasks', owner, {'name': 'N'}, 400),
+        ('POST', f'/api/projects/{project_id}/tasks', owner, {**task, 'end_date': '2025-01-01'}, 400),
+        ('POST', f'/api/projects/{project_id}/tasks', owner, {**task, 'parent_task_id': 'missing'}, 400),
+        ('POST', f'/api/projects/{project_id}/tasks', owner, {**task, 'assigned_to': 'missing'}, 400),
+        ('POST', f'/api/projects/{project_id}/tasks', owner, {**task, 'parent_task_id': task_id}, 201),
+        ('PUT', f'/api/tasks/{task_id}', outsider, {'name': 'X'}, 403),
+        ('PUT', f'/api/tasks/{task_id}', owner, {'assigned_to': 'missing'}, 400),
+        ('PUT', f'/api/tasks/{task_id}', owner, {'start_date': '2026-02-01'}, 400),
+        ('PUT', f'/api/tasks/{task_id}', owner, {'name': 'T2', 'assigned_to': owner_id}, 200),
+        ('GET', '/api/notifications', owner, None, 200),
+        ('PUT', f'/api/notifications/{notification_id}/read', outsider, None, 403),
+        ('PUT', f'/api/notifications/{notification_id}/read', owner, None, 200),
+        ('PUT', '/api/notifications/mark_all_read', owner, None, 200),
+        # غير الموجود يُمرَّر إلى Flask (Delegate)
+        ('GET', '/api/projects/missing', owner, None, 404),
+        ('GET', '/api/tasks/missing', owner, None, 404),
+        ('PUT', '/api/projects/missing', owner, {'name': 'X'}, 404),
+        ('PUT', '/api/notifications/missing/read', owner, None, 404),
+    ]
+    asgi = AsyncApp(app, router)
+    for method, path, headers, body, status in cases:
+        case = f'{method} {path} {body}'
+        asgi_status, asgi_body, asgi_headers = asyncio.run(_call(asgi, method, path, headers or {}, body))
+        flask_response = client.open(path, method=method, headers=headers or {}, json=body)
+        assert asgi_status == flask_response.status_code == status, case
+        assert _normalize(asgi_body) == _normalize(flask_response.get_json()), case
+        assert ('etag' in asgi_headers) == ('ETag' in flask_response.headers), case
+
+
+@pytest.mark.parametrize('app', [{'TENANCY_ENABLED': True, 'TENANT_DIRECTORY_TTL': 0}], indirect=True)
+def test_tenant_register_requires_invite(app, tmp_path):
+    from src.tenancy import create_invite, create_tenant
+
+    app.config['TENANT_DATABASE_DIR'] = str(tmp_path / 'shards')
+    with app.app_context():
+        create_tenant('acme', 'Acme')
+        invite = create_invite('acme', 'b@example.com')
+    asgi = AsyncApp(app, router)
+    user = {'username': 'b', 'email': 'b@example.com', 'password': 'password'}
+
+    status, _, _ = asyncio.run(_call(asgi, 'POST', '/api/auth/register', {'X-Tenant': 'acme'}, user))
+    assert status == 403
+    status, body, _ = asyncio.run(_call(asgi, 'POST', '/api/auth/register', {}, {**user, 'invite': invite}))
+    assert status == 201, body
+    with app.app_context():
+        from flask_jwt_extended import decode_token
+        assert decode_token(body['access_token'])['tenant'] == 'acme'
@@ -0,0 +1,175 @@
+"""لقطات SQLite والاستعادة (src.backup)"""
+
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+from src import backup
+from src.backup import BackupError, SnapshotStore, restore, verify_file
+
+COMPRESSIONS = ['gzip', pytest.param('zstd', marks=pytest.mark.skipif(
+    backup.zstandard is None, reason='zstandard غير مثبتة'))]
+
+
+def _database(path, rows=2000):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, body TEXT)')
+    connection.executemany('INSERT INTO item (body) VALUES (?)', [(f'item {i}' * 10,) for i in range(rows)])
+    connection.commit()
+    connection.close()
+    return str(path)
+
+
+def _rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute('SELECT id, body FROM item ORDER BY id').fetchall()
+    finally:
+        connection.close()
+
+
+def _update(path, sql, *params):
+    connection = sqlite3.connect(path)
+    connection.execute(sql, params)
+    connection.commit()
+    connection.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'backups'), 'app')
+
+
+@pytest.mark.parametrize('compression', COMPRESSIONS)
+def test_full_and_incremental_round_trip(tmp_path, store, compression):
+    source = _database(tmp_path / 'app.db')
+    full = store.create(source, compression=compression, sleep=0)
+    expected_full = _rows(source)
+
+    _update(source, "UPDATE item SET body = 'changed' WHERE id = 5")
+    incremental = store.create(source, incremental=True, compression=compression, sleep=0)
+    assert full['kind'] == 'full' and full['compression'] == compression
+    assert incremental['kind'] == 'incremental' and incremental['parent'] == full['id']
+    assert 0 < incremental['changed_pages'] < incremental['page_count']
+
+    store.build(full['id'], str(tmp_path / 'full.db'))
+    store.build(incremental['id'], str(tmp_path / 'incremental.db'))
+    assert _rows(tmp_path / 'full.db') == expected_full
+    assert _rows(tmp_path / 'incremental.db') == _rows(source)
+
+
+def test_incremental_with_shrinking_database(tmp_path, store):
+    source = _database(tmp_path / 'app.db')
+    store.create(source, compression='gzip', sleep=0)
+    _update(source, 'DELETE FROM item WHERE id > 10')
+    connection = sqlite3.connect(source)
+    connection.execute('VACUUM')
+    connection.close()
+
+    incremental = store.create(source, incremental=True, compression='gzip', sleep=0)
+    store.build(incremental['id'], str(tmp_path / 'restored.db'))
+    assert _rows(tmp_path / 'restored.db') == _rows(source)
+
+
+def test_max_chain_starts_new_full(tmp_path, store):
+    source = _database(tmp_path / 'app.db', rows=10)
+    kinds = [store.create(source, incremental=True, compression='gzip', sleep=0, max_chain=2)['kind']
+             for _ in range(4)]
+    assert kinds == ['full', 'incremental', 'full', 'incremental']
+
+
+def test_zstd_falls_back_to_gzip(tmp_path, store, monkeypatch, caplog):
+    source = _database(tmp_path / 'app.db', rows=10)
+    monkeypatch.setattr(backup, 'zstandard', None)
+
+    manifest = store.create(source, compression='zstd', sleep=0)
+    assert 'zstandard is not installed' in caplog.text
+    assert manifest['compression'] == 'gzip'
+    assert manifest['file'].endswith('.db.gz')
+    store.build(manifest['id'], str(tmp_path / 'restored.db'))
+    assert _rows(tmp_path / 'restored.db') == _rows(source)
+
+
+@pytest.mark.skipif(backup.zstandard is None, reason='zstandard غير مثبتة')
+def test_zstd_snapshot_needs_zstandard(tmp_path, store, monkeypatch):
+    manifest = store.create(_database(tmp_path / 'app.db', rows=10), compression='zstd', sleep=0)
+    monkeypatch.setattr(backup, 'zstandard', None)
+    with pytest.raises(BackupError):
+        store.build(manifest['id'], str(tmp_path / 'restored.db'))
+
+
+def test_sha256_mismatch(tmp_path, store):
+    source = _database(tmp_path / 'app.db', rows=10)
+    manifest = store.create(source, compression='gzip', sleep=0)
+    data_path = os.path.join(store.directory, manifest['file'])
+    with gzip.open(data_path, 'rb') as f:
+        data = bytearray(f.read())
+    data[-1] ^= 0xFF
+    with gzip.open(data_path, 'wb') as f:
+        f.write(bytes(data))
+
+    target = str(tmp_path / 'target.db')
+    with pytest.raises(BackupError, match='sha256'):
+        restore(store, manifest['id'], target)
+    # الهدف لا يُمس والملف المؤقت يُحذف
+    assert not os.path.exists(target)
+    assert not os.path.exists(f'{target}.restoring')
+
+
+def test_integrity_check_failure(tmp_path):
+    path = _database(tmp_path / 'app.db')
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    page_size = connection.execute('PRAGMA page_size').fetchone()[0]
+    connection.close()
+    # إفساد صفحة بيانات في منتصف الملف
+    with open(path, 'r+b') as f:
+        f.seek(page_size * 5 + 16)
+        f.write(b'\xff' * 64)
+
+    with pytest.raises(BackupError):
+        verify_file(path)
+
+
+def test_not_a_database(tmp_path):
+    path = tmp_path / 'garbage.db'
+    path.write_bytes(b'x' * 4096)
+    with pytest.raises(BackupError):
+        verify_file(str(path))
+
+
+def test_restore_replaces_target_and_stale_wal(tmp_path, store):
+    source = _database(tmp_path / 'app.db')
+    manifest = store.create(source, compression='gzip', sleep=0)
+    target = _database(tmp_path / 'target.db', rows=1)
+    with open(f'{target}-wal', 'wb') as f:
+        f.write(b'stale')
+
+    restore(store, manifest['id'], target)
+    assert not os.path.exists(f'{target}-wal')
+    assert _rows(target) == _rows(source)
+
+
+def test_prune_keeps_latest_chains(tmp_path, store):
+    source = _database(tmp_path / 'app.db', rows=10)
+    created = []
+    for _ in range(3):
+        created.append(store.create(source, compression='gzip', sleep=0))
+        created.append(store.create(source, incremental=True, compression='gzip', sleep=0))
+
+    removed = store.prune(keep_full=2)
+    assert removed == [created[0]['id'], created[1]['id']]
+    assert [manifest['id'] for manifest in store.manifests()] == [manifest['id'] for manifest in created[2:]]
+    assert sorted(os.listdir(store.directory)) == sorted(
+        name for manifest in created[2:] for name in (manifest['file'], manifest['pages_file'],
+                                                      f"{manifest['id']}.json")
+    )
+    assert store.prune(keep_full=2) == []
+
+
+def test_missing_snapshot(store):
+    with pytest.raises(BackupError):
+        store.manifest('app-missing')
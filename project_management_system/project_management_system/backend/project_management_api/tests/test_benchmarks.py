@@ -0,0 +1,86 @@
+"""حزمة قياس الأداء (benchmarks): كل سيناريو يعمل على بيانات صغيرة دون أخطاء"""
+
+import dataclasses
+import json
+
+import bcrypt
+import pytest
+
+from benchmarks import harness, run
+from benchmarks.harness import compare_to_baseline, load_baseline, percentile, summarize
+from benchmarks.scenarios import SCENARIOS
+
+
+@pytest.fixture(autouse=True)
+def fast_hashes(monkeypatch):
+    # login_storm يتحقق من كلمة المرور في كل طلب؛ أقل كلفة لـ bcrypt تكفي هنا
+    gensalt = bcrypt.gensalt
+    monkeypatch.setattr(harness.bcrypt, 'gensalt', lambda: gensalt(4))
+
+
+def _small(scenario):
+    seed = {'users': 6, 'projects': 3, 'tasks_per_project': 5, 'notifications_per_user': 2}
+    if scenario.seed.get('large_project_tasks'):
+        seed['large_project_tasks'] = 20
+    return dataclasses.replace(scenario, requests=24, concurrency=4, seed=seed)
+
+
+@pytest.mark.parametrize('name', sorted(SCENARIOS))
+def test_scenario_smoke(name, monkeypatch, tmp_path, capsys):
+    monkeypatch.setitem(SCENARIOS, name, _small(SCENARIOS[name]))
+    out = tmp_path / 'results.json'
+    argv = ['-s', name, '--baseline-dir', str(tmp_path), '--json', str(out)]
+
+    assert run.main([*argv, '--save-baseline']) == 0
+    result = json.loads(out.read_text(encoding='utf-8'))[name]
+    assert result['requests'] == 24
+    assert result['errors'] == 0, result['endpoints']
+    assert load_baseline(name, str(tmp_path)) == result
+
+    # التشغيل الثاني يقارن بخط الأساس المحفوظ؛ عتبة كبيرة حتى لا يتأثر بتذبذب الزمن
+    assert run.main([*argv, '--threshold', '100']) == 0
+    assert 'ضمن حدود خط الأساس' in capsys.readouterr().out
+
+
+def test_http_driver(monkeypatch, tmp_path):
+    monkeypatch.setitem(SCENARIOS, 'mixed', _small(SCENARIOS['mixed']))
+    out = tmp_path / 'results.json'
+    assert run.main(['-s', 'mixed', '--http', '--baseline-dir', str(tmp_path), '--json', str(out)]) == 0
+    assert json.loads(out.read_text(encoding='utf-8'))['mixed']['errors'] == 0
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile([], 50) == 0.0
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+    assert percentile(values, 100) == 100.0
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_summarize():
+    samples = [('a', 0.001, 200), ('a', 0.003, 500), ('b', 0.002, 429), ('b', 0.004, 0)]
+    result = summarize(samples, 2.0)
+    assert (result['requests'], result['errors'], result['rejected']) == (4, 2, 1)
+    assert result['throughput_rps'] == 2.0
+    assert result['max_ms'] == 4.0
+    assert result['endpoints']['a']['errors'] == 1
+    assert result['endpoints']['b']['rejected'] == 1
+
+
+def test_compare_to_baseline():
+    baseline = {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'throughput_rps': 100.0, 'errors': 0}
+    assert compare_to_baseline({**baseline, 'p95_ms': 23.0}, baseline, 0.2) == []
+
+    regressions = compare_to_baseline(
+        {**baseline, 'p95_ms': 25.0, 'throughput_rps': 70.0, 'errors': 1}, baseline, 0.2,
+    )
+    assert [line.split(':')[0] for line in regressions] == ['p95_ms', 'throughput_rps', 'errors']
+
+
+def test_regression_exit_code(monkeypatch, tmp_path):
+    monkeypatch.setitem(SCENARIOS, 'login_storm', _small(SCENARIOS['login_storm']))
+    baseline = tmp_path / 'login_storm.json'
+    baseline.write_text(json.dumps({'scenario': 'login_storm', 'result': {
+        'p50_ms': 0.001, 'p95_ms': 0.001, 'p99_ms': 0.001, 'throughput_rps': 1e9, 'errors': 0,
+    }}), encoding='utf-8')
+    assert run.main(['-s', 'login_storm', '--baseline-dir', str(tmp_path)]) == 1
@@ -0,0 +1,136 @@
+"""اختبارات src.cache: كل اختبار يعمل على المخازن الثلاثة (conftest.backend)"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.cache import invalidate_on_commit, project_tag, user_tag
+from tests.conftest import create_project, register
+
+
+def test_get_set(fresh_cache):
+    assert fresh_cache.get('workload:1') is None
+    fresh_cache.set('workload:1', {'hours': 8}, 60, tags=[user_tag(1)])
+    assert fresh_cache.get('workload:1') == {'hours': 8}
+    assert fresh_cache.get(('workload', 1)) is None
+    fresh_cache.set(('workload', 1), [1, 2], 60)
+    assert fresh_cache.get(('workload', 1)) == [1, 2]
+
+
+def test_invalidate_tag(fresh_cache):
+    fresh_cache.set('a', 1, 60, tags=[project_tag(1)])
+    fresh_cache.set('b', 2, 60, tags=[project_tag(1), user_tag(7)])
+    fresh_cache.set('c', 3, 60, tags=[project_tag(2)])
+    fresh_cache.invalidate(project_tag(1))
+    assert fresh_cache.get('a') is None
+    assert fresh_cache.get('b') is None
+    assert fresh_cache.get('c') == 3
+
+    # القيمة الجديدة بعد الإبطال تُخزَّن بالإصدار الجديد
+    fresh_cache.set('a', 10, 60, tags=[project_tag(1)])
+    assert fresh_cache.get('a') == 10
+
+
+def test_set_rejects_value_computed_before_invalidation(fresh_cache):
+    versions = fresh_cache.versions([project_tag(1)])
+    fresh_cache.invalidate(project_tag(1))
+    fresh_cache.set('a', 'stale', 60, versions=versions)
+    assert fresh_cache.get('a') is None
+
+
+def test_ttl(fresh_cache):
+    fresh_cache.set('short', 1, 0.05)
+    fresh_cache.set('long', 2, 60)
+    assert fresh_cache.get('short') == 1
+    time.sleep(0.1)
+    assert fresh_cache.get('short') is None
+    assert fresh_cache.get('long') == 2
+
+
+def test_stats(fresh_cache):
+    fresh_cache.get('workload:1')
+    fresh_cache.set('workload:1', 1, 60)
+    fresh_cache.get('workload:1')
+    stats = fresh_cache.stats()
+    assert stats['backend'] == fresh_cache.backend.name
+    assert stats['namespaces']['workload'] == {'hits': 1, 'misses': 1, 'sets': 1, 'errors': 0, 'hit_ratio': 0.5}
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_invalidate_on_commit(tagged, session):
+    tagged.set('a', 1, 60, tags=[project_tag(1)])
+    session.connection()
+    invalidate_on_commit(session, project_tag(1))
+    # قبل الالتزام ما زالت القيمة صالحة للطلبات الأخرى
+    assert tagged.get('a') == 1
+    session.commit()
+    assert tagged.get('a') is None
+
+
+def test_invalidate_on_commit_discarded_on_rollback(tagged, session):
+    tagged.set('a', 1, 60, tags=[project_tag(1)])
+    session.connection()
+    invalidate_on_commit(session, project_tag(1))
+    session.rollback()
+    assert 'cache_tags' not in session.info
+    assert tagged.get('a') == 1
+
+    # الالتزام التالي لا يحمل وسوم المعاملة المتراجعة
+    session.connection()
+    session.commit()
+    assert tagged.get('a') == 1
+
+
+def _worker(database_dir):
+    """العامل الثاني: تطبيق مستقل على القاعدة نفسها ينشئ مهمة"""
+    from src.main import create_app
+
+    state = json.load(open(os.path.join(database_dir, 'state.json')))
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(database_dir, 'app.db')}",
+        'RATELIMIT_ENABLED': False, 'JOB_INLINE_WORKERS': 0,
+    })
+    response = app.test_client().post(
+        f"/api/projects/{state['project_id']}/tasks", headers={'Authorization': f"Bearer {state['token']}"},
+        json={'name': 'T', 'start_date': '2026-01-02', 'end_date': '2026-01-05'},
+    )
+    assert response.status_code == 201, response.get_json()
+
+
+def test_response_cache_across_workers(app, tmp_path):
+    """الإعداد الافتراضي: كتابة عامل آخر تُبطل الاستجابة المخزنة في هذا العامل"""
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+
+    url = f'/api/projects/{project_id}/tasks'
+    assert client.get(url, headers=headers).get_json() == []
+    response = client.get(url, headers=headers)
+    assert response.headers['X-Cache'] == 'HIT'
+
+    state = {'project_id': project_id, 'token': headers['Authorization'].split()[1]}
+    (tmp_path / 'state.json').write_text(json.dumps(state))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, __file__, str(tmp_path)], check=True, timeout=120,
+                   env={**os.environ, 'PYTHONPATH': root})
+
+    response = client.get(url, headers=headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(response.get_json()) == 1
+
+
+if __name__ == '__main__':
+    _worker(sys.argv[1])
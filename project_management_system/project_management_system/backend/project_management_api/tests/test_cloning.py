@@ -0,0 +1,132 @@
+"""نسخ المشروع (POST /api/projects/<id>/clone و src.services.cloning)"""
+
+import pytest
+
+from src.models.project import ProjectMember
+from src.models.task import Comment, Dependency, Task
+from src.models.user import db
+from tests.conftest import create_project, register
+
+
+def _task(client, headers, project_id, name, start, end, **fields):
+    response = client.post(f'/api/projects/{project_id}/tasks', headers=headers,
+                           json={'name': name, 'start_date': start, 'end_date': end, **fields})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+@pytest.fixture
+def source(app):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    member_id, member_headers = register(client, 'member')
+    project_id = create_project(client, headers, start_date='2026-01-01', end_date='2026-03-31')
+    client.post(f'/api/projects/{project_id}/members', headers=headers, json={'user_id': member_id})
+
+    parent = _task(client, headers, project_id, 'P', '2026-01-01', '2026-01-31', assigned_to=member_id)
+    child = _task(client, headers, project_id, 'C', '2026-01-05', '2026-01-10', parent_task_id=parent)
+    after = _task(client, headers, project_id, 'A', '2026-01-11', '2026-01-20')
+    client.put(f'/api/tasks/{child}', headers=headers, json={'status': 'completed'})
+    response = client.post(f'/api/tasks/{after}/dependencies', headers=headers, json={'predecessor_task_id': child})
+    assert response.status_code == 201, response.get_json()
+    client.post(f'/api/tasks/{child}/comments', headers=headers, json={'content': 'ملاحظة'})
+    return client, headers, project_id, {'owner': owner_id, 'member': member_id, 'member_headers': member_headers}
+
+
+def _clone(client, headers, project_id, **body):
+    return client.post(f'/api/projects/{project_id}/clone', headers=headers, json=body)
+
+
+def _tasks(app, project_id):
+    with app.app_context():
+        return {task.name: task.to_dict() for task in Task.query.filter_by(project_id=project_id)}
+
+
+def test_clone_remaps_parents_and_dependencies(app, source):
+    client, headers, project_id, _ = source
+    response = _clone(client, headers, project_id)
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert body['copied'] == {'tasks': 3, 'dependencies': 1, 'comments': 0, 'members': 0}
+
+    original, copied = _tasks(app, project_id), _tasks(app, body['id'])
+    assert {task['id'] for task in copied.values()}.isdisjoint(task['id'] for task in original.values())
+    assert copied['C']['parent_task_id'] == copied['P']['id']
+    assert copied['P']['parent_task_id'] is None
+    with app.app_context():
+        dependency, = Dependency.query.filter(Dependency.successor_task_id == copied['A']['id']).all()
+        assert dependency.predecessor_task_id == copied['C']['id']
+        # المصدر لم يتغير
+        assert Dependency.query.filter(Dependency.successor_task_id == original['A']['id']).count() == 1
+
+    # الافتراضي: إعادة الحالة والإبقاء على المكلفين
+    assert copied['C']['status'] == 'not_started'
+    assert copied['P']['assigned_to'] == original['P']['assigned_to']
+
+
+@pytest.mark.parametrize('body', [{'offset_days': 10}, {'start_date': '2026-01-11'}])
+def test_clone_shifts_dates(app, source, body):
+    client, headers, project_id, _ = source
+    response = _clone(client, headers, project_id, **body)
+    assert response.status_code == 201, response.get_json()
+    clone = response.get_json()
+    assert (clone['start_date'], clone['end_date']) == ('2026-01-11', '2026-04-10')
+    copied = _tasks(app, clone['id'])
+    assert (copied['C']['start_date'], copied['C']['end_date']) == ('2026-01-15', '2026-01-20')
+    assert (copied['A']['start_date'], copied['A']['end_date']) == ('2026-01-21', '2026-01-30')
+
+
+def test_clone_flags(app, source):
+    client, headers, project_id, users = source
+    response = _clone(client, headers, project_id, include_assignees=False, include_comments=True,
+                      include_members=True, reset_status=False, name='نسخة')
+    assert response.status_code == 201, response.get_json()
+    clone = response.get_json()
+    assert clone['name'] == 'نسخة'
+    assert clone['copied'] == {'tasks': 3, 'dependencies': 1, 'comments': 1, 'members': 1}
+
+    copied = _tasks(app, clone['id'])
+    assert copied['P']['assigned_to'] is None
+    assert copied['C']['status'] == 'completed'
+    with app.app_context():
+        comment, = Comment.query.filter_by(task_id=copied['C']['id']).all()
+        assert comment.content == 'ملاحظة'
+        members = {m.user_id for m in ProjectMember.query.filter_by(project_id=clone['id'])}
+    assert members == {users['member']}
+
+
+def test_clone_by_member_adds_source_owner(app, source):
+    client, _, project_id, users = source
+    response = _clone(client, users['member_headers'], project_id, include_members=True)
+    assert response.status_code == 201, response.get_json()
+    clone = response.get_json()
+    assert clone['owner_id'] == users['member']
+    with app.app_context():
+        roles = {m.user_id: m.role for m in ProjectMember.query.filter_by(project_id=clone['id'])}
+    assert roles == {users['owner']: 'admin'}
+
+
+def test_clone_requires_access(source):
+    client, _, project_id, _ = source
+    _, stranger = register(client, 'stranger')
+    assert _clone(client, stranger, project_id).status_code == 403
+
+
+def test_clone_null_offset(app, source):
+    client, headers, project_id, _ = source
+    response = _clone(client, headers, project_id, offset_days=None)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['start_date'] == '2026-01-01'
+
+
+@pytest.mark.parametrize('body', [
+    {'offset_days': [1]}, {'offset_days': {'a': 1}}, {'offset_days': '3'},
+    {'offset_days': True}, {'offset_days': 10 ** 9}, {'start_date': 5}, {'start_date': '2026-13-01'},
+    {'include_comments': 'yes'}, {'name': 7},
+])
+def test_clone_rejects_invalid_body(app, source, body):
+    client, headers, project_id, _ = source
+    response = _clone(client, headers, project_id, **body)
+    assert response.status_code == 400, response.get_json()
+    with app.app_context():
+        assert db.session.query(Task).count() == 3
@@ -0,0 +1,145 @@
+"""ضغط الاستجابات حسب Accept-Encoding (src.compression)"""
+
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Response, jsonify, stream_with_context
+
+from src import compression
+from src.compression import negotiate
+
+PREFERENCE = ['zstd', 'br', 'gzip']
+LARGE = {'items': [{'id': i, 'name': f'item {i}'} for i in range(500)]}
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('gzip, br', 'br'),
+    ('gzip, br, zstd', 'zstd'),
+    # q الأعلى يغلب ترتيب التفضيل
+    ('br;q=0.5, gzip;q=0.8', 'gzip'),
+    ('zstd;q=0.1, gzip', 'gzip'),
+    ('GZIP; q=0.9', 'gzip'),
+    # * يشمل ما لم يُذكر، وq=0 يرفض صراحة
+    ('*', 'zstd'),
+    ('*;q=0.2, zstd;q=0', 'br'),
+    ('gzip;q=0', None),
+    ('identity;q=0', None),
+    ('identity;q=0, gzip;q=0.3', 'gzip'),
+    ('gzip;q=abc', None),
+    ('deflate, compress', None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, PREFERENCE) == expected
+
+
+def test_negotiate_follows_available_preference():
+    assert negotiate('zstd, br, gzip', ['gzip']) == 'gzip'
+
+
+@pytest.fixture
+def client(app):
+    @app.route('/test/large')
+    def large():
+        response = jsonify(LARGE)
+        response.set_etag('v1')
+        return response
+
+    @app.route('/test/small')
+    def small():
+        response = jsonify({'ok': True})
+        response.set_etag('v1')
+        return response
+
+    @app.route('/test/stream')
+    def stream():
+        def generate():
+            for i in range(5):
+                yield json.dumps({'chunk': i, 'padding': 'x' * 400}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    @app.route('/test/text')
+    def text():
+        return Response('x' * 5000, mimetype='text/plain')
+
+    return app.test_client()
+
+
+def test_large_response_is_compressed(client):
+    response = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data) < len(json.dumps(LARGE))
+    assert json.loads(gzip.decompress(response.data)) == LARGE
+
+
+@pytest.mark.skipif(compression.brotli is None, reason='brotli غير مثبتة')
+def test_brotli(client):
+    response = client.get('/test/large', headers={'Accept-Encoding': 'br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(compression.brotli.decompress(response.data)) == LARGE
+
+
+@pytest.mark.skipif(compression.zstandard is None, reason='zstandard غير مثبتة')
+def test_zstd(client):
+    response = client.get('/test/large', headers={'Accept-Encoding': 'zstd'})
+    assert response.headers['Content-Encoding'] == 'zstd'
+    decompressed = compression.zstandard.ZstdDecompressor().decompressobj().decompress(response.data)
+    assert json.loads(decompressed) == LARGE
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    # Vary حتى على غير المضغوط: الاستجابة تعتمد على الترويسة
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == '"v1"'
+    assert response.get_json() == {'ok': True}
+
+
+def test_no_accept_encoding(client):
+    response = client.get('/test/large', headers={'Accept-Encoding': 'identity;q=0'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.get_json() == LARGE
+
+
+def test_etag_becomes_weak(client):
+    compressed = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/test/large')
+    assert compressed.headers['ETag'] == 'W/"v1"'
+    assert plain.headers['ETag'] == '"v1"'
+
+
+def test_streamed_response(client):
+    response = client.get('/test/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    response.close()
+    # كل قطعة تُفرَّغ فوراً: أكثر من جزء مضغوط يصل قبل النهاية
+    assert len([chunk for chunk in chunks if chunk]) > 2
+    lines = zlib.decompress(b''.join(chunks), 31).decode().splitlines()
+    assert [json.loads(line)['chunk'] for line in lines] == list(range(5))
+
+
+def test_other_mimetypes_untouched(client):
+    response = client.get('/test/text', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'x' * 5000
+
+
+def test_fast_level_for_large_responses(app):
+    compressor = app.extensions['compression']
+    threshold = app.config['COMPRESS_FAST_THRESHOLD']
+    assert compressor.level_for('gzip', threshold - 1) == app.config['COMPRESS_LEVELS']['gzip']
+    assert compressor.level_for('gzip', threshold) == app.config['COMPRESS_FAST_LEVELS']['gzip']
+
+
+@pytest.mark.parametrize('app', [{'COMPRESS_ENABLED': False}], indirect=True)
+def test_disabled(client):
+    response = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,35 @@
+"""اختبارات استيراد المهام (src.services.importer)"""
+
+from src.models.task import Dependency, Task
+from src.models.user import db
+from tests.conftest import create_project, register
+
+CSV = """id,name,start_date,end_date,predecessors
+1,تصميم,2026-01-01,2026-01-05,
+2,تنفيذ,2026-01-06,2026-01-20,1
+"""
+
+
+def test_import_tasks_command(app, tmp_path):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    path = tmp_path / 'tasks.csv'
+    path.write_text(CSV, encoding='utf-8')
+
+    result = app.test_cli_runner().invoke(args=['import', 'tasks', project_id, str(path)])
+
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert Task.query.filter_by(project_id=project_id).count() == 2
+        assert Dependency.query.count() == 1
+
+
+def test_import_tasks_command_unknown_project(app, tmp_path):
+    path = tmp_path / 'tasks.csv'
+    path.write_text(CSV, encoding='utf-8')
+
+    result = app.test_cli_runner().invoke(args=['import', 'tasks', 'missing', str(path)])
+
+    assert result.exit_code != 0
+    assert 'المشروع غير موجود' in result.output
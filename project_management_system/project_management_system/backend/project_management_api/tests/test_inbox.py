@@ -0,0 +1,95 @@
+"""صندوق مهامي GET /me/tasks (src.services.inbox)"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.models.project import Project, ProjectMember
+from src.models.task import Task
+from src.models.user import db
+from tests.conftest import register
+
+START = date(2026, 1, 1)
+
+
+@pytest.fixture
+def inbox(app):
+    """مهام مسندة للمستخدم في مشروعه ومشروع هو عضو فيه، ومشروع غادره"""
+    client = app.test_client()
+    me, headers = register(client, 'me')
+    other, _ = register(client, 'other')
+    with app.app_context():
+        projects = {name: Project(name=name, start_date=START, end_date=START + timedelta(days=60), owner_id=owner)
+                    for name, owner in (('mine', me), ('member', other), ('left', other))}
+        db.session.add_all(projects.values())
+        db.session.flush()
+        db.session.add(ProjectMember(project_id=projects['member'].id, user_id=me, role='member'))
+        tasks = []
+        # تاريخا انتهاء متساويان في كل زوج: الترتيب الثانوي بالمعرف
+        for i, (project, status) in enumerate([
+            ('mine', 'not_started'), ('member', 'in_progress'), ('mine', 'on_hold'), ('member', 'not_started'),
+            ('mine', 'completed'), ('member', 'in_progress'), ('left', 'not_started'),
+        ]):
+            task = Task(project_id=projects[project].id, name=f'T{i}', start_date=START,
+                        end_date=START + timedelta(days=1 + i // 2), status=status, assigned_to=me)
+            db.session.add(task)
+            tasks.append(task)
+        db.session.add(Task(project_id=projects['mine'].id, name='theirs', start_date=START,
+                            end_date=START + timedelta(days=1), assigned_to=other))
+        db.session.commit()
+        order = sorted((task for task in tasks if task.project_id != projects['left'].id),
+                       key=lambda task: (task.end_date, task.id))
+        return client, headers, [(task.name, task.status) for task in order]
+
+
+def _get(client, headers, **query):
+    response = client.get('/api/me/tasks', headers=headers, query_string=query)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_default_is_open_tasks_by_due_date(inbox):
+    client, headers, order = inbox
+    body = _get(client, headers)
+    assert [task['name'] for task in body['tasks']] == [name for name, status in order if status != 'completed']
+    assert {task['project_name'] for task in body['tasks']} == {'mine', 'member'}
+    assert body['next_cursor'] is None
+
+
+@pytest.mark.parametrize('status', ['completed', 'in_progress,on_hold', 'not_started, completed'])
+def test_status_filter(inbox, status):
+    client, headers, order = inbox
+    wanted = {value.strip() for value in status.split(',')}
+    body = _get(client, headers, status=status)
+    assert [task['name'] for task in body['tasks']] == [name for name, value in order if value in wanted]
+
+
+def test_keyset_pages(inbox):
+    client, headers, order = inbox
+    names, cursor, pages = [], None, 0
+    while True:
+        body = _get(client, headers, status='not_started,in_progress,on_hold,completed', limit=2,
+                    **({'cursor': cursor} if cursor else {}))
+        assert len(body['tasks']) <= 2
+        names += [task['name'] for task in body['tasks']]
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert names == [name for name, _ in order]
+    assert pages == 3
+
+
+def test_due_range(inbox):
+    client, headers, _ = inbox
+    body = _get(client, headers, status='not_started,in_progress,on_hold,completed',
+                **{'from': '2026-01-03', 'to': '2026-01-03'})
+    assert sorted(task['name'] for task in body['tasks']) == ['T2', 'T3']
+
+
+@pytest.mark.parametrize('query', [
+    {'status': 'done'}, {'limit': 0}, {'limit': 201}, {'limit': 'x'}, {'cursor': 'bad'}, {'from': '2026/01/01'},
+])
+def test_invalid_parameters(inbox, query):
+    client, headers, _ = inbox
+    assert client.get('/api/me/tasks', headers=headers, query_string=query).status_code == 400
@@ -0,0 +1,30 @@
+"""عمال الطابور المضمّنون في عامل الويب (src.jobs.init_jobs)"""
+
+import threading
+
+import pytest
+
+from src.main import shutdown
+
+
+def _job_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('jobs-')]
+
+
+def test_inline_workers_disabled_by_default(app):
+    assert 'jobs' not in app.extensions
+    app.test_client().get('/api/projects')
+    assert not _job_threads()
+
+
+@pytest.mark.parametrize('app', [{'JOB_INLINE_WORKERS': 2, 'JOB_POLL_INTERVAL': 0.05}], indirect=True)
+def test_inline_workers_stop_on_shutdown(app):
+    client = app.test_client()
+    client.get('/api/projects')
+    assert len(_job_threads()) == 3  # خيطا عمل وخيط النبض
+
+    shutdown(app)
+    assert not _job_threads()
+    # لا يعيد طلب لاحق تشغيلها
+    client.get('/api/projects')
+    assert not _job_threads()
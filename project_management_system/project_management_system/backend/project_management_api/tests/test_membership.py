@@ -0,0 +1,100 @@
+"""إضافة الأعضاء بالجملة (src.services.membership)"""
+
+import pytest
+
+from src.models.job import Job
+from src.models.notification import Notification
+from src.models.project import ProjectMember
+from src.models.user import User, db
+from src.services import membership
+from tests.conftest import create_project, register
+
+
+def _users(app, *names):
+    """مستخدمون مباشرة في القاعدة (بلا bcrypt لكل تسجيل)"""
+    with app.app_context():
+        users = [User(username=name, email=f'{name}@example.com', password_hash='x') for name in names]
+        db.session.add_all(users)
+        db.session.commit()
+        return [user.id for user in users]
+
+
+def _invites(app, project_id):
+    with app.app_context():
+        return sorted(db.session.scalars(db.select(Notification.user_id).where(
+            Notification.type == 'project_invite', Notification.related_entity_id == project_id,
+        )))
+
+
+@pytest.fixture
+def project(app):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    return client, headers, owner_id, create_project(client, headers)
+
+
+def test_bulk_add_statuses(app, project):
+    client, headers, owner_id, project_id = project
+    member, existing = _users(app, 'm1', 'm2')
+    client.post(f'/api/projects/{project_id}/members', headers=headers, json={'user_id': existing})
+
+    response = client.post(f'/api/projects/{project_id}/members/bulk', headers=headers, json={'members': [
+        {'user_id': member, 'role': 'admin'},
+        {'user_id': member},
+        {'user_id': existing},
+        {'user_id': owner_id},
+        {'user_id': 'missing'},
+        {'user_id': member, 'role': 'boss'},
+    ]})
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body['added'] == 1
+    assert [result['status'] for result in body['results']] == [
+        'added', 'duplicate', 'already_member', 'owner', 'not_found', 'invalid_role',
+    ]
+    with app.app_context():
+        assert db.session.get(ProjectMember, (project_id, member)).role == 'admin'
+
+
+def test_invites_in_same_transaction(app, project):
+    client, headers, _, project_id = project
+    first, second = _users(app, 'm1', 'm2')
+
+    client.post(f'/api/projects/{project_id}/members', headers=headers, json={'user_id': first})
+    client.post(f'/api/projects/{project_id}/members/bulk', headers=headers,
+                json={'members': [{'user_id': first}, {'user_id': second}]})
+
+    # بلا عامل مهام: الإشعارات التُزمت مع العضويات، ومرة واحدة لكل عضو
+    assert _invites(app, project_id) == sorted([first, second])
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(Job)) == 0
+
+
+def test_chunks_above_in_limit(app, project, monkeypatch):
+    client, headers, _, project_id = project
+    user_ids = _users(app, *(f'm{i}' for i in range(7)))
+    existing = user_ids[3]
+    client.post(f'/api/projects/{project_id}/members', headers=headers, json={'user_id': existing})
+    chunk = membership._chunks
+    monkeypatch.setattr(membership, '_chunks', lambda values: chunk(values, size=2))
+
+    response = client.post(f'/api/projects/{project_id}/members/bulk', headers=headers,
+                           json={'members': [{'user_id': user_id} for user_id in user_ids + ['missing']]})
+    assert response.status_code == 200, response.get_json()
+    statuses = {result['user_id']: result['status'] for result in response.get_json()['results']}
+    assert statuses == {**{user_id: 'added' for user_id in user_ids}, existing: 'already_member',
+                        'missing': 'not_found'}
+    assert _invites(app, project_id) == sorted(user_ids)
+
+
+def test_bulk_add_requires_owner(app, project):
+    client, headers, _, project_id = project
+    _, other = register(client, 'other')
+    member, = _users(app, 'm1')
+
+    response = client.post(f'/api/projects/{project_id}/members/bulk', headers=other,
+                           json={'members': [{'user_id': member}]})
+    assert response.status_code == 403
+    response = client.post(f'/api/projects/{project_id}/members/bulk', headers=headers, json={'members': []})
+    assert response.status_code == 400
+    assert _invites(app, project_id) == []
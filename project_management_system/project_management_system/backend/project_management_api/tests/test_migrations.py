@@ -0,0 +1,137 @@
+"""ترحيلات المخطط (src.migrations): قاعدة فارغة، ومخطط ما قبل الترحيلات، والتكرار الآمن"""
+
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.migrations import _INITIAL_SCHEMA, MIGRATIONS, applied_versions, current_version, upgrade
+from src.models.user import db
+
+ALL_VERSIONS = [item.version for item in MIGRATIONS]
+
+
+@pytest.fixture
+def engine_for(tmp_path):
+    engines = []
+
+    def make(name):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def _schema(engine):
+    """{table: (columns, indexes)} بلا جدول الإصدارات"""
+    with engine.connect() as conn:
+        tables = [row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name != 'schema_migrations'"
+        )]
+        return {
+            table: (
+                {row[1]: (row[2], row[3], row[4]) for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')},
+                {row[1] for row in conn.exec_driver_sql(f'PRAGMA index_list("{table}")')},
+            )
+            for table in tables
+        }
+
+
+def test_upgrade_empty_database(engine_for):
+    engine = engine_for('empty.db')
+    assert upgrade(engine) == ALL_VERSIONS
+    assert current_version(engine) == ALL_VERSIONS[-1]
+    assert upgrade(engine) == []
+
+    # كل جدول وعمود في النماذج موجود في المخطط الناتج
+    schema = _schema(engine)
+    for table in db.metadata.sorted_tables:
+        assert table.name in schema, table.name
+        assert {column.name for column in table.columns} <= set(schema[table.name][0]), table.name
+
+
+def test_upgrade_pre_migration_schema(engine_for, tmp_path):
+    """قاعدة أنشأتها create_all قبل الترحيلات، ببيانات، تصل إلى المخطط نفسه"""
+    conn = sqlite3.connect(tmp_path / 'legacy.db')
+    for statement in _INITIAL_SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO user (id, username, email, password_hash) VALUES ('u1', ' Ärger ', 'A@X.COM', 'x')")
+    conn.execute("INSERT INTO project (id, name, start_date, end_date, owner_id) "
+                 "VALUES ('p1', 'P', '2026-01-01', '2026-02-01', 'u1')")
+    conn.execute("INSERT INTO task (id, project_id, name, start_date, end_date, status) "
+                 "VALUES ('t1', 'p1', 'T', '2026-01-01', '2026-01-05', 'not_started')")
+    conn.commit()
+    conn.close()
+
+    legacy = engine_for('legacy.db')
+    assert upgrade(legacy) == ALL_VERSIONS
+    assert upgrade(legacy) == []
+    assert _schema(legacy) == _schema_of_fresh(engine_for)
+
+    with legacy.connect() as conn:
+        assert conn.exec_driver_sql(
+            'SELECT username_normalized, email_normalized FROM user'
+        ).one() == ('ärger', 'a@x.com')
+        assert conn.exec_driver_sql('SELECT version FROM task').scalar() == 1
+        assert conn.exec_driver_sql('SELECT COUNT(*) FROM project').scalar() == 1
+
+
+def _schema_of_fresh(engine_for):
+    engine = engine_for('fresh.db')
+    upgrade(engine)
+    return _schema(engine)
+
+
+def test_rerun_after_partial_bookkeeping(engine_for):
+    """DDL الترحيلات آمن على مخطط مطبق إذا فُقد سجل الإصدارات"""
+    engine = engine_for('app.db')
+    upgrade(engine)
+    schema = _schema(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql('DELETE FROM schema_migrations')
+    assert upgrade(engine) == ALL_VERSIONS
+    assert _schema(engine) == schema
+
+
+def test_upgrade_to_target(engine_for):
+    engine = engine_for('app.db')
+    assert upgrade(engine, target=5) == [v for v in ALL_VERSIONS if v <= 5]
+    assert current_version(engine) == 5
+    assert 'version' not in _schema(engine)['task'][0]
+    assert upgrade(engine) == [v for v in ALL_VERSIONS if v > 5]
+
+
+def test_concurrent_upgrades_apply_each_version_once(tmp_path):
+    engines = [create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={'timeout': 30}) for _ in range(3)]
+    results = [None] * len(engines)
+
+    def run(index):
+        results[index] = upgrade(engines[index])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(engines))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(v for applied in results for v in applied) == ALL_VERSIONS
+    assert applied_versions(engines[0]) == set(ALL_VERSIONS)
+    for engine in engines:
+        engine.dispose()
+
+
+def test_cli(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['db', 'current'])
+    assert result.exit_code == 0, result.output
+    assert f'الإصدار الحالي: {ALL_VERSIONS[-1]}' in result.output
+    assert 'معلق' not in result.output
+
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0, result.output
+    assert '(طُبّق 0 ترحيل)' in result.output
@@ -0,0 +1,174 @@
+"""محلل الأداء بالعينات (src.profiler) ومساراته في /api/admin/profiler"""
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from src import profiler as profiler_module
+from src.profiler import TRUNCATED, SamplingProfiler
+from tests.conftest import register
+
+ADMIN_PATHS = [
+    ('GET', '/api/admin/profiler'),
+    ('POST', '/api/admin/profiler/start'),
+    ('POST', '/api/admin/profiler/stop'),
+    ('GET', '/api/admin/profiler/stacks'),
+]
+
+
+@pytest.fixture
+def admin(app):
+    @app.route('/test/slow')
+    def slow():
+        time.sleep(0.2)
+        return {'ok': True}
+
+    @app.route('/test/fast')
+    def fast():
+        return {'ok': True}
+
+    client = app.test_client()
+    admin_id, headers = register(client, 'admin')
+    app.config['ADMIN_USER_IDS'] = [admin_id]
+    yield client, headers
+    app.extensions['profiler'].stop()
+
+
+def test_admin_only(app, admin):
+    client, _ = admin
+    _, headers = register(client, 'user')
+    for method, path in ADMIN_PATHS:
+        assert client.open(path, method=method, headers=headers).status_code == 403, path
+        assert client.open(path, method=method).status_code == 401, path
+    assert app.extensions['profiler'].running is False
+
+
+def test_start_and_stop(admin):
+    client, headers = admin
+    response = client.post('/api/admin/profiler/start', headers=headers, json={'interval_ms': 50, 'duration': 30})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['running'] is True
+    assert response.get_json()['interval_ms'] == 50
+    assert client.post('/api/admin/profiler/start', headers=headers).status_code == 409
+
+    status = client.post('/api/admin/profiler/stop', headers=headers).get_json()
+    assert status['running'] is False and status['stopped_at'] is not None
+    # يمكن التشغيل مرة أخرى بعد الإيقاف
+    assert client.post('/api/admin/profiler/start', headers=headers, json={'duration': 1}).status_code == 200
+
+
+def test_stops_after_duration(app, admin):
+    client, headers = admin
+    client.post('/api/admin/profiler/start', headers=headers, json={'interval_ms': 5, 'duration': 0.05})
+    deadline = time.monotonic() + 2
+    while app.extensions['profiler'].running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.get('/api/admin/profiler', headers=headers).get_json()['running'] is False
+
+
+@pytest.mark.parametrize('body', [
+    {'interval_ms': 0.5},
+    {'duration': 0},
+    {'duration': 601},
+    {'rate': 0},
+    {'rate': 101},
+    {'rate': 'x'},
+    {'endpoint': 'missing.endpoint'},
+])
+def test_invalid_start(admin, body):
+    client, headers = admin
+    assert client.post('/api/admin/profiler/start', headers=headers, json=body).status_code == 400
+
+
+def test_endpoint_filter_and_outputs(admin):
+    client, headers = admin
+    response = client.post('/api/admin/profiler/start', headers=headers,
+                           json={'interval_ms': 2, 'duration': 30, 'endpoint': 'slow'})
+    assert response.status_code == 200, response.get_json()
+    client.get('/test/fast')
+    client.get('/test/slow')
+    client.post('/api/admin/profiler/stop', headers=headers)
+
+    status = client.get('/api/admin/profiler', headers=headers).get_json()
+    assert status['samples'] > 0 and status['endpoint'] == 'slow'
+
+    response = client.get('/api/admin/profiler/stacks', headers=headers)
+    assert response.mimetype == 'text/plain'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename=profile-')
+    lines = response.get_data(as_text=True).splitlines()
+    # جذر كل مكدس نقطة النهاية، والمسار غير المطلوب لا يُسجل
+    assert lines and all(line.startswith('slow;') for line in lines)
+    assert any(';slow (' in line for line in lines)
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == status['samples']
+
+    tree = client.get('/api/admin/profiler/stacks?format=json', headers=headers).get_json()
+    assert tree['value'] == status['samples']
+    assert [child['name'] for child in tree['children']] == ['slow']
+    assert client.get('/api/admin/profiler/stacks?format=svg', headers=headers).status_code == 400
+
+
+@pytest.mark.parametrize('draw, recorded', [(0.3, True), (0.7, False)])
+def test_rate_samples_requests(app, monkeypatch, draw, recorded):
+    profiler = SamplingProfiler(max_stacks=10, max_depth=10)
+    profiler.running, profiler.endpoint, profiler.rate = True, 'fast', 0.5
+    monkeypatch.setattr(profiler_module.random, 'random', lambda: draw)
+
+    @app.route('/test/fast')
+    def fast():
+        return {}
+
+    with app.test_request_context('/test/fast'):
+        profiler.before_request()
+        assert (threading.get_ident() in profiler._threads) is recorded
+        profiler.teardown_request()
+        assert profiler._threads == {}
+    with app.test_request_context('/api/projects'):
+        profiler.before_request()
+        assert profiler._threads == {}
+
+
+def _sample_from_a(profiler):
+    profiler._sample()
+
+
+def _sample_from_b(profiler):
+    profiler._sample()
+
+
+def test_max_stacks_truncation():
+    profiler = SamplingProfiler(max_stacks=1, max_depth=128)
+    profiler._threads[threading.get_ident()] = 'ep'
+    _sample_from_a(profiler)
+    _sample_from_a(profiler)
+    _sample_from_b(profiler)
+
+    assert len(profiler.stacks) == 2
+    assert profiler.stacks[('ep', TRUNCATED)] == 1
+    assert profiler.status()['truncated'] == 1
+    assert profiler.status()['samples'] == 3
+    assert 'ep;[truncated] 1' in profiler.collapsed().splitlines()
+
+
+def test_max_depth():
+    profiler = SamplingProfiler(max_stacks=10, max_depth=3)
+    profiler._threads[threading.get_ident()] = 'ep'
+    _sample_from_a(profiler)
+    stack, = profiler.stacks
+    # الجذر ثم أعمق ثلاثة إطارات، آخرها _sample نفسها
+    assert len(stack) == 4 and stack[0] == 'ep' and stack[-1].startswith('_sample (')
+
+
+def test_collapsed_and_tree_format():
+    profiler = SamplingProfiler(max_stacks=10, max_depth=10)
+    profiler.stacks = Counter({('ep', 'a', 'b'): 3, ('ep', 'a', 'c'): 1, ('other', 'a'): 2})
+    assert profiler.collapsed() == 'ep;a;b 3\nother;a 2\nep;a;c 1\n'
+
+    tree = profiler.tree()
+    assert tree['value'] == 6
+    ep, other = tree['children']
+    assert (ep['name'], ep['value'], other['value']) == ('ep', 4, 2)
+    a, = ep['children']
+    assert {child['name']: child['value'] for child in a['children']} == {'b': 3, 'c': 1}
+    assert a['children'][0]['children'] == []
@@ -0,0 +1,46 @@
+"""تحديد المعدل والتحكم في القبول (src.ratelimit)"""
+
+import pytest
+
+from src.ratelimit import MemoryBackend
+
+LIMITED = {'RATELIMIT_ENABLED': True, 'RATELIMIT_BACKEND': 'memory',
+           'RATELIMIT_CLASSES': {'write': {'rate': 0, 'burst': 2, 'concurrency': 1}}}
+
+
+@pytest.mark.parametrize('app', [LIMITED], indirect=True)
+def test_concurrency_rejection_keeps_tokens(app):
+    limiter = app.extensions['ratelimit']
+    assert limiter.admit('write', 'u') == (True, 0)
+    # الفئة ممتلئة: رفض دون أخذ رمز من الدلو
+    for _ in range(5):
+        assert limiter.admit('write', 'u') == (False, 1)
+    limiter.release('write')
+
+    assert limiter.admit('write', 'u') == (True, 0)
+    limiter.release('write')
+    allowed, _ = limiter.admit('write', 'u')
+    assert not allowed
+
+
+@pytest.mark.parametrize('app', [LIMITED], indirect=True)
+def test_rejected_token_frees_seat(app):
+    limiter = app.extensions['ratelimit']
+    for _ in range(2):
+        assert limiter.admit('write', 'u') == (True, 0)
+        limiter.release('write')
+    assert not limiter.admit('write', 'u')[0]
+    # المقعد المحجوز للطلب المرفوض أُعيد، فمستخدم آخر يُقبل
+    assert limiter.admit('write', 'v') == (True, 0)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=2)
+    assert backend.take('a', 0, 1)[0]
+    assert backend.take('b', 0, 1)[0]
+    assert not backend.take('a', 0, 1)[0]  # a الأحدث استخداماً الآن
+    assert backend.take('c', 0, 1)[0]  # يُحذف b
+
+    assert list(backend._buckets) == ['a', 'c']
+    assert not backend.take('a', 0, 1)[0]
+    assert backend.take('b', 0, 1)[0]
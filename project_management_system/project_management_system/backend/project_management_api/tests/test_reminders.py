@@ -0,0 +1,134 @@
+"""تذكيرات المواعيد النهائية (src.services.reminders)"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+
+from src import locks
+from src.models.notification import Notification
+from src.models.project import Project
+from src.models.task import Task
+from src.models.user import User, db
+from src.services.reminders import LOCK_NAME, run_due_reminders, scan_due_tasks
+
+TODAY = date(2026, 3, 10)
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        users = [User(username=name, email=f'{name}@example.com', password_hash='x') for name in ('a', 'b')]
+        db.session.add_all(users)
+        db.session.flush()
+        project = Project(name='P', start_date=TODAY - timedelta(days=30), end_date=TODAY + timedelta(days=30),
+                          owner_id=users[0].id)
+        db.session.add(project)
+        db.session.commit()
+        yield project, users
+
+
+def _task(project, end_date, assigned_to, status='not_started', name='T'):
+    task = Task(project_id=project.id, name=name, start_date=end_date - timedelta(days=5), end_date=end_date,
+                assigned_to=assigned_to, status=status)
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def _reminders():
+    return db.session.execute(
+        select(Notification.related_entity_id, Notification.user_id, Notification.message)
+        .where(Notification.type == 'task_due').order_by(Notification.message)
+    ).all()
+
+
+def test_window_and_filters(ctx):
+    project, (user, _) = ctx
+    due_today = _task(project, TODAY, user.id, name='today')
+    due_tomorrow = _task(project, TODAY + timedelta(days=1), user.id, 'in_progress', name='tomorrow')
+    due_later = _task(project, TODAY + timedelta(days=3), user.id, 'on_hold', name='later')
+    _task(project, TODAY + timedelta(days=4), user.id, name='outside')
+    _task(project, TODAY - timedelta(days=1), user.id, name='overdue')
+    _task(project, TODAY, user.id, 'completed', name='done')
+    _task(project, TODAY, None, name='unassigned')
+
+    assert scan_due_tasks(3, today=TODAY) == 3
+    assert sorted(_reminders()) == sorted([
+        (due_today, user.id, 'مهمة "today" تنتهي اليوم'),
+        (due_tomorrow, user.id, 'مهمة "tomorrow" ستنتهي غداً'),
+        (due_later, user.id, 'مهمة "later" ستنتهي خلال 3 أيام'),
+    ])
+
+
+def test_keyset_batches(app, ctx):
+    project, (user, _) = ctx
+    # نفس end_date لعدة مهام: الترقيم يعتمد على (end_date, id) لا على التاريخ وحده
+    task_ids = [_task(project, TODAY + timedelta(days=day), user.id) for day in (0, 1, 1, 1, 1, 2, 2)]
+    inserts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO notification'):
+            inserts.append(len(parameters) if executemany else 1)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        assert scan_due_tasks(3, batch_size=2, today=TODAY) == 7
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert inserts == [2, 2, 2, 1]
+    assert sorted(row.related_entity_id for row in _reminders()) == sorted(task_ids)
+
+
+def test_already_sent_is_skipped(ctx):
+    project, (user, other) = ctx
+    first = _task(project, TODAY, user.id)
+    second = _task(project, TODAY, user.id)
+    # إشعار من نوع آخر لا يمنع التذكير
+    db.session.add(Notification(user_id=user.id, message='m', type='task_updated', related_entity_id=second))
+    db.session.commit()
+
+    assert scan_due_tasks(3, today=TODAY) == 2
+    assert scan_due_tasks(3, today=TODAY) == 0
+
+    # إعادة الإسناد: المستخدم الجديد لم يُذكَّر بعد
+    db.session.get(Task, first).assigned_to = other.id
+    db.session.commit()
+    assert scan_due_tasks(3, today=TODAY) == 1
+    assert db.session.scalar(select(func.count()).select_from(Notification).where(
+        Notification.type == 'task_due', Notification.related_entity_id == first,
+    )) == 2
+
+
+def test_lock_contention(ctx):
+    project, (user, _) = ctx
+    _task(project, date.today(), user.id)
+
+    owner = locks.acquire(LOCK_NAME, 60)
+    assert owner is not None
+    try:
+        assert run_due_reminders() is None
+        assert _reminders() == []
+    finally:
+        locks.release(LOCK_NAME, owner)
+
+    assert run_due_reminders() == 1
+    # القفل يتحرر بعد المسح
+    assert locks.acquire(LOCK_NAME, 60) is not None
+
+
+def test_expired_lock_is_taken_over(ctx):
+    project, (user, _) = ctx
+    _task(project, date.today(), user.id)
+
+    # عامل توقف وهو يحمل القفل: تنتهي صلاحيته فيأخذه المسح التالي
+    stale = locks.acquire(LOCK_NAME, -1)
+    assert stale is not None
+    assert run_due_reminders() == 1
+
+    # تحرير المالك القديم لا يمس قفلاً أخذه عامل آخر بعده
+    current = locks.acquire(LOCK_NAME, 60)
+    locks.release(LOCK_NAME, stale)
+    assert run_due_reminders() is None
+    locks.release(LOCK_NAME, current)
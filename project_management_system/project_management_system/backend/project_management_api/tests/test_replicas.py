@@ -0,0 +1,33 @@
+"""توجيه القراءة (src.replicas): الالتصاق بعد الكتابة مشترك بين العمال"""
+
+import pytest
+
+from src.cache import SQLiteBackend, cache_path
+from src.main import create_app
+
+
+def _config(tmp_path, **overrides):
+    return {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        # نسخة القراءة هنا الملف نفسه؛ ما يُختبر هو مكان تخزين الالتصاق
+        'SQLALCHEMY_READ_URLS': [f"sqlite:///{tmp_path / 'app.db'}"],
+        'RATELIMIT_ENABLED': False,
+        **overrides,
+    }
+
+
+def test_read_replicas_require_shared_cache(tmp_path):
+    with pytest.raises(RuntimeError):
+        create_app(_config(tmp_path, CACHE_BACKEND='memory'))
+
+
+def test_sticky_flag_visible_to_other_workers(tmp_path):
+    app = create_app(_config(tmp_path))
+    router = app.extensions['read_routing']
+    router.stick('u1')
+
+    # عامل آخر: اتصال مستقل بملف المخزن نفسه
+    other = SQLiteBackend(cache_path(app))
+    assert other.get('read_sticky:u1') is True
+    assert other.get('read_sticky:u2') is None
+    assert router.is_sticky('u1')
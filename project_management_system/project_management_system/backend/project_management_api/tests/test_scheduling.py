@@ -0,0 +1,116 @@
+"""إعادة الجدولة حسب التبعيات (src.services.scheduling) عبر PUT /tasks/<id>?propagate=true"""
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user import db
+from src.services import scheduling
+from tests.conftest import create_project, register
+
+
+def _task(client, headers, project_id, name, start, end):
+    response = client.post(f'/api/projects/{project_id}/tasks', headers=headers,
+                           json={'name': name, 'start_date': start, 'end_date': end})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def _depend(client, headers, successor, predecessor, dependency_type='finish_to_start'):
+    response = client.post(f'/api/tasks/{successor}/dependencies', headers=headers,
+                           json={'predecessor_task_id': predecessor, 'type': dependency_type})
+    assert response.status_code == 201, response.get_json()
+
+
+def _get(client, headers, task_id):
+    return client.get(f'/api/tasks/{task_id}', headers=headers).get_json()
+
+
+@pytest.fixture
+def project(app):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    return client, headers, create_project(client, headers)
+
+
+@pytest.mark.parametrize('dependency_type, start, end, shift', [
+    ('finish_to_start', '2026-01-12', '2026-01-14', 10),
+    ('start_to_start', '2026-01-08', '2026-01-10', 6),
+    ('finish_to_finish', '2026-01-10', '2026-01-12', 8),
+    ('start_to_finish', '2026-01-06', '2026-01-08', 4),
+])
+def test_dependency_types(project, dependency_type, start, end, shift):
+    client, headers, project_id = project
+    first = _task(client, headers, project_id, 'T1', '2026-01-01', '2026-01-05')
+    second = _task(client, headers, project_id, 'T2', '2026-01-02', '2026-01-04')
+    _depend(client, headers, second, first, dependency_type)
+
+    response = client.put(f'/api/tasks/{first}?propagate=true', headers=headers,
+                          json={'start_date': '2026-01-08', 'end_date': '2026-01-12'})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['rescheduled'] == [
+        {'id': second, 'start_date': start, 'end_date': end, 'shift_days': shift},
+    ]
+    task = _get(client, headers, second)
+    assert (task['start_date'], task['end_date'], task['version']) == (start, end, 2)
+
+
+def test_chain_is_shifted_in_bulk(app, project, monkeypatch):
+    client, headers, project_id = project
+    chain = [_task(client, headers, project_id, f'T{i}', f'2026-01-{2 * i + 1:02d}', f'2026-01-{2 * i + 3:02d}')
+             for i in range(4)]
+    for predecessor, successor in zip(chain, chain[1:]):
+        _depend(client, headers, successor, predecessor)
+    monkeypatch.setattr(scheduling, '_UPDATE_CHUNK', 2)
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE task '):
+            statements.append(executemany)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.put(f'/api/tasks/{chain[0]}?propagate=true', headers=headers,
+                              json={'end_date': '2026-01-05'})
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 200, response.get_json()
+
+    # المهام متلاصقة فكل مهمة لاحقة تُزاح يومين
+    assert [(task['start_date'], task['shift_days']) for task in response.get_json()['rescheduled']] == [
+        ('2026-01-05', 2), ('2026-01-07', 2), ('2026-01-09', 2),
+    ]
+    # عبارة للمهمة المعدلة وعبارة لكل دفعة من المهام المزاحة، بلا executemany
+    assert statements == [False, False, False]
+    assert [_get(client, headers, task_id)['end_date'] for task_id in chain] == [
+        '2026-01-05', '2026-01-07', '2026-01-09', '2026-01-11',
+    ]
+
+
+def test_no_shift_needed(project):
+    client, headers, project_id = project
+    first = _task(client, headers, project_id, 'T1', '2026-01-01', '2026-01-05')
+    second = _task(client, headers, project_id, 'T2', '2026-02-01', '2026-02-03')
+    _depend(client, headers, second, first)
+
+    response = client.put(f'/api/tasks/{first}?propagate=true', headers=headers, json={'end_date': '2026-01-10'})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['rescheduled'] == []
+    task = _get(client, headers, second)
+    assert (task['start_date'], task['version']) == ('2026-02-01', 1)
+
+
+def test_cycle_is_rejected(project):
+    client, headers, project_id = project
+    first = _task(client, headers, project_id, 'T1', '2026-01-01', '2026-01-05')
+    second = _task(client, headers, project_id, 'T2', '2026-01-05', '2026-01-08')
+    _depend(client, headers, second, first)
+    _depend(client, headers, first, second)
+
+    response = client.put(f'/api/tasks/{first}?propagate=true', headers=headers, json={'end_date': '2026-01-10'})
+    assert response.status_code == 409
+    # التراجع عن المعاملة كلها، بما فيها تعديل المهمة نفسها
+    assert _get(client, headers, first)['end_date'] == '2026-01-05'
+    assert _get(client, headers, second)['start_date'] == '2026-01-05'
@@ -0,0 +1,78 @@
+"""بناء الملفات الثابتة (src.static_assets.build_assets): ترتيب الاعتماديات والمراجع النسبية"""
+
+import pytest
+
+from src.static_assets import build_assets
+
+
+def _write(folder, files):
+    for name, content in files.items():
+        path = folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content if isinstance(content, bytes) else content.encode())
+
+
+def _built(build, manifest, name):
+    return (build / manifest['assets'][name]['file']).read_text()
+
+
+FILES = {
+    'index.html': '<link href="/css/app.css" rel="stylesheet"><script src="js/app.js?v=1"></script>',
+    'css/app.css': "@import './theme.css'; body { background: url(../img/logo.png); }",
+    'css/theme.css': 'h1 { color: red; }',
+    'js/app.js': "import { a } from './util.js';",
+    'js/util.js': "export const a = '../img/logo.png';",
+    'img/logo.png': b'\x89PNG logo',
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    _write(tmp_path / 'static', FILES)
+    return tmp_path / 'static', tmp_path / 'build'
+
+
+def test_relative_and_absolute_references(tree):
+    source, build = tree
+    manifest = build_assets(str(source), str(build), encodings=['gzip'])
+    files = {name: entry['file'] for name, entry in manifest['assets'].items()}
+    base = {name: file.rpartition('/')[2] for name, file in files.items()}
+
+    assert files['index.html'] == 'index.html'
+    assert _built(build, manifest, 'index.html') == (
+        f'<link href="/{files["css/app.css"]}" rel="stylesheet"><script src="{files["js/app.js"]}?v=1"></script>')
+    assert _built(build, manifest, 'css/app.css') == (
+        f"@import './{base['css/theme.css']}'; body {{ background: url(../img/{base['img/logo.png']}); }}")
+    assert _built(build, manifest, 'js/app.js') == f"import {{ a }} from './{base['js/util.js']}';"
+    assert _built(build, manifest, 'js/util.js') == f"export const a = '../img/{base['img/logo.png']}';"
+
+
+def test_fingerprint_follows_dependencies(tree, tmp_path):
+    """تغيير الصورة يغير بصمة util.js ثم app.js الذي يستورده، ولا يمس theme.css"""
+    source, build = tree
+    before = build_assets(str(source), str(build), encodings=[])['assets']
+    (source / 'img' / 'logo.png').write_bytes(b'\x89PNG other')
+    after = build_assets(str(source), str(build), encodings=[])['assets']
+
+    for name in ('img/logo.png', 'js/util.js', 'js/app.js', 'css/app.css'):
+        assert before[name]['file'] != after[name]['file'], name
+    assert before['css/theme.css']['file'] == after['css/theme.css']['file']
+
+
+def test_cycle_keeps_logical_name(tmp_path):
+    _write(tmp_path / 'static', {
+        'index.html': '<script src="a.js"></script>',
+        'a.js': "import './b.js'; import './c.js';",
+        'b.js': "import './a.js';",
+        'c.js': 'export {};',
+    })
+    build = tmp_path / 'build'
+    manifest = build_assets(str(tmp_path / 'static'), str(build), encodings=[])
+    files = {name: entry['file'] for name, entry in manifest['assets'].items()}
+
+    # a.js يُثبّت فتنكسر الحلقة، وb.js وc.js يأخذان بصمة
+    assert files['a.js'] == 'a.js'
+    assert files['b.js'] != 'b.js' and files['c.js'] != 'c.js'
+    assert _built(build, manifest, 'a.js') == f"import './{files['b.js']}'; import './{files['c.js']}';"
+    assert _built(build, manifest, 'b.js') == "import './a.js';"
+    assert _built(build, manifest, 'index.html') == '<script src="a.js"></script>'
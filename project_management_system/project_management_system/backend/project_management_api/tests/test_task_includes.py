@@ -0,0 +1,111 @@
+"""include= على المهام (src.services.task_includes)"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from src.models.project import Project
+from src.models.task import Comment, Dependency, Task
+from src.models.user import User, db
+from tests.conftest import register
+
+INCLUDE = 'comments,attachments,dependencies,subtasks,users'
+
+
+def _project(app, owner_id, size):
+    """مشروع بـ size مهمة: لكل مهمة تعليق من مستخدم مختلف ومهمة فرعية، والمهام سلسلة تبعيات"""
+    with app.app_context():
+        project = Project(name=f'P{size}', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+                          owner_id=owner_id)
+        db.session.add(project)
+        db.session.flush()
+        tasks = []
+        for i in range(size):
+            author = User(username=f'author{size}_{i}', email=f'author{size}_{i}@example.com', password_hash='x')
+            task = Task(project_id=project.id, name=f'T{i}', start_date=date(2026, 1, 1),
+                        end_date=date(2026, 1, 5), assigned_to=owner_id)
+            db.session.add_all([author, task])
+            db.session.flush()
+            db.session.add_all([
+                Comment(task_id=task.id, user_id=author.id, content='c'),
+                Task(project_id=project.id, parent_task_id=task.id, name=f'S{i}', start_date=date(2026, 1, 1),
+                     end_date=date(2026, 1, 2), assigned_to=author.id),
+            ])
+            if tasks:
+                db.session.add(Dependency(predecessor_task_id=tasks[-1], successor_task_id=task.id))
+            tasks.append(task.id)
+        db.session.commit()
+        return project.id, tasks
+
+
+def _select_count(app, client, path, headers):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+def test_query_count_is_constant(app):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    small, _ = _project(app, owner_id, 2)
+    large, _ = _project(app, owner_id, 8)
+
+    small_count, small_document = _select_count(app, client, f'/api/projects/{small}/tasks?include={INCLUDE}', headers)
+    large_count, large_document = _select_count(app, client, f'/api/projects/{large}/tasks?include={INCLUDE}', headers)
+    assert small_count == large_count
+    assert len(large_document['data']) == 16
+    # المالك ومؤلفو التعليقات مرة واحدة لكل منهم
+    assert len(large_document['included']['users']) == 9
+
+
+def test_single_task_document(app):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    _, tasks = _project(app, owner_id, 3)
+
+    response = client.get(f'/api/tasks/{tasks[1]}?include=comments,dependencies,subtasks,users', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    document = response.get_json()
+    task = document['data']
+    assert task['id'] == tasks[1]
+    assert [comment['content'] for comment in task['comments']] == ['c']
+    assert [dependency['predecessor_task_id'] for dependency in task['dependencies']['predecessors']] == [tasks[0]]
+    assert [dependency['successor_task_id'] for dependency in task['dependencies']['successors']] == [tasks[2]]
+    assert [subtask['name'] for subtask in task['subtasks']] == ['S1']
+    assert 'attachments' not in task
+    assert sorted(user['username'] for user in document['included']['users']) == ['author3_1', 'owner']
+
+
+def test_without_include(app):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    project_id, tasks = _project(app, owner_id, 1)
+
+    body = client.get(f'/api/projects/{project_id}/tasks', headers=headers).get_json()
+    assert isinstance(body, list) and 'comments' not in body[0]
+    body = client.get(f'/api/projects/{project_id}/tasks?include=comments', headers=headers).get_json()
+    assert body['included'] == {}
+
+
+@pytest.mark.parametrize('value', ['bogus', 'comments,owner'])
+def test_unknown_include(app, value):
+    client = app.test_client()
+    owner_id, headers = register(client, 'owner')
+    project_id, tasks = _project(app, owner_id, 1)
+
+    response = client.get(f'/api/projects/{project_id}/tasks?include={value}', headers=headers)
+    assert response.status_code == 400
+    assert client.get(f'/api/tasks/{tasks[0]}?include={value}', headers=headers).status_code == 400
@@ -0,0 +1,48 @@
+"""تعديل المهام عبر PUT /tasks/<id> في المسارين: العبارة الواحدة (src.services.task_writes) وORM"""
+
+import pytest
+
+from tests.conftest import create_project, register
+
+pytestmark = pytest.mark.parametrize('app', [{'TASK_FAST_WRITES': True}, {'TASK_FAST_WRITES': False}],
+                                     indirect=True, ids=['fast', 'orm'])
+
+
+@pytest.fixture
+def task(app):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    response = client.post(f'/api/projects/{project_id}/tasks', headers=headers,
+                           json={'name': 'T', 'start_date': '2026-01-01', 'end_date': '2026-01-05'})
+    return client, headers, response.get_json()
+
+
+def test_update_bumps_version(task):
+    client, headers, created = task
+    response = client.put(f"/api/tasks/{created['id']}", headers={**headers, 'If-Match': '"1"'},
+                          json={'name': 'T2'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+    response = client.put(f"/api/tasks/{created['id']}", headers={**headers, 'If-Match': '"1"'},
+                          json={'name': 'T3'})
+    assert response.status_code == 412
+
+
+@pytest.mark.parametrize('body', [{}, {'name': 'T', 'start_date': '2026-01-01', 'status': 'not_started'}])
+def test_noop_update_keeps_version(task, body):
+    client, headers, created = task
+    response = client.put(f"/api/tasks/{created['id']}", headers={**headers, 'If-Match': '"1"'}, json=body)
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 1
+    assert response.get_json()['updated_at'] == created['updated_at']
+    assert response.headers['ETag'] == '"1"'
+
+
+def test_noop_update_checks_access(app, task):
+    client, _, created = task
+    _, other = register(client, 'b')
+    response = client.put(f"/api/tasks/{created['id']}", headers=other, json={})
+    assert response.status_code == 403
@@ -0,0 +1,203 @@
+"""قواعد المؤسسات (src.tenancy): التسجيل بدعوة، والنقل، وتغطية النسخ الاحتياطي والتذكيرات"""
+
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import src.backup
+from src.models.tenant import Tenant
+from src.models.user import db
+from src.tenancy import create_invite, create_tenant, move_tenant
+from tests.conftest import create_project
+
+TENANCY = {'TENANCY_ENABLED': True, 'TENANT_DIRECTORY_TTL': 0, 'ACTIVITY_FLUSH_INTERVAL': 0}
+MOVE = {**TENANCY, 'TENANT_MOVE_JOB_TIMEOUT': 5, 'JOB_INLINE_WORKERS': 0}
+
+
+def _register(app, client, username, tenant='acme', email=None):
+    """تسجيل مستخدم في المؤسسة بدعوة؛ يعيد الاستجابة"""
+    email = email or f'{username}@example.com'
+    with app.app_context():
+        invite = create_invite(tenant, email)
+    return client.post('/api/auth/register', json={
+        'username': username, 'email': email, 'password': 'password', 'invite': invite,
+    })
+
+
+@pytest.fixture
+def tenant_app(app, tmp_path):
+    app.config['TENANT_DATABASE_DIR'] = str(tmp_path / 'shards')
+    with app.app_context():
+        create_tenant('acme', 'Acme')
+    client = app.test_client()
+    response = _register(app, client, 'a')
+    assert response.status_code == 201, response.get_json()
+    create_project(client, {'Authorization': f"Bearer {response.get_json()['access_token']}"})
+    return app
+
+
+def _shard(app):
+    with app.app_context():
+        tenant = db.session.get(Tenant, 'acme')
+        return tenant.shard, tenant.status
+
+
+def _running_job(path, lease):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO job (id, name, status, priority, attempts, max_attempts, run_at, locked_until) "
+                 "VALUES ('j1', 'x', 'running', 0, 1, 5, 0, ?)", (time.time() + lease,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize('app', [MOVE], indirect=True)
+def test_move_waits_for_running_jobs(tenant_app, tmp_path):
+    source, _ = _shard(tenant_app)
+    _running_job(source, 60)
+
+    def finish():
+        time.sleep(0.5)
+        conn = sqlite3.connect(source)
+        conn.execute("UPDATE job SET status = 'succeeded', locked_until = NULL WHERE id = 'j1'")
+        conn.commit()
+        conn.close()
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    started = time.monotonic()
+    with tenant_app.app_context():
+        move_tenant('acme', str(tmp_path / 'moved.db'))
+    thread.join()
+    assert time.monotonic() - started >= 0.5
+    assert _shard(tenant_app) == (str(tmp_path / 'moved.db'), 'active')
+
+    # حالة المهمة بعد انتهائها منسوخة إلى الملف الجديد
+    conn = sqlite3.connect(str(tmp_path / 'moved.db'))
+    assert conn.execute("SELECT status FROM job WHERE id = 'j1'").fetchone()[0] == 'succeeded'
+    conn.close()
+
+
+@pytest.mark.parametrize('app', [{**MOVE, 'TENANT_MOVE_JOB_TIMEOUT': 0.2}], indirect=True)
+def test_move_aborts_when_jobs_do_not_finish(tenant_app, tmp_path):
+    source, _ = _shard(tenant_app)
+    _running_job(source, 60)
+    with tenant_app.app_context(), pytest.raises(ValueError, match='مهمة جارية'):
+        move_tenant('acme', str(tmp_path / 'moved.db'))
+    assert _shard(tenant_app) == (source, 'active')
+    assert not (tmp_path / 'moved.db').exists()
+
+
+@pytest.mark.parametrize('app', [MOVE], indirect=True)
+def test_move_ignores_expired_lease(tenant_app, tmp_path):
+    source, _ = _shard(tenant_app)
+    _running_job(source, -1)
+    with tenant_app.app_context():
+        move_tenant('acme', str(tmp_path / 'moved.db'))
+    assert _shard(tenant_app)[0] == str(tmp_path / 'moved.db')
+
+
+@pytest.mark.parametrize('app', [MOVE], indirect=True)
+def test_move_aborts_on_write_after_copy(tenant_app, tmp_path, monkeypatch):
+    """تعديل لا يغير عدد الصفوف في الملف القديم بعد النسخ يلغي النقل"""
+    source, _ = _shard(tenant_app)
+    copy = src.backup.online_copy
+
+    def copy_then_write(source_path, target_path, **kwargs):
+        copy(source_path, target_path, **kwargs)
+        conn = sqlite3.connect(source_path)
+        conn.execute("UPDATE project SET name = 'late'")
+        conn.commit()
+        conn.close()
+
+    monkeypatch.setattr(src.backup, 'online_copy', copy_then_write)
+    with tenant_app.app_context(), pytest.raises(ValueError, match='أثناء النقل'):
+        move_tenant('acme', str(tmp_path / 'moved.db'))
+    assert _shard(tenant_app) == (source, 'active')
+    assert not (tmp_path / 'moved.db').exists()
+
+
+def _users(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute('SELECT username FROM user ORDER BY username')]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('app', [TENANCY], indirect=True)
+def test_register_with_tenant_header_requires_invite(tenant_app):
+    client = tenant_app.test_client()
+    response = client.post('/api/auth/register', headers={'X-Tenant': 'acme'}, json={
+        'username': 'intruder', 'email': 'intruder@example.com', 'password': 'password',
+    })
+    assert response.status_code == 403
+    assert _users(_shard(tenant_app)[0]) == ['a']
+
+
+@pytest.mark.parametrize('app', [TENANCY], indirect=True)
+def test_register_rejects_bad_invites(tenant_app):
+    client = tenant_app.test_client()
+    # دعوة لبريد آخر
+    with tenant_app.app_context():
+        invite = create_invite('acme', 'bob@example.com')
+    response = client.post('/api/auth/register', json={
+        'username': 'eve', 'email': 'eve@example.com', 'password': 'password', 'invite': invite,
+    })
+    assert response.status_code == 403
+    # توقيع مزور
+    response = client.post('/api/auth/register', json={
+        'username': 'eve', 'email': 'bob@example.com', 'password': 'password', 'invite': invite[:-2] + 'xx',
+    })
+    assert response.status_code == 403
+    assert _users(_shard(tenant_app)[0]) == ['a']
+
+
+@pytest.mark.parametrize('app', [TENANCY], indirect=True)
+def test_invited_user_registers_and_logs_in_with_header(tenant_app):
+    client = tenant_app.test_client()
+    response = _register(tenant_app, client, 'bob', email='Bob@Example.com')
+    assert response.status_code == 201, response.get_json()
+    assert _users(_shard(tenant_app)[0]) == ['a', 'bob']
+
+    response = client.post('/api/auth/login', headers={'X-Tenant': 'acme'},
+                           json={'username': 'bob', 'password': 'password'})
+    assert response.status_code == 200
+    # بدون الترويسة يبحث تسجيل الدخول في القاعدة الافتراضية
+    assert client.post('/api/auth/login', json={'username': 'bob', 'password': 'password'}).status_code == 401
+
+
+@pytest.mark.parametrize('app', [TENANCY], indirect=True)
+def test_backup_create_covers_tenants(tenant_app, tmp_path):
+    tenant_app.config['BACKUP_DIR'] = str(tmp_path / 'backups')
+    runner = tenant_app.test_cli_runner()
+    result = runner.invoke(args=['backup', 'create'])
+    assert result.exit_code == 0, result.output
+    assert 'app:' in result.output and 'tenant-acme:' in result.output
+
+    result = runner.invoke(args=['backup', 'list', '--tenant', 'acme'])
+    assert result.exit_code == 0, result.output
+    assert 'full' in result.output
+    assert runner.invoke(args=['backup', 'list', '--tenant', 'nope']).exit_code != 0
+
+
+@pytest.mark.parametrize('app', [TENANCY], indirect=True)
+def test_reminders_cover_tenants(tenant_app):
+    from src.services.reminders import run_all_due_reminders
+
+    source, _ = _shard(tenant_app)
+    conn = sqlite3.connect(source)
+    user_id = conn.execute("SELECT id FROM user WHERE username = 'a'").fetchone()[0]
+    project_id = conn.execute('SELECT id FROM project').fetchone()[0]
+    due = (date.today() + timedelta(days=1)).isoformat()
+    conn.execute("INSERT INTO task (id, project_id, name, start_date, end_date, status, assigned_to) "
+                 "VALUES ('t1', ?, 'T', ?, ?, 'in_progress', ?)", (project_id, due, due, user_id))
+    conn.commit()
+
+    with tenant_app.app_context():
+        assert run_all_due_reminders() == {None: 0, 'acme': 1}
+        assert run_all_due_reminders() == {None: 0, 'acme': 0}
+    assert conn.execute("SELECT COUNT(*) FROM notification WHERE type = 'task_due'").fetchone()[0] == 1
+    conn.close()
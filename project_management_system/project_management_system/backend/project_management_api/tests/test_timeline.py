@@ -0,0 +1,70 @@
+"""مخطط جانت المجمّع (src.services.timeline): شريط لكل مهمة جذر مهما كان عمق الشجرة"""
+
+import pytest
+
+from tests.conftest import create_project, register
+
+
+def _task(client, headers, project_id, name, start, end, parent=None):
+    response = client.post(f'/api/projects/{project_id}/tasks', headers=headers, json={
+        'name': name, 'start_date': start, 'end_date': end, 'parent_task_id': parent,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+@pytest.fixture
+def plan(app):
+    client = app.test_client()
+    _, headers = register(client, 'a')
+    project_id = create_project(client, headers)
+    root = _task(client, headers, project_id, 'R', '2026-01-01', '2026-01-31')
+    middle = _task(client, headers, project_id, 'M', '2026-01-05', '2026-01-20', root)
+    leaf = _task(client, headers, project_id, 'L', '2026-01-10', '2026-01-15', middle)
+    other = _task(client, headers, project_id, 'R2', '2026-02-01', '2026-02-10')
+    other_child = _task(client, headers, project_id, 'C2', '2026-02-02', '2026-02-05', other)
+    _task(client, headers, project_id, 'I', '2026-01-03', '2026-01-04')
+    client.put(f'/api/tasks/{leaf}', headers=headers, json={'status': 'completed'})
+    response = client.post(f'/api/tasks/{other_child}/dependencies', headers=headers,
+                           json={'predecessor_task_id': leaf})
+    assert response.status_code == 201, response.get_json()
+
+    def timeline(zoom, start='2026-01-01', end='2026-03-31'):
+        response = client.get(f'/api/projects/{project_id}/timeline?from={start}&to={end}&zoom={zoom}',
+                              headers=headers)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    return timeline, {'root': root, 'middle': middle, 'leaf': leaf, 'other': other}
+
+
+def test_groups_by_root_ancestor(plan):
+    timeline, ids = plan
+    body = timeline('month')
+    bars = {bar['id']: bar for bar in body['tasks']}
+
+    # M ليست شريطاً مستقلاً: R وM وL في شريط R وحده
+    assert set(bars) == {ids['root'], ids['other'], 'period:2026-01'}
+    assert sum(bar['task_count'] for bar in bars.values()) == 6
+    assert bars[ids['root']]['task_count'] == 3
+    assert bars[ids['root']]['progress'] == 0.33
+    assert (bars[ids['root']]['start_date'], bars[ids['root']]['end_date']) == ('2026-01-01', '2026-01-31')
+    assert bars[ids['other']]['task_count'] == 2
+    assert bars['period:2026-01']['task_count'] == 1
+    assert body['dependencies'] == [{'predecessor_task_id': ids['root'], 'successor_task_id': ids['other'],
+                                     'type': 'finish_to_start'}]
+
+
+def test_quarter_period(plan):
+    timeline, ids = plan
+    assert {bar['id'] for bar in timeline('quarter')['tasks']} == {ids['root'], ids['other'], 'period:2026-Q1'}
+
+
+def test_window_limits_bars(plan):
+    timeline, ids = plan
+    body = timeline('month', '2026-01-10', '2026-01-12')
+    assert [(bar['id'], bar['task_count']) for bar in body['tasks']] == [(ids['root'], 3)]
+    assert body['dependencies'] == []
+
+    # مستوى day يعيد كل مهمة ظاهرة كما هي
+    assert {task['name'] for task in timeline('day', '2026-01-10', '2026-01-12')['tasks']} == {'R', 'M', 'L'}
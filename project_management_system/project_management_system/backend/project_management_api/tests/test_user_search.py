@@ -0,0 +1,105 @@
+"""بحث دليل المستخدمين GET /users (src.services.user_search)"""
+
+from datetime import date
+
+import pytest
+
+from src.models.project import Project, ProjectMember
+from src.models.user import User, db
+from tests.conftest import register
+
+
+@pytest.fixture
+def directory(app):
+    """المستخدم الحالي يملك مشروعاً فيه أعضاء، وعضو في مشروع آخر؛ وغرباء بنفس البادئات"""
+    client = app.test_client()
+    me, headers = register(client, 'me')
+    with app.app_context():
+        users = {name: User(username=name, email=f'{name.lower()}@example.com', password_hash='x')
+                 for name in ('Ahmed', 'ahmad', 'Amal', 'Basma', 'boss', 'Ahlam_stranger', 'zed')}
+        db.session.add_all(users.values())
+        db.session.flush()
+        mine = Project(name='mine', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), owner_id=me)
+        theirs = Project(name='theirs', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+                         owner_id=users['boss'].id)
+        db.session.add_all([mine, theirs])
+        db.session.flush()
+        db.session.add_all([ProjectMember(project_id=mine.id, user_id=users[name].id, role='member')
+                            for name in ('Ahmed', 'ahmad', 'Amal')])
+        db.session.add_all([ProjectMember(project_id=theirs.id, user_id=user_id, role='member')
+                            for user_id in (me, users['Basma'].id)])
+        db.session.commit()
+        ids = {name: user.id for name, user in users.items()}
+    return client, headers, ids
+
+
+def _names(response):
+    assert response.status_code == 200, response.get_json()
+    return [user['username'] for user in response.get_json()['users']]
+
+
+def test_scope_without_query(directory):
+    client, headers, _ = directory
+    # المستخدم نفسه وأعضاء مشاريعه ومالكوها، لا الغرباء
+    assert _names(client.get('/api/users', headers=headers)) == ['ahmad', 'Ahmed', 'Amal', 'Basma', 'boss', 'me']
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('ah', ['ahmad', 'Ahmed']),
+    ('AH', ['ahmad', 'Ahmed']),
+    ('  Ahm ', ['ahmad', 'Ahmed']),
+    ('a', ['ahmad', 'Ahmed', 'Amal']),
+    # البريد الإلكتروني أيضاً
+    ('basma@', ['Basma']),
+    ('ahl', []),
+    ('zed', []),
+])
+def test_prefix(directory, query, expected):
+    client, headers, _ = directory
+    assert _names(client.get('/api/users', headers=headers, query_string={'q': query})) == expected
+
+
+def test_cursor_pages(directory):
+    client, headers, _ = directory
+    pages, cursor = [], None
+    while True:
+        query = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get('/api/users', headers=headers, query_string=query).get_json()
+        pages.append([user['username'] for user in body['users']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert pages == [['ahmad', 'Ahmed'], ['Amal', 'Basma'], ['boss', 'me']]
+
+
+def test_cursor_with_prefix(directory):
+    client, headers, ids = directory
+    body = client.get('/api/users', headers=headers, query_string={'q': 'a', 'limit': 1}).get_json()
+    assert [user['username'] for user in body['users']] == ['ahmad']
+    assert body['next_cursor'] == ids['ahmad']
+    body = client.get('/api/users', headers=headers,
+                      query_string={'q': 'a', 'limit': 5, 'cursor': body['next_cursor']}).get_json()
+    assert [user['username'] for user in body['users']] == ['Ahmed', 'Amal']
+    assert body['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', [{'limit': 0}, {'limit': 51}, {'limit': 'x'}, {'cursor': 'missing'}])
+def test_invalid_parameters(directory, query):
+    client, headers, _ = directory
+    assert client.get('/api/users', headers=headers, query_string=query).status_code == 400
+
+
+def test_new_member_visible_after_commit(directory):
+    client, headers, ids = directory
+    assert _names(client.get('/api/users', headers=headers, query_string={'q': 'z'})) == []
+    projects = client.get('/api/projects', headers=headers).get_json()
+    mine = next(project['id'] for project in projects if project['name'] == 'mine')
+    client.post(f'/api/projects/{mine}/members', headers=headers, json={'user_id': ids['zed']})
+    # ذاكرة البادئات تُفرغ بعد الالتزام
+    assert _names(client.get('/api/users', headers=headers, query_string={'q': 'z'})) == ['zed']
+
+
+def test_get_user_scope(directory):
+    client, headers, ids = directory
+    assert client.get(f"/api/users/{ids['boss']}", headers=headers).status_code == 200
+    assert client.get(f"/api/users/{ids['Ahlam_stranger']}", headers=headers).status_code == 404
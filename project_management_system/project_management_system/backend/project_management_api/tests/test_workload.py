@@ -0,0 +1,106 @@
+"""حمل العمل (src.services.workload) وصلاحية GET /users/<id>/workload"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user import db
+from src.routes.workload import _shares_project
+from src.services.workload import bucketize, sweep
+from tests.conftest import create_project, register
+
+
+def test_sweep_counts_overlaps():
+    start, end = date(2026, 1, 1), date(2026, 1, 10)
+    intervals = [
+        (date(2026, 1, 2), date(2026, 1, 4)),
+        (date(2026, 1, 4), date(2026, 1, 6)),
+        # ملاصقة: تبدأ في اليوم التالي لنهاية السابقة
+        (date(2026, 1, 7), date(2026, 1, 7)),
+        # تُقص على النطاق
+        (date(2025, 12, 1), date(2026, 1, 1)),
+        (date(2026, 1, 9), date(2026, 2, 1)),
+        # خارج النطاق
+        (date(2026, 2, 1), date(2026, 2, 3)),
+    ]
+    assert sweep(intervals, start, end) == [
+        (date(2026, 1, 1), date(2026, 1, 1), 1),
+        (date(2026, 1, 2), date(2026, 1, 3), 1),
+        (date(2026, 1, 4), date(2026, 1, 4), 2),
+        (date(2026, 1, 5), date(2026, 1, 6), 1),
+        (date(2026, 1, 7), date(2026, 1, 7), 1),
+        (date(2026, 1, 8), date(2026, 1, 8), 0),
+        (date(2026, 1, 9), date(2026, 1, 10), 1),
+    ]
+
+
+def test_sweep_without_tasks():
+    start, end = date(2026, 1, 1), date(2026, 1, 3)
+    assert sweep([], start, end) == [(start, end, 0)]
+
+
+def test_week_buckets_are_clipped_to_range():
+    # الأربعاء 2026-01-07 إلى الثلاثاء 2026-01-13: أسبوع مقصوص ثم الاثنين والثلاثاء
+    start, end = date(2026, 1, 7), date(2026, 1, 13)
+    segments = sweep([(date(2026, 1, 9), date(2026, 1, 12)), (date(2026, 1, 11), date(2026, 1, 11))], start, end)
+    assert bucketize(segments, start, end, 'week') == [
+        {'start': '2026-01-07', 'end': '2026-01-11', 'peak': 2, 'average': 0.8},
+        {'start': '2026-01-12', 'end': '2026-01-13', 'peak': 1, 'average': 0.5},
+    ]
+
+
+def test_day_buckets():
+    start, end = date(2026, 1, 1), date(2026, 1, 3)
+    segments = sweep([(date(2026, 1, 2), date(2026, 1, 5))], start, end)
+    assert [(bucket['start'], bucket['peak']) for bucket in bucketize(segments, start, end, 'day')] == [
+        ('2026-01-01', 0), ('2026-01-02', 1), ('2026-01-03', 1),
+    ]
+
+
+@pytest.fixture
+def team(app):
+    client = app.test_client()
+    users = {name: register(client, name) for name in ('owner', 'member', 'other_member', 'stranger')}
+    project_id = create_project(client, users['owner'][1])
+    for name in ('member', 'other_member'):
+        client.post(f'/api/projects/{project_id}/members', headers=users['owner'][1],
+                    json={'user_id': users[name][0]})
+    return client, users
+
+
+@pytest.mark.parametrize('viewer, subject, status', [
+    ('stranger', 'stranger', 200),
+    ('member', 'owner', 200),
+    ('owner', 'member', 200),
+    ('member', 'other_member', 200),
+    ('stranger', 'owner', 403),
+    ('owner', 'stranger', 403),
+])
+def test_workload_access(team, viewer, subject, status):
+    client, users = team
+    response = client.get(f'/api/users/{users[subject][0]}/workload?from=2026-01-01&to=2026-01-07',
+                          headers=users[viewer][1])
+    assert response.status_code == status, response.get_json()
+
+
+def test_workload_unknown_user(team):
+    client, users = team
+    response = client.get('/api/users/missing/workload', headers=users['owner'][1])
+    assert response.status_code == 404
+
+
+def test_shares_project_is_one_query(app, team):
+    _, users = team
+    statements = []
+    with app.app_context():
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            assert _shares_project(users['member'][0], users['other_member'][0])
+            assert not _shares_project(users['member'][0], users['stranger'][0])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+    assert len(statements) == 2